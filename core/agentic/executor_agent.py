@@ -1,18 +1,34 @@
 import json
 import logging
 import re
+import threading
 import time
-from typing import Any, Dict, List, Optional, Set
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from core.agentic.base import BaseLLMAgent
 from core.agentic.json_mixin import JSONParseMixin
 from core.protocols import ExecutorRunResult
-from core.tools import ToolContext, build_default_registry
+from core.tools import ToolContext, ToolResult, build_default_registry
 from core.utils import elapsed_ms, log_event, log_exception
 from core.utils.errors import ErrorCode, error_payload
 
 logger = logging.getLogger(__name__)
 
+TOOL_POOL_WORKERS = 8
+_tool_pool: Optional[ThreadPoolExecutor] = None
+_tool_pool_lock = threading.Lock()
+
+
+def _shared_tool_pool() -> ThreadPoolExecutor:
+    """同轮工具调用的共享线程池（进程级、懒创建），与步骤池分开，避免步骤等待工具时互相占满。"""
+    global _tool_pool
+    with _tool_pool_lock:
+        if _tool_pool is None:
+            _tool_pool = ThreadPoolExecutor(max_workers=TOOL_POOL_WORKERS, thread_name_prefix="executor-tool")
+        return _tool_pool
+
 
 class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
     """Task executor agent: unified ReAct loop with function-calling."""
@@ -21,8 +37,15 @@ class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
     STATUS_FAILED = "失败"
     STATUS_NEED_INFO = "需补充信息"
     _FILE_EXT_PATTERN = re.compile(r"\.(pdf|md|txt|json|ya?ml|csv|log|py)\b", re.IGNORECASE)
+    # 同一轮内最多并行执行的工具调用数；1 表示退回逐个串行执行。
+    max_parallel_tool_calls = 4
 
-    def __init__(self, max_tool_rounds: int = 4, max_repeated_tool_call: int = 2):
+    def __init__(
+        self,
+        max_tool_rounds: int = 4,
+        max_repeated_tool_call: int = 2,
+        max_parallel_tool_calls: int = 4,
+    ):
         super().__init__(
             missing_key_message="Missing LLM API key for executor agent",
             missing_key_field="chat_api_key",
@@ -30,6 +53,7 @@ class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
         )
         self.max_tool_rounds = max(int(max_tool_rounds), 1)
         self.max_repeated_tool_call = max(int(max_repeated_tool_call), 1)
+        self.max_parallel_tool_calls = max(int(max_parallel_tool_calls), 1)
         self.registry = build_default_registry()
 
     def _system_prompt(self) -> str:
@@ -335,6 +359,7 @@ class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
         tool_ms: int,
         duration_ms: int,
         status: str,
+        tool_wall_ms: int = 0,
     ) -> None:
         log_event(
             logger,
@@ -349,9 +374,56 @@ class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
             llm_ms=llm_ms,
             tool_calls=tool_calls,
             tool_ms=tool_ms,
+            tool_wall_ms=tool_wall_ms,
             duration_ms=duration_ms,
         )
 
+    def _tool_parallel_safe(self, tool_name: str) -> bool:
+        checker = getattr(self.registry, "is_parallel_safe", None)
+        return bool(checker(tool_name)) if callable(checker) else True
+
+    def _timed_tool_call(self, tool_name: str, tool_args: Dict[str, Any], ctx: ToolContext) -> Tuple[ToolResult, int]:
+        started = time.perf_counter()
+        result = self.registry.call(tool_name, tool_args, ctx)
+        return result, elapsed_ms(started)
+
+    def _execute_tool_calls(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        ctx: ToolContext,
+    ) -> List[Tuple[ToolResult, int]]:
+        """
+        执行同一轮的多个工具调用，结果按原调用顺序返回。
+
+        相邻的可并行调用成组并发执行（每组最多 max_parallel_tool_calls 个，组内第一个在当前线程执行）；
+        不可并行的调用（写文件等）作为屏障单独执行，保证它与前后调用的先后顺序不变。
+        同一工具的并发上限由 ToolRegistry 按工具声明的 max_concurrency 控制。
+        """
+        results: List[Optional[Tuple[ToolResult, int]]] = [None] * len(calls)
+        group: List[int] = []
+
+        def _flush() -> None:
+            width = max(int(self.max_parallel_tool_calls), 1)
+            for offset in range(0, len(group), width):
+                chunk = group[offset : offset + width]
+                futures = [
+                    (idx, _shared_tool_pool().submit(copy_context().run, self._timed_tool_call, *calls[idx], ctx))
+                    for idx in chunk[1:]
+                ]
+                results[chunk[0]] = self._timed_tool_call(*calls[chunk[0]], ctx)
+                for idx, future in futures:
+                    results[idx] = future.result()
+            group.clear()
+
+        for idx, (tool_name, _) in enumerate(calls):
+            if self._tool_parallel_safe(tool_name):
+                group.append(idx)
+                continue
+            _flush()
+            results[idx] = self._timed_tool_call(*calls[idx], ctx)
+        _flush()
+        return [item for item in results if item is not None]
+
     def _run_react_loop(
         self,
         *,
@@ -390,6 +462,7 @@ class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
         llm_ms_total = 0
         tool_calls_total = 0
         tool_ms_total = 0
+        tool_wall_ms_total = 0
 
         # ReAct 状态机：
         # DECIDE(模型决策) -> ACT(执行工具) -> OBSERVE(回填工具结果) -> DECIDE ...
@@ -413,7 +486,7 @@ class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
             tool_calls = list(getattr(msg, "tool_calls", None) or [])
 
             if tool_calls:
-                # 先把 assistant 的 tool_calls 消息写入上下文，再逐个执行工具并写回 observation。
+                # 先把 assistant 的 tool_calls 消息写入上下文，再执行工具并写回 observation。
                 messages.append(
                     {
                         "role": "assistant",
@@ -421,35 +494,25 @@ class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
                         "tool_calls": [self._serialize_tool_call(tc) for tc in tool_calls],
                     }
                 )
+                # 先按原顺序做重复调用检测：超限调用之前的调用照常执行并回填，之后返回循环错误。
+                planned: List[Tuple[Any, str, Dict[str, Any]]] = []
+                loop_detected = False
                 for tc in tool_calls:
                     tool_name = self._tool_call_name(tc)
                     tool_args = self._parse_tool_args(tc)
                     signature = self._tool_call_signature(tool_name, tool_args)
                     repeated_call_counter[signature] = repeated_call_counter.get(signature, 0) + 1
                     if repeated_call_counter[signature] > self.max_repeated_tool_call:
-                        self._log_step_perf(
-                            ok=False,
-                            rounds=rounds_used,
-                            llm_calls=llm_calls,
-                            llm_ms=llm_ms_total,
-                            tool_calls=tool_calls_total,
-                            tool_ms=tool_ms_total,
-                            duration_ms=elapsed_ms(step_started),
-                            status="loop_detected",
-                        )
-                        return ExecutorRunResult(
-                            output_text="任务执行陷入重复工具调用，请用户补充更具体约束。",
-                            tool_events=tool_events,
-                            error=error_payload(
-                                code=ErrorCode.TOOL_EXECUTION_ERROR,
-                                message="Executor tool call loop detected",
-                                retryable=True,
-                            ),
-                        )
-
-                    tool_started = time.perf_counter()
-                    result = self.registry.call(tool_name, tool_args, ctx)
-                    tool_duration_ms = elapsed_ms(tool_started)
+                        loop_detected = True
+                        break
+                    planned.append((tc, tool_name, tool_args))
+
+                # 同轮相互独立的调用并发执行，observation 仍按 tool_call_id 原顺序写回。
+                tools_started = time.perf_counter()
+                outcomes = self._execute_tool_calls([(name, args) for _, name, args in planned], ctx)
+                if planned:
+                    tool_wall_ms_total += elapsed_ms(tools_started)
+                for (tc, tool_name, tool_args), (result, tool_duration_ms) in zip(planned, outcomes):
                     tool_calls_total += 1
                     tool_ms_total += tool_duration_ms
                     event = {
@@ -466,6 +529,28 @@ class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
                             "content": result.to_model_text(),
                         }
                     )
+
+                if loop_detected:
+                    self._log_step_perf(
+                        ok=False,
+                        rounds=rounds_used,
+                        llm_calls=llm_calls,
+                        llm_ms=llm_ms_total,
+                        tool_calls=tool_calls_total,
+                        tool_ms=tool_ms_total,
+                        tool_wall_ms=tool_wall_ms_total,
+                        duration_ms=elapsed_ms(step_started),
+                        status="loop_detected",
+                    )
+                    return ExecutorRunResult(
+                        output_text="任务执行陷入重复工具调用，请用户补充更具体约束。",
+                        tool_events=tool_events,
+                        error=error_payload(
+                            code=ErrorCode.TOOL_EXECUTION_ERROR,
+                            message="Executor tool call loop detected",
+                            retryable=True,
+                        ),
+                    )
                 continue
 
             # 没有 tool_calls 时，若模型给出文本则作为最终可交付结果并统一规范化。
@@ -482,6 +567,7 @@ class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
                         llm_ms=llm_ms_total,
                         tool_calls=tool_calls_total,
                         tool_ms=tool_ms_total,
+                        tool_wall_ms=tool_wall_ms_total,
                         duration_ms=elapsed_ms(step_started),
                         status="missing_required_tool_evidence",
                     )
@@ -502,6 +588,7 @@ class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
                     llm_ms=llm_ms_total,
                     tool_calls=tool_calls_total,
                     tool_ms=tool_ms_total,
+                    tool_wall_ms=tool_wall_ms_total,
                     duration_ms=elapsed_ms(step_started),
                     status="success",
                 )
@@ -514,6 +601,7 @@ class ExecutorAgent(BaseLLMAgent, JSONParseMixin):
             llm_ms=llm_ms_total,
             tool_calls=tool_calls_total,
             tool_ms=tool_ms_total,
+            tool_wall_ms=tool_wall_ms_total,
             duration_ms=elapsed_ms(step_started),
             status="rounds_exceeded",
         )
@@ -49,6 +49,11 @@ class MemoryVectorConfig:
     embedding_api_url: str
     embedding_api_key: str
     vector_dim: int
+    embedding_cache_enabled: bool
+    embedding_cache_max_entries: int
+    vector_backend: str
+    vector_reduction: str
+    vector_reduced_dim: int
 
 
 @dataclass
@@ -56,6 +61,7 @@ class WebSearchConfig:
     timeout_sec: float
     max_top_k: int
     uapis: "UapiSearchConfig"
+    cache_ttl_sec: float = 300.0
 
 
 @dataclass
@@ -98,12 +104,30 @@ class LoggingConfig:
     slow_threshold_ms: int
     redact_user_text: bool
     user_text_preview_chars: int
+    # 文本日志 / 事件日志 / trace 的轮转阈值；0 表示不按该维度轮转。
+    rotate_max_bytes: int = 16 * 1024 * 1024
+    rotate_max_age_hours: float = 24.0
+    compress_rotated: bool = True
+
+
+RETENTION_CATEGORIES = ("sessions", "traces", "notes", "logs")
+
+
+@dataclass
+class RetentionConfig:
+    enable_scheduler: bool
+    sweep_interval_seconds: float
+    sweep_batch_size: int
+    # 类别（runtime 子目录名）-> 保留天数；<= 0 表示不过期。
+    keep_days: Dict[str, float]
 
 
 @dataclass
 class TaskFlowConfig:
     max_replan_rounds: int
     max_clarify_rounds: int
+    # 进程级步骤执行池大小，即全进程同时运行的执行器 LLM 循环上限。
+    step_pool_workers: int = 4
 
 
 @dataclass
@@ -115,6 +139,7 @@ class AppConfig:
     tools: ToolsConfig
     logging: LoggingConfig
     task_flow: TaskFlowConfig
+    retention: RetentionConfig
 
 
 def _load_json(path: Path) -> dict:
@@ -331,8 +356,62 @@ def _build_memory_vector_config(raw: Dict[str, Any], llm_raw: Dict[str, Any]) ->
             os.environ.get("LUMINA_VECTOR_DIM", mv.get("vector_dim", 1536)),
             "memory_vector.vector_dim",
         ),
+        embedding_cache_enabled=_to_bool(
+            os.environ.get("LUMINA_EMBEDDING_CACHE_ENABLED", mv.get("embedding_cache_enabled", True)),
+            "memory_vector.embedding_cache_enabled",
+        ),
+        embedding_cache_max_entries=_to_int(
+            mv.get("embedding_cache_max_entries", 200000),
+            "memory_vector.embedding_cache_max_entries",
+        ),
+        vector_backend=str(
+            os.environ.get("LUMINA_VECTOR_BACKEND", mv.get("vector_backend", "qdrant"))
+        ).strip().lower()
+        or "qdrant",
+        vector_reduction=str(mv.get("vector_reduction", "none")).strip().lower() or "none",
+        vector_reduced_dim=_to_int(mv.get("vector_reduced_dim", 0), "memory_vector.vector_reduced_dim"),
     )
 
+    if cfg.vector_backend not in {"qdrant", "flat", "flat_q8", "hnsw"}:
+        raise AppError(
+            ErrorCode.CONFIG_INVALID,
+            "Invalid memory_vector.vector_backend",
+            details={
+                "field": "memory_vector.vector_backend",
+                "value": cfg.vector_backend,
+                "allowed": ["qdrant", "flat", "flat_q8", "hnsw"],
+            },
+        )
+    if cfg.vector_reduction not in {"none", "truncate", "pca"}:
+        raise AppError(
+            ErrorCode.CONFIG_INVALID,
+            "Invalid memory_vector.vector_reduction",
+            details={
+                "field": "memory_vector.vector_reduction",
+                "value": cfg.vector_reduction,
+                "allowed": ["none", "truncate", "pca"],
+            },
+        )
+    if cfg.vector_reduction != "none" and not 0 < cfg.vector_reduced_dim < cfg.vector_dim:
+        raise AppError(
+            ErrorCode.CONFIG_INVALID,
+            "memory_vector.vector_reduced_dim must be in (0, vector_dim) when vector_reduction is set",
+            details={
+                "field": "memory_vector.vector_reduced_dim",
+                "value": cfg.vector_reduced_dim,
+                "vector_dim": cfg.vector_dim,
+            },
+        )
+    if cfg.embedding_cache_max_entries < 1:
+        raise AppError(
+            ErrorCode.CONFIG_INVALID,
+            "memory_vector.embedding_cache_max_entries must be >= 1",
+            details={
+                "field": "memory_vector.embedding_cache_max_entries",
+                "value": cfg.embedding_cache_max_entries,
+            },
+        )
+
     if cfg.enabled:
         required = {
             "memory_vector.embedding_model": cfg.embedding_model,
@@ -408,6 +487,7 @@ def _build_web_search_config(raw: Dict[str, Any]) -> WebSearchConfig:
 
     timeout_sec = _to_float(timeout_raw, "tools.web_search.timeout_sec")
     max_top_k = _to_int(max_top_k_raw, "tools.web_search.max_top_k")
+    cache_ttl_sec = _to_float(raw.get("cache_ttl_sec", 300), "tools.web_search.cache_ttl_sec")
 
     if timeout_sec <= 0:
         raise AppError(
@@ -421,11 +501,18 @@ def _build_web_search_config(raw: Dict[str, Any]) -> WebSearchConfig:
             "tools.web_search.max_top_k must be >= 1",
             details={"field": "tools.web_search.max_top_k", "value": max_top_k},
         )
+    if cache_ttl_sec < 0:
+        raise AppError(
+            ErrorCode.CONFIG_INVALID,
+            "tools.web_search.cache_ttl_sec must be >= 0",
+            details={"field": "tools.web_search.cache_ttl_sec", "value": cache_ttl_sec},
+        )
 
     return WebSearchConfig(
         timeout_sec=timeout_sec,
         max_top_k=max_top_k,
         uapis=_build_uapis_config(uapis_raw),
+        cache_ttl_sec=cache_ttl_sec,
     )
 
 
@@ -573,6 +660,20 @@ def _build_logging_config(raw: Dict[str, Any]) -> LoggingConfig:
             details={"field": "logging.user_text_preview_chars", "value": user_text_preview_chars},
         )
 
+    rotate_max_bytes = _to_int(payload.get("rotate_max_bytes", 16 * 1024 * 1024), "logging.rotate_max_bytes")
+    rotate_max_age_hours = _to_float(payload.get("rotate_max_age_hours", 24.0), "logging.rotate_max_age_hours")
+    for field_name, value in (
+        ("logging.rotate_max_bytes", rotate_max_bytes),
+        ("logging.rotate_max_age_hours", rotate_max_age_hours),
+    ):
+        if value < 0:
+            raise AppError(
+                ErrorCode.CONFIG_INVALID,
+                f"{field_name} must be >= 0",
+                details={"field": field_name, "value": value},
+            )
+    compress_rotated = _to_bool(payload.get("compress_rotated", True), "logging.compress_rotated")
+
     return LoggingConfig(
         level=level,
         format=fmt,
@@ -585,6 +686,9 @@ def _build_logging_config(raw: Dict[str, Any]) -> LoggingConfig:
         slow_threshold_ms=slow_threshold_ms,
         redact_user_text=redact_user_text,
         user_text_preview_chars=user_text_preview_chars,
+        rotate_max_bytes=rotate_max_bytes,
+        rotate_max_age_hours=rotate_max_age_hours,
+        compress_rotated=compress_rotated,
     )
 
 
@@ -592,6 +696,7 @@ def _build_task_flow_config(raw: Dict[str, Any]) -> TaskFlowConfig:
     payload = dict(raw or {})
     max_replan_rounds = _to_int(payload.get("max_replan_rounds", 2), "task_flow.max_replan_rounds")
     max_clarify_rounds = _to_int(payload.get("max_clarify_rounds", 3), "task_flow.max_clarify_rounds")
+    step_pool_workers = _to_int(payload.get("step_pool_workers", 4), "task_flow.step_pool_workers")
     if max_replan_rounds < 0:
         raise AppError(
             ErrorCode.CONFIG_INVALID,
@@ -604,9 +709,60 @@ def _build_task_flow_config(raw: Dict[str, Any]) -> TaskFlowConfig:
             "task_flow.max_clarify_rounds must be >= 1",
             details={"field": "task_flow.max_clarify_rounds", "value": max_clarify_rounds},
         )
+    if step_pool_workers < 1:
+        raise AppError(
+            ErrorCode.CONFIG_INVALID,
+            "task_flow.step_pool_workers must be >= 1",
+            details={"field": "task_flow.step_pool_workers", "value": step_pool_workers},
+        )
     return TaskFlowConfig(
         max_replan_rounds=max_replan_rounds,
         max_clarify_rounds=max_clarify_rounds,
+        step_pool_workers=step_pool_workers,
+    )
+
+
+def _build_retention_config(raw: Dict[str, Any]) -> RetentionConfig:
+    payload = dict(raw or {})
+    enable_scheduler = _to_bool(payload.get("enable_scheduler", False), "retention.enable_scheduler")
+    sweep_interval_seconds = _to_float(payload.get("sweep_interval_seconds", 300), "retention.sweep_interval_seconds")
+    if sweep_interval_seconds < 1:
+        raise AppError(
+            ErrorCode.CONFIG_INVALID,
+            "retention.sweep_interval_seconds must be >= 1",
+            details={"field": "retention.sweep_interval_seconds", "value": sweep_interval_seconds},
+        )
+    sweep_batch_size = _to_int(payload.get("sweep_batch_size", 500), "retention.sweep_batch_size")
+    if sweep_batch_size < 1:
+        raise AppError(
+            ErrorCode.CONFIG_INVALID,
+            "retention.sweep_batch_size must be >= 1",
+            details={"field": "retention.sweep_batch_size", "value": sweep_batch_size},
+        )
+    keep_raw = payload.get("keep_days") or {}
+    if not isinstance(keep_raw, dict):
+        raise AppError(
+            ErrorCode.CONFIG_INVALID,
+            "retention.keep_days must be an object",
+            details={"field": "retention.keep_days"},
+        )
+    keep_days: Dict[str, float] = {category: 7.0 for category in RETENTION_CATEGORIES}
+    for category, value in keep_raw.items():
+        if category not in RETENTION_CATEGORIES:
+            raise AppError(
+                ErrorCode.CONFIG_INVALID,
+                "Unknown retention.keep_days category",
+                details={
+                    "field": f"retention.keep_days.{category}",
+                    "allowed": list(RETENTION_CATEGORIES),
+                },
+            )
+        keep_days[category] = _to_float(value, f"retention.keep_days.{category}")
+    return RetentionConfig(
+        enable_scheduler=enable_scheduler,
+        sweep_interval_seconds=sweep_interval_seconds,
+        sweep_batch_size=sweep_batch_size,
+        keep_days=keep_days,
     )
 
 
@@ -640,6 +796,14 @@ def load_app_config() -> AppConfig:
             details={"field": "task_flow"},
         )
 
+    retention_raw = raw.get("retention") or {}
+    if not isinstance(retention_raw, dict):
+        raise AppError(
+            ErrorCode.CONFIG_INVALID,
+            "retention must be an object",
+            details={"field": "retention"},
+        )
+
     return AppConfig(
         llm=_build_llm_config(llm_raw),
         tts=_build_tts_config(tts_raw),
@@ -648,4 +812,5 @@ def load_app_config() -> AppConfig:
         tools=_build_tools_config(tools_raw),
         logging=_build_logging_config(logging_raw),
         task_flow=_build_task_flow_config(task_flow_raw),
+        retention=_build_retention_config(retention_raw),
     )
@@ -0,0 +1,127 @@
+"""Persistent windowed write-dedupe filter for MemoryService."""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+
+class PersistentDedupeFilter:
+    """
+    跨重启/跨 worker 共享的写入去重窗口（SQLite）。
+
+    - 每个 key 一行：last_seen + expires_at（= last_seen + 该类型窗口）；
+    - 判重为一次主键查询 + 一次 UPSERT，同一批在一个 IMMEDIATE 事务里完成，多进程下检查与标记原子；
+    - 过期行按 expires_at 索引做范围删除，最多每 purge_interval_sec 执行一次，不做全表扫描。
+    语义与原进程内实现一致：命中窗口内的旧记录即判重，且无论是否重复都把 last_seen 刷新为当前时间。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        windows: Mapping[str, int],
+        default_window_sec: int = 24 * 3600,
+        purge_interval_sec: float = 60.0,
+    ):
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.db_path = db_path
+        self.windows: Dict[str, int] = {str(k): int(v) for k, v in windows.items()}
+        self.default_window_sec = int(default_window_sec)
+        self.purge_interval_sec = max(float(purge_interval_sec), 0.0)
+
+        # isolation_level=None：手动 BEGIN IMMEDIATE，保证“查 + 写”在多进程间原子。
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.RLock()
+        self._closed = False
+        self._last_purge = 0.0
+        self._stats = {"checks": 0, "duplicates": 0, "purged": 0}
+        self._init_table()
+
+    def _init_table(self):
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS write_dedupe (
+                key TEXT PRIMARY KEY,
+                memory_type TEXT NOT NULL,
+                last_seen REAL NOT NULL,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_write_dedupe_expires_at ON write_dedupe(expires_at)")
+
+    def window_for(self, memory_type: str) -> int:
+        return int(self.windows.get(memory_type, self.default_window_sec))
+
+    def check_and_mark(self, entries: Sequence[Tuple[str, str]], now: float | None = None) -> List[bool]:
+        """
+        entries 为 (memory_type, key)；返回每条是否为窗口内重复，并把所有 key 标记为“刚见过”。
+
+        同一批内后出现的相同 key 也会被判为重复。
+        """
+        if not entries:
+            return []
+        now = time.time() if now is None else float(now)
+        results: List[bool] = []
+        with self._lock:
+            if self._closed:
+                return [False] * len(entries)
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for memory_type, key in entries:
+                    window = self.window_for(memory_type)
+                    row = self._db.execute(
+                        "SELECT last_seen FROM write_dedupe WHERE key = ?",
+                        (key,),
+                    ).fetchone()
+                    results.append(row is not None and (now - float(row[0])) <= window)
+                    self._db.execute(
+                        """
+                        INSERT INTO write_dedupe(key, memory_type, last_seen, expires_at)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT(key) DO UPDATE SET
+                            memory_type = excluded.memory_type,
+                            last_seen = excluded.last_seen,
+                            expires_at = excluded.expires_at
+                        """,
+                        (key, memory_type, now, now + window),
+                    )
+                if now - self._last_purge >= self.purge_interval_sec:
+                    cursor = self._db.execute("DELETE FROM write_dedupe WHERE expires_at < ?", (now,))
+                    self._stats["purged"] += max(cursor.rowcount, 0)
+                    self._last_purge = now
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._stats["checks"] += len(entries)
+            self._stats["duplicates"] += sum(1 for dup in results if dup)
+        return results
+
+    def unmark(self, keys: Sequence[str]) -> None:
+        """撤销标记：调用方在 check_and_mark 之后写入失败时调用，避免内容在窗口内被误判重复。"""
+        keys = list(keys)
+        if not keys:
+            return
+        with self._lock:
+            if self._closed:
+                return
+            self._db.executemany("DELETE FROM write_dedupe WHERE key = ?", [(key,) for key in keys])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._db.close()
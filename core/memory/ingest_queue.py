@@ -0,0 +1,262 @@
+"""Write-behind ingestion queue for MemoryService (bounded queue + crash-safe journal)."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import IO, Callable, Deque, Dict, List, Optional, Tuple
+
+from core.utils import log_event, log_exception
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+class JournalLockedError(RuntimeError):
+    """日志已被另一个队列实例（本进程或其他进程）持有。"""
+
+
+def _acquire_journal_lock(lock_path: Path) -> IO[str]:
+    """对 lock_path 加非阻塞排他锁并返回持锁文件；已被占用时抛 JournalLockedError。"""
+    handle = open(lock_path, "a+", encoding="utf-8")
+    try:
+        if fcntl is not None:
+            # flock 按打开的文件描述锁定，同一进程内的第二个实例也会冲突。
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:  # pragma: no cover - Windows
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError as exc:
+        handle.close()
+        raise JournalLockedError(f"ingest journal is locked: {lock_path}") from exc
+    return handle
+
+
+def _release_journal_lock(handle: IO[str]) -> None:
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        else:  # pragma: no cover - Windows
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        handle.close()
+
+
+class MemoryIngestQueue:
+    """
+    记忆写入的后写（write-behind）队列。
+
+    - enqueue 先把 payload 追加到 JSONL 日志并 fsync，再放入内存队列，返回 True 即视为“已确认”；
+    - 后台 worker 按批取出交给 handler，处理完后追加 done 记录；
+    - 进程崩溃后重启时，日志中“有 put 无 done”的条目会按原顺序重新入队；
+    - 限制：handler 抛异常的批次同样记 done（避免毒消息反复重放），该批条目不会再重试；
+      逐条容错与失败重试由 handler 自己负责（MemoryService 整批失败时退回逐条写入）；
+    - 队列有界：满时 enqueue 最多等待 put_timeout_sec，仍满则返回 False，由调用方同步兜底；
+    - 队列存活期间持有日志旁的 .lock 排他锁：同一份日志只能有一个实例回放/追加/压缩，
+      另一个实例构造时抛 JournalLockedError，由调用方退回同步写入。
+    """
+
+    def __init__(
+        self,
+        journal_path: Path,
+        handler: Callable[[List[Dict[str, object]]], None],
+        max_pending: int = 256,
+        batch_size: int = 16,
+        put_timeout_sec: float = 0.05,
+        fsync: bool = True,
+        compact_bytes: int = 1 << 20,
+    ):
+        self._journal_path = Path(journal_path)
+        self._journal_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock_handle = _acquire_journal_lock(self._journal_path.with_name(self._journal_path.name + ".lock"))
+        self._handler = handler
+        self.max_pending = max(int(max_pending), 1)
+        self.batch_size = max(int(batch_size), 1)
+        self.put_timeout_sec = max(float(put_timeout_sec), 0.0)
+        self._fsync = bool(fsync)
+        self._compact_bytes = max(int(compact_bytes), 0)
+
+        self._cond = threading.Condition()
+        self._pending: Deque[Tuple[int, Dict[str, object]]] = deque()
+        self._inflight = 0
+        self._next_seq = 1
+        self._stopping = False
+        self._stats = {
+            "enqueued": 0,
+            "processed": 0,
+            "failed_batches": 0,
+            "rejected": 0,
+            "recovered": 0,
+        }
+
+        try:
+            self._recover()
+            self._journal = open(self._journal_path, "a", encoding="utf-8")
+        except Exception:
+            _release_journal_lock(self._lock_handle)
+            raise
+        self._worker = threading.Thread(target=self._worker_loop, name="memory-ingest", daemon=True)
+        self._worker.start()
+
+    def _recover(self) -> None:
+        """回放日志：找出未完成条目，按 seq 顺序重新入队，并把日志压缩为仅含这些条目。"""
+        puts: Dict[int, Dict[str, object]] = {}
+        done: set[int] = set()
+        if self._journal_path.exists():
+            with open(self._journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 崩溃时可能留下半行，未 fsync 完成的条目本就未被确认，直接忽略。
+                        continue
+                    if not isinstance(record, dict):
+                        continue
+                    if record.get("op") == "put" and isinstance(record.get("payload"), dict):
+                        puts[int(record["seq"])] = record["payload"]
+                    elif record.get("op") == "done":
+                        done.update(int(seq) for seq in record.get("seqs") or [])
+
+        for seq in sorted(puts):
+            if seq not in done:
+                self._pending.append((seq, puts[seq]))
+        self._next_seq = max(puts, default=0) + 1
+        self._stats["recovered"] = len(self._pending)
+        self._rewrite_journal([self._put_record(seq, payload) for seq, payload in self._pending])
+        if self._pending:
+            log_event(
+                logger,
+                logging.INFO,
+                "memory.ingest.recovered",
+                "记忆后写日志回放，未完成条目已重新入队",
+                component="memory",
+                pending=len(self._pending),
+            )
+
+    def _rewrite_journal(self, records: List[Dict[str, object]]) -> None:
+        temp_path = str(self._journal_path) + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            if self._fsync:
+                os.fsync(f.fileno())
+        os.replace(temp_path, self._journal_path)
+
+    @staticmethod
+    def _put_record(seq: int, payload: Dict[str, object]) -> Dict[str, object]:
+        return {"op": "put", "seq": seq, "ts": time.time(), "payload": payload}
+
+    def _append_locked(self, record: Dict[str, object]) -> None:
+        self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        if self._fsync:
+            os.fsync(self._journal.fileno())
+
+    def enqueue(self, payload: Dict[str, object]) -> bool:
+        """持久化并入队；返回 False 表示队列已满或已关闭（调用方应同步处理）。"""
+        with self._cond:
+            if self._stopping:
+                return False
+            if len(self._pending) >= self.max_pending:
+                self._cond.wait_for(
+                    lambda: len(self._pending) < self.max_pending or self._stopping,
+                    timeout=self.put_timeout_sec,
+                )
+            if self._stopping or len(self._pending) >= self.max_pending:
+                self._stats["rejected"] += 1
+                return False
+            seq = self._next_seq
+            self._next_seq += 1
+            self._append_locked(self._put_record(seq, payload))
+            self._pending.append((seq, payload))
+            self._stats["enqueued"] += 1
+            self._cond.notify_all()
+        return True
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopping)
+                if self._stopping:
+                    return
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                self._inflight = len(batch)
+                self._cond.notify_all()
+
+            try:
+                self._handler([payload for _, payload in batch])
+            except Exception:
+                # handler 负责逐条容错；这里兜底防止 worker 退出，失败批次同样确认，避免毒消息反复重放。
+                self._stats["failed_batches"] += 1
+                log_exception(
+                    logger,
+                    "memory.ingest.batch.error",
+                    "记忆后写批次处理失败，已跳过该批次",
+                    component="memory",
+                    fallback="skip_ingest_batch",
+                    batch_size=len(batch),
+                )
+
+            with self._cond:
+                try:
+                    self._append_locked({"op": "done", "seqs": [seq for seq, _ in batch]})
+                    self._maybe_compact_locked()
+                except Exception:
+                    log_exception(
+                        logger,
+                        "memory.ingest.journal.error",
+                        "记忆后写日志确认失败",
+                        component="memory",
+                    )
+                self._stats["processed"] += len(batch)
+                self._inflight = 0
+                self._cond.notify_all()
+
+    def _maybe_compact_locked(self) -> None:
+        # 队列排空且日志超过阈值时截断：此刻所有 put 都已有 done，日志可整体丢弃。
+        if self._pending or not self._compact_bytes:
+            return
+        if self._journal.tell() < self._compact_bytes:
+            return
+        self._journal.close()
+        self._rewrite_journal([])
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待队列排空且当前批次处理完毕；超时返回 False。"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and self._inflight == 0, timeout=timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                **self._stats,
+                "pending": len(self._pending),
+                "inflight": self._inflight,
+                "max_pending": self.max_pending,
+            }
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """排空队列后停止 worker；超时未处理完的条目保留在日志中，下次启动重放。"""
+        self.flush(timeout=timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._worker.join(timeout=timeout)
+        with self._cond:
+            if self._lock_handle is None:
+                return
+            self._journal.close()
+            _release_journal_lock(self._lock_handle)
+            self._lock_handle = None
@@ -4,6 +4,7 @@ from .core import Memory
 from .models import MemoryItem, MemoryMetadata
 from .config import MemoryConfig
 from .embedding import EmbeddingProvider, OpenAIEmbedding
+from .embedding_cache import PersistentEmbeddingCache
 
 __all__ = [
     "Memory",
@@ -12,4 +13,5 @@ __all__ = [
     "MemoryConfig",
     "EmbeddingProvider",
     "OpenAIEmbedding",
+    "PersistentEmbeddingCache",
 ]
@@ -9,6 +9,14 @@ class MemoryConfig:
     storage_path: str = "./memory_data"
     embedding_model: str = "Qwen/Qwen3-Embedding-8B"
     embedding_dim: int = 4096
+    # 向量索引后端：qdrant | flat | flat_q8 | hnsw（hnsw 需要可选依赖 hnswlib）
+    vector_backend: str = "qdrant"
+    # flat_q8 专用：降维方式 none | truncate | pca，降维目标维度，粗排候选放大倍数（全精度重排）
+    vector_reduction: str = "none"
+    vector_reduced_dim: int = 0
+    vector_rescore_multiplier: int = 4
+    # 向量索引定时落盘间隔（秒，0 关闭）；两次落盘之间崩溃丢失的向量在启动时按 SQLite 对账补回
+    vector_flush_interval_seconds: float = 5.0
 
     # Working memory
     working_memory_size: int = 50
@@ -33,11 +41,23 @@ class MemoryConfig:
     vector_weight: float = 0.7
     keyword_weight: float = 0.3
 
+    # 长期记忆只读连接池大小（WAL 下并发检索各借一条连接）
+    read_pool_size: int = 4
+
+    # Retrieval cache：按 (store, 归一化 query, top_k) 缓存长期候选集，靠存储代数失效
+    enable_search_cache: bool = True
+    search_cache_max_entries: int = 256
+
     # Access counting
     enable_async_mark_access: bool = True
     access_flush_interval_ms: int = 500
     access_flush_batch_size: int = 256
 
+    # Group commit：并发的长期写入在 max_delay_ms 内或累计 max_items 条时合并为一个事务
+    enable_group_commit: bool = True
+    group_commit_max_delay_ms: int = 5
+    group_commit_max_items: int = 32
+
     # Repeat estimation
     near_repeat_similarity_threshold: float = 0.88
 
@@ -66,6 +86,18 @@ class MemoryConfig:
     # Feature flags
     enable_incremental_consolidate: bool = True
 
+    # 自适应 consolidate 调度：前台 QPS / 写锁等待高时退避，空闲时放大批量追赶，
+    # 整轮扫描无变更且无新写入时跳过 tick（每 idle_rescan_seconds 强制重扫一次）
+    enable_adaptive_consolidate: bool = True
+    consolidate_load_window_seconds: float = 10.0
+    consolidate_backoff_qps: float = 5.0
+    consolidate_backoff_lock_wait_ms: float = 20.0
+    consolidate_idle_qps: float = 0.2
+    consolidate_max_backoff_seconds: float = 60.0
+    consolidate_max_defer_seconds: float = 300.0
+    consolidate_catchup_multiplier: int = 4
+    consolidate_idle_rescan_seconds: float = 3600.0
+
     # LLM extraction/summarization (loaded from root config.yaml -> memory.llm.*)
     llm_enabled: bool = False
     llm_model: str = "gpt-4o-mini"
@@ -74,3 +106,8 @@ class MemoryConfig:
     llm_timeout_seconds: int = 30
     llm_temperature_extract: float = 0.0
     llm_temperature_summary: float = 0.2
+    # LLM 微批：并发的抽取/摘要作业在 max_delay_ms 内或累计 max_size 个时合并为一次结构化请求；
+    # 写路径最多等待 wait_seconds，超时回退中性元数据 / 拼接摘要
+    llm_batch_max_size: int = 8
+    llm_batch_max_delay_ms: int = 20
+    llm_batch_wait_seconds: float = 10.0
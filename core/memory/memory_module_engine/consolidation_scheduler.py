@@ -0,0 +1,201 @@
+"""Load-aware scheduling for background long-term consolidation."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Optional, Tuple
+
+
+class LoadMonitor:
+    """
+    前台负载采样：检索/写入次数与长期写锁等待耗时，按滑动窗口统计。
+
+    只记录时间戳和耗时，开销是一次加锁 + deque 追加，可放在热路径上。
+    """
+
+    def __init__(self, window_seconds: float = 10.0, clock: Callable[[], float] = time.monotonic):
+        self.window_seconds = max(float(window_seconds), 0.1)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._ops: Deque[float] = deque()
+        self._lock_waits: Deque[Tuple[float, float]] = deque()
+
+    def record_op(self, count: int = 1) -> None:
+        now = self._clock()
+        with self._lock:
+            self._ops.extend([now] * max(int(count), 1))
+            self._trim_locked(now)
+
+    def record_lock_wait(self, wait_ms: float) -> None:
+        now = self._clock()
+        with self._lock:
+            self._lock_waits.append((now, float(wait_ms)))
+            self._trim_locked(now)
+
+    def _trim_locked(self, now: float) -> None:
+        horizon = now - self.window_seconds
+        while self._ops and self._ops[0] < horizon:
+            self._ops.popleft()
+        while self._lock_waits and self._lock_waits[0][0] < horizon:
+            self._lock_waits.popleft()
+
+    def snapshot(self) -> dict:
+        now = self._clock()
+        with self._lock:
+            self._trim_locked(now)
+            waits = [wait for _, wait in self._lock_waits]
+            return {
+                "qps": round(len(self._ops) / self.window_seconds, 3),
+                "lock_wait_avg_ms": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "lock_wait_max_ms": round(max(waits), 3) if waits else 0.0,
+            }
+
+
+@dataclass
+class ConsolidationDecision:
+    action: str  # run | catchup | backoff | skip_idle
+    batch_size: int
+    time_budget_ms: int
+    next_interval: float
+
+
+class ConsolidationScheduler:
+    """
+    自适应 consolidate 调度。
+
+    每个 tick 依据前台负载决定本轮动作：
+    - backoff：QPS 或写锁等待超阈值时跳过，tick 间隔指数退避（有上限）；
+      连续推迟超过 max_defer_seconds 时仍以基础批量跑一轮，避免饿死；
+    - catchup：前台空闲时放大批量与时间预算，尽快补齐积压；
+    - skip_idle：上一整轮扫描无任何变更、且之后存储代数未变化时跳过，
+      超过 idle_rescan_seconds 后强制重扫（衰减随时间推进，不完全由写入驱动）；
+    - run：其余情况按基础批量执行。
+    """
+
+    def __init__(
+        self,
+        monitor: LoadMonitor,
+        tick_seconds: float,
+        batch_size: int,
+        time_budget_ms: int,
+        backoff_qps: float = 5.0,
+        backoff_lock_wait_ms: float = 20.0,
+        idle_qps: float = 0.2,
+        max_backoff_seconds: float = 60.0,
+        max_defer_seconds: float = 300.0,
+        catchup_multiplier: int = 4,
+        idle_rescan_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.monitor = monitor
+        self.tick_seconds = max(float(tick_seconds), 0.01)
+        self.batch_size = max(int(batch_size), 1)
+        self.time_budget_ms = max(int(time_budget_ms), 1)
+        self.backoff_qps = float(backoff_qps)
+        self.backoff_lock_wait_ms = float(backoff_lock_wait_ms)
+        self.idle_qps = float(idle_qps)
+        self.max_backoff_seconds = max(float(max_backoff_seconds), self.tick_seconds)
+        self.max_defer_seconds = max(float(max_defer_seconds), 0.0)
+        self.catchup_multiplier = max(int(catchup_multiplier), 1)
+        self.idle_rescan_seconds = max(float(idle_rescan_seconds), 0.0)
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._interval = self.tick_seconds
+        self._deferred_since: Optional[float] = None
+        # 当前一整轮扫描是否有变更；回绕时若仍为 False 则进入静默期。
+        self._pass_dirty = False
+        self._quiescent_since: Optional[float] = None
+        self._last_generation: Optional[int] = None
+        self._last_decision = ""
+        self._last_load: dict = {}
+        self._counters = {"run": 0, "catchup": 0, "backoff": 0, "skip_idle": 0, "forced": 0}
+        self._last_step_ms = 0
+        self._last_processed = 0
+
+    def decide(self, generation: int) -> ConsolidationDecision:
+        now = self._clock()
+        load = self.monitor.snapshot()
+        with self._lock:
+            self._last_load = load
+            changed = self._last_generation is not None and generation != self._last_generation
+            if changed:
+                self._pass_dirty = True
+                self._quiescent_since = None
+
+            if self._quiescent_since is not None and now - self._quiescent_since < self.idle_rescan_seconds:
+                return self._decide_locked("skip_idle", 0, self.tick_seconds)
+            self._quiescent_since = None
+
+            busy = load["qps"] >= self.backoff_qps or load["lock_wait_avg_ms"] >= self.backoff_lock_wait_ms
+            if busy:
+                if self._deferred_since is None:
+                    self._deferred_since = now
+                if now - self._deferred_since < self.max_defer_seconds:
+                    self._interval = min(self._interval * 2.0, self.max_backoff_seconds)
+                    return self._decide_locked("backoff", 0, self._interval)
+                # 推迟过久：以基础批量跑一轮，退避间隔保持不变。
+                self._counters["forced"] += 1
+                self._deferred_since = now
+                return self._decide_locked("run", self.batch_size, self._interval, self.time_budget_ms)
+
+            self._deferred_since = None
+            self._interval = self.tick_seconds
+            if load["qps"] <= self.idle_qps:
+                return self._decide_locked(
+                    "catchup",
+                    self.batch_size * self.catchup_multiplier,
+                    self.tick_seconds,
+                    self.time_budget_ms * self.catchup_multiplier,
+                )
+            return self._decide_locked("run", self.batch_size, self.tick_seconds, self.time_budget_ms)
+
+    def _decide_locked(
+        self,
+        action: str,
+        batch_size: int,
+        next_interval: float,
+        time_budget_ms: int = 0,
+    ) -> ConsolidationDecision:
+        self._counters[action] += 1
+        self._last_decision = action
+        return ConsolidationDecision(
+            action=action,
+            batch_size=batch_size,
+            time_budget_ms=time_budget_ms,
+            next_interval=next_interval,
+        )
+
+    def observe_step(self, step: dict, generation: int) -> None:
+        """记录一轮 consolidate 结果；generation 为本轮结束后的存储代数。"""
+        # reinforced 不计入：半衰期每轮由 compute_half_life 重算后再放大，结果稳定，不代表新变化。
+        changed = any(
+            int(step.get(key, 0) or 0) > 0
+            for key in ("dedupe_merged", "compressed", "evicted", "removed_low_importance")
+        )
+        with self._lock:
+            self._last_generation = generation
+            self._last_step_ms = int(step.get("elapsed_ms", 0) or 0)
+            self._last_processed = int(step.get("processed", 0) or 0)
+            empty = self._last_processed == 0
+            if step.get("cursor_wrapped") or empty:
+                # 回绕时判断刚结束的一整轮是否干净；本轮（新一轮首批）的变更计入下一轮。
+                if not self._pass_dirty and not changed:
+                    self._quiescent_since = self._clock()
+                self._pass_dirty = changed
+            elif changed:
+                self._pass_dirty = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "last_decision": self._last_decision,
+                "interval_seconds": round(self._interval, 3),
+                "quiescent": self._quiescent_since is not None,
+                "last_step_ms": self._last_step_ms,
+                "last_processed": self._last_processed,
+                "load": dict(self._last_load),
+            }
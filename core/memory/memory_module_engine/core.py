@@ -6,13 +6,19 @@ import time
 import uuid
 import heapq
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import replace
 from typing import Optional
 
 from .config import MemoryConfig
+from .consolidation_scheduler import ConsolidationScheduler, LoadMonitor
 from .embedding import EmbeddingProvider
+from .group_commit import GroupCommitWriter
 from .long_term import LongTermMemory
 from .models import MemoryItem
 from .overflow_processor import OverflowProcessor
+from .retrieval_cache import RetrievalCache
+from .schema import infer_memory_type
 from .signal_extractor import SignalExtractor
 from .utils import (
     DecayEngine,
@@ -57,6 +63,9 @@ class Memory:
             llm_base_url=self.config.llm_base_url,
             llm_timeout_seconds=self.config.llm_timeout_seconds,
             llm_temperature=self.config.llm_temperature_extract,
+            batch_max_size=self.config.llm_batch_max_size,
+            batch_max_delay_ms=self.config.llm_batch_max_delay_ms,
+            batch_wait_seconds=self.config.llm_batch_wait_seconds,
         )
         self.write_gate = WriteGate(threshold=self.config.persist_importance_threshold)
         self.working = WorkingMemory(
@@ -65,7 +74,19 @@ class Memory:
             importance_boost=self.config.working_importance_boost,
             importance_boost_every_hits=self.config.working_importance_boost_every_hits,
         )
-        self.long_term = LongTermMemory(storage_path, vector_dim=self.embedder.get_dimension())
+        self.long_term = LongTermMemory(
+            storage_path,
+            vector_dim=self.embedder.get_dimension(),
+            vector_backend=self.config.vector_backend,
+            read_pool_size=self.config.read_pool_size,
+            vector_options={
+                "reduction": self.config.vector_reduction,
+                "reduced_dim": self.config.vector_reduced_dim,
+                "rescore_multiplier": self.config.vector_rescore_multiplier,
+            },
+            vector_flush_interval_sec=self.config.vector_flush_interval_seconds,
+        )
+        self.long_term.reconcile_vectors(self.embedder.encode)
         self.decay_engine = DecayEngine(
             compression_threshold=self.config.compression_threshold,
             eviction_threshold=self.config.eviction_threshold,
@@ -81,6 +102,9 @@ class Memory:
             llm_base_url=self.config.llm_base_url,
             llm_timeout_seconds=self.config.llm_timeout_seconds,
             llm_temperature=self.config.llm_temperature_summary,
+            batch_max_size=self.config.llm_batch_max_size,
+            batch_max_delay_ms=self.config.llm_batch_max_delay_ms,
+            batch_wait_seconds=self.config.llm_batch_wait_seconds,
         )
 
         self.auto_consolidate = auto_consolidate
@@ -94,6 +118,34 @@ class Memory:
         self._access_flush_stop_event = threading.Event()
         self._access_flush_wakeup_event = threading.Event()
         self._access_flush_thread: Optional[threading.Thread] = None
+        self._search_cache: Optional[RetrievalCache] = None
+        if self.config.enable_search_cache:
+            self._search_cache = RetrievalCache(max_entries=self.config.search_cache_max_entries)
+        self._group_writer: Optional[GroupCommitWriter] = None
+        if self.config.enable_group_commit:
+            self._group_writer = GroupCommitWriter(
+                self._write_long_term_batch,
+                max_delay_ms=self.config.group_commit_max_delay_ms,
+                max_items=self.config.group_commit_max_items,
+            )
+
+        # 前台负载采样（检索/写入 QPS、长期写锁等待），供自适应 consolidate 调度参考。
+        self._load_monitor = LoadMonitor(window_seconds=self.config.consolidate_load_window_seconds)
+        self._consolidation_scheduler: Optional[ConsolidationScheduler] = None
+        if self.config.enable_adaptive_consolidate:
+            self._consolidation_scheduler = ConsolidationScheduler(
+                self._load_monitor,
+                tick_seconds=max(int(self.config.consolidate_tick_seconds), 1),
+                batch_size=max(int(self.config.consolidate_batch_size), 1),
+                time_budget_ms=max(int(self.config.consolidate_time_budget_ms), 1),
+                backoff_qps=self.config.consolidate_backoff_qps,
+                backoff_lock_wait_ms=self.config.consolidate_backoff_lock_wait_ms,
+                idle_qps=self.config.consolidate_idle_qps,
+                max_backoff_seconds=self.config.consolidate_max_backoff_seconds,
+                max_defer_seconds=self.config.consolidate_max_defer_seconds,
+                catchup_multiplier=self.config.consolidate_catchup_multiplier,
+                idle_rescan_seconds=self.config.consolidate_idle_rescan_seconds,
+            )
 
         if self.config.enable_async_mark_access:
             self._start_access_flush_worker()
@@ -103,18 +155,50 @@ class Memory:
 
     def add(self, content: str) -> str:
         """Add raw user content into memory system."""
-        raw_content = normalize_text(content)
-        if not raw_content:
+        return self.add_many([content])[0]
+
+    def add_many(self, contents: list[str]) -> list[str]:
+        """
+        批量写入多条内容（例如一轮对话抽取出的多个候选）。
+
+        信号抽取整体交给 extract_many（启用 LLM 时微批为一次结构化请求），与各条 embedding 并发；
+        重复信号估计与 working 入队仍按顺序执行，保证后一条能看到前一条；
+        需要立即持久化的条目合并为一次长期写入。
+        """
+        raw_contents = [normalize_text(content) for content in contents]
+        if not raw_contents or any(not raw for raw in raw_contents):
             raise ValueError("content cannot be empty")
+        self._load_monitor.record_op(len(raw_contents))
+
+        extract_future = self._executor.submit(self.signal_extractor.extract_many, raw_contents)
+        embedding_futures = [self._executor.submit(self.embedder.encode, raw) for raw in raw_contents]
+        extracted_all = extract_future.result()
+
+        item_ids: list[str] = []
+        to_persist: list[MemoryItem] = []
+        for raw_content, extracted, embedding_future in zip(raw_contents, extracted_all, embedding_futures):
+            embedding = embedding_future.result()
+            item = self._build_working_item(raw_content, extracted.metadata, embedding)
+            self.working.add(item)
+            item_ids.append(item.id)
+
+            should_immediate_persist = self.write_gate.evaluate(
+                metadata=item.metadata,
+                importance=item.importance,
+            )
+            if should_immediate_persist:
+                to_persist.append(item)
 
-        now = time.time()
-        extract_future = self._executor.submit(self.signal_extractor.extract, raw_content)
-        embedding_future = self._executor.submit(self.embedder.encode, raw_content)
+        if to_persist:
+            self._persist_items(to_persist)
+            for item in to_persist:
+                self.working.remove(item.id)
 
-        extracted = extract_future.result()
-        embedding = embedding_future.result()
-        metadata = extracted.metadata
+        self._process_overflow_if_needed()
+        return item_ids
 
+    def _build_working_item(self, raw_content: str, metadata, embedding: list[float]) -> MemoryItem:
+        now = time.time()
         near_repeat_score, repeat_count = self._estimate_repeat_signals(embedding)
         metadata.near_repeat_score = near_repeat_score
         metadata.repeat_count = repeat_count
@@ -125,7 +209,7 @@ class Memory:
         importance = self.scorer.calculate(raw_content, metadata)
         metadata.confidence = clamp(metadata.confidence + 0.05 * near_repeat_score)
 
-        item = MemoryItem(
+        return MemoryItem(
             id=str(uuid.uuid4()),
             content=raw_content,
             importance=importance,
@@ -133,19 +217,6 @@ class Memory:
             recall_count=0,
             metadata=metadata,
         )
-        self.working.add(item)
-
-        should_immediate_persist = self.write_gate.evaluate(
-            metadata=metadata,
-            importance=importance,
-        )
-
-        if should_immediate_persist:
-            self._persist_item(item)
-            self.working.remove(item.id)
-
-        self._process_overflow_if_needed()
-        return item.id
 
     def search(self, query: str, top_k: int = 10) -> list[MemoryItem]:
         """
@@ -154,23 +225,17 @@ class Memory:
         关键点：
         1. 读路径不拿长期写锁，避免被 consolidate 写事务阻塞；
         2. 命中 long-term 后默认异步批量更新 recall_count（可回退同步）；
-        3. 最终结果仍在 core 里统一打分，保证排序策略单一且可控。
+        3. 最终结果仍在 core 里统一打分，保证排序策略单一且可控；
+        4. query embedding 与长期候选集按存储代数缓存，重复查询跳过 embedding/向量/FTS。
         """
         query_text = normalize_text(query)
         if not query_text:
             return []
+        self._load_monitor.record_op()
 
-        query_embedding = self.embedder.encode(query_text)
+        query_embedding, long_term_candidates = self._long_term_candidates(query_text, top_k)
         working_candidates = self.working.search(query_embedding, top_k=max(top_k * 2, top_k))
 
-        # 读连接检索候选，不阻塞写通道。
-        long_term_candidates = self.long_term.search_candidates(
-            query_text=query_text,
-            query_embedding=query_embedding,
-            limit=max(top_k * 4, 20),
-            min_importance=0.0,
-        )
-
         # 缓存查询近似的候选记忆
         ranked_by_id: dict[str, tuple[float, MemoryItem]] = {}
 
@@ -202,7 +267,7 @@ class Memory:
             if self.config.enable_async_mark_access:
                 self._enqueue_access_counts(long_term_hit_ids)
             else:
-                with self._long_term_write_lock:
+                with self._foreground_write_lock():
                     self.long_term.mark_access(long_term_hit_ids)
 
         # 对本轮命中的 working 记忆做“命中驱动晋升”判断：
@@ -210,6 +275,55 @@ class Memory:
         self._promote_working_hits(final)
         return final
 
+    def _long_term_candidates(self, query_text: str, top_k: int) -> tuple[list[float], list[dict]]:
+        """
+        返回 (query embedding, 长期候选集)，优先命中检索缓存。
+
+        代数在查询前读取：查询期间若有写入提交，代数已变，该条缓存下次读取即失效。
+        working 部分有命中副作用且本身是内存检索，不进入缓存。
+        缓存存取两侧都复制候选，调用方修改返回的 MemoryItem 不会污染缓存。
+        """
+        cache_key = ("long_term", query_text, int(top_k))
+        generation = self.long_term.generation
+        if self._search_cache is not None:
+            cached = self._search_cache.get(cache_key, generation)
+            if cached is not None:
+                query_embedding, long_term_candidates = cached
+                return list(query_embedding), self._copy_candidates(long_term_candidates)
+
+        query_embedding = self.embedder.encode(query_text)
+        # 读连接检索候选，不阻塞写通道。
+        long_term_candidates = self.long_term.search_candidates(
+            query_text=query_text,
+            query_embedding=query_embedding,
+            limit=max(top_k * 4, 20),
+            min_importance=0.0,
+        )
+        if self._search_cache is not None:
+            self._search_cache.put(
+                cache_key,
+                generation,
+                (list(query_embedding), self._copy_candidates(long_term_candidates)),
+            )
+        return query_embedding, long_term_candidates
+
+    @staticmethod
+    def _copy_candidates(candidates: list[dict]) -> list[dict]:
+        copied = []
+        for candidate in candidates:
+            item = candidate["item"]
+            copied.append(
+                {
+                    **candidate,
+                    "item": replace(
+                        item,
+                        embedding=list(item.embedding) if item.embedding is not None else None,
+                        metadata=replace(item.metadata),
+                    ),
+                }
+            )
+        return copied
+
     def consolidate_step(self) -> dict:
         """
         手动触发一次“增量 consolidate 小步”。
@@ -225,15 +339,32 @@ class Memory:
         return self._consolidate_long_term_full()
 
     def get_stats(self) -> dict:
-        long_term_memories = self.long_term.get_all(include_archived=True)
+        """
+        记忆统计（可高频抓取）。
+
+        长期记忆读取触发器维护的计数器，不再全表加载；working 容量有限，直接按内容前缀计数。
+        """
+        long_term_stats = self.long_term.get_stats()
+        working_by_type: dict[str, int] = {}
         working_items = self.working.get_all()
+        for item in working_items:
+            memory_type = infer_memory_type(item.content)
+            working_by_type[memory_type] = working_by_type.get(memory_type, 0) + 1
         return {
             "working_count": len(working_items),
-            "long_term_count": len(long_term_memories),
-            "avg_importance": (
-                sum(item.importance for item in long_term_memories) / len(long_term_memories)
-                if long_term_memories
-                else 0.0
+            "long_term_count": long_term_stats["total"],
+            "avg_importance": long_term_stats["avg_importance"],
+            "working_by_type": dict(sorted(working_by_type.items())),
+            "long_term": long_term_stats,
+            "group_commit": self._group_writer.stats() if self._group_writer is not None else None,
+            "search_cache": self._search_cache.stats() if self._search_cache is not None else None,
+            "read_pool": self.long_term.read_pool_stats(),
+            "llm_batching": {
+                "signal": self.signal_extractor.batcher_stats(),
+                "summary": self.overflow_processor.batcher_stats(),
+            },
+            "consolidation": (
+                self._consolidation_scheduler.stats() if self._consolidation_scheduler is not None else None
             ),
         }
 
@@ -266,11 +397,30 @@ class Memory:
         return round(near_repeat, 4), int(repeat_count)
 
     def _persist_item(self, item: MemoryItem):
-        item.metadata.store = "long_term"
-        # 每当存储进长期记忆时，计算半衰期
-        item.metadata.half_life_days = self.decay_engine.compute_half_life(item)
+        self._persist_items([item])
+
+    def _persist_items(self, items: list[MemoryItem]):
+        for item in items:
+            item.metadata.store = "long_term"
+            # 每当存储进长期记忆时，计算半衰期
+            item.metadata.half_life_days = self.decay_engine.compute_half_life(item)
+        if self._group_writer is not None:
+            # 与其它线程同时段的写入合并为一个事务；等待落库完成以保持同步语义。
+            self._group_writer.write(items)
+        else:
+            self._write_long_term_batch(items)
+
+    def _write_long_term_batch(self, items: list[MemoryItem]):
+        with self._foreground_write_lock():
+            self.long_term.add_many(items)
+
+    @contextmanager
+    def _foreground_write_lock(self):
+        """前台写路径获取长期写锁，并把等待耗时计入负载采样（consolidate 自身不计）。"""
+        start = time.perf_counter()
         with self._long_term_write_lock:
-            self.long_term.add(item)
+            self._load_monitor.record_lock_wait((time.perf_counter() - start) * 1000.0)
+            yield
 
     def _promote_working_hits(self, results: list[MemoryItem]):
         """
@@ -309,7 +459,8 @@ class Memory:
         summary_items = self.overflow_processor.build_summaries(clusters)
         for summary in summary_items:
             summary.embedding = self.embedder.encode(summary.content)
-            self._persist_item(summary)
+        if summary_items:
+            self._persist_items(summary_items)
 
     def _start_access_flush_worker(self):
         """启动访问计数异步落库 worker。"""
@@ -387,7 +538,7 @@ class Memory:
             return 0
 
         try:
-            with self._long_term_write_lock:
+            with self._foreground_write_lock():
                 self.long_term.mark_access_counts(counts, commit=True)
             return len(counts)
         except Exception:
@@ -422,6 +573,7 @@ class Memory:
 
         调度策略：
         1. 开启增量模式时走“高频小步”（consolidate_tick_seconds）；
+           启用自适应调度时由 ConsolidationScheduler 按前台负载决定退避/追赶/静默跳过；
         2. 关闭增量模式时回退到“低频全量”策略（worker_interval_seconds）；
         3. 单轮失败不会终止线程，防止后台线程意外退出造成长期退化。
         """
@@ -432,28 +584,51 @@ class Memory:
 
         while not self._worker_stop_event.wait(interval):
             try:
-                if self.config.enable_incremental_consolidate:
-                    self._consolidate_long_term_step()
-                else:
+                if not self.config.enable_incremental_consolidate:
                     self._consolidate_long_term_full()
+                elif self._consolidation_scheduler is not None:
+                    interval = self._run_scheduled_consolidate_tick()
+                else:
+                    self._consolidate_long_term_step()
             except Exception:
                 # Worker failures should not kill user requests.
                 continue
 
-    def _consolidate_long_term_step(self) -> dict:
+    def _run_scheduled_consolidate_tick(self) -> float:
+        """按调度决策执行（或跳过）一轮增量 consolidate，返回下一次 tick 的等待秒数。"""
+        scheduler = self._consolidation_scheduler
+        decision = scheduler.decide(self.long_term.generation)
+        if decision.batch_size > 0:
+            step = self._consolidate_long_term_step(
+                batch_size=decision.batch_size,
+                time_budget_ms=decision.time_budget_ms,
+            )
+            scheduler.observe_step(step, self.long_term.generation)
+        return decision.next_interval
+
+    def _consolidate_long_term_step(
+        self,
+        batch_size: Optional[int] = None,
+        time_budget_ms: Optional[int] = None,
+    ) -> dict:
         """
         执行一次预算驱动的增量 consolidate。
 
         步骤：
         1. 在写锁内调用 long_term.consolidate_step，按 batch/time budget 小步推进；
+           batch_size/time_budget_ms 缺省取配置值，自适应调度追赶时会放大；
         2. 统一返回本轮去重/衰减/强化统计。
         """
+        if batch_size is None:
+            batch_size = self.config.consolidate_batch_size
+        if time_budget_ms is None:
+            time_budget_ms = self.config.consolidate_time_budget_ms
         with self._long_term_write_lock:
             step = self.long_term.consolidate_step(
                 decay_engine=self.decay_engine,
                 compressor=self.compressor,
-                batch_size=max(int(self.config.consolidate_batch_size), 1),
-                time_budget_ms=max(int(self.config.consolidate_time_budget_ms), 1),
+                batch_size=max(int(batch_size), 1),
+                time_budget_ms=max(int(time_budget_ms), 1),
                 cursor_reset_hours=max(int(self.config.consolidate_cursor_reset_hours), 1),
                 low_importance_delete_threshold=float(self.config.low_importance_delete_threshold),
                 high_importance_reinforce_threshold=float(
@@ -527,6 +702,10 @@ class Memory:
             self._flush_pending_access_counts(max_items=None)
 
         self._executor.shutdown(wait=True, cancel_futures=False)
+        self.signal_extractor.close()
+        self.overflow_processor.close()
+        if self._group_writer is not None:
+            self._group_writer.close()
         with self._long_term_write_lock:
             self.long_term.close()
 
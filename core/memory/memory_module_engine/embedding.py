@@ -2,7 +2,9 @@
 from collections import OrderedDict
 from threading import RLock
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
+
+from .embedding_cache import PersistentEmbeddingCache
 
 
 class EmbeddingProvider(ABC):
@@ -30,6 +32,7 @@ class OpenAIEmbedding(EmbeddingProvider):
         base_url: str = None,
         cache_enabled: bool = True,
         cache_max_entries: int = 4096,
+        persistent_cache: Optional[PersistentEmbeddingCache] = None,
     ):
         from openai import OpenAI
         self.client = OpenAI(api_key=api_key, base_url=base_url)
@@ -39,10 +42,20 @@ class OpenAIEmbedding(EmbeddingProvider):
         self.cache_max_entries = max(int(cache_max_entries), 1)
         self._cache: OrderedDict[str, List[float]] = OrderedDict()
         self._cache_lock = RLock()
+        # 磁盘缓存位于内存 LRU 之后：内存未命中再查磁盘，磁盘未命中才调用 API。
+        self.persistent_cache = persistent_cache if self.cache_enabled else None
+        self._cache_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
 
     def _cache_key(self, text: str) -> str:
         # 缓存 key 使用模型与维度，避免多模型场景冲突。
-        return f"{self.model}|{self.dimensions}|{text}"
+        return PersistentEmbeddingCache.make_key(self.model, self.dimensions, text)
+
+    def _remember(self, key: str, embedding: List[float]):
+        with self._cache_lock:
+            self._cache[key] = embedding
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
 
     def encode(self, text: str) -> List[float]:
         if self.cache_enabled:
@@ -51,9 +64,21 @@ class OpenAIEmbedding(EmbeddingProvider):
                 cached = self._cache.get(key)
                 if cached is not None:
                     self._cache.move_to_end(key)
+                    self._cache_stats["memory_hits"] += 1
                     # 返回副本，避免外部修改污染缓存。
                     return list(cached)
 
+            if self.persistent_cache is not None:
+                stored = self.persistent_cache.get(key)
+                if stored is not None:
+                    with self._cache_lock:
+                        self._cache_stats["disk_hits"] += 1
+                    self._remember(key, stored)
+                    return list(stored)
+
+            with self._cache_lock:
+                self._cache_stats["misses"] += 1
+
         response = self.client.embeddings.create(
             model=self.model,
             input=text,
@@ -62,13 +87,25 @@ class OpenAIEmbedding(EmbeddingProvider):
         embedding = list(response.data[0].embedding)
 
         if self.cache_enabled:
-            with self._cache_lock:
-                self._cache[key] = embedding
-                self._cache.move_to_end(key)
-                while len(self._cache) > self.cache_max_entries:
-                    self._cache.popitem(last=False)
+            # 磁盘层按 float32 存储：先统一精度，首次调用与之后的内存 / 磁盘命中结果一致。
+            embedding = PersistentEmbeddingCache.to_float32(embedding)
+            self._remember(key, embedding)
+            if self.persistent_cache is not None:
+                self.persistent_cache.put(key, embedding)
 
         return embedding
 
+    def cache_stats(self) -> dict:
+        with self._cache_lock:
+            stats = dict(self._cache_stats)
+            stats["memory_entries"] = len(self._cache)
+        if self.persistent_cache is not None:
+            stats["disk"] = self.persistent_cache.stats()
+        return stats
+
+    def close(self):
+        if self.persistent_cache is not None:
+            self.persistent_cache.close()
+
     def get_dimension(self) -> int:
         return self.dimensions
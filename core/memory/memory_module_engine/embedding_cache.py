@@ -0,0 +1,165 @@
+"""SQLite-backed persistent embedding cache."""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from hashlib import sha1
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class PersistentEmbeddingCache:
+    """
+    跨进程/跨重启共享的 embedding 磁盘缓存。
+
+    - key: ``model|dim|sha1(text)``，避免多模型/多维度冲突；
+    - value: float32 紧凑 blob（numpy tobytes）；
+    - 超过 max_entries 时按 last_access 淘汰最久未访问的条目。
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 200_000, evict_ratio: float = 0.1):
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+        self.db_path = db_path
+        self.max_entries = max(int(max_entries), 1)
+        # 每次淘汰多删一部分，避免在容量边界上每次写入都触发删除。
+        self.evict_ratio = min(max(float(evict_ratio), 0.0), 0.9)
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.RLock()
+        self._closed = False
+        self._init_table()
+
+        # 命中只在内存里记录访问时间，随下一次写入批量落库，避免读路径产生写事务。
+        self._pending_touches: Dict[str, float] = {}
+        self._count = int(self._db.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0])
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _init_table(self):
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                key TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_access ON embedding_cache(last_access)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def to_float32(embedding: List[float]) -> List[float]:
+        """按磁盘存储精度（float32）取整，内存层 / API 结果与磁盘命中返回完全相同的值。"""
+        return np.asarray(embedding, dtype=np.float32).astype(float).tolist()
+
+    @staticmethod
+    def make_key(model: str, dimensions: int, text: str) -> str:
+        digest = sha1(str(text or "").encode("utf-8")).hexdigest()
+        return f"{model}|{int(dimensions)}|{digest}"
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            if self._closed:
+                return None
+            row = self._db.execute(
+                "SELECT dim, vector FROM embedding_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._pending_touches[key] = time.time()
+
+        dim, blob = int(row[0]), row[1]
+        vector = np.frombuffer(blob, dtype=np.float32)
+        if vector.shape[0] != dim:
+            return None
+        return vector.astype(float).tolist()
+
+    def put(self, key: str, embedding: List[float]):
+        vector = np.asarray(embedding, dtype=np.float32)
+        now = time.time()
+        with self._lock:
+            if self._closed:
+                return
+            cursor = self._db.execute(
+                """
+                INSERT OR IGNORE INTO embedding_cache(key, dim, vector, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, int(vector.shape[0]), vector.tobytes(), now, now),
+            )
+            if cursor.rowcount > 0:
+                self._count += 1
+                self._stats["writes"] += 1
+            self._flush_touches_locked()
+            if self._count > self.max_entries:
+                self._evict_locked()
+            self._db.commit()
+
+    def _flush_touches_locked(self):
+        if not self._pending_touches:
+            return
+        self._db.executemany(
+            "UPDATE embedding_cache SET last_access = ? WHERE key = ?",
+            [(ts, key) for key, ts in self._pending_touches.items()],
+        )
+        self._pending_touches.clear()
+
+    def _evict_locked(self):
+        target = int(self.max_entries * (1.0 - self.evict_ratio))
+        overflow = self._count - target
+        if overflow <= 0:
+            return
+        cursor = self._db.execute(
+            """
+            DELETE FROM embedding_cache
+            WHERE key IN (
+                SELECT key FROM embedding_cache ORDER BY last_access ASC LIMIT ?
+            )
+            """,
+            (overflow,),
+        )
+        removed = max(int(cursor.rowcount), 0)
+        self._stats["evictions"] += removed
+        # 多进程共享同一文件时本地计数可能漂移，淘汰后以实际行数校准。
+        self._count = int(self._db.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": self._count,
+                "max_entries": self.max_entries,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self._flush_touches_locked()
+                self._db.commit()
+            finally:
+                self._closed = True
+                self._db.close()
@@ -0,0 +1,111 @@
+"""Group-commit writer: coalesce concurrent long-term writes into one transaction."""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+from .models import MemoryItem
+
+
+class GroupCommitWriter:
+    """
+    组提交写入器。
+
+    调用方 submit 一组记忆后拿到 Future；后台线程从第一组到达起最多等待 max_delay_ms，
+    或累计到 max_items 条即刻落库，把这段时间内所有提交合并为一次 write_fn 调用
+    （LongTermMemory.add_many：一个事务 + 一次批量向量 upsert）。
+    合并批次失败时按提交逐组重试，单组的坏数据不会拖累同批其它调用方。
+    """
+
+    def __init__(
+        self,
+        write_fn: Callable[[List[MemoryItem]], object],
+        max_delay_ms: int = 5,
+        max_items: int = 32,
+    ):
+        self._write_fn = write_fn
+        self.max_delay_s = max(int(max_delay_ms), 0) / 1000.0
+        self.max_items = max(int(max_items), 1)
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[List[MemoryItem], Future]] = []
+        self._queued_items = 0
+        self._stopping = False
+        self._stats = {"batches": 0, "items": 0, "submissions": 0, "retried_batches": 0}
+        self._thread = threading.Thread(target=self._loop, name="memory-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, items: List[MemoryItem]) -> Future:
+        future: Future = Future()
+        items = list(items)
+        if not items:
+            future.set_result([])
+            return future
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("group commit writer is closed")
+            self._queue.append((items, future))
+            self._queued_items += len(items)
+            self._stats["submissions"] += 1
+            self._cond.notify_all()
+        return future
+
+    def write(self, items: List[MemoryItem], timeout: Optional[float] = None) -> List[str]:
+        """提交并等待落库完成（同步语义，供原有单条写入路径使用）。"""
+        return self.submit(items).result(timeout=timeout)
+
+    def _take_batch(self) -> List[Tuple[List[MemoryItem], Future]]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or self._stopping)
+            if not self._queue:
+                return []
+            deadline = time.monotonic() + self.max_delay_s
+            while self._queued_items < self.max_items and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+            batch = self._queue
+            self._queue = []
+            self._queued_items = 0
+            return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            merged = [item for items, _ in batch for item in items]
+            try:
+                self._write_fn(merged)
+            except Exception:
+                self._stats["retried_batches"] += 1
+                self._write_individually(batch)
+                continue
+            self._stats["batches"] += 1
+            self._stats["items"] += len(merged)
+            for items, future in batch:
+                future.set_result([item.id for item in items])
+
+    def _write_individually(self, batch: List[Tuple[List[MemoryItem], Future]]) -> None:
+        for items, future in batch:
+            try:
+                self._write_fn(items)
+            except Exception as exc:
+                future.set_exception(exc)
+                continue
+            self._stats["batches"] += 1
+            self._stats["items"] += len(items)
+            future.set_result([item.id for item in items])
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self._stats, "queued_items": self._queued_items}
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """停止接收新提交，已排队的提交会在退出前落库。"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
@@ -0,0 +1,171 @@
+"""Micro-batcher that packs concurrent LLM jobs into one structured call."""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+JobT = TypeVar("JobT")
+ResultT = TypeVar("ResultT")
+
+
+class LLMMicroBatcher(Generic[JobT, ResultT]):
+    """
+    LLM 微批处理器。
+
+    调用方 submit 单个作业拿到 Future；后台线程从第一个作业到达起最多等待 max_delay_ms，
+    或累计到 max_batch_size 个即发起一次 batch_fn 调用（一次结构化 LLM 请求处理多条），
+    结果按下标映射回各自的 Future。
+    batch_fn 抛异常或某个下标缺失时对应结果为 None，由调用方回退到中性结果；
+    调用方等待超时（wait）同样返回 None，不阻塞写路径。
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[JobT]], Sequence[Optional[ResultT]]],
+        max_batch_size: int = 8,
+        max_delay_ms: int = 20,
+        name: str = "memory-llm-batcher",
+    ):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.max_delay_s = max(int(max_delay_ms), 0) / 1000.0
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[JobT, Future]] = []
+        self._stopping = False
+        self._stats = {"jobs": 0, "batches": 0, "failed_batches": 0, "timeouts": 0}
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, job: JobT) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._stopping:
+                future.set_result(None)
+                return future
+            self._queue.append((job, future))
+            self._stats["jobs"] += 1
+            self._cond.notify_all()
+        return future
+
+    def wait(self, future: Future, timeout: Optional[float]) -> Optional[ResultT]:
+        """等待结果；超时返回 None（后台请求继续执行，结果被丢弃）。"""
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            with self._cond:
+                self._stats["timeouts"] += 1
+            return None
+
+    def run_many(self, jobs: Sequence[JobT], timeout: Optional[float]) -> List[Optional[ResultT]]:
+        """提交一组作业并在同一截止时间内等待全部结果。"""
+        futures = [self.submit(job) for job in jobs]
+        deadline = None if timeout is None else time.monotonic() + max(float(timeout), 0.0)
+        results: List[Optional[ResultT]] = []
+        for future in futures:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            results.append(self.wait(future, remaining))
+        return results
+
+    def _take_batch(self) -> List[Tuple[JobT, Future]]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or self._stopping)
+            if not self._queue:
+                return []
+            deadline = time.monotonic() + self.max_delay_s
+            while len(self._queue) < self.max_batch_size and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+            batch = self._queue[: self.max_batch_size]
+            self._queue = self._queue[self.max_batch_size :]
+            return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            try:
+                results = list(self._batch_fn([job for job, _ in batch]))
+            except Exception:
+                results = []
+                with self._cond:
+                    self._stats["failed_batches"] += 1
+            with self._cond:
+                self._stats["batches"] += 1
+            for idx, (_, future) in enumerate(batch):
+                future.set_result(results[idx] if idx < len(results) else None)
+
+    def stats(self) -> dict:
+        with self._cond:
+            batches = self._stats["batches"]
+            return {
+                **self._stats,
+                "queued": len(self._queue),
+                "avg_batch_size": round(self._stats["jobs"] / batches, 3) if batches else 0.0,
+            }
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """停止接收新作业；已排队的作业在退出前处理完。"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+
+
+def chat_json(
+    *,
+    api_key: str,
+    base_url: str,
+    timeout_seconds: float,
+    model: str,
+    temperature: float,
+    system_prompt: str,
+    user_prompt: str,
+    schema_name: str,
+    schema: dict,
+) -> dict:
+    """发起一次 json_schema 约束的 chat 请求并解析结果（openai 未安装或请求失败时抛异常）。"""
+    from openai import OpenAI
+
+    client = OpenAI(api_key=api_key, base_url=base_url or None, timeout=timeout_seconds)
+    resp = client.chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        response_format={
+            "type": "json_schema",
+            "json_schema": {"name": schema_name, "strict": True, "schema": schema},
+        },
+    )
+    return json.loads(resp.choices[0].message.content or "")
+
+
+def map_items_by_index(parsed: object, count: int, value_getter: Callable[[dict], object]) -> List[Optional[object]]:
+    """
+    把批量响应 {"items": [{"index": 1, ...}, ...]} 按 1 起始下标映射回输入顺序。
+
+    越界、重复（保留首个）或缺失的下标对应 None。
+    """
+    results: List[Optional[object]] = [None] * count
+    items = parsed.get("items") if isinstance(parsed, dict) else None
+    if not isinstance(items, list):
+        return results
+    for entry in items:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            position = int(entry.get("index")) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= position < count and results[position] is None:
+            results[position] = value_getter(entry)
+    return results
@@ -1,4 +1,4 @@
-"""Long-term memory store (SQLite + Qdrant + FTS)."""
+"""Long-term memory store (SQLite + vector index + FTS)."""
 from __future__ import annotations
 
 import json
@@ -6,19 +6,52 @@ import os
 import sqlite3
 import threading
 import time
-from typing import Dict, Iterable, List, Optional
-
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
-
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .minhash import (
+    MINHASH_VERSION,
+    estimate_jaccard,
+    lsh_buckets,
+    minhash_signature,
+    signature_from_blob,
+    signature_to_blob,
+)
 from .models import MemoryItem, MemoryMetadata
+from .read_pool import ReadConnectionPool
+from .schema import (
+    CREATE_MEMORIES,
+    cold_metadata_json,
+    infer_memory_type,
+    migrate_memories_schema,
+)
 from .utils import DecayEngine, MemoryCompressor, clamp, normalize_text, tokenize
+from .vector_store import VectorStore, build_vector_store
 
 
 class LongTermMemory:
     """Persistent long-term memory with hybrid retrieval support."""
 
-    def __init__(self, storage_path: str, vector_dim: int = 384):
+    # FTS 同步方式版本：2 = 触发器增量维护（rowid 与 memories 对齐）。
+    FTS_SCHEMA_VERSION = "2"
+    # 统计计数器版本：变更计数键或分桶规则时递增，启动时按 GROUP BY 重建一次。
+    STATS_SCHEMA_VERSION = "1"
+    IMPORTANCE_BUCKETS = 10
+    # 年龄直方图边界（天），最后一档为 ">= 最大边界"。
+    AGE_BUCKET_DAYS = (1, 7, 30, 90)
+    # 全量去重时，签名估计的 Jaccard 低于 threshold - 该余量的候选对直接跳过精判。
+    MINHASH_PREFILTER_MARGIN = 0.15
+    # 检索排序只需要的热字段列（不读 metadata JSON）。
+    HOT_COLUMNS = "id, content, importance, recall_count, created_at, state, half_life_days, confidence"
+
+    def __init__(
+        self,
+        storage_path: str,
+        vector_dim: int = 384,
+        vector_backend: str = "qdrant",
+        read_pool_size: int = 4,
+        vector_options: Optional[dict] = None,
+        vector_flush_interval_sec: float = 5.0,
+    ):
         os.makedirs(storage_path, exist_ok=True)
 
         db_path = os.path.join(storage_path, "memory.db")
@@ -31,46 +64,111 @@ class LongTermMemory:
         self._write_db.row_factory = sqlite3.Row
         self._write_db.execute("PRAGMA journal_mode=WAL")
         self._write_db.execute("PRAGMA busy_timeout=5000")
+        # REPLACE 冲突删除时也触发 delete 触发器，保证 FTS 不残留旧行。
+        self._write_db.execute("PRAGMA recursive_triggers=ON")
 
-        # 读连接：检索只读查询走这条连接，尽量避免与写事务互相阻塞。
-        # isolation_level=None 使用 autocommit 读，缩短读事务生命周期。
-        self._read_db = sqlite3.connect(
-            db_path,
-            check_same_thread=False,
-            isolation_level=None,
-        )
-        self._read_db.row_factory = sqlite3.Row
-        self._read_db.execute("PRAGMA journal_mode=WAL")
-        self._read_db.execute("PRAGMA busy_timeout=5000")
-        self._read_db.execute("PRAGMA query_only=1")
+        # 读连接池：检索只读查询按调用借出一条只读连接，WAL 下多会话检索可并行，
+        # 也不与写事务互相阻塞。
+        self._read_pool = ReadConnectionPool(db_path, size=read_pool_size)
 
         self._write_lock = threading.RLock()
-        self._read_lock = threading.RLock()
-        # 延迟向量删除集合：用于“DB 事务先提交，再删向量”保证一致性。
+        # 延迟向量操作：用于“DB 事务先提交，再写/删向量”保证一致性。
         self._pending_vector_deletes: set[str] = set()
+        self._pending_vector_upserts: dict[str, tuple] = {}
+        # 外层事务内是否有影响检索结果的行变更（不含向量），提交后据此决定是否递增代数。
+        self._pending_rows_changed = False
+        # 存储代数：任何影响检索结果的写入在“DB 提交 + 向量同步”完成后递增，
+        # 供上层检索缓存判定失效（访问计数不影响排序，不递增）。
+        self._generation = 0
+        self._generation_lock = threading.Lock()
 
-        self.vector_store = QdrantClient(path=os.path.join(storage_path, "vectors"))
         self.vector_dim = vector_dim
-        self.collection_name = f"long_term_{self.vector_dim}"
+        # 向量索引后端可插拔：qdrant（local mode）/ flat（内存映射精确检索）/
+        # flat_q8（int8 量化 + 可选降维，全精度重排）/ hnsw（可选依赖）。
+        self.vector_store: VectorStore = build_vector_store(
+            vector_backend,
+            storage_path,
+            vector_dim,
+            **(vector_options or {}),
+        )
 
         self._init_tables()
-        self._init_collection()
+
+        # 向量索引不在每次写入后落盘（hnsw 全量保存是 O(N)），由后台线程定时 flush、close 时兜底。
+        self._vector_flush_interval = max(float(vector_flush_interval_sec or 0.0), 0.0)
+        self._vector_flush_stop = threading.Event()
+        self._vector_flush_thread: Optional[threading.Thread] = None
+        if self._vector_flush_interval > 0:
+            self._vector_flush_thread = threading.Thread(
+                target=self._vector_flush_loop,
+                name="memory-vector-flush",
+                daemon=True,
+            )
+            self._vector_flush_thread.start()
+
+    def _vector_flush_loop(self):
+        while not self._vector_flush_stop.wait(self._vector_flush_interval):
+            try:
+                self.vector_store.flush()
+            except Exception:
+                continue
+
+    def reconcile_vectors(self, encode: Callable[[str], List[float]]) -> dict:
+        """
+        启动对账：以 SQLite 为准修复向量索引。
+
+        - SQLite 中存在但索引缺失的记忆重新编码并写入（上次落盘后崩溃丢失的写入）；
+        - 索引中存在但 SQLite 已删除的 id 从索引移除（崩溃前未落盘的删除）。
+        无法枚举 id 的后端（qdrant）跳过。
+        """
+        indexed = self.vector_store.ids()
+        if indexed is None:
+            return {"checked": False, "restored": 0, "removed": 0}
+        with self._read_pool.connection() as conn:
+            rows = conn.execute("SELECT id, content FROM memories").fetchall()
+        db_ids = {row["id"] for row in rows}
+        stale = [memory_id for memory_id in indexed if memory_id not in db_ids]
+        missing = [row for row in rows if row["id"] not in indexed]
+        if stale:
+            self.vector_store.delete(stale)
+        restored = 0
+        if missing:
+            items = {item.id: item for item in self.get_by_ids([row["id"] for row in missing])}
+            points = []
+            for row in missing:
+                item = items.get(row["id"])
+                if item is None:
+                    continue
+                try:
+                    embedding = encode(row["content"])
+                except Exception:
+                    # 编码失败的记忆留待下次启动再补。
+                    continue
+                points.append(self._vector_point(row["id"], embedding, item))
+            if points:
+                self.vector_store.upsert(points)
+                restored = len(points)
+        if stale or restored:
+            self.vector_store.flush()
+            self._bump_generation()
+        return {"checked": True, "restored": restored, "removed": len(stale)}
+
+    @property
+    def generation(self) -> int:
+        with self._generation_lock:
+            return self._generation
+
+    def _bump_generation(self):
+        with self._generation_lock:
+            self._generation += 1
+
+    def read_pool_stats(self) -> dict:
+        """读连接池争用指标（借出次数、等待次数/耗时、当前占用）。"""
+        return self._read_pool.stats()
 
     def _init_tables(self):
         db = self._write_db
-        db.execute(
-            """
-            CREATE TABLE IF NOT EXISTS memories (
-                id TEXT PRIMARY KEY,
-                content TEXT NOT NULL,
-                importance REAL DEFAULT 0.5,
-                recall_count INTEGER DEFAULT 0,
-                metadata TEXT NOT NULL,
-                created_at REAL NOT NULL,
-                updated_at REAL NOT NULL
-            )
-            """
-        )
+        db.execute(CREATE_MEMORIES)
         db.execute(
             """
             CREATE TABLE IF NOT EXISTS consolidation_state (
@@ -80,41 +178,23 @@ class LongTermMemory:
             )
             """
         )
-        self._validate_memories_schema()
+        self._migrate_memories_schema()
         self._init_indexes()
         self._init_fts()
+        self._init_stats()
+        self._init_lsh()
         # 初始化时将cursor置为0
         self._set_state_value_locked("cursor_rowid", "0")
         db.commit()
 
-    def _validate_memories_schema(self):
+    def _migrate_memories_schema(self):
         """
-        严格校验 memories 表结构是否与当前版本一致。
+        校验并升级 memories 表结构（PRAGMA user_version）。
 
-        该项目已移除历史迁移/兼容逻辑；若本地仍使用旧库结构，
-        直接抛错并提示清理 `memory_data` 后重建。
+        v1 库会在此自动迁移到类型化列（一次性 O(n)），也可提前用
+        scripts/migrate_memory_db.py 离线迁移；无法识别的结构直接抛错。
         """
-        expected_columns = {
-            "id",
-            "content",
-            "importance",
-            "recall_count",
-            "metadata",
-            "created_at",
-            "updated_at",
-        }
-        actual_columns = self._table_columns(self._write_db, "memories")
-        if actual_columns != expected_columns:
-            raise RuntimeError(
-                "Unsupported memories schema detected. "
-                "Expected columns: "
-                f"{sorted(expected_columns)}, got: {sorted(actual_columns)}. "
-                "Please reset storage (e.g. remove memory_data/memory.db) and reinitialize."
-            )
-
-    def _table_columns(self, conn: sqlite3.Connection, table_name: str) -> set[str]:
-        rows = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
-        return {row["name"] for row in rows}
+        migrate_memories_schema(self._write_db)
 
     def _init_indexes(self):
         db = self._write_db
@@ -124,8 +204,21 @@ class LongTermMemory:
         db.execute(
             "CREATE INDEX IF NOT EXISTS idx_memories_created_at ON memories(created_at DESC)"
         )
+        # 热字段过滤（state != 'archived' + importance 阈值）直接走索引。
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memories_state_importance ON memories(state, importance DESC)"
+        )
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memories_memory_type ON memories(memory_type)"
+        )
 
     def _init_fts(self):
+        """
+        初始化 FTS 并安装增量同步触发器。
+
+        memories_fts 的 rowid 与 memories.rowid 对齐，触发器按 rowid 增删，
+        写路径无需再手动维护 FTS。启动时只做 O(1) 的漂移检查，检测到不一致才全量重建。
+        """
         db = self._write_db
         db.execute(
             """
@@ -133,116 +226,483 @@ class LongTermMemory:
             USING fts5(id UNINDEXED, content, tokenize='unicode61')
             """
         )
-        self._rebuild_fts()
+        db.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
+                INSERT INTO memories_fts(rowid, id, content) VALUES (new.rowid, new.id, new.content);
+            END
+            """
+        )
+        db.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
+                DELETE FROM memories_fts WHERE rowid = old.rowid;
+            END
+            """
+        )
+        db.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS memories_fts_au AFTER UPDATE OF content ON memories
+            WHEN old.content IS NOT new.content BEGIN
+                DELETE FROM memories_fts WHERE rowid = old.rowid;
+                INSERT INTO memories_fts(rowid, id, content) VALUES (new.rowid, new.id, new.content);
+            END
+            """
+        )
+        if not self._fts_in_sync():
+            self._rebuild_fts()
+
+    def _fts_in_sync(self) -> bool:
+        """
+        启动期轻量一致性检查（与记忆条数无关）。
+
+        - 同步版本标记缺失：旧库由全量重建维护，rowid 未对齐，需要重建一次；
+        - 两表最大 rowid 不一致：说明存在绕过触发器的写入或中断，需要重建。
+        """
+        row = self._write_db.execute(
+            "SELECT value FROM consolidation_state WHERE key = ?",
+            ("fts_schema_version",),
+        ).fetchone()
+        if row is None or row["value"] != self.FTS_SCHEMA_VERSION:
+            return False
+        mem_max = self._write_db.execute("SELECT MAX(rowid) AS m FROM memories").fetchone()["m"]
+        fts_max = self._write_db.execute("SELECT MAX(rowid) AS m FROM memories_fts").fetchone()["m"]
+        return mem_max == fts_max
+
+    def check_fts_consistency(self, repair: bool = True) -> dict:
+        """
+        全量一致性检查（按条数 + 最大 rowid 对比），供运维或测试显式调用。
+
+        repair=True 时检测到漂移会直接重建。
+        """
+        with self._write_lock:
+            mem_count = self._write_db.execute("SELECT COUNT(*) AS c FROM memories").fetchone()["c"]
+            fts_count = self._write_db.execute("SELECT COUNT(*) AS c FROM memories_fts").fetchone()["c"]
+            drift = mem_count != fts_count or not self._fts_in_sync()
+            rebuilt = False
+            if drift and repair:
+                self._rebuild_fts()
+                self._write_db.commit()
+                self._bump_generation()
+                rebuilt = True
+        return {
+            "memories": int(mem_count),
+            "fts_rows": int(fts_count),
+            "drift": bool(drift),
+            "rebuilt": rebuilt,
+        }
 
     def _rebuild_fts(self):
         db = self._write_db
         db.execute("DELETE FROM memories_fts")
         db.execute(
             """
-            INSERT INTO memories_fts(id, content)
-            SELECT id, content
+            INSERT INTO memories_fts(rowid, id, content)
+            SELECT rowid, id, content
             FROM memories
             """
         )
+        self._set_state_value_locked("fts_schema_version", self.FTS_SCHEMA_VERSION)
+
+    def _init_stats(self):
+        """
+        初始化 memory_stats 计数表并安装维护触发器。
+
+        计数键：total / importance_sum / state:<s> / type:<t> / store:<s> /
+        importance_bucket:<0-9>。所有写路径（含 consolidate 的删改）都经触发器
+        在同一事务内增量更新，get_stats 只需读取几十行计数，不再全表加载。
+        """
+        db = self._write_db
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS memory_stats (
+                key TEXT PRIMARY KEY,
+                value REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        bucket = (
+            "MAX(MIN(CAST({row}.importance * "
+            f"{self.IMPORTANCE_BUCKETS} AS INTEGER), {self.IMPORTANCE_BUCKETS - 1}), 0)"
+        )
 
-    def _init_collection(self):
-        collections = [c.name for c in self.vector_store.get_collections().collections]
-        if self.collection_name not in collections:
-            self.vector_store.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(size=self.vector_dim, distance=Distance.COSINE),
+        def _bump(row: str, sign: str) -> str:
+            # 每个计数键一条 UPSERT；sign 为 '+' 或 '-'。
+            keys = (
+                ("'total'", "1"),
+                ("'importance_sum'", f"{row}.importance"),
+                (f"'state:' || {row}.state", "1"),
+                (f"'type:' || {row}.memory_type", "1"),
+                (f"'store:' || {row}.store", "1"),
+                (f"'importance_bucket:' || {bucket.format(row=row)}", "1"),
+            )
+            return "\n".join(
+                f"INSERT INTO memory_stats(key, value) VALUES ({key}, {sign}{value}) "
+                f"ON CONFLICT(key) DO UPDATE SET value = value {sign} {value};"
+                for key, value in keys
             )
-            return
 
-        info = self.vector_store.get_collection(self.collection_name)
-        existing_dim = None
-        try:
-            existing_dim = info.config.params.vectors.size
-        except Exception:
-            existing_dim = self.vector_dim
-        if existing_dim != self.vector_dim:
-            self.collection_name = f"long_term_{self.vector_dim}_v2"
-            collections = [c.name for c in self.vector_store.get_collections().collections]
-            if self.collection_name not in collections:
-                self.vector_store.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=self.vector_dim, distance=Distance.COSINE),
+        db.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS memories_stats_ai AFTER INSERT ON memories BEGIN
+                {_bump("new", "+")}
+            END
+            """
+        )
+        db.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS memories_stats_ad AFTER DELETE ON memories BEGIN
+                {_bump("old", "-")}
+            END
+            """
+        )
+        db.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS memories_stats_au
+            AFTER UPDATE OF importance, state, store, memory_type ON memories
+            WHEN old.importance IS NOT new.importance
+              OR old.state IS NOT new.state
+              OR old.store IS NOT new.store
+              OR old.memory_type IS NOT new.memory_type
+            BEGIN
+                {_bump("old", "-")}
+                {_bump("new", "+")}
+            END
+            """
+        )
+        row = db.execute(
+            "SELECT value FROM consolidation_state WHERE key = ?",
+            ("stats_schema_version",),
+        ).fetchone()
+        if row is None or row["value"] != self.STATS_SCHEMA_VERSION:
+            self._rebuild_stats()
+
+    def _rebuild_stats(self):
+        """按 GROUP BY 全量重算计数（仅在首次启用或版本变更时执行）。"""
+        db = self._write_db
+        db.execute("DELETE FROM memory_stats")
+        db.execute(
+            """
+            INSERT INTO memory_stats(key, value)
+            SELECT 'total', COUNT(*) FROM memories
+            UNION ALL SELECT 'importance_sum', COALESCE(SUM(importance), 0) FROM memories
+            """
+        )
+        for column in ("state", "memory_type", "store"):
+            prefix = "type" if column == "memory_type" else column
+            db.execute(
+                f"""
+                INSERT INTO memory_stats(key, value)
+                SELECT '{prefix}:' || {column}, COUNT(*) FROM memories GROUP BY {column}
+                """
+            )
+        db.execute(
+            f"""
+            INSERT INTO memory_stats(key, value)
+            SELECT 'importance_bucket:' || bucket, COUNT(*)
+            FROM (
+                SELECT MAX(MIN(CAST(importance * {self.IMPORTANCE_BUCKETS} AS INTEGER),
+                               {self.IMPORTANCE_BUCKETS - 1}), 0) AS bucket
+                FROM memories
+            )
+            GROUP BY bucket
+            """
+        )
+        self._set_state_value_locked("stats_schema_version", self.STATS_SCHEMA_VERSION)
+
+    def rebuild_stats(self) -> dict:
+        """显式重算统计计数（运维修复入口），返回重算后的统计。"""
+        with self._write_lock:
+            self._rebuild_stats()
+            self._write_db.commit()
+        return self.get_stats()
+
+    def get_stats(self) -> dict:
+        """
+        读取长期记忆统计（计数器 + 索引范围计数），代价与记忆条数基本无关。
+
+        - total/by_state/by_type/by_store/avg_importance/importance_histogram 来自 memory_stats；
+        - age_histogram 基于 created_at 索引做少量范围 COUNT。
+        """
+        with self._read_pool.connection() as conn:
+            rows = conn.execute("SELECT key, value FROM memory_stats").fetchall()
+            now = time.time()
+            newer_than: list[int] = []
+            for days in self.AGE_BUCKET_DAYS:
+                count = conn.execute(
+                    "SELECT COUNT(*) AS c FROM memories WHERE created_at >= ?",
+                    (now - days * 86400.0,),
+                ).fetchone()["c"]
+                newer_than.append(int(count))
+
+        counters = {row["key"]: float(row["value"]) for row in rows}
+        total = int(counters.get("total", 0))
+
+        def _group(prefix: str) -> dict:
+            grouped = {}
+            for key, value in counters.items():
+                if key.startswith(prefix) and int(value) > 0:
+                    grouped[key[len(prefix):]] = int(value)
+            return dict(sorted(grouped.items()))
+
+        width = 1.0 / self.IMPORTANCE_BUCKETS
+        importance_histogram = {
+            f"{idx * width:.1f}-{(idx + 1) * width:.1f}": int(counters.get(f"importance_bucket:{idx}", 0))
+            for idx in range(self.IMPORTANCE_BUCKETS)
+        }
+
+        age_histogram = {}
+        lower_days = 0
+        lower_count = 0
+        for days, count in zip(self.AGE_BUCKET_DAYS, newer_than):
+            label = f"<{days}d" if lower_days == 0 else f"{lower_days}-{days}d"
+            age_histogram[label] = max(count - lower_count, 0)
+            lower_days, lower_count = days, count
+        age_histogram[f">={lower_days}d"] = max(total - lower_count, 0)
+
+        return {
+            "total": total,
+            "by_state": _group("state:"),
+            "by_type": _group("type:"),
+            "by_store": _group("store:"),
+            "avg_importance": round(counters.get("importance_sum", 0.0) / total, 6) if total else 0.0,
+            "importance_histogram": importance_histogram,
+            "age_histogram": age_histogram,
+        }
+
+    def _init_lsh(self):
+        """
+        初始化 MinHash/LSH 近重复索引。
+
+        - memories.minhash 持久化签名（NULL 表示待计算，由部分索引快速定位）；
+        - memory_lsh 保存 (bucket, memory_id)，bucket 为 band 哈希，删除由触发器同步；
+        - 签名参数变化时清空重算，启动时补算缺失签名（例如刚从 v2 迁移的库）。
+        """
+        db = self._write_db
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS memory_lsh (
+                bucket INTEGER NOT NULL,
+                memory_id TEXT NOT NULL,
+                PRIMARY KEY (bucket, memory_id)
+            ) WITHOUT ROWID
+            """
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_memory_lsh_memory_id ON memory_lsh(memory_id)")
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memories_minhash_missing ON memories(id) WHERE minhash IS NULL"
+        )
+        db.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS memories_lsh_ad AFTER DELETE ON memories BEGIN
+                DELETE FROM memory_lsh WHERE memory_id = old.id;
+            END
+            """
+        )
+        row = db.execute(
+            "SELECT value FROM consolidation_state WHERE key = ?",
+            ("minhash_version",),
+        ).fetchone()
+        if row is None or row["value"] != MINHASH_VERSION:
+            db.execute("DELETE FROM memory_lsh")
+            db.execute("UPDATE memories SET minhash = NULL")
+            self._set_state_value_locked("minhash_version", MINHASH_VERSION)
+        self._backfill_minhash()
+
+    def _backfill_minhash(self, batch_size: int = 500) -> int:
+        """为 minhash 为 NULL 的记录补算签名并写入 LSH 桶（调用方负责 commit）。"""
+        db = self._write_db
+        filled = 0
+        while True:
+            rows = db.execute(
+                "SELECT id, content FROM memories WHERE minhash IS NULL LIMIT ?",
+                (max(int(batch_size), 1),),
+            ).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                signature = self._content_signature(row["content"])
+                db.execute(
+                    "UPDATE memories SET minhash = ? WHERE id = ?",
+                    (signature_to_blob(signature), row["id"]),
                 )
+                self._index_lsh_locked(row["id"], signature)
+            filled += len(rows)
+        return filled
+
+    def _content_signature(self, content: str):
+        # 与 _near_duplicate_score 使用同一套 bigram，保证候选召回与精判口径一致。
+        return minhash_signature(self._char_ngrams(content))
+
+    def _index_lsh_locked(self, memory_id: str, signature):
+        db = self._write_db
+        db.execute("DELETE FROM memory_lsh WHERE memory_id = ?", (memory_id,))
+        buckets = lsh_buckets(signature)
+        if buckets:
+            db.executemany(
+                "INSERT OR IGNORE INTO memory_lsh(bucket, memory_id) VALUES (?, ?)",
+                [(bucket, memory_id) for bucket in buckets],
+            )
+
+    def _lsh_candidate_ids_write(self, memory_id: str, limit: int) -> list[str]:
+        """
+        LSH 近重复候选：与 memory_id 至少共享一个 band 桶的记录，按共享桶数降序。
+        """
+        rows = self._write_db.execute(
+            """
+            SELECT other.memory_id AS id, COUNT(*) AS hits
+            FROM memory_lsh AS own
+            JOIN memory_lsh AS other ON other.bucket = own.bucket
+            WHERE own.memory_id = ? AND other.memory_id != ?
+            GROUP BY other.memory_id
+            ORDER BY hits DESC
+            LIMIT ?
+            """,
+            (memory_id, memory_id, max(int(limit), 1)),
+        ).fetchall()
+        return [row["id"] for row in rows]
 
     def add(self, item: MemoryItem, commit: bool = True) -> str:
+        return self.add_many([item], commit=commit)[0]
+
+    def add_many(self, items: List[MemoryItem], commit: bool = True) -> List[str]:
+        """
+        批量写入长期记忆：一个 SQLite 事务 + 一次批量向量 upsert。
+
+        一致性顺序与删除路径一致：先提交 DB，再写向量；
+        commit=False 时向量写入延迟到外层事务提交后的 _flush_pending_vector_ops。
+        """
+        if not items:
+            return []
         now = time.time()
+        # 签名计算不依赖 DB，放在锁外。
+        prepared = [(item, self._content_signature(item.content)) for item in items]
+        points: list[tuple] = []
+        with self._write_lock:
+            try:
+                for item, signature in prepared:
+                    self._insert_locked(item, signature, now)
+                    if item.embedding:
+                        points.append(self._vector_point(item.id, item.embedding, item))
+                if commit:
+                    self._write_db.commit()
+            except Exception:
+                if commit:
+                    self._write_db.rollback()
+                raise
+            if not commit:
+                self._pending_rows_changed = True
+                for point in points:
+                    self._pending_vector_deletes.discard(point[0])
+                    self._pending_vector_upserts[point[0]] = point
+                return [item.id for item in items]
+        if points:
+            self.vector_store.upsert(points)
+        self._bump_generation()
+        return [item.id for item in items]
+
+    def _insert_locked(self, item: MemoryItem, signature, now: float):
         item.metadata.store = "long_term"
         item.metadata.created_at = item.metadata.created_at or now
+        # UPSERT 保留原 rowid（consolidate cursor 与 FTS rowid 都依赖它）。
+        self._write_db.execute(
+            """
+            INSERT INTO memories (
+                id, content, importance, recall_count, metadata, created_at, updated_at,
+                state, store, half_life_days, confidence, memory_type, minhash
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                content = excluded.content,
+                importance = excluded.importance,
+                recall_count = excluded.recall_count,
+                metadata = excluded.metadata,
+                created_at = excluded.created_at,
+                updated_at = excluded.updated_at,
+                state = excluded.state,
+                store = excluded.store,
+                half_life_days = excluded.half_life_days,
+                confidence = excluded.confidence,
+                memory_type = excluded.memory_type,
+                minhash = excluded.minhash
+            """,
+            (
+                item.id,
+                item.content,
+                float(item.importance),
+                int(item.recall_count),
+                cold_metadata_json(item.metadata),
+                float(item.metadata.created_at),
+                now,
+                item.metadata.state,
+                "long_term",
+                float(item.metadata.half_life_days),
+                float(item.metadata.confidence),
+                infer_memory_type(item.content),
+                signature_to_blob(signature),
+            ),
+        )
+        self._index_lsh_locked(item.id, signature)
 
+    def update_item(self, item: MemoryItem, update_vector: bool = False, commit: bool = True):
+        now = time.time()
         with self._write_lock:
-            self._write_db.execute(
+            previous = self._write_db.execute(
                 """
-                INSERT OR REPLACE INTO memories (
-                    id, content, importance, recall_count, metadata, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                SELECT content, importance, recall_count, metadata, state, half_life_days, confidence
+                FROM memories WHERE id = ?
                 """,
-                (
-                    item.id,
-                    item.content,
-                    float(item.importance),
-                    int(item.recall_count),
-                    json.dumps(item.metadata.to_dict(), ensure_ascii=False),
-                    float(item.metadata.created_at),
-                    now,
-                ),
+                (item.id,),
+            ).fetchone()
+            values = (
+                item.content,
+                float(item.importance),
+                int(item.recall_count),
+                cold_metadata_json(item.metadata),
+                item.metadata.state,
+                float(item.metadata.half_life_days),
+                float(item.metadata.confidence),
             )
-            self._upsert_fts(item.id, item.content)
-            if item.embedding:
-                self._upsert_vector(item.id, item.embedding, item)
-            if commit:
-                self._write_db.commit()
-        return item.id
-
-    def update_item(self, item: MemoryItem, update_vector: bool = False, commit: bool = True):
-        now = time.time()
-        with self._write_lock:
+            # 只有字段真的变化才算影响检索（consolidate 会回写大量未变的记录）。
+            changed = previous is not None and tuple(previous) != values
             self._write_db.execute(
                 """
                 UPDATE memories
-                SET content = ?, importance = ?, recall_count = ?, metadata = ?, updated_at = ?
+                SET content = ?, importance = ?, recall_count = ?, metadata = ?,
+                    state = ?, half_life_days = ?, confidence = ?, updated_at = ?, memory_type = ?
                 WHERE id = ?
                 """,
-                (
-                    item.content,
-                    float(item.importance),
-                    int(item.recall_count),
-                    json.dumps(item.metadata.to_dict(), ensure_ascii=False),
-                    now,
-                    item.id,
-                ),
+                (*values, now, infer_memory_type(item.content), item.id),
             )
-            self._upsert_fts(item.id, item.content)
+            # 仅内容变化（例如压缩）时重算签名，衰减/计数类更新不触碰 LSH。
+            if previous is not None and previous["content"] != item.content:
+                signature = self._content_signature(item.content)
+                self._write_db.execute(
+                    "UPDATE memories SET minhash = ? WHERE id = ?",
+                    (signature_to_blob(signature), item.id),
+                )
+                self._index_lsh_locked(item.id, signature)
             if update_vector and item.embedding:
                 self._upsert_vector(item.id, item.embedding, item)
-            if commit:
-                self._write_db.commit()
-
-    def _upsert_fts(self, memory_id: str, content: str):
-        self._write_db.execute("DELETE FROM memories_fts WHERE id = ?", (memory_id,))
-        self._write_db.execute(
-            "INSERT INTO memories_fts(id, content) VALUES (?, ?)",
-            (memory_id, content),
-        )
+                changed = True
+            if not commit:
+                self._pending_rows_changed = self._pending_rows_changed or changed
+                return
+            self._write_db.commit()
+            if changed:
+                self._bump_generation()
 
     def _upsert_vector(self, memory_id: str, embedding: list, item: MemoryItem):
-        self.vector_store.upsert(
-            collection_name=self.collection_name,
-            points=[
-                PointStruct(
-                    id=memory_id,
-                    vector=embedding,
-                    payload={
-                        "importance": float(item.importance),
-                        "state": item.metadata.state,
-                    },
-                )
-            ],
+        self.vector_store.upsert([self._vector_point(memory_id, embedding, item)])
+
+    @staticmethod
+    def _vector_point(memory_id: str, embedding: list, item: MemoryItem) -> tuple:
+        return (
+            memory_id,
+            embedding,
+            {
+                "importance": float(item.importance),
+                "state": item.metadata.state,
+            },
         )
 
     def delete(self, memory_id: str, commit: bool = True):
@@ -256,49 +716,55 @@ class LongTermMemory:
         """
         should_delete_vector = False
         with self._write_lock:
+            # FTS 行由 memories_fts_ad 触发器同步删除。
             self._write_db.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
-            self._write_db.execute("DELETE FROM memories_fts WHERE id = ?", (memory_id,))
             if commit:
                 self._write_db.commit()
                 should_delete_vector = True
             else:
+                self._pending_vector_upserts.pop(memory_id, None)
                 self._pending_vector_deletes.add(memory_id)
         if should_delete_vector:
-            self.vector_store.delete(collection_name=self.collection_name, points_selector=[memory_id])
+            self.vector_store.delete([memory_id])
+            self._bump_generation()
 
     def _get_by_id_with_conn(self, conn: sqlite3.Connection, memory_id: str) -> Optional[MemoryItem]:
         row = conn.execute("SELECT * FROM memories WHERE id = ?", (memory_id,)).fetchone()
         return self._row_to_item(row) if row else None
 
     def get_by_id(self, memory_id: str) -> Optional[MemoryItem]:
-        with self._read_lock:
-            return self._get_by_id_with_conn(self._read_db, memory_id)
+        with self._read_pool.connection() as conn:
+            return self._get_by_id_with_conn(conn, memory_id)
 
-    def _get_by_ids_with_conn(self, conn: sqlite3.Connection, memory_ids: Iterable[str]) -> List[MemoryItem]:
+    def _get_by_ids_with_conn(
+        self,
+        conn: sqlite3.Connection,
+        memory_ids: Iterable[str],
+        include_archived: bool = True,
+    ) -> List[MemoryItem]:
         memory_ids = list(memory_ids)
         if not memory_ids:
             return []
         placeholders = ", ".join(["?"] * len(memory_ids))
+        state_filter = "" if include_archived else " AND state != 'archived'"
         rows = conn.execute(
-            f"SELECT * FROM memories WHERE id IN ({placeholders})",
+            f"SELECT * FROM memories WHERE id IN ({placeholders}){state_filter}",
             tuple(memory_ids),
         ).fetchall()
         return [self._row_to_item(row) for row in rows]
 
     def get_by_ids(self, memory_ids: Iterable[str]) -> List[MemoryItem]:
-        with self._read_lock:
-            return self._get_by_ids_with_conn(self._read_db, memory_ids)
+        with self._read_pool.connection() as conn:
+            return self._get_by_ids_with_conn(conn, memory_ids)
 
     def _get_all_with_conn(self, conn: sqlite3.Connection, include_archived: bool = False) -> List[MemoryItem]:
-        rows = conn.execute("SELECT * FROM memories ORDER BY created_at DESC").fetchall()
-        items = [self._row_to_item(row) for row in rows]
-        if include_archived:
-            return items
-        return [item for item in items if item.metadata.state != "archived"]
+        state_filter = "" if include_archived else "WHERE state != 'archived' "
+        rows = conn.execute(f"SELECT * FROM memories {state_filter}ORDER BY created_at DESC").fetchall()
+        return [self._row_to_item(row) for row in rows]
 
     def get_all(self, include_archived: bool = False) -> List[MemoryItem]:
-        with self._read_lock:
-            return self._get_all_with_conn(self._read_db, include_archived=include_archived)
+        with self._read_pool.connection() as conn:
+            return self._get_all_with_conn(conn, include_archived=include_archived)
 
     def search_candidates(
         self,
@@ -317,6 +783,7 @@ class LongTermMemory:
             "keyword_score": float,
         }
         最终排序权重由 core 统一计算，这里只负责“召回 + 打底分数”。
+        item 只读取热字段列，冷 metadata 为默认值，不应再经 update_item 回写。
         """
         vector_scores = self._vector_candidates(query_embedding, limit * 3)
         keyword_scores = self._keyword_candidates(query_text, limit * 3)
@@ -325,21 +792,20 @@ class LongTermMemory:
             return []
 
         placeholders = ", ".join(["?"] * len(candidate_ids))
-        with self._read_lock:
-            rows = self._read_db.execute(
+        with self._read_pool.connection() as conn:
+            rows = conn.execute(
                 f"""
-                SELECT * FROM memories
+                SELECT {self.HOT_COLUMNS} FROM memories
                 WHERE id IN ({placeholders})
                   AND importance >= ?
+                  AND state != 'archived'
                 """,
                 (*candidate_ids, float(min_importance)),
             ).fetchall()
 
         items = []
         for row in rows:
-            item = self._row_to_item(row)
-            if item.metadata.state == "archived":
-                continue
+            item = self._row_to_item(row, with_cold=False)
             items.append(
                 {
                     "item": item,
@@ -351,18 +817,13 @@ class LongTermMemory:
 
     def _vector_candidates(self, query_embedding: List[float], limit: int) -> Dict[str, float]:
         try:
-            vector_results = self.vector_store.query_points(
-                collection_name=self.collection_name,
-                query=query_embedding,
-                limit=limit,
-            ).points
+            vector_results = self.vector_store.query(query_embedding, limit)
         except Exception:
             return {}
 
         scored: dict[str, float] = {}
-        for hit in vector_results:
-            mem_id = str(hit.id)
-            score = clamp((float(hit.score) + 1.0) / 2.0)
+        for mem_id, raw_score in vector_results:
+            score = clamp((float(raw_score) + 1.0) / 2.0)
             scored[mem_id] = max(scored.get(mem_id, 0.0), score)
         return scored
 
@@ -373,8 +834,8 @@ class LongTermMemory:
         match_query = " OR ".join(f"{tok}*" if len(tok) > 2 else tok for tok in tokens)
 
         try:
-            with self._read_lock:
-                rows = self._read_db.execute(
+            with self._read_pool.connection() as conn:
+                rows = conn.execute(
                     """
                     SELECT id, bm25(memories_fts) AS rank
                     FROM memories_fts
@@ -460,56 +921,35 @@ class LongTermMemory:
 
         更新字段：
         - recall_count: 累加访问次数；
-        - metadata: 回写规范化后的 metadata；
         - updated_at: 标记最近访问时间。
+
+        热字段已拆为独立列，这里是纯 SQL 增量更新，不再解析/回写 metadata JSON。
         """
         if not counts:
             return 0
 
-        with self._write_lock:
-            memory_ids = list(counts.keys())
-            placeholders = ", ".join(["?"] * len(memory_ids))
-            rows = self._write_db.execute(
-                f"SELECT id, recall_count, metadata FROM memories WHERE id IN ({placeholders})",
-                tuple(memory_ids),
-            ).fetchall()
-
-            now = time.time()
-            updates = []
-            touched = 0
-            for row in rows:
-                increment = int(counts.get(row["id"], 0))
-                if increment <= 0:
-                    continue
-
-                metadata_dict = {}
-                if row["metadata"]:
-                    try:
-                        metadata_dict = json.loads(row["metadata"])
-                    except json.JSONDecodeError:
-                        metadata_dict = {}
-
-                metadata = MemoryMetadata.from_dict(metadata_dict)
-                metadata.store = "long_term"
-                updates.append(
-                    (
-                        int(row["recall_count"] or 0) + increment,
-                        json.dumps(metadata.to_dict(), ensure_ascii=False),
-                        now,
-                        row["id"],
-                    )
-                )
-                touched += increment
+        now = time.time()
+        updates = [
+            (int(increment), now, memory_id)
+            for memory_id, increment in counts.items()
+            if int(increment) > 0
+        ]
+        if not updates:
+            return 0
 
-            if updates:
-                self._write_db.executemany(
+        touched = 0
+        with self._write_lock:
+            for increment, ts, memory_id in updates:
+                cursor = self._write_db.execute(
                     """
                     UPDATE memories
-                    SET recall_count = ?, metadata = ?, updated_at = ?
+                    SET recall_count = recall_count + ?, updated_at = ?
                     WHERE id = ?
                     """,
-                    updates,
+                    (increment, ts, memory_id),
                 )
+                if cursor.rowcount > 0:
+                    touched += increment
             if commit:
                 self._write_db.commit()
 
@@ -582,6 +1022,7 @@ class LongTermMemory:
                 SELECT rowid, *
                 FROM memories
                 WHERE rowid > ?
+                  AND state != 'archived'
                 ORDER BY rowid ASC
                 LIMIT ?
                 """,
@@ -650,11 +1091,11 @@ class LongTermMemory:
                 self._set_state_value_locked("cursor_rowid", str(last_rowid))
                 self._write_db.commit()
                 # 步骤4：事务成功后统一删向量，避免回滚不一致。
-                self._flush_pending_vector_deletes()
+                self._flush_pending_vector_ops()
             except Exception:
                 self._write_db.rollback()
                 # 事务失败时清理待删集合，避免脏状态泄漏到下一轮。
-                self._clear_pending_vector_deletes()
+                self._clear_pending_vector_ops()
                 raise
 
         elapsed_ms = int((time.monotonic() - start_ts) * 1000)
@@ -686,8 +1127,9 @@ class LongTermMemory:
         增量去重子步骤：仅处理当前 batch 源记忆。
 
         采用“候选召回 + 精判”：
-        - 候选集A：向量近邻；
-        - 候选集B：FTS 关键词候选；
+        - 候选集A：MinHash/LSH 词面近重复候选；
+        - 候选集B：向量近邻；
+        - 候选集C：FTS 关键词候选；
         - 精判：_near_duplicate_score。
 
         资源保护：
@@ -710,16 +1152,22 @@ class LongTermMemory:
             if source_item is None or source_item.metadata.state == "archived":
                 continue
 
-            # 候选集A：向量邻近候选（语义近似）。
+            # 候选集A：LSH 桶候选（字符 bigram 近重复）。
             candidate_ids = set(
+                self._lsh_candidate_ids_write(source_item.id, limit=dedupe_candidate_k)
+            )
+            # 候选集B：向量邻近候选（语义近似）。
+            candidate_ids.update(
                 self._vector_neighbor_ids(source_item.id, limit=dedupe_candidate_k)
             )
-            # 候选集B：关键词候选（词面近似）。
+            # 候选集C：关键词候选（词面近似）。
             candidate_ids.update(
                 self._keyword_candidate_ids_write(source_item.content, limit=dedupe_candidate_k)
             )
             candidate_ids.discard(source_item.id)
-            candidates = self._get_by_ids_with_conn(self._write_db, candidate_ids)
+            candidates = self._get_by_ids_with_conn(
+                self._write_db, candidate_ids, include_archived=False
+            )
 
             for candidate in candidates:
                 if time.monotonic() >= deadline:
@@ -845,46 +1293,16 @@ class LongTermMemory:
         """
         获取某条记忆的向量近邻 id。
 
-        查询策略：
-        - 优先使用“按 point id 查询近邻”；
-        - 若当前后端不支持该能力，则先 retrieve 向量，再用向量查询近邻。
+        查询策略由后端决定：Qdrant 优先按 point id 查询，其它后端读取已存向量后检索。
         """
         limit = max(int(limit), 1)
-        hits = []
         try:
-            hits = self.vector_store.query_points(
-                collection_name=self.collection_name,
-                query=memory_id,
-                limit=limit + 1,
-            ).points
+            hits = self.vector_store.query_by_id(memory_id, limit + 1)
         except Exception:
-            try:
-                points = self.vector_store.retrieve(
-                    collection_name=self.collection_name,
-                    ids=[memory_id],
-                    with_vectors=True,
-                )
-            except Exception:
-                return []
-            if not points:
-                return []
-            vector = points[0].vector
-            if isinstance(vector, dict):
-                vector = next(iter(vector.values()), None)
-            if not vector:
-                return []
-            try:
-                hits = self.vector_store.query_points(
-                    collection_name=self.collection_name,
-                    query=vector,
-                    limit=limit + 1,
-                ).points
-            except Exception:
-                return []
+            return []
 
         neighbor_ids: list[str] = []
-        for hit in hits:
-            candidate_id = str(hit.id)
+        for candidate_id, _ in hits:
             if candidate_id == memory_id:
                 continue
             neighbor_ids.append(candidate_id)
@@ -939,52 +1357,79 @@ class LongTermMemory:
             (key, value, now),
         )
 
-    def _flush_pending_vector_deletes(self):
+    def _flush_pending_vector_ops(self):
         """
-        提交后批量执行向量删除。
+        提交后批量执行延迟的向量写入与删除。
 
-        只在 DB 事务已经成功提交后调用，保证“先 DB 后向量”的一致性顺序。
+        只在 DB 事务已经成功提交后调用，保证“先 DB 后向量”的一致性顺序；
+        事务内确有行或向量变更时才递增存储代数（批量 consolidate/dedupe/decay 的提交点都会经过这里），
+        空转的 consolidate tick 不会让检索缓存失效。
         """
-        pending_ids: list[str] = []
         with self._write_lock:
-            if not self._pending_vector_deletes:
+            rows_changed = self._pending_rows_changed
+            self._pending_rows_changed = False
+            if not self._pending_vector_deletes and not self._pending_vector_upserts:
+                if rows_changed:
+                    self._bump_generation()
                 return
+            pending_points = list(self._pending_vector_upserts.values())
             pending_ids = list(self._pending_vector_deletes)
+            self._pending_vector_upserts.clear()
             self._pending_vector_deletes.clear()
 
+        if pending_points:
+            self.vector_store.upsert(pending_points)
         if pending_ids:
-            self.vector_store.delete(
-                collection_name=self.collection_name,
-                points_selector=pending_ids,
-            )
+            self.vector_store.delete(pending_ids)
+        self._bump_generation()
 
-    def _clear_pending_vector_deletes(self):
-        """回滚/异常时清空延迟删除集合，避免脏删除泄漏到下一事务。"""
+    def _clear_pending_vector_ops(self):
+        """回滚/异常时清空延迟向量操作，避免脏写/脏删泄漏到下一事务。"""
         with self._write_lock:
+            self._pending_vector_upserts.clear()
             self._pending_vector_deletes.clear()
+            self._pending_rows_changed = False
 
-    def dedupe_by_similarity(self, threshold: float = 0.92) -> dict:
+    def dedupe_by_similarity(self, threshold: float = 0.92, candidate_limit: int = 64) -> dict:
         """
         consolidate 子步骤 1：按内容近似度去重。
 
         规则：
+        - 候选对来自 MinHash/LSH 桶（每条记忆最多 candidate_limit 个），整体近似线性；
+        - 签名估计的相似度明显低于阈值的候选对跳过 bigram 精判；
         - 两条记忆近似度 >= threshold 视为重复；
         - 通过 _pick_keeper 保留“重要度/置信度/召回更高”的一条；
         - loser 的 recall_count 合并到 keeper，保证访问历史不丢失。
         """
         with self._write_lock:
             items = self._get_all_with_conn(self._write_db, include_archived=False)
+            by_id = {item.id: item for item in items}
+            signatures = {
+                row["id"]: signature_from_blob(row["minhash"])
+                for row in self._write_db.execute(
+                    "SELECT id, minhash FROM memories WHERE state != 'archived'"
+                ).fetchall()
+            }
+            prefilter = float(threshold) - self.MINHASH_PREFILTER_MARGIN
             merged = 0
+            pairs = 0
             removed_ids: set[str] = set()
+            seen_pairs: set[tuple[str, str]] = set()
 
             try:
-                for i in range(len(items)):
-                    left = items[i]
+                for left in items:
                     if left.id in removed_ids:
                         continue
-                    for j in range(i + 1, len(items)):
-                        right = items[j]
-                        if right.id in removed_ids:
+                    for candidate_id in self._lsh_candidate_ids_write(left.id, limit=candidate_limit):
+                        right = by_id.get(candidate_id)
+                        if right is None or right.id in removed_ids:
+                            continue
+                        pair_key = tuple(sorted((left.id, right.id)))
+                        if pair_key in seen_pairs:
+                            continue
+                        seen_pairs.add(pair_key)
+                        pairs += 1
+                        if estimate_jaccard(signatures.get(left.id), signatures.get(right.id)) < prefilter:
                             continue
                         score = self._near_duplicate_score(left.content, right.content)
                         if score < threshold:
@@ -1009,13 +1454,13 @@ class LongTermMemory:
                         if left.id == loser.id:
                             break
                 self._write_db.commit()
-                self._flush_pending_vector_deletes()
+                self._flush_pending_vector_ops()
             except Exception:
                 self._write_db.rollback()
-                self._clear_pending_vector_deletes()
+                self._clear_pending_vector_ops()
                 raise
 
-        return {"merged": merged}
+        return {"merged": merged, "pairs": pairs}
 
     def apply_decay(self, decay_engine: DecayEngine, compressor: MemoryCompressor) -> dict:
         """
@@ -1043,10 +1488,10 @@ class LongTermMemory:
                         compressed += 1
                     self.update_item(item, update_vector=False, commit=False)
                 self._write_db.commit()
-                self._flush_pending_vector_deletes()
+                self._flush_pending_vector_ops()
             except Exception:
                 self._write_db.rollback()
-                self._clear_pending_vector_deletes()
+                self._clear_pending_vector_ops()
                 raise
         return {"compressed": compressed, "evicted": evicted}
 
@@ -1083,14 +1528,19 @@ class LongTermMemory:
             return {normalized}
         return {normalized[i : i + n] for i in range(len(normalized) - n + 1)}
 
-    def _row_to_item(self, row: sqlite3.Row) -> MemoryItem:
+    def _row_to_item(self, row: sqlite3.Row, with_cold: bool = True) -> MemoryItem:
+        """with_cold=False 时跳过冷 metadata JSON 解析（行可只含 HOT_COLUMNS）。"""
         metadata_dict: dict = {}
-        if row["metadata"]:
+        if with_cold and row["metadata"]:
             try:
                 metadata_dict = json.loads(row["metadata"])
             except json.JSONDecodeError:
                 metadata_dict = {}
 
+        # 热字段以类型化列为准；JSON 只承载冷字段。
+        metadata_dict["state"] = row["state"]
+        metadata_dict["half_life_days"] = row["half_life_days"]
+        metadata_dict["confidence"] = row["confidence"]
         metadata = MemoryMetadata.from_dict(metadata_dict)
         metadata.store = "long_term"
         metadata.created_at = float(row["created_at"] if row["created_at"] is not None else metadata.created_at)
@@ -1111,13 +1561,15 @@ class LongTermMemory:
         )
 
     def close(self):
+        self._vector_flush_stop.set()
+        if self._vector_flush_thread is not None:
+            self._vector_flush_thread.join(timeout=5)
         try:
-            self._flush_pending_vector_deletes()
+            self._flush_pending_vector_ops()
         except Exception:
             pass
 
-        with self._read_lock:
-            self._read_db.close()
+        self._read_pool.close()
         with self._write_lock:
             self._write_db.close()
         self.vector_store.close()
@@ -1,15 +1,17 @@
 """Overflow processing for old working memories."""
 from __future__ import annotations
 
-import json
 import math
 import time
 import uuid
 from textwrap import dedent
-from typing import List
+from typing import List, Optional
 
+import numpy as np
+
+from .llm_batcher import LLMMicroBatcher, chat_json, map_items_by_index
 from .models import MemoryItem, MemoryMetadata
-from .utils import clamp, cosine_similarity, normalize_text
+from .utils import clamp, normalize_text
 
 
 class OverflowProcessor:
@@ -25,6 +27,9 @@ class OverflowProcessor:
         llm_base_url: str = "",
         llm_timeout_seconds: int = 30,
         llm_temperature: float = 0.2,
+        batch_max_size: int = 8,
+        batch_max_delay_ms: int = 20,
+        batch_wait_seconds: Optional[float] = None,
     ):
         self.similarity_threshold = similarity_threshold
         self.max_cluster_size = max_cluster_size
@@ -34,30 +39,88 @@ class OverflowProcessor:
         self.llm_base_url = llm_base_url
         self.llm_timeout_seconds = llm_timeout_seconds
         self.llm_temperature = llm_temperature
+        self.batch_wait_seconds = float(
+            llm_timeout_seconds if batch_wait_seconds is None else batch_wait_seconds
+        )
+        self._batcher: Optional[LLMMicroBatcher[List[MemoryItem], str]] = None
+        if self.llm_enabled and self.llm_api_key:
+            # 同一次溢出处理的多个簇（以及并发的溢出处理）合并为一次结构化摘要请求。
+            self._batcher = LLMMicroBatcher(
+                self._summarize_batch_with_llm,
+                max_batch_size=batch_max_size,
+                max_delay_ms=batch_max_delay_ms,
+                name="memory-summary-batcher",
+            )
 
     def cluster(self, items: List[MemoryItem]) -> List[List[MemoryItem]]:
-        clusters: List[List[MemoryItem]] = []
-        for item in items:
-            placed = False
-            for cluster in clusters:
-                if self._is_close(item, cluster):
-                    cluster.append(item)
-                    placed = True
-                    break
-            if not placed:
-                clusters.append([item])
-        return clusters
+        """
+        Leader 聚类：按顺序把每条记忆放入第一个“平均相似度 >= 阈值且未满”的簇，否则新建簇。
+
+        相似度矩阵一次矩阵乘得到；member_sums[:, c] 维护所有条目到簇 c 成员的相似度之和，
+        入簇时按列累加，判定只需一次向量比较，避免逐成员重复计算。
+        """
+        if not items:
+            return []
+        similarity = self._similarity_matrix(items)
+        count = len(items)
+        max_size = max(int(self.max_cluster_size), 1)
+        member_sums = np.zeros((count, count), dtype=np.float64)
+        sizes = np.zeros(count, dtype=np.int64)
+        assignments: List[List[int]] = []
+
+        for idx in range(count):
+            opened = len(assignments)
+            target = -1
+            if opened:
+                means = member_sums[idx, :opened] / sizes[:opened]
+                eligible = np.flatnonzero(
+                    (sizes[:opened] < max_size) & (means >= self.similarity_threshold)
+                )
+                if eligible.size:
+                    target = int(eligible[0])
+            if target < 0:
+                target = opened
+                assignments.append([])
+            assignments[target].append(idx)
+            sizes[target] += 1
+            member_sums[:, target] += similarity[:, idx]
+
+        return [[items[idx] for idx in members] for members in assignments]
+
+    def _similarity_matrix(self, items: List[MemoryItem]) -> np.ndarray:
+        """
+        两两相似度矩阵：有 embedding 的条目之间用余弦（一次矩阵乘），
+        任一方缺 embedding 时退化为词集合 Jaccard。
+        """
+        count = len(items)
+        similarity = np.zeros((count, count), dtype=np.float64)
+        embedded = [idx for idx, item in enumerate(items) if item.embedding is not None]
+        if embedded:
+            matrix = np.asarray([items[idx].embedding for idx in embedded], dtype=np.float64)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1.0, norms)
+            similarity[np.ix_(embedded, embedded)] = matrix @ matrix.T
+
+        embedded_set = set(embedded)
+        missing = [idx for idx in range(count) if idx not in embedded_set]
+        if missing:
+            tokens = [set(normalize_text(item.content).split()) for item in items]
+            for idx in missing:
+                for other in range(count):
+                    score = self._token_overlap(tokens[idx], tokens[other])
+                    similarity[idx, other] = score
+                    similarity[other, idx] = score
+        return similarity
 
     def build_summaries(self, clusters: List[List[MemoryItem]]) -> List[MemoryItem]:
         summaries = []
         now = time.time()
-        for cluster in clusters:
-            if not cluster:
-                continue
-
+        clusters = [cluster for cluster in clusters if cluster]
+        llm_summaries = self._llm_summaries(clusters)
+        for cluster, llm_summary in zip(clusters, llm_summaries):
             # overflow 汇总不是简单平均：
             # 被更多次命中的 working 记忆在摘要中占更高权重。
-            summary_text = self._try_llm_summary(cluster) or self._summarize_cluster(cluster)
+            summary_text = llm_summary or self._summarize_cluster(cluster)
             avg_importance = self._weighted_average(
                 cluster,
                 value_getter=lambda item: item.importance,
@@ -117,20 +180,8 @@ class OverflowProcessor:
             return 0.0
         return weighted_sum / weight_total
 
-    def _is_close(self, item: MemoryItem, cluster: List[MemoryItem]) -> bool:
-        if len(cluster) >= self.max_cluster_size:
-            return False
-        sims = []
-        for other in cluster:
-            if item.embedding is None or other.embedding is None:
-                sims.append(self._text_overlap(item, other))
-            else:
-                sims.append(cosine_similarity(item.embedding, other.embedding))
-        return (sum(sims) / max(len(sims), 1)) >= self.similarity_threshold
-
-    def _text_overlap(self, a: MemoryItem, b: MemoryItem) -> float:
-        left = set(normalize_text(a.content).split())
-        right = set(normalize_text(b.content).split())
+    @staticmethod
+    def _token_overlap(left: set, right: set) -> float:
         if not left or not right:
             return 0.0
         return len(left & right) / len(left | right)
@@ -143,77 +194,85 @@ class OverflowProcessor:
             lines.append(f"{idx}. {short}")
         return " | ".join(lines)
 
-    def _try_llm_summary(self, cluster: List[MemoryItem]) -> str | None:
-        if not self.llm_enabled:
-            return None
-        try:
-            from openai import OpenAI
-        except Exception:
-            return None
+    def _llm_summaries(self, clusters: List[List[MemoryItem]]) -> List[Optional[str]]:
+        """为每个簇取 LLM 摘要；不可用、失败或超时的簇为 None（调用方回退拼接摘要）。"""
+        if self._batcher is None or not clusters:
+            return [None] * len(clusters)
+        return self._batcher.run_many(clusters, timeout=self.batch_wait_seconds)
 
-        if not self.llm_api_key:
-            return None
+    def _summarize_batch_with_llm(self, clusters: List[List[MemoryItem]]) -> List[Optional[str]]:
+        """一次结构化请求为多个簇生成摘要，按 index（1 起始）映射回簇顺序。"""
+        if not self.llm_enabled or not self.llm_api_key or not clusters:
+            return [None] * len(clusters)
 
-        snippets = []
-        for idx, item in enumerate(cluster, start=1):
-            snippets.append(f"{idx}. {item.content.strip()}")
-        joined_snippets = "\n".join(snippets)
+        groups = []
+        for group_idx, cluster in enumerate(clusters, start=1):
+            snippets = [f"{idx}. {item.content.strip()}" for idx, item in enumerate(cluster, start=1)]
+            groups.append(f"[组 {group_idx}]\n" + "\n".join(snippets))
         prompt = dedent(
             f"""
-            请将下面多条短记忆聚类后压缩为一条高密度中文摘要，并严格按 JSON Schema 输出。
+            下面有 {len(clusters)} 组短记忆，请把每一组分别压缩为一条高密度中文摘要，并严格按 JSON Schema 输出。
             要求：
-            1. summary 控制在 220 字以内。
-            2. 保留核心事实与时间线，不要重复。
-            3. 语气客观，不做额外推测。
+            1. items 中每组对应一个对象，index 与组编号一致，不要遗漏或跨组合并。
+            2. summary 控制在 220 字以内。
+            3. 保留核心事实与时间线，不要重复。
+            4. 语气客观，不做额外推测。
 
             示例：
-            输入：1. 用户下周要交周报。2. 用户希望周三提醒。3. 用户对延期感到焦虑。
-            输出示例：{{"summary":"用户下周需提交周报，希望在周三收到提醒，并对延期存在焦虑情绪。"}}
+            输入：[组 1] 1. 用户下周要交周报。2. 用户希望周三提醒。3. 用户对延期感到焦虑。
+            输出示例：{{"items":[{{"index":1,"summary":"用户下周需提交周报，希望在周三收到提醒，并对延期存在焦虑情绪。"}}]}}
 
             待处理输入：
-            {joined_snippets}
             """
         ).strip()
+        prompt = f"{prompt}\n" + "\n\n".join(groups)
         try:
-            client = OpenAI(
+            parsed = chat_json(
                 api_key=self.llm_api_key,
-                base_url=self.llm_base_url or None,
-                timeout=self.llm_timeout_seconds,
-            )
-            resp = client.chat.completions.create(
+                base_url=self.llm_base_url,
+                timeout_seconds=self.llm_timeout_seconds,
                 model=self.llm_model,
                 temperature=self.llm_temperature,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": dedent(
-                            """
-                            你是记忆聚类摘要器。
-                            你必须严格按给定 JSON Schema 输出，
-                            不要输出解释文本或 markdown。
-                            """
-                        ).strip(),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "overflow_cluster_summary",
-                        "strict": True,
-                        "schema": {
-                            "type": "object",
-                            "additionalProperties": False,
-                            "properties": {
-                                "summary": {"type": "string", "minLength": 1, "maxLength": 220}
+                system_prompt=dedent(
+                    """
+                    你是记忆聚类摘要器。
+                    你必须严格按给定 JSON Schema 输出，
+                    不要输出解释文本或 markdown。
+                    """
+                ).strip(),
+                user_prompt=prompt,
+                schema_name="overflow_cluster_summary_batch",
+                schema={
+                    "type": "object",
+                    "additionalProperties": False,
+                    "properties": {
+                        "items": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "additionalProperties": False,
+                                "properties": {
+                                    "index": {"type": "integer", "minimum": 1},
+                                    "summary": {"type": "string", "minLength": 1, "maxLength": 220},
+                                },
+                                "required": ["index", "summary"],
                             },
-                            "required": ["summary"],
-                        },
+                        }
                     },
+                    "required": ["items"],
                 },
             )
-            content = resp.choices[0].message.content or ""
-            parsed = json.loads(content)
-            return parsed.get("summary")
         except Exception:
-            return None
+            return [None] * len(clusters)
+        return map_items_by_index(
+            parsed,
+            len(clusters),
+            lambda entry: str(entry.get("summary") or "").strip() or None,
+        )
+
+    def batcher_stats(self) -> Optional[dict]:
+        return self._batcher.stats() if self._batcher is not None else None
+
+    def close(self) -> None:
+        if self._batcher is not None:
+            self._batcher.close()
@@ -0,0 +1,134 @@
+"""Bounded pool of read-only SQLite connections for concurrent long-term retrieval."""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List
+
+
+class ReadConnectionPool:
+    """
+    只读连接池。
+
+    WAL 模式下多个读连接可以并行读取同一快照，单连接 + 锁会让所有会话的检索串行化。
+    连接按需创建、上限 size 条，每条都设置 query_only 与 mmap/page cache；
+    借出时若无空闲连接则等待并计入争用指标（waits / wait_ms）。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 4,
+        mmap_size_bytes: int = 64 << 20,
+        cache_size_kib: int = 8192,
+        busy_timeout_ms: int = 5000,
+    ):
+        self.db_path = db_path
+        self.size = max(int(size), 1)
+        self.mmap_size_bytes = max(int(mmap_size_bytes), 0)
+        self.cache_size_kib = max(int(cache_size_kib), 0)
+        self.busy_timeout_ms = max(int(busy_timeout_ms), 0)
+
+        self._cond = threading.Condition()
+        self._idle: List[sqlite3.Connection] = []
+        self._all: List[sqlite3.Connection] = []
+        self._opening = 0
+        self._closed = False
+        self._stats = {
+            "acquires": 0,
+            "waits": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        }
+
+    def _open(self) -> sqlite3.Connection:
+        # isolation_level=None 使用 autocommit 读，缩短读事务生命周期。
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        conn.execute("PRAGMA query_only=1")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size_bytes}")
+        # 负值表示以 KiB 为单位。
+        conn.execute(f"PRAGMA cache_size=-{self.cache_size_kib}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._cond:
+            self._stats["acquires"] += 1
+            start = None
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("read connection pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if len(self._all) + self._opening < self.size:
+                    # 先占名额再在锁外建连，避免建连期间阻塞其它借还。
+                    self._opening += 1
+                    conn = None
+                    break
+                if start is None:
+                    start = time.perf_counter()
+                self._cond.wait()
+            if start is not None:
+                waited_ms = (time.perf_counter() - start) * 1000.0
+                self._stats["waits"] += 1
+                self._stats["wait_ms_total"] += waited_ms
+                self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], waited_ms)
+            if conn is not None:
+                return conn
+
+        try:
+            conn = self._open()
+        except Exception:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._opening -= 1
+            self._all.append(conn)
+        return conn
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._cond:
+            if self._closed:
+                conn.close()
+                return
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            acquires = self._stats["acquires"]
+            opened = len(self._all)
+            return {
+                "size": self.size,
+                "open": opened,
+                "in_use": opened - len(self._idle),
+                "acquires": acquires,
+                "waits": self._stats["waits"],
+                "wait_rate": round(self._stats["waits"] / acquires, 4) if acquires else 0.0,
+                "wait_ms_total": round(self._stats["wait_ms_total"], 3),
+                "wait_ms_max": round(self._stats["wait_ms_max"], 3),
+            }
+
+    def close(self) -> None:
+        """关闭空闲连接；仍被借出的连接在归还时关闭。"""
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                conn.close()
+            self._idle.clear()
+            self._cond.notify_all()
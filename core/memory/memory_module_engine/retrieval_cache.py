@@ -0,0 +1,57 @@
+"""Generation-stamped LRU cache for long-term retrieval candidates."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+
+class RetrievalCache:
+    """
+    有界 LRU：值附带写入时的存储代数（generation）。
+
+    读取时代数与当前不一致即视为失效（并顺带清除），因此只要写路径在提交后递增代数，
+    命中结果与直接查询完全一致；不需要逐 key 失效。
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(int(max_entries), 1)
+        self._entries: "OrderedDict[Hashable, Tuple[int, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0}
+
+    def get(self, key: Hashable, generation: int) -> Optional[object]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry[0] != generation:
+                self._entries.pop(key, None)
+                self._stats["stale"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key: Hashable, generation: int, value: object) -> None:
+        with self._lock:
+            self._entries[key] = (generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,182 @@
+"""memories 表结构版本与迁移。"""
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+
+from .models import MemoryMetadata
+
+# PRAGMA user_version 记录的 memories 表结构版本。
+SCHEMA_VERSION = 3
+
+SCHEMA_V1_COLUMNS = frozenset(
+    {
+        "id",
+        "content",
+        "importance",
+        "recall_count",
+        "metadata",
+        "created_at",
+        "updated_at",
+    }
+)
+# v2：热字段拆为类型化列，metadata JSON 只保存其余冷字段。
+TYPED_COLUMNS = ("state", "store", "half_life_days", "confidence", "memory_type")
+SCHEMA_V2_COLUMNS = SCHEMA_V1_COLUMNS | frozenset(TYPED_COLUMNS)
+# v3：新增 minhash 签名列（近重复 LSH 索引的持久化来源，NULL 表示待计算）。
+SCHEMA_V3_COLUMNS = SCHEMA_V2_COLUMNS | frozenset({"minhash"})
+_LAYOUTS = {1: SCHEMA_V1_COLUMNS, 2: SCHEMA_V2_COLUMNS, 3: SCHEMA_V3_COLUMNS}
+
+# 已有独立列的 metadata 字段，不再重复写入 JSON。
+HOT_METADATA_FIELDS = ("created_at", "store", "state", "half_life_days", "confidence")
+
+_MEMORY_TYPE_RE = re.compile(r"^([a-z][a-z_]{0,23}):")
+
+CREATE_MEMORIES = """
+    CREATE TABLE IF NOT EXISTS memories (
+        id TEXT PRIMARY KEY,
+        content TEXT NOT NULL,
+        importance REAL DEFAULT 0.5,
+        recall_count INTEGER DEFAULT 0,
+        metadata TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        state TEXT NOT NULL DEFAULT 'active',
+        store TEXT NOT NULL DEFAULT 'long_term',
+        half_life_days REAL NOT NULL DEFAULT 30.0,
+        confidence REAL NOT NULL DEFAULT 0.5,
+        memory_type TEXT NOT NULL DEFAULT 'general',
+        minhash BLOB
+    )
+"""
+
+_V2_ADD_COLUMNS = (
+    "ALTER TABLE memories ADD COLUMN state TEXT NOT NULL DEFAULT 'active'",
+    "ALTER TABLE memories ADD COLUMN store TEXT NOT NULL DEFAULT 'long_term'",
+    "ALTER TABLE memories ADD COLUMN half_life_days REAL NOT NULL DEFAULT 30.0",
+    "ALTER TABLE memories ADD COLUMN confidence REAL NOT NULL DEFAULT 0.5",
+    "ALTER TABLE memories ADD COLUMN memory_type TEXT NOT NULL DEFAULT 'general'",
+)
+
+
+def infer_memory_type(content: str) -> str:
+    """
+    从内容前缀推断记忆类型（MemoryService 写入格式为 ``<type>: <text>``）。
+
+    无前缀的记忆（例如 overflow 摘要）归为 general。
+    """
+    matched = _MEMORY_TYPE_RE.match(str(content or "").strip().lower())
+    return matched.group(1) if matched else "general"
+
+
+def cold_metadata_json(metadata: MemoryMetadata) -> str:
+    payload = metadata.to_dict()
+    for key in HOT_METADATA_FIELDS:
+        payload.pop(key, None)
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def detect_layout(columns: set[str]) -> int:
+    """按列集合识别表结构版本；无法识别返回 0。"""
+    for version, layout in _LAYOUTS.items():
+        if columns == layout:
+            return version
+    return 0
+
+
+def table_columns(conn: sqlite3.Connection, table_name: str) -> set[str]:
+    rows = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
+    return {row[1] for row in rows}
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate_memories_schema(conn: sqlite3.Connection, batch_size: int = 1000) -> dict:
+    """
+    将 memories 表升级到 SCHEMA_VERSION（幂等）。
+
+    v1 -> v2：新增类型化列，并从 metadata JSON 回填 state/half_life_days/confidence，
+    按内容前缀回填 memory_type，同时把这些热字段从 JSON 中移除。
+    v2 -> v3：新增 minhash 列（保持 NULL，由 LongTermMemory 启动时按批补算签名与 LSH 桶）。
+    调用方负责 commit。
+    """
+    columns = table_columns(conn, "memories")
+    layout = detect_layout(columns)
+    if not layout:
+        raise RuntimeError(
+            "Unsupported memories schema detected. "
+            "Expected columns: "
+            f"{sorted(SCHEMA_V3_COLUMNS)}, got: {sorted(columns)}. "
+            "Please reset storage (e.g. remove memory_data/memory.db) and reinitialize."
+        )
+    from_version = 1 if layout == 1 else min(layout, schema_version(conn))
+    if layout == SCHEMA_VERSION and from_version >= SCHEMA_VERSION:
+        return {"from_version": from_version, "to_version": SCHEMA_VERSION, "migrated_rows": 0}
+
+    # 加列与回填放在同一事务里，中途失败不会留下“有列未回填”的半迁移状态。
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    if layout == 1:
+        for statement in _V2_ADD_COLUMNS:
+            conn.execute(statement)
+    if layout < 3:
+        conn.execute("ALTER TABLE memories ADD COLUMN minhash BLOB")
+    if from_version >= 2:
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        return {"from_version": from_version, "to_version": SCHEMA_VERSION, "migrated_rows": 0}
+
+    migrated = 0
+    last_rowid = 0
+    batch_size = max(int(batch_size), 1)
+    while True:
+        rows = conn.execute(
+            """
+            SELECT rowid, content, metadata, created_at, state, half_life_days, confidence
+            FROM memories
+            WHERE rowid > ?
+            ORDER BY rowid ASC
+            LIMIT ?
+            """,
+            (last_rowid, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for rowid, content, raw_metadata, created_at, state, half_life_days, confidence in rows:
+            try:
+                data = json.loads(raw_metadata) if raw_metadata else {}
+            except json.JSONDecodeError:
+                data = {}
+            # JSON 中缺失的热字段以列值为准（列默认值与 MemoryMetadata 默认值一致）。
+            data.setdefault("created_at", created_at)
+            data.setdefault("state", state)
+            data.setdefault("half_life_days", half_life_days)
+            data.setdefault("confidence", confidence)
+            metadata = MemoryMetadata.from_dict(data)
+            updates.append(
+                (
+                    metadata.state,
+                    "long_term",
+                    float(metadata.half_life_days),
+                    float(metadata.confidence),
+                    infer_memory_type(content),
+                    cold_metadata_json(metadata),
+                    rowid,
+                )
+            )
+        conn.executemany(
+            """
+            UPDATE memories
+            SET state = ?, store = ?, half_life_days = ?, confidence = ?, memory_type = ?, metadata = ?
+            WHERE rowid = ?
+            """,
+            updates,
+        )
+        migrated += len(updates)
+        last_rowid = int(rows[-1][0])
+
+    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    return {"from_version": from_version, "to_version": SCHEMA_VERSION, "migrated_rows": migrated}
@@ -1,11 +1,11 @@
 """LLM-based signal extraction from raw user input."""
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from textwrap import dedent
-from typing import Optional
+from typing import List, Optional
 
+from .llm_batcher import LLMMicroBatcher, chat_json, map_items_by_index
 from .models import MemoryMetadata
 from .utils import clamp
 
@@ -15,6 +15,40 @@ class ExtractedSignals:
     metadata: MemoryMetadata
 
 
+_SIGNAL_PROPERTIES = {
+    "explicit_remember": {"type": "boolean"},
+    "future_use": {"type": "boolean"},
+    "emotion_intensity": {"type": "number", "minimum": 0, "maximum": 1},
+    "temporal_urgency": {"type": "number", "minimum": 0, "maximum": 1},
+    "information_density": {"type": "number", "minimum": 0, "maximum": 1},
+    "importance_hint": {"type": "number", "minimum": 0, "maximum": 1},
+    "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+    "user_rating": {
+        "anyOf": [
+            {"type": "number", "minimum": 0, "maximum": 1},
+            {"type": "null"},
+        ]
+    },
+}
+
+BATCH_SIGNAL_SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "properties": {
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "additionalProperties": False,
+                "properties": {"index": {"type": "integer", "minimum": 1}, **_SIGNAL_PROPERTIES},
+                "required": ["index", *_SIGNAL_PROPERTIES.keys()],
+            },
+        }
+    },
+    "required": ["items"],
+}
+
+
 class SignalExtractor:
     """Use LLM as the single judge for metadata extraction."""
 
@@ -26,6 +60,9 @@ class SignalExtractor:
         llm_base_url: str = "",
         llm_timeout_seconds: int = 30,
         llm_temperature: float = 0.0,
+        batch_max_size: int = 8,
+        batch_max_delay_ms: int = 20,
+        batch_wait_seconds: Optional[float] = None,
     ):
         self.llm_enabled = llm_enabled
         self.llm_model = llm_model
@@ -33,23 +70,50 @@ class SignalExtractor:
         self.llm_base_url = llm_base_url
         self.llm_timeout_seconds = llm_timeout_seconds
         self.llm_temperature = llm_temperature
+        # 写路径等待 LLM 的上限；超时回退中性元数据，迟到的结果直接丢弃。
+        self.batch_wait_seconds = float(
+            llm_timeout_seconds if batch_wait_seconds is None else batch_wait_seconds
+        )
+        self._batcher: Optional[LLMMicroBatcher[str, dict]] = None
+        if self.llm_enabled and self.llm_api_key:
+            # 并发的 extract 调用合并为一次结构化请求（按编号映射回各自结果）。
+            self._batcher = LLMMicroBatcher(
+                self._extract_batch_with_llm,
+                max_batch_size=batch_max_size,
+                max_delay_ms=batch_max_delay_ms,
+                name="memory-signal-batcher",
+            )
 
     def extract(self, content: str) -> ExtractedSignals:
-        llm_data = self._extract_with_llm(content)
+        return self.extract_many([content])[0]
+
+    def extract_many(self, contents: List[str]) -> List[ExtractedSignals]:
+        """批量提取；LLM 不可用、失败、超时或漏掉某条时该条回退中性低置信元数据。"""
+        contents = list(contents)
+        if self._batcher is None:
+            llm_results: List[Optional[dict]] = [None] * len(contents)
+        else:
+            llm_results = self._batcher.run_many(contents, timeout=self.batch_wait_seconds)
+        return [self._build_signals(llm_data) for llm_data in llm_results]
+
+    def _build_signals(self, llm_data: Optional[dict]) -> ExtractedSignals:
         if llm_data:
-            metadata = MemoryMetadata(
-                explicit_remember=bool(llm_data.get("explicit_remember", False)),
-                future_use=bool(llm_data.get("future_use", False)),
-                emotion_intensity=clamp(float(llm_data.get("emotion_intensity", 0.0))),
-                near_repeat_score=0.0,  # Filled later in core via similarity lookup.
-                repeat_count=0,
-                temporal_urgency=clamp(float(llm_data.get("temporal_urgency", 0.0))),
-                information_density=clamp(float(llm_data.get("information_density", 0.5))),
-                llm_importance_hint=clamp(float(llm_data.get("importance_hint", 0.5))),
-                confidence=clamp(float(llm_data.get("confidence", 0.6))),
-                user_rating=self._safe_optional_float(llm_data.get("user_rating")),
-            )
-            return ExtractedSignals(metadata=metadata)
+            try:
+                metadata = MemoryMetadata(
+                    explicit_remember=bool(llm_data.get("explicit_remember", False)),
+                    future_use=bool(llm_data.get("future_use", False)),
+                    emotion_intensity=clamp(float(llm_data.get("emotion_intensity", 0.0))),
+                    near_repeat_score=0.0,  # Filled later in core via similarity lookup.
+                    repeat_count=0,
+                    temporal_urgency=clamp(float(llm_data.get("temporal_urgency", 0.0))),
+                    information_density=clamp(float(llm_data.get("information_density", 0.5))),
+                    llm_importance_hint=clamp(float(llm_data.get("importance_hint", 0.5))),
+                    confidence=clamp(float(llm_data.get("confidence", 0.6))),
+                    user_rating=self._safe_optional_float(llm_data.get("user_rating")),
+                )
+                return ExtractedSignals(metadata=metadata)
+            except (TypeError, ValueError):
+                pass
 
         # Fallback: neutral low-confidence to avoid over-persisting noisy inputs.
         return ExtractedSignals(
@@ -67,95 +131,58 @@ class SignalExtractor:
             )
         )
 
-    def _extract_with_llm(self, content: str) -> Optional[dict]:
-        if not self.llm_enabled:
-            return None
-        try:
-            from openai import OpenAI
-        except Exception:
-            return None
-
-        if not self.llm_api_key:
-            return None
+    def _extract_batch_with_llm(self, contents: List[str]) -> List[Optional[dict]]:
+        """一次结构化请求提取多条输入的信号，按 index（1 起始）映射回输入顺序。"""
+        if not self.llm_enabled or not self.llm_api_key or not contents:
+            return [None] * len(contents)
 
+        numbered = "\n".join(f"{idx}. {content}" for idx, content in enumerate(contents, start=1))
         prompt = dedent(
             f"""
-            请提取以下用户输入的记忆评分信号，并按约定 JSON Schema 输出。
+            请逐条提取以下 {len(contents)} 条用户输入的记忆评分信号，并按约定 JSON Schema 输出。
             要求：
-            1. 所有分数字段都在 0-1 之间。
-            2. 如果无法判断 user_rating，返回 null。
+            1. items 中每条输入对应一个对象，index 与输入编号一致，不要遗漏或合并。
+            2. 所有分数字段都在 0-1 之间。
+            3. 如果无法判断 user_rating，返回 null。
 
             示例：
-            输入：请记住，下周三提醒我提交项目周报，我现在有点焦虑。
-            输出示例：{{"explicit_remember":true,"future_use":true,"emotion_intensity":0.72,"temporal_urgency":0.66,"information_density":0.74,"importance_hint":0.83,"confidence":0.88,"user_rating":null}}
+            输入：1. 请记住，下周三提醒我提交项目周报，我现在有点焦虑。
+            输出示例：{{"items":[{{"index":1,"explicit_remember":true,"future_use":true,"emotion_intensity":0.72,"temporal_urgency":0.66,"information_density":0.74,"importance_hint":0.83,"confidence":0.88,"user_rating":null}}]}}
 
-            待分析输入：{content}
+            待分析输入：
             """
         ).strip()
+        # 编号输入在 dedent 之后拼接，避免多行内容破坏公共缩进。
+        prompt = f"{prompt}\n{numbered}"
 
         try:
-            client = OpenAI(
+            parsed = chat_json(
                 api_key=self.llm_api_key,
-                base_url=self.llm_base_url or None,
-                timeout=self.llm_timeout_seconds,
-            )
-            resp = client.chat.completions.create(
+                base_url=self.llm_base_url,
+                timeout_seconds=self.llm_timeout_seconds,
                 model=self.llm_model,
                 temperature=self.llm_temperature,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": dedent(
-                            """
-                            你是一个记忆信号提取器。
-                            你的任务是把用户输入转成结构化记忆评分因子。
-                            必须严格按照给定 JSON Schema 输出，不要输出额外文本。
-                            """
-                        ).strip(),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "memory_signal_extraction",
-                        "strict": True,
-                        "schema": {
-                            "type": "object",
-                            "additionalProperties": False,
-                            "properties": {
-                                "explicit_remember": {"type": "boolean"},
-                                "future_use": {"type": "boolean"},
-                                "emotion_intensity": {"type": "number", "minimum": 0, "maximum": 1},
-                                "temporal_urgency": {"type": "number", "minimum": 0, "maximum": 1},
-                                "information_density": {"type": "number", "minimum": 0, "maximum": 1},
-                                "importance_hint": {"type": "number", "minimum": 0, "maximum": 1},
-                                "confidence": {"type": "number", "minimum": 0, "maximum": 1},
-                                "user_rating": {
-                                    "anyOf": [
-                                        {"type": "number", "minimum": 0, "maximum": 1},
-                                        {"type": "null"},
-                                    ]
-                                },
-                            },
-                            "required": [
-                                "explicit_remember",
-                                "future_use",
-                                "emotion_intensity",
-                                "temporal_urgency",
-                                "information_density",
-                                "importance_hint",
-                                "confidence",
-                                "user_rating",
-                            ],
-                        },
-                    },
-                },
+                system_prompt=dedent(
+                    """
+                    你是一个记忆信号提取器。
+                    你的任务是把多条用户输入逐条转成结构化记忆评分因子。
+                    必须严格按照给定 JSON Schema 输出，不要输出额外文本。
+                    """
+                ).strip(),
+                user_prompt=prompt,
+                schema_name="memory_signal_extraction_batch",
+                schema=BATCH_SIGNAL_SCHEMA,
             )
-            text = resp.choices[0].message.content or ""
-            return json.loads(text)
         except Exception:
-            return None
+            return [None] * len(contents)
+        return map_items_by_index(parsed, len(contents), lambda entry: entry)
+
+    def batcher_stats(self) -> Optional[dict]:
+        return self._batcher.stats() if self._batcher is not None else None
+
+    def close(self) -> None:
+        if self._batcher is not None:
+            self._batcher.close()
 
     def _safe_optional_float(self, value) -> Optional[float]:
         if value is None:
@@ -0,0 +1,726 @@
+"""Pluggable vector index backends for long-term memory."""
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# (memory_id, vector, payload)
+VectorPoint = tuple[str, Sequence[float], dict]
+
+VECTOR_BACKENDS = ("qdrant", "flat", "flat_q8", "hnsw")
+VECTOR_REDUCTIONS = ("none", "truncate", "pca")
+
+
+class VectorStore(ABC):
+    """
+    向量索引抽象。
+
+    约定：
+    - 相似度统一为余弦相似度，取值 [-1, 1]（与 Qdrant COSINE 一致）；
+    - query 结果按分数降序返回 (memory_id, score)。
+    """
+
+    @abstractmethod
+    def upsert(self, points: Sequence[VectorPoint]) -> None:
+        """批量写入/覆盖向量。"""
+
+    @abstractmethod
+    def delete(self, memory_ids: Iterable[str]) -> None:
+        """批量删除向量（不存在的 id 忽略）。"""
+
+    @abstractmethod
+    def query(self, vector: Sequence[float], limit: int) -> List[tuple[str, float]]:
+        """按向量检索 top-k 近邻。"""
+
+    @abstractmethod
+    def get_vector(self, memory_id: str) -> Optional[List[float]]:
+        """读取已存储向量，不存在返回 None。"""
+
+    def query_by_id(self, memory_id: str, limit: int) -> List[tuple[str, float]]:
+        """按已存储 point 的向量检索近邻（结果可能包含自身）。"""
+        vector = self.get_vector(memory_id)
+        if not vector:
+            return []
+        return self.query(vector, limit)
+
+    def flush(self) -> None:
+        """将内存中的索引状态落盘（无缓冲的后端为空实现）。"""
+
+    def ids(self) -> Optional[set[str]]:
+        """返回索引中全部 memory_id；无法廉价枚举的后端返回 None（调用方跳过对账）。"""
+        return None
+
+    @abstractmethod
+    def close(self) -> None:
+        """释放底层资源。"""
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms = np.where(norms == 0.0, 1.0, norms)
+    return matrix / norms
+
+
+class QdrantVectorStore(VectorStore):
+    """Qdrant local mode（QdrantClient(path=...)），保持原有行为。"""
+
+    def __init__(self, storage_path: str, vector_dim: int):
+        from qdrant_client import QdrantClient
+        from qdrant_client.models import Distance, PointStruct, VectorParams
+
+        self._point_struct = PointStruct
+        self._vector_params = VectorParams(size=vector_dim, distance=Distance.COSINE)
+        self.client = QdrantClient(path=os.path.join(storage_path, "vectors"))
+        self.vector_dim = vector_dim
+        self.collection_name = f"long_term_{self.vector_dim}"
+        self._init_collection()
+
+    def _init_collection(self):
+        collections = [c.name for c in self.client.get_collections().collections]
+        if self.collection_name not in collections:
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=self._vector_params,
+            )
+            return
+
+        info = self.client.get_collection(self.collection_name)
+        existing_dim = None
+        try:
+            existing_dim = info.config.params.vectors.size
+        except Exception:
+            existing_dim = self.vector_dim
+        if existing_dim != self.vector_dim:
+            self.collection_name = f"long_term_{self.vector_dim}_v2"
+            collections = [c.name for c in self.client.get_collections().collections]
+            if self.collection_name not in collections:
+                self.client.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config=self._vector_params,
+                )
+
+    def upsert(self, points: Sequence[VectorPoint]) -> None:
+        if not points:
+            return
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                self._point_struct(id=memory_id, vector=list(vector), payload=dict(payload or {}))
+                for memory_id, vector, payload in points
+            ],
+        )
+
+    def delete(self, memory_ids: Iterable[str]) -> None:
+        ids = list(memory_ids)
+        if not ids:
+            return
+        self.client.delete(collection_name=self.collection_name, points_selector=ids)
+
+    def query(self, vector: Sequence[float], limit: int) -> List[tuple[str, float]]:
+        hits = self.client.query_points(
+            collection_name=self.collection_name,
+            query=list(vector),
+            limit=max(int(limit), 1),
+        ).points
+        return [(str(hit.id), float(hit.score)) for hit in hits]
+
+    def get_vector(self, memory_id: str) -> Optional[List[float]]:
+        points = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=[memory_id],
+            with_vectors=True,
+        )
+        if not points:
+            return None
+        vector = points[0].vector
+        if isinstance(vector, dict):
+            vector = next(iter(vector.values()), None)
+        return list(vector) if vector else None
+
+    def query_by_id(self, memory_id: str, limit: int) -> List[tuple[str, float]]:
+        # 优先使用“按 point id 查询近邻”；后端不支持时回退到 retrieve + 向量查询。
+        try:
+            hits = self.client.query_points(
+                collection_name=self.collection_name,
+                query=memory_id,
+                limit=max(int(limit), 1),
+            ).points
+            return [(str(hit.id), float(hit.score)) for hit in hits]
+        except Exception:
+            return super().query_by_id(memory_id, limit)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class FlatVectorStore(VectorStore):
+    """
+    内存映射 float32 平铺索引（精确检索）。
+
+    存储布局（storage_path/vectors_flat_<dim>/）：
+    - vectors.f32：capacity x dim 的归一化向量矩阵（np.memmap）；
+    - ids.bin：capacity 个定长 id 槽位，空串表示空闲槽位。
+
+    删除只清空槽位并回收复用，写入为 O(1) 的原地覆盖；检索为一次矩阵向量乘 + argpartition。
+    """
+
+    ID_BYTES = 64
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, storage_path: str, vector_dim: int):
+        self.vector_dim = int(vector_dim)
+        self.index_dir = os.path.join(storage_path, self._index_dir_name())
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._vectors_path = os.path.join(self.index_dir, "vectors.f32")
+        self._ids_path = os.path.join(self.index_dir, "ids.bin")
+        self._lock = threading.RLock()
+
+        capacity = self.INITIAL_CAPACITY
+        if os.path.exists(self._ids_path):
+            capacity = max(os.path.getsize(self._ids_path) // self.ID_BYTES, 1)
+        self._open(capacity)
+
+        self._id_to_slot: dict[str, int] = {}
+        self._free_slots: list[int] = []
+        self._alive = np.zeros(self._capacity, dtype=bool)
+        self._high_water = 0
+        for slot, raw in enumerate(self._ids):
+            memory_id = bytes(raw).rstrip(b"\x00").decode("utf-8")
+            if memory_id:
+                self._id_to_slot[memory_id] = slot
+                self._alive[slot] = True
+                self._high_water = slot + 1
+        self._free_slots = [slot for slot in range(self._high_water) if not self._alive[slot]]
+
+    def _index_dir_name(self) -> str:
+        return f"vectors_flat_{self.vector_dim}"
+
+    def _open(self, capacity: int):
+        for path, row_bytes in (
+            (self._vectors_path, self.vector_dim * 4),
+            (self._ids_path, self.ID_BYTES),
+        ):
+            expected = capacity * row_bytes
+            with open(path, "ab") as f:
+                if f.tell() < expected:
+                    f.truncate(expected)
+        self._capacity = capacity
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.vector_dim)
+        )
+        self._ids = np.memmap(self._ids_path, dtype=f"S{self.ID_BYTES}", mode="r+", shape=(capacity,))
+
+    def _grow_locked(self, min_capacity: int):
+        capacity = self._capacity
+        while capacity < min_capacity:
+            capacity *= 2
+        self._vectors.flush()
+        self._ids.flush()
+        del self._vectors
+        del self._ids
+        self._open(capacity)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: self._alive.shape[0]] = self._alive
+        self._alive = alive
+
+    def _allocate_slot_locked(self) -> int:
+        if self._free_slots:
+            return self._free_slots.pop()
+        if self._high_water >= self._capacity:
+            self._grow_locked(self._high_water + 1)
+        slot = self._high_water
+        self._high_water += 1
+        return slot
+
+    def upsert(self, points: Sequence[VectorPoint]) -> None:
+        if not points:
+            return
+        matrix = np.asarray([list(vector) for _, vector, _ in points], dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != self.vector_dim:
+            raise ValueError(f"vector dim mismatch: expected {self.vector_dim}, got {matrix.shape}")
+        matrix = _normalize_rows(matrix)
+        with self._lock:
+            slots = []
+            for row, (memory_id, _, _) in enumerate(points):
+                encoded = str(memory_id).encode("utf-8")
+                if len(encoded) > self.ID_BYTES:
+                    raise ValueError(f"memory id too long for flat index: {memory_id}")
+                slot = self._id_to_slot.get(memory_id)
+                if slot is None:
+                    slot = self._allocate_slot_locked()
+                    self._id_to_slot[memory_id] = slot
+                    self._ids[slot] = encoded
+                    self._alive[slot] = True
+                self._vectors[slot] = matrix[row]
+                slots.append(slot)
+            self._after_upsert_locked(slots, matrix)
+
+    def _after_upsert_locked(self, slots: List[int], matrix: np.ndarray) -> None:
+        """子类钩子：向量写入槽位后维护派生索引（如量化码）。"""
+
+    def delete(self, memory_ids: Iterable[str]) -> None:
+        with self._lock:
+            for memory_id in memory_ids:
+                slot = self._id_to_slot.pop(str(memory_id), None)
+                if slot is None:
+                    continue
+                self._ids[slot] = b""
+                self._alive[slot] = False
+                self._free_slots.append(slot)
+
+    def query(self, vector: Sequence[float], limit: int) -> List[tuple[str, float]]:
+        query = np.asarray(vector, dtype=np.float32)
+        q_norm = float(np.linalg.norm(query))
+        if q_norm == 0.0:
+            return []
+        query = query / q_norm
+        with self._lock:
+            size = self._high_water
+            if size == 0:
+                return []
+            scores = np.asarray(self._vectors[:size] @ query, dtype=np.float32)
+            scores[~self._alive[:size]] = -np.inf
+            k = min(max(int(limit), 1), size)
+            top = np.argpartition(-scores, k - 1)[:k] if k < size else np.arange(size)
+            top = top[np.argsort(-scores[top])]
+            return [
+                (bytes(self._ids[slot]).rstrip(b"\x00").decode("utf-8"), float(scores[slot]))
+                for slot in top
+                if np.isfinite(scores[slot])
+            ]
+
+    def get_vector(self, memory_id: str) -> Optional[List[float]]:
+        with self._lock:
+            slot = self._id_to_slot.get(memory_id)
+            if slot is None:
+                return None
+            return self._vectors[slot].astype(float).tolist()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._id_to_slot)
+
+    def ids(self) -> Optional[set[str]]:
+        with self._lock:
+            return set(self._id_to_slot)
+
+    def footprint(self) -> dict:
+        """检索需要常驻内存的字节数（scan_bytes）与磁盘总占用（disk_bytes）。"""
+        with self._lock:
+            scan_bytes = self._capacity * self.vector_dim * 4
+            return {"scan_bytes": scan_bytes, "disk_bytes": scan_bytes + self._capacity * self.ID_BYTES}
+
+    def flush(self) -> None:
+        with self._lock:
+            self._vectors.flush()
+            self._ids.flush()
+
+    def close(self) -> None:
+        self.flush()
+
+
+class QuantizedFlatVectorStore(FlatVectorStore):
+    """
+    int8 标量量化的平铺索引（可选降维），粗排 + 全精度重排。
+
+    在 FlatVectorStore 布局之上额外维护（storage_path/vectors_q8_<dim>[_<reduction><code_dim>]/）：
+    - codes.i8：capacity x code_dim 的 int8 量化码（逐行对称量化）；
+    - scales.f32：每行量化尺度；
+    - projection.npz：PCA 投影（reduction="pca" 且已 fit_pca 时存在）。
+
+    检索只扫描量化码（常驻内存约为 float32 的 1/4，降维后更小），取 limit * rescore_multiplier
+    个候选后读取 vectors.f32 中对应行做精确余弦重排；全精度向量按需换页，不必常驻。
+    降维方式：truncate 取前 code_dim 维（适用于 Matryoshka 式 embedding）；pca 使用从已存向量
+    学习的投影，拟合前按 truncate 处理，拟合后全量重编码。
+    """
+
+    # 粗排每块升为 float32 的字节上限，控制查询时的临时内存。
+    SCAN_CHUNK_BYTES = 4 << 20
+
+    def __init__(
+        self,
+        storage_path: str,
+        vector_dim: int,
+        reduction: str = "none",
+        reduced_dim: int = 0,
+        rescore_multiplier: int = 4,
+    ):
+        reduction = str(reduction or "none").strip().lower()
+        if reduction not in VECTOR_REDUCTIONS:
+            raise ValueError(f"Unsupported vector reduction: {reduction!r}, expected one of {VECTOR_REDUCTIONS}")
+        vector_dim = int(vector_dim)
+        if reduction == "none":
+            code_dim = vector_dim
+        else:
+            code_dim = int(reduced_dim)
+            if not 0 < code_dim < vector_dim:
+                raise ValueError(f"reduced_dim must be in (0, {vector_dim}) for reduction={reduction!r}")
+        self.reduction = reduction
+        self.code_dim = code_dim
+        self.rescore_multiplier = max(int(rescore_multiplier), 1)
+        self._pca_mean: Optional[np.ndarray] = None
+        self._pca_components: Optional[np.ndarray] = None
+        super().__init__(storage_path, vector_dim)
+
+        self._projection_path = os.path.join(self.index_dir, "projection.npz")
+        if self.reduction == "pca" and os.path.exists(self._projection_path):
+            with np.load(self._projection_path) as data:
+                self._pca_mean = data["mean"].astype(np.float32)
+                self._pca_components = data["components"].astype(np.float32)
+
+    def _index_dir_name(self) -> str:
+        if self.reduction == "none":
+            return f"vectors_q8_{self.vector_dim}"
+        return f"vectors_q8_{self.vector_dim}_{self.reduction}{self.code_dim}"
+
+    def _open(self, capacity: int):
+        super()._open(capacity)
+        self._codes_path = os.path.join(self.index_dir, "codes.i8")
+        self._scales_path = os.path.join(self.index_dir, "scales.f32")
+        for path, row_bytes in ((self._codes_path, self.code_dim), (self._scales_path, 4)):
+            expected = capacity * row_bytes
+            with open(path, "ab") as f:
+                if f.tell() < expected:
+                    f.truncate(expected)
+        self._codes = np.memmap(self._codes_path, dtype=np.int8, mode="r+", shape=(capacity, self.code_dim))
+        self._scales = np.memmap(self._scales_path, dtype=np.float32, mode="r+", shape=(capacity,))
+
+    def _grow_locked(self, min_capacity: int):
+        self._codes.flush()
+        self._scales.flush()
+        del self._codes
+        del self._scales
+        super()._grow_locked(min_capacity)
+
+    @property
+    def pca_fitted(self) -> bool:
+        return self._pca_components is not None
+
+    def _project(self, matrix: np.ndarray) -> np.ndarray:
+        """归一化向量 -> 量化空间（降维后重新归一化，使 int8 点积近似余弦）。"""
+        if self.reduction == "pca" and self._pca_components is not None:
+            reduced = (matrix - self._pca_mean) @ self._pca_components.T
+        elif self.reduction == "none":
+            reduced = matrix
+        else:
+            reduced = matrix[:, : self.code_dim]
+        return _normalize_rows(np.asarray(reduced, dtype=np.float32))
+
+    @staticmethod
+    def _quantize(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales = np.where(scales == 0.0, 1.0, scales).astype(np.float32)
+        codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+
+    def _after_upsert_locked(self, slots: List[int], matrix: np.ndarray) -> None:
+        if not slots:
+            return
+        codes, scales = self._quantize(self._project(matrix))
+        self._codes[slots] = codes
+        self._scales[slots] = scales
+
+    def _chunk_rows(self) -> int:
+        return max(self.SCAN_CHUNK_BYTES // (self.vector_dim * 4), 256)
+
+    def query(self, vector: Sequence[float], limit: int) -> List[tuple[str, float]]:
+        query = np.asarray(vector, dtype=np.float32)
+        q_norm = float(np.linalg.norm(query))
+        if q_norm == 0.0:
+            return []
+        query = query / q_norm
+        projected = self._project(query[None, :])[0]
+        limit = max(int(limit), 1)
+        chunk_rows = self._chunk_rows()
+        with self._lock:
+            size = self._high_water
+            if size == 0:
+                return []
+            # 粗排：分块把 int8 码升为 float32 再乘，避免一次性物化 size x code_dim 的浮点矩阵。
+            approx = np.empty(size, dtype=np.float32)
+            for start in range(0, size, chunk_rows):
+                end = min(start + chunk_rows, size)
+                approx[start:end] = (self._codes[start:end].astype(np.float32) @ projected) * self._scales[start:end]
+            approx[~self._alive[:size]] = -np.inf
+
+            k = min(limit * self.rescore_multiplier, size)
+            candidates = np.argpartition(-approx, k - 1)[:k] if k < size else np.arange(size)
+            candidates = candidates[np.isfinite(approx[candidates])]
+            if candidates.size == 0:
+                return []
+            # 重排：只读取候选行的全精度向量。
+            candidates = np.sort(candidates)
+            exact = np.asarray(self._vectors[candidates] @ query, dtype=np.float32)
+            order = np.argsort(-exact)[:limit]
+            return [
+                (bytes(self._ids[candidates[i]]).rstrip(b"\x00").decode("utf-8"), float(exact[i]))
+                for i in order
+            ]
+
+    def fit_pca(self, max_samples: int = 20000, seed: int = 0) -> dict:
+        """从已存全精度向量学习 PCA 投影并落盘，随后全量重编码量化码。"""
+        if self.reduction != "pca":
+            raise ValueError("fit_pca requires reduction='pca'")
+        with self._lock:
+            alive = np.flatnonzero(self._alive[: self._high_water])
+            if alive.size < self.code_dim:
+                raise ValueError(f"need at least {self.code_dim} stored vectors to fit PCA, got {alive.size}")
+            rng = np.random.default_rng(seed)
+            sample = alive
+            if alive.size > max_samples:
+                sample = np.sort(rng.choice(alive, size=max(int(max_samples), self.code_dim), replace=False))
+            data = np.asarray(self._vectors[sample], dtype=np.float32)
+            mean = data.mean(axis=0)
+            _, singular, vt = np.linalg.svd(data - mean, full_matrices=False)
+            components = vt[: self.code_dim].astype(np.float32)
+            energy = singular**2
+            explained = float(energy[: self.code_dim].sum() / energy.sum()) if energy.sum() > 0 else 0.0
+
+            temp_path = self._projection_path + ".tmp.npz"
+            np.savez(temp_path, mean=mean.astype(np.float32), components=components)
+            os.replace(temp_path, self._projection_path)
+            self._pca_mean = mean.astype(np.float32)
+            self._pca_components = components
+
+            chunk_rows = self._chunk_rows()
+            for start in range(0, alive.size, chunk_rows):
+                chunk = alive[start : start + chunk_rows]
+                self._after_upsert_locked(chunk.tolist(), np.asarray(self._vectors[chunk], dtype=np.float32))
+            self._codes.flush()
+            self._scales.flush()
+        return {
+            "samples": int(sample.size),
+            "code_dim": self.code_dim,
+            "explained_variance": round(explained, 4),
+            "reencoded": int(alive.size),
+        }
+
+    def footprint(self) -> dict:
+        with self._lock:
+            scan_bytes = self._capacity * (self.code_dim + 4)
+            full_bytes = self._capacity * self.vector_dim * 4
+            return {"scan_bytes": scan_bytes, "disk_bytes": scan_bytes + full_bytes + self._capacity * self.ID_BYTES}
+
+    def flush(self) -> None:
+        with self._lock:
+            super().flush()
+            self._codes.flush()
+            self._scales.flush()
+
+
+class HnswVectorStore(VectorStore):
+    """
+    可选 HNSW 近似索引（依赖 hnswlib，未安装时初始化报错）。
+
+    hnswlib 只支持整数 label，id <-> label 映射与索引文件一起落盘：
+    每次保存写出新的 index-<seq>.bin，再原子替换 labels.json（其中记录 index_file）作为提交点，
+    崩溃时要么是旧的一对、要么是新的一对，不会出现索引与映射错配。
+    保存按 save_every 批量触发，另由调用方定时 / 关闭时 flush；两次保存之间崩溃丢失的写入
+    由 LongTermMemory 启动时按 SQLite 对账补回。
+    """
+
+    def __init__(
+        self,
+        storage_path: str,
+        vector_dim: int,
+        max_elements: int = 10_000,
+        ef_construction: int = 200,
+        m: int = 16,
+        ef_search: int = 64,
+        save_every: int = 256,
+    ):
+        try:
+            hnswlib = importlib.import_module("hnswlib")
+        except Exception as exc:
+            raise RuntimeError(
+                "vector_backend='hnsw' requires the optional dependency hnswlib (pip install hnswlib)"
+            ) from exc
+
+        self.vector_dim = int(vector_dim)
+        self.index_dir = os.path.join(storage_path, f"vectors_hnsw_{self.vector_dim}")
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._labels_path = os.path.join(self.index_dir, "labels.json")
+        self._lock = threading.RLock()
+        self._ef_search = max(int(ef_search), 1)
+        self._save_every = max(int(save_every), 1)
+        self._dirty = 0
+
+        self._index = hnswlib.Index(space="cosine", dim=self.vector_dim)
+        self._id_to_label: dict[str, int] = {}
+        self._label_to_id: dict[int, str] = {}
+        self._next_label = 0
+        self._index_file = ""
+        self._save_seq = 0
+        labels = None
+        if os.path.exists(self._labels_path):
+            with open(self._labels_path, "r", encoding="utf-8") as f:
+                labels = json.load(f)
+            # 旧版本固定写 index.bin。
+            self._index_file = str(labels.get("index_file") or "index.bin")
+        index_path = os.path.join(self.index_dir, self._index_file) if self._index_file else ""
+        if labels is not None and os.path.exists(index_path):
+            self._id_to_label = {str(k): int(v) for k, v in labels.get("ids", {}).items()}
+            self._next_label = int(labels.get("next_label", 0))
+            self._save_seq = self._parse_seq(self._index_file)
+            self._index.load_index(index_path, max_elements=max(int(max_elements), 1))
+        else:
+            self._index_file = ""
+            self._index.init_index(
+                max_elements=max(int(max_elements), 1),
+                ef_construction=int(ef_construction),
+                M=int(m),
+            )
+        self._label_to_id = {label: memory_id for memory_id, label in self._id_to_label.items()}
+        self._index.set_ef(self._ef_search)
+        self._remove_orphan_files()
+
+    @staticmethod
+    def _parse_seq(index_file: str) -> int:
+        match = re.fullmatch(r"index-(\d+)\.bin", index_file)
+        return int(match.group(1)) if match else 0
+
+    def _remove_orphan_files(self):
+        """清理未被 labels.json 引用的索引文件（保存中途崩溃留下的半成品）。"""
+        for name in os.listdir(self.index_dir):
+            if name == self._index_file:
+                continue
+            if name.endswith(".tmp") or (name.startswith("index") and name.endswith(".bin")):
+                try:
+                    os.remove(os.path.join(self.index_dir, name))
+                except OSError:
+                    pass
+
+    def upsert(self, points: Sequence[VectorPoint]) -> None:
+        if not points:
+            return
+        matrix = np.asarray([list(vector) for _, vector, _ in points], dtype=np.float32)
+        with self._lock:
+            labels = []
+            for memory_id, _, _ in points:
+                label = self._id_to_label.get(memory_id)
+                if label is None:
+                    label = self._next_label
+                    self._next_label += 1
+                    self._id_to_label[memory_id] = label
+                    self._label_to_id[label] = memory_id
+                labels.append(label)
+            needed = self._index.get_current_count() + len(labels)
+            if needed > self._index.get_max_elements():
+                self._index.resize_index(max(needed, self._index.get_max_elements() * 2))
+            self._index.add_items(matrix, np.asarray(labels, dtype=np.int64))
+            self._mark_dirty_locked(len(labels))
+
+    def delete(self, memory_ids: Iterable[str]) -> None:
+        with self._lock:
+            removed = 0
+            for memory_id in memory_ids:
+                label = self._id_to_label.pop(str(memory_id), None)
+                if label is None:
+                    continue
+                self._label_to_id.pop(label, None)
+                try:
+                    self._index.mark_deleted(label)
+                except RuntimeError:
+                    pass
+                removed += 1
+            self._mark_dirty_locked(removed)
+
+    def query(self, vector: Sequence[float], limit: int) -> List[tuple[str, float]]:
+        with self._lock:
+            alive = len(self._id_to_label)
+            if alive == 0:
+                return []
+            k = min(max(int(limit), 1), alive)
+            self._index.set_ef(max(self._ef_search, k))
+            labels, distances = self._index.knn_query(np.asarray(vector, dtype=np.float32), k=k)
+            out = []
+            for label, distance in zip(labels[0], distances[0]):
+                memory_id = self._label_to_id.get(int(label))
+                if memory_id is None:
+                    continue
+                # hnswlib cosine 距离 = 1 - cos。
+                out.append((memory_id, float(1.0 - distance)))
+            return out
+
+    def get_vector(self, memory_id: str) -> Optional[List[float]]:
+        with self._lock:
+            label = self._id_to_label.get(memory_id)
+            if label is None:
+                return None
+            return [float(v) for v in self._index.get_items([label])[0]]
+
+    def ids(self) -> Optional[set[str]]:
+        with self._lock:
+            return set(self._id_to_label)
+
+    def _mark_dirty_locked(self, count: int):
+        self._dirty += int(count)
+        if self._dirty >= self._save_every:
+            self._save_locked()
+
+    def _save_locked(self):
+        # 先写新索引文件，再原子替换 labels.json 切换引用；替换成功前旧的一对仍完整可用。
+        self._save_seq += 1
+        index_file = f"index-{self._save_seq}.bin"
+        index_path = os.path.join(self.index_dir, index_file)
+        self._index.save_index(index_path)
+        with open(index_path, "rb") as f:
+            os.fsync(f.fileno())
+        temp_path = self._labels_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"ids": self._id_to_label, "next_label": self._next_label, "index_file": index_file},
+                f,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._labels_path)
+        previous, self._index_file = self._index_file, index_file
+        if previous and previous != index_file:
+            try:
+                os.remove(os.path.join(self.index_dir, previous))
+            except OSError:
+                pass
+        self._dirty = 0
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._dirty:
+                self._save_locked()
+
+    def close(self) -> None:
+        self.flush()
+
+
+def build_vector_store(
+    backend: str,
+    storage_path: str,
+    vector_dim: int,
+    reduction: str = "none",
+    reduced_dim: int = 0,
+    rescore_multiplier: int = 4,
+) -> VectorStore:
+    """构建向量索引；reduction/reduced_dim/rescore_multiplier 仅对 flat_q8 生效。"""
+    name = str(backend or "qdrant").strip().lower()
+    if name == "qdrant":
+        return QdrantVectorStore(storage_path, vector_dim)
+    if name == "flat":
+        return FlatVectorStore(storage_path, vector_dim)
+    if name == "flat_q8":
+        return QuantizedFlatVectorStore(
+            storage_path,
+            vector_dim,
+            reduction=reduction,
+            reduced_dim=reduced_dim,
+            rescore_multiplier=rescore_multiplier,
+        )
+    if name == "hnsw":
+        return HnswVectorStore(storage_path, vector_dim)
+    raise ValueError(f"Unsupported vector backend: {backend!r}, expected one of {VECTOR_BACKENDS}")
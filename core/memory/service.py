@@ -1,20 +1,20 @@
-import json
 import logging
 import math
 import re
-import threading
-import time
-from datetime import datetime
 from hashlib import sha1
 from typing import Dict, List, Optional
 
 from core.config import MemoryVectorConfig, load_app_config
+from core.memory.dedupe_store import PersistentDedupeFilter
+from core.memory.ingest_queue import JournalLockedError, MemoryIngestQueue
 from core.memory.memory_module_engine import Memory as EngineMemory
 from core.memory.memory_module_engine import OpenAIEmbedding
 from core.memory.memory_module_engine.embedding import EmbeddingProvider as EngineEmbeddingProvider
+from core.memory.memory_module_engine.embedding_cache import PersistentEmbeddingCache
 from core.memory.memory_module_engine.models import MemoryItem
-from core.paths import runtime_memory_dir, runtime_sessions_dir
-from core.utils import log_exception
+from core.memory.session_store import SessionHistoryStore
+from core.paths import memory_module_dir, runtime_memory_dir, runtime_sessions_dir
+from core.utils import log_event, log_exception
 
 logger = logging.getLogger(__name__)
 
@@ -69,29 +69,62 @@ class MemoryService:
         self,
         short_history_limit: int = 24,
         default_user_id: str = "default",
+        write_behind: bool = True,
+        ingest_queue_size: int = 256,
     ):
         self.short_history_limit = max(int(short_history_limit), 0)
         self.default_user_id = default_user_id
 
         self.vector_cfg = load_app_config().memory_vector
-        self._dedupe_lock = threading.RLock()
-        self._session_lock = threading.RLock()
-        self._recent_hashes: Dict[str, float] = {}
+        # 写入去重窗口持久化在 runtime/memory 下：重启或多 worker 不会重复 embedding / 落库同一条记忆。
+        self._dedupe = PersistentDedupeFilter(
+            str(runtime_memory_dir() / "write_dedupe.db"),
+            windows=self.DEDUPE_WINDOW_SECONDS,
+        )
 
-        self._session_dir = runtime_sessions_dir()
-        self._session_dir.mkdir(parents=True, exist_ok=True)
+        # 会话历史：按会话追加写 JSONL + 最近窗口 LRU，每轮不再整文件读写。
+        self._sessions = SessionHistoryStore(
+            runtime_sessions_dir(),
+            window_messages=max(self.short_history_limit, 64),
+        )
         self._engine = self._build_engine(self.vector_cfg)
+        # 后写队列：ingest_turn 只做落日志 + 入队，抽取/embedding/落库由后台 worker 完成。
+        # 需在 engine 就绪后创建，启动时会立即回放上次未完成的条目。
+        # 日志由一个实例独占：多 worker 共用 runtime 时，拿不到日志锁的实例退回同步写入，
+        # 避免重复回放他人的未完成条目、或压缩时替换掉他人正在追加的日志文件。
+        self._ingest_queue: Optional[MemoryIngestQueue] = None
+        if write_behind:
+            try:
+                self._ingest_queue = MemoryIngestQueue(
+                    runtime_memory_dir() / "ingest_journal.jsonl",
+                    handler=self._ingest_batch,
+                    max_pending=ingest_queue_size,
+                )
+            except JournalLockedError:
+                log_event(
+                    logger,
+                    logging.WARNING,
+                    "memory.ingest.journal.locked",
+                    "记忆后写日志已被其他实例持有，本实例改为同步写入",
+                    component="memory",
+                    fallback="sync_ingest",
+                )
 
     def _build_engine(self, vector_cfg: MemoryVectorConfig) -> EngineMemory:
-        storage_dir = runtime_memory_dir() / "memory_module"
+        storage_dir = memory_module_dir()
         storage_dir.mkdir(parents=True, exist_ok=True)
 
-        embedder = self._build_embedder(vector_cfg)
+        self._embedder = self._build_embedder(vector_cfg)
         # 运行默认关闭 LLM 抽取，避免主链路强依赖外网。
-        overrides = {"llm_enabled": False}
+        overrides = {
+            "llm_enabled": False,
+            "vector_backend": vector_cfg.vector_backend,
+            "vector_reduction": vector_cfg.vector_reduction,
+            "vector_reduced_dim": vector_cfg.vector_reduced_dim,
+        }
         return EngineMemory(
             storage_path=str(storage_dir),
-            embedding_provider=embedder,
+            embedding_provider=self._embedder,
             auto_consolidate=True,
             config_overrides=overrides,
         )
@@ -101,6 +134,13 @@ class MemoryService:
         use_openai = bool(vector_cfg.enabled and api_key)
         if use_openai:
             try:
+                persistent_cache = None
+                if vector_cfg.embedding_cache_enabled:
+                    # 磁盘缓存放在 runtime/memory 下，重启/多 worker 共享同一份 embedding。
+                    persistent_cache = PersistentEmbeddingCache(
+                        str(runtime_memory_dir() / "embedding_cache.db"),
+                        max_entries=vector_cfg.embedding_cache_max_entries,
+                    )
                 return OpenAIEmbedding(
                     api_key=api_key,
                     model=vector_cfg.embedding_model,
@@ -108,6 +148,7 @@ class MemoryService:
                     base_url=vector_cfg.embedding_api_url or None,
                     cache_enabled=True,
                     cache_max_entries=4096,
+                    persistent_cache=persistent_cache,
                 )
             except Exception:
                 log_exception(
@@ -120,67 +161,14 @@ class MemoryService:
         return DeterministicEmbeddingProvider(dim=max(int(vector_cfg.vector_dim), 384))
 
     def _safe_session_id(self, session_id: str) -> str:
-        raw = str(session_id or "default").strip() or "default"
-        return re.sub(r"[^A-Za-z0-9._-]", "_", raw)
+        return SessionHistoryStore.safe_session_id(session_id)
 
     def _session_path(self, session_id: str):
-        safe = self._safe_session_id(session_id)
-        return self._session_dir / f"{safe}.json"
-
-    def _load_round(self, session_id: str) -> Dict[str, object]:
-        path = self._session_path(session_id)
-        if not path.exists():
-            return {"session_id": self._safe_session_id(session_id), "history": [], "metadata": {}}
-
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            history = data.get("history")
-            metadata = data.get("metadata")
-            return {
-                "session_id": data.get("session_id", self._safe_session_id(session_id)),
-                "saved_at": data.get("saved_at", ""),
-                "history": history if isinstance(history, list) else [],
-                "metadata": metadata if isinstance(metadata, dict) else {},
-            }
-        except Exception:
-            return {"session_id": self._safe_session_id(session_id), "history": [], "metadata": {}}
-
-    def _save_round(self, session_id: str, history: List[Dict[str, object]], metadata: Dict[str, object]) -> None:
-        path = self._session_path(session_id)
-        payload = {
-            "session_id": self._safe_session_id(session_id),
-            "saved_at": datetime.utcnow().isoformat() + "Z",
-            "history": history,
-            "metadata": metadata,
-        }
-        temp_path = str(path) + ".tmp"
-        with open(temp_path, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
-        # 原子替换，避免并发写入导致半文件状态。
-        import os
-
-        os.replace(temp_path, path)
+        return self._sessions.session_path(session_id)
 
     def get_recent_history(self, session_id: str, limit_messages: Optional[int] = None) -> List[Dict[str, str]]:
         limit = self.short_history_limit if limit_messages is None else limit_messages
-        with self._session_lock:
-            payload = self._load_round(session_id)
-        history = payload.get("history")
-        if not isinstance(history, list):
-            return []
-
-        rows = history[-limit:] if isinstance(limit, int) and limit > 0 else history
-        out: List[Dict[str, str]] = []
-        for row in rows:
-            if not isinstance(row, dict):
-                continue
-            role = str(row.get("role", "")).strip()
-            content = str(row.get("content", ""))
-            if not role:
-                continue
-            out.append({"role": role, "content": content})
-        return out
+        return self._sessions.recent(session_id, limit if isinstance(limit, int) else None)
 
     def record_session_round(
         self,
@@ -189,14 +177,12 @@ class MemoryService:
         assistant_reply: str,
         metadata: Optional[Dict[str, object]] = None,
     ) -> List[Dict[str, str]]:
-        with self._session_lock:
-            payload = self._load_round(session_id)
-            history = payload.get("history") if isinstance(payload.get("history"), list) else []
-            if (user_text or "").strip():
-                history.append({"role": "user", "content": str(user_text)})
-            if (assistant_reply or "").strip():
-                history.append({"role": "assistant", "content": str(assistant_reply)})
-            self._save_round(session_id, history, metadata or {})
+        messages: List[Dict[str, str]] = []
+        if (user_text or "").strip():
+            messages.append({"role": "user", "content": str(user_text)})
+        if (assistant_reply or "").strip():
+            messages.append({"role": "assistant", "content": str(assistant_reply)})
+        self._sessions.append_round(session_id, messages, metadata or {})
         return self.get_recent_history(session_id=session_id, limit_messages=None)
 
     def ingest_turn(
@@ -205,23 +191,78 @@ class MemoryService:
         user_text: str,
         assistant_reply: str,
         meta: Optional[Dict] = None,
+    ) -> None:
+        """
+        记录一轮对话到记忆。
+
+        启用后写队列时只做持久化入队即返回；队列满或未启用时退化为同步写入。
+        """
+        payload = {
+            "session_id": str(session_id or ""),
+            "user_text": str(user_text or ""),
+            "assistant_reply": str(assistant_reply or ""),
+            "meta": self._journal_meta(meta),
+        }
+        if self._ingest_queue is not None and self._ingest_queue.enqueue(payload):
+            return
+        self._ingest_turn_now(**payload)
+
+    def _journal_meta(self, meta: Optional[Dict]) -> Dict[str, object]:
+        # 只保留抽取用到的字段，保证 payload 可 JSON 序列化、日志体积可控。
+        meta = meta if isinstance(meta, dict) else {}
+        plan = meta.get("plan")
+        return {
+            "task_mode": bool(meta.get("task_mode")),
+            "task_id": str(meta.get("task_id") or ""),
+            "task_error": bool(meta.get("task_error")),
+            "plan": {"goal": str(plan.get("goal", ""))} if isinstance(plan, dict) else None,
+        }
+
+    def _ingest_batch(self, payloads: List[Dict[str, object]]) -> None:
+        for payload in payloads:
+            try:
+                self._ingest_turn_now(**payload)
+            except Exception:
+                log_exception(
+                    logger,
+                    "memory.ingest.turn.error",
+                    "记忆后写处理失败，已跳过该轮",
+                    component="memory",
+                    session_id=str(payload.get("session_id") or ""),
+                    fallback="skip_memory_ingest",
+                )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待后写队列处理完毕（测试与停机时使用）；未启用后写时直接返回 True。"""
+        if self._ingest_queue is None:
+            return True
+        return self._ingest_queue.flush(timeout=timeout)
+
+    def _ingest_turn_now(
+        self,
+        session_id: str,
+        user_text: str,
+        assistant_reply: str,
+        meta: Optional[Dict] = None,
     ) -> None:
         user_text = str(user_text or "").strip()
         assistant_reply = str(assistant_reply or "").strip()
         meta = meta if isinstance(meta, dict) else {}
+        # 本轮所有候选先收集，再一次性写入 engine（长期写入合并为一个事务）。
+        entries: List[tuple[str, str]] = []
 
         # 1) 结构化偏好与待办。
         for profile in self._extract_profile_candidates(user_text):
-            self._persist_memory("profile", profile)
+            entries.append(("profile", profile))
 
         for commitment in self._extract_commitment_candidates(user_text):
-            self._persist_memory("commitment", commitment)
+            entries.append(("commitment", commitment))
 
         # 2) 对话片段。
         if len(user_text) >= 6:
             topic = self._extract_topic(user_text=user_text, assistant_reply=assistant_reply)
             episodic = f"主题:{topic} | USER:{user_text[:120]} | ASSISTANT:{assistant_reply[:120]}"
-            self._persist_memory("episodic", episodic)
+            entries.append(("episodic", episodic))
 
         # 3) 任务经验。
         if meta.get("task_mode") and meta.get("task_id") and not meta.get("task_error"):
@@ -229,7 +270,9 @@ class MemoryService:
             if isinstance(plan, dict):
                 goal = str(plan.get("goal", "")).strip()
                 if goal:
-                    self._persist_memory("procedural", f"任务模板: {goal}")
+                    entries.append(("procedural", f"任务模板: {goal}"))
+
+        self._persist_memories(entries)
 
     def build_context(self, query: str = "") -> str:
         query_text = str(query or "").strip()
@@ -267,47 +310,105 @@ class MemoryService:
 
         return "\n".join(lines).strip()
 
-    def _persist_memory(self, memory_type: str, content: str) -> str:
-        normalized = str(content or "").strip()
-        if not normalized:
-            return ""
-        full_text = f"{memory_type}: {normalized}"
-        if self._is_recent_duplicate(memory_type, full_text):
-            return ""
+    def get_stats(self) -> Dict[str, object]:
+        """记忆统计快照（计数器读取，适合周期性抓取）。"""
+        stats: Dict[str, object] = dict(self._engine.get_stats())
+        if self._ingest_queue is not None:
+            stats["ingest_queue"] = self._ingest_queue.stats()
+        stats["write_dedupe"] = self._dedupe.stats()
+        stats["session_store"] = self._sessions.stats()
+        cache_stats = getattr(self._embedder, "cache_stats", None)
+        if callable(cache_stats):
+            stats["embedding_cache"] = cache_stats()
+        return stats
+
+    def _persist_memories(self, entries: List[tuple[str, str]]) -> List[str]:
+        candidates: List[tuple[str, str]] = []
+        for memory_type, content in entries:
+            normalized = str(content or "").strip()
+            if not normalized:
+                continue
+            candidates.append((memory_type, f"{memory_type}: {normalized}"))
+        keys = self._dedupe_keys(candidates)
+        duplicates = self._check_duplicates(keys)
+        fresh = [
+            (key, full_text)
+            for key, (_, full_text), duplicate in zip(keys, candidates, duplicates)
+            if not duplicate
+        ]
+        if not fresh:
+            return []
         try:
-            return self._engine.add(full_text)
+            return self._engine.add_many([full_text for _, full_text in fresh])
         except Exception:
             log_exception(
                 logger,
                 "memory.engine.add.error",
-                "memory_module 写入失败，已跳过该条记忆",
+                "memory_module 批量写入失败，逐条重试",
                 component="memory",
-                fallback="skip_memory_write",
+                fallback="per_entry_add",
+                batch_size=len(fresh),
             )
-            return ""
+        # 整批失败时逐条写入：一条坏数据不拖累同轮其他记忆。
+        memory_ids: List[str] = []
+        failed_keys: List[tuple[str, str]] = []
+        for key, full_text in fresh:
+            try:
+                memory_ids.append(self._engine.add(full_text))
+            except Exception:
+                failed_keys.append(key)
+                log_exception(
+                    logger,
+                    "memory.engine.add.error",
+                    "memory_module 写入失败，已跳过该条记忆",
+                    component="memory",
+                    fallback="skip_memory_write",
+                    memory_type=key[0],
+                )
+        # 写入失败的条目撤销去重标记，重试 / 日志重放时同样的内容不会被当作重复丢掉。
+        self._unmark_duplicates(failed_keys)
+        return memory_ids
 
     def _hash_content(self, memory_type: str, text: str) -> str:
         normalized = " ".join(str(text or "").strip().lower().split())
         return sha1(f"{memory_type}:{normalized}".encode("utf-8")).hexdigest()
 
+    def _dedupe_keys(self, entries: List[tuple[str, str]]) -> List[tuple[str, str]]:
+        return [
+            (memory_type, f"{memory_type}:{self._hash_content(memory_type, content)}")
+            for memory_type, content in entries
+        ]
+
     def _is_recent_duplicate(self, memory_type: str, content: str) -> bool:
-        content_hash = self._hash_content(memory_type, content)
-        key = f"{memory_type}:{content_hash}"
-        now = time.time()
-        window = int(self.DEDUPE_WINDOW_SECONDS.get(memory_type, 24 * 3600))
+        return self._recent_duplicates([(memory_type, content)])[0]
 
-        with self._dedupe_lock:
-            last = self._recent_hashes.get(key)
-            self._recent_hashes[key] = now
+    def _recent_duplicates(self, entries: List[tuple[str, str]]) -> List[bool]:
+        return self._check_duplicates(self._dedupe_keys(entries))
 
-            # 控制 map 尺寸并清理过旧 key。
-            if len(self._recent_hashes) > 4096:
-                cutoff = now - max(window, 3600)
-                stale_keys = [k for k, ts in self._recent_hashes.items() if ts < cutoff]
-                for stale in stale_keys:
-                    self._recent_hashes.pop(stale, None)
+    def _check_duplicates(self, keys: List[tuple[str, str]]) -> List[bool]:
+        """批量判重（一个事务）；去重存储异常时放行写入，宁可重复也不丢记忆。"""
+        try:
+            return self._dedupe.check_and_mark(keys)
+        except Exception:
+            log_exception(
+                logger,
+                "memory.dedupe.error",
+                "写入去重检查失败，本批按非重复处理",
+                component="memory",
+                fallback="dedupe_fail_open",
+            )
+            return [False] * len(keys)
 
-        return last is not None and (now - last) <= window
+    def _unmark_duplicates(self, keys: List[tuple[str, str]]) -> None:
+        try:
+            self._dedupe.unmark([key for _, key in keys])
+        except Exception:
+            log_exception(
+                logger,
+                "memory.dedupe.unmark.error",
+                "撤销写入去重标记失败",
+                component="memory",
+            )
 
     def _search_entries(self, query: str, limit: int) -> List[MemoryItem]:
         try:
@@ -431,6 +532,17 @@ class MemoryService:
         return topic
 
     def close(self) -> None:
+        if self._ingest_queue is not None:
+            try:
+                # 先排空后写队列再关 engine；超时未处理的条目留在日志，下次启动回放。
+                self._ingest_queue.close()
+            except Exception:
+                log_exception(
+                    logger,
+                    "memory.ingest.close.error",
+                    "记忆后写队列关闭失败",
+                    component="memory",
+                )
         try:
             self._engine.close()
         except Exception:
@@ -440,3 +552,23 @@ class MemoryService:
                 "memory_module 关闭失败",
                 component="memory",
             )
+        try:
+            self._dedupe.close()
+        except Exception:
+            log_exception(
+                logger,
+                "memory.dedupe.close.error",
+                "写入去重存储关闭失败",
+                component="memory",
+            )
+        close_embedder = getattr(self._embedder, "close", None)
+        if callable(close_embedder):
+            try:
+                close_embedder()
+            except Exception:
+                log_exception(
+                    logger,
+                    "memory.embedder.close.error",
+                    "embedding 缓存关闭失败",
+                    component="memory",
+                )
@@ -0,0 +1,343 @@
+"""Append-only per-session history log with an in-memory window cache."""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from core.utils.retention import register_runtime_file
+
+TAIL_BLOCK_BYTES = 64 * 1024
+
+
+@dataclass
+class _SessionWindow:
+    messages: Deque[Dict[str, str]]
+    metadata: Dict[str, object] = field(default_factory=dict)
+    # 窗口是否已包含会话全部消息（历史短于窗口时为 True，可直接服务任意 limit）。
+    complete: bool = False
+    # 自上次压缩以来追加的记录数（冷加载时按尾部读到的记录估算下限）。
+    records_since_compact: int = 0
+
+
+class SessionHistoryStore:
+    """
+    会话短期历史存储。
+
+    - 每个会话一个 JSONL 段文件 `{session}.jsonl`，每轮只追加一行 round 记录（消息 + 元数据），不再整文件重写；
+    - 内存 LRU 缓存最近 window_messages 条消息，命中时读历史不触碰磁盘；未命中时从文件尾部倒读，不解析全文件；
+    - 每追加 compact_every 条记录压缩一次：整段合并为一行 snapshot（元数据只保留最新），
+      retain_messages > 0 时同时裁掉更早的消息；
+    - 锁按会话划分，不同会话的读写互不阻塞；LRU 结构本身由一把只覆盖字典操作的小锁保护；
+    - 兼容旧版整文件 `{session}.json`：首次访问时迁移为 snapshot 记录。
+    """
+
+    def __init__(
+        self,
+        session_dir: Path,
+        window_messages: int = 64,
+        max_cached_sessions: int = 128,
+        compact_every: int = 200,
+        retain_messages: int = 0,
+    ):
+        self._dir = Path(session_dir)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self.window_messages = max(int(window_messages), 1)
+        self.max_cached_sessions = max(int(max_cached_sessions), 1)
+        self.compact_every = max(int(compact_every), 1)
+        self.retain_messages = max(int(retain_messages), 0)
+
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+        self._cache: "OrderedDict[str, _SessionWindow]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "appends": 0, "compactions": 0, "migrated": 0}
+
+    @staticmethod
+    def safe_session_id(session_id: str) -> str:
+        raw = str(session_id or "default").strip() or "default"
+        return re.sub(r"[^A-Za-z0-9._-]", "_", raw)
+
+    def session_path(self, session_id: str) -> Path:
+        return self._dir / f"{self.safe_session_id(session_id)}.jsonl"
+
+    def _legacy_path(self, safe: str) -> Path:
+        return self._dir / f"{safe}.json"
+
+    def _session_lock(self, safe: str) -> threading.RLock:
+        with self._locks_guard:
+            lock = self._locks.get(safe)
+            if lock is None:
+                lock = threading.RLock()
+                self._locks[safe] = lock
+            return lock
+
+    def _bump(self, key: str, count: int = 1) -> None:
+        with self._cache_lock:
+            self._stats[key] += count
+
+    # ---- 读 ----
+
+    def recent(self, session_id: str, limit: Optional[int]) -> List[Dict[str, str]]:
+        """最近 limit 条消息；limit 为 None 或 <= 0 时返回全部。"""
+        safe = self.safe_session_id(session_id)
+        with self._session_lock(safe):
+            if limit is not None and 0 < limit <= self.window_messages:
+                window = self._window(safe)
+                return list(window.messages)[-limit:]
+            window = self._window(safe)
+            if window.complete:
+                messages = list(window.messages)
+            else:
+                messages, _, _ = self._read_all(safe)
+        if limit is not None and limit > 0:
+            return messages[-limit:]
+        return messages
+
+    def metadata(self, session_id: str) -> Dict[str, object]:
+        safe = self.safe_session_id(session_id)
+        with self._session_lock(safe):
+            return dict(self._window(safe).metadata)
+
+    def _window(self, safe: str) -> _SessionWindow:
+        """调用方需持有会话锁。"""
+        with self._cache_lock:
+            window = self._cache.get(safe)
+            if window is not None:
+                self._cache.move_to_end(safe)
+                self._stats["hits"] += 1
+                return window
+            self._stats["misses"] += 1
+
+        window = self._load_window(safe)
+        with self._cache_lock:
+            self._cache[safe] = window
+            self._cache.move_to_end(safe)
+            while len(self._cache) > self.max_cached_sessions:
+                self._cache.popitem(last=False)
+        return window
+
+    def _load_window(self, safe: str) -> _SessionWindow:
+        self._migrate_legacy(safe)
+        path = self._dir / f"{safe}.jsonl"
+        window = _SessionWindow(messages=deque(maxlen=self.window_messages))
+        if not path.exists():
+            window.complete = True
+            return window
+
+        records, reached_start = self._tail_records(path, self.window_messages)
+        collected: List[Dict[str, str]] = []
+        hit_snapshot = False
+        # records 为倒序：最新在前，最新一条的元数据即当前元数据。
+        for record in records:
+            collected[:0] = _record_messages(record)
+            if record.get("op") == "snapshot":
+                hit_snapshot = True
+        window.messages.extend(collected)
+        window.metadata = _record_metadata(records[0]) if records else {}
+        window.complete = (reached_start or hit_snapshot) and len(collected) <= self.window_messages
+        window.records_since_compact = len(records)
+        return window
+
+    def _tail_records(self, path: Path, want_messages: int) -> Tuple[List[dict], bool]:
+        """
+        从文件尾部按块倒读，直到凑够 want_messages 条消息或遇到 snapshot。
+
+        返回（倒序记录列表, 是否已读到文件开头）。末尾半行（崩溃残留）会被截掉，保证后续追加从新行开始。
+        """
+        records: List[dict] = []
+        messages = 0
+        with open(path, "r+b") as f:
+            pos = _truncate_torn_tail(f)
+            buffer = b""
+            while pos > 0:
+                read_size = min(TAIL_BLOCK_BYTES, pos)
+                pos -= read_size
+                f.seek(pos)
+                lines = (f.read(read_size) + buffer).split(b"\n")
+                # 第一段可能是被块边界截断的半行，留到下一块拼接（已到开头则一并解析）。
+                buffer = lines[0] if pos > 0 else b""
+                complete_lines = lines[1:] if pos > 0 else lines
+                for raw in reversed(complete_lines):
+                    record = _parse_line(raw)
+                    if record is None:
+                        continue
+                    records.append(record)
+                    messages += len(_record_messages(record))
+                    if record.get("op") == "snapshot" or messages >= want_messages:
+                        return records, False
+        return records, True
+
+    def _read_all(self, safe: str) -> Tuple[List[Dict[str, str]], Dict[str, object], int]:
+        """全量读取（仅在需要超出窗口的历史或压缩时使用）。返回（消息, 最新元数据, 记录数）。"""
+        path = self._dir / f"{safe}.jsonl"
+        messages: List[Dict[str, str]] = []
+        metadata: Dict[str, object] = {}
+        count = 0
+        if not path.exists():
+            return messages, metadata, count
+        with open(path, "rb") as f:
+            for raw in f:
+                record = _parse_line(raw)
+                if record is None:
+                    continue
+                count += 1
+                if record.get("op") == "snapshot":
+                    messages = []
+                messages.extend(_record_messages(record))
+                metadata = _record_metadata(record)
+        return messages, metadata, count
+
+    # ---- 写 ----
+
+    def append_round(
+        self,
+        session_id: str,
+        messages: List[Dict[str, str]],
+        metadata: Dict[str, object],
+    ) -> None:
+        safe = self.safe_session_id(session_id)
+        record = {
+            "op": "round",
+            "saved_at": _now(),
+            "messages": messages,
+            "metadata": metadata,
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._session_lock(safe):
+            window = self._window(safe)
+            path = self._dir / f"{safe}.jsonl"
+            created = not path.exists()
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+            if created:
+                register_runtime_file(path, "sessions")
+            if window.complete and len(window.messages) + len(messages) > self.window_messages:
+                # 有消息将被挤出窗口，之后窗口不再等于全量历史。
+                window.complete = False
+            window.messages.extend(messages)
+            window.metadata = dict(metadata)
+            window.records_since_compact += 1
+            self._bump("appends")
+            if window.records_since_compact >= self.compact_every:
+                self._compact_locked(safe, window)
+
+    def compact(self, session_id: str) -> None:
+        safe = self.safe_session_id(session_id)
+        with self._session_lock(safe):
+            self._compact_locked(safe, self._window(safe))
+
+    def _compact_locked(self, safe: str, window: _SessionWindow) -> None:
+        messages, metadata, _ = self._read_all(safe)
+        if self.retain_messages > 0:
+            messages = messages[-self.retain_messages :]
+        self._write_snapshot(safe, messages, metadata)
+        window.messages.clear()
+        window.messages.extend(messages[-self.window_messages :])
+        window.metadata = dict(metadata)
+        window.complete = len(messages) <= self.window_messages
+        window.records_since_compact = 1
+        self._bump("compactions")
+
+    def _write_snapshot(self, safe: str, messages: List[Dict[str, str]], metadata: Dict[str, object]) -> None:
+        path = self._dir / f"{safe}.jsonl"
+        record = {"op": "snapshot", "saved_at": _now(), "messages": messages, "metadata": metadata}
+        temp_path = str(path) + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # 原子替换，避免压缩中途崩溃留下半文件。
+        os.replace(temp_path, path)
+
+    def _migrate_legacy(self, safe: str) -> None:
+        legacy = self._legacy_path(safe)
+        if not legacy.exists() or (self._dir / f"{safe}.jsonl").exists():
+            return
+        try:
+            with open(legacy, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        history = data.get("history") if isinstance(data, dict) else None
+        metadata = data.get("metadata") if isinstance(data, dict) else None
+        self._write_snapshot(
+            safe,
+            _clean_messages(history if isinstance(history, list) else []),
+            metadata if isinstance(metadata, dict) else {},
+        )
+        legacy.unlink(missing_ok=True)
+        self._bump("migrated")
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "cached_sessions": len(self._cache),
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _truncate_torn_tail(f) -> int:
+    """截掉文件末尾没有换行的半行（追加写崩溃残留），返回截断后的文件长度。"""
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    if end == 0:
+        return 0
+    f.seek(end - 1)
+    if f.read(1) == b"\n":
+        return end
+    pos = end
+    while pos > 0:
+        read_size = min(TAIL_BLOCK_BYTES, pos)
+        pos -= read_size
+        f.seek(pos)
+        cut = f.read(read_size).rfind(b"\n")
+        if cut >= 0:
+            keep = pos + cut + 1
+            f.truncate(keep)
+            return keep
+    f.truncate(0)
+    return 0
+
+
+def _parse_line(raw: bytes) -> Optional[dict]:
+    raw = raw.strip()
+    if not raw:
+        return None
+    try:
+        record = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def _clean_messages(rows: list) -> List[Dict[str, str]]:
+    out: List[Dict[str, str]] = []
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        role = str(row.get("role", "")).strip()
+        if not role:
+            continue
+        out.append({"role": role, "content": str(row.get("content", ""))})
+    return out
+
+
+def _record_messages(record: dict) -> List[Dict[str, str]]:
+    messages = record.get("messages")
+    return _clean_messages(messages) if isinstance(messages, list) else []
+
+
+def _record_metadata(record: dict) -> Dict[str, object]:
+    metadata = record.get("metadata")
+    return metadata if isinstance(metadata, dict) else {}
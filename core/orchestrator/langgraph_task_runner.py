@@ -2,14 +2,14 @@ import logging
 import time
 import json
 from copy import deepcopy
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from contextvars import copy_context
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 from dataclasses import dataclass
 from typing import Any, Callable, Dict, List, Optional, Tuple, TypedDict
 
 from langgraph.graph import END, START, StateGraph
 
-from core.orchestrator.task_snapshot import step_result_from_node
+from core.orchestrator.step_pool import StepPool, get_step_pool
+from core.orchestrator.task_snapshot import step_memo_key, step_result_from_node
 from core.protocols import CriticResult, ExecutorRunResult, PlanResult, TaskState
 from core.utils import bind_log_context, elapsed_ms, log_event, log_exception
 
@@ -76,6 +76,8 @@ class TaskFlowState(TypedDict, total=False):
     resume_snapshot: Optional[Dict[str, Any]]
     resume_waiting_payload: Optional[Dict[str, Any]]
     resume_user_reply: str
+    step_memo: Optional[Dict[str, Dict[str, Any]]]
+    tool_names: List[str]
 
 
 class LangGraphTaskRunner:
@@ -84,11 +86,14 @@ class LangGraphTaskRunner:
         *,
         task_manager: Any,
         build_step_input: Callable[..., str],
+        step_pool: Optional[StepPool] = None,
     ):
         # task_manager 负责任务状态持久化；
-        # build_step_input 由 orchestrator 注入，用于将 step + 上下文组装成执行输入。
+        # build_step_input 由 orchestrator 注入，用于将 step + 上下文组装成执行输入；
+        # step_pool 为空时使用进程级共享步骤池（get_step_pool）。
         self._task_manager = task_manager
         self._build_step_input = build_step_input
+        self._step_pool = step_pool
         self._graph = self._build_graph()
 
     def run(
@@ -105,6 +110,7 @@ class LangGraphTaskRunner:
         resume_snapshot: Optional[Dict[str, Any]] = None,
         resume_waiting_payload: Optional[Dict[str, Any]] = None,
         resume_user_reply: str = "",
+        step_memo: Optional[Dict[str, Dict[str, Any]]] = None,
     ) -> TaskFlowRunResult:
         """
         TaskRunner 对外统一入口。
@@ -115,6 +121,9 @@ class LangGraphTaskRunner:
         3) critic_agent 负责最终评审。
 
         该方法会驱动 LangGraph 状态机直到 finalize，返回整轮执行快照。
+
+        step_memo 由调用方跨 replan 轮次持有：提交步骤前按 step_memo_key 查找，命中则直接复用
+        之前成功的输出（节点标记 reused），本轮结束后把成功节点写回 step_memo。
         """
         initial: TaskFlowState = {
             "user_text": user_text,
@@ -135,9 +144,12 @@ class LangGraphTaskRunner:
             "resume_snapshot": resume_snapshot,
             "resume_waiting_payload": resume_waiting_payload,
             "resume_user_reply": resume_user_reply,
+            "step_memo": step_memo,
+            "tool_names": self._tool_names(executor_agent) if step_memo is not None else [],
         }
 
         state = self._graph.invoke(initial)
+        self._remember_succeeded_steps(state)
         critic_result = state.get("critic_result")
         if critic_result is None:
             # waiting 场景下无需强制评审；否则兜底 pass，保证返回结构稳定。
@@ -310,7 +322,7 @@ class LangGraphTaskRunner:
         self._refresh_ready_nodes(snapshot)
 
         # _ready_nodes 会按拓扑顺序返回可执行节点，并受 max_parallelism 限制
-        # 返回结果就是本轮要交给 _run_ready_steps 执行的批次
+        # 返回结果是 _run_ready_steps 首批提交的节点，之后由其在步骤完成时补投
         ready_nodes = self._ready_nodes(snapshot, limit=self._max_parallelism(snapshot))
         if ready_nodes:
             # 有可执行节点：写入 ready_batch，并路由到执行节点
@@ -344,98 +356,47 @@ class LangGraphTaskRunner:
         return state
 
     def _run_ready_steps(self, state: TaskFlowState) -> TaskFlowState:
-        # 读取本轮执行所需的核心上下文：
-        # - snapshot: 当前任务图快照（包含所有节点状态与依赖）
-        # - task_id: 用于任务结果落盘
-        # - executor_agent: 真正执行单步任务的代理
-        # - fail_fast: 是否在出现首个步骤错误后阻断剩余未执行步骤
+        # 完成驱动的调度循环（不再按批次屏障等待）：
+        # - 先提交 select_ready_steps 选出的 ready_batch；
+        # - 任一步骤完成即回写结果，并立刻刷新依赖、补投新就绪的节点，在途步骤数始终不超过 max_parallelism；
+        # - 快照读写（含 build_step_input）只在调度线程进行，worker 线程只调用 executor_agent.run_task。
         snapshot = state["task_snapshot"]
         task_id = state["task_id"]
-        executor_agent = state["executor_agent"]
         fail_fast = self._fail_fast(snapshot)
+        max_parallelism = self._max_parallelism(snapshot)
+        rank = {step_id: idx for idx, step_id in enumerate(snapshot.get("topological_order") or [])}
+        started = time.perf_counter()
 
-        # 将本轮 ready 批次转换为待执行作业列表 jobs。
-        # 每个作业保存 (step_id, step_input)：
-        # - step_id: 用于后续回写结果
-        # - step_input: 给 executor 的最终输入文本（包含上下文/绑定/步骤指令）
-        ready_batch = list(state.get("ready_batch") or [])
-        jobs: List[Tuple[str, str]] = []
-        for step_id in ready_batch:
-            node = self._get_node(snapshot, step_id)
-
-            # 在提交并发执行前，把节点状态置为 running，并清空旧错误。
-            # 这样在观测层可以即时看到该步骤已被调度。
-            node["state"] = STEP_STATE_RUNNING
-            node["error"] = None
-
-            # 为每个步骤构造独立的执行输入，确保模型执行时拿到正确的步骤上下文。
-            step_input = self._build_step_input(
-                user_text=state["user_text"],
-                task_snapshot=snapshot,
-                step_id=step_id,
-            )
-            jobs.append((step_id, step_input))
-
-        # 并发执行当前批次：
-        # _run_step_batch 内部使用线程池并行调用 executor_agent.run_task。
-        # 返回 step_id -> ExecutorRunResult 的映射，便于按原批次顺序回写。
-        run_results = self._run_step_batch(
-            jobs=jobs,
-            executor_agent=executor_agent,
-            history=state["history"],
-            session_id=state["session_id"],
-            task_id=task_id,
-        )
-
-        # 记录 fail_fast 触发错误：
-        # - 只记录第一个触发 fail_fast 的错误
-        # - 本轮已启动的并发步骤仍会回收结果并落盘
-        # - 阻断发生在本轮结束后（阻断下一轮）
+        # fail_fast / 等待用户输入命中后停止补投，已在途的步骤仍会回收结果并落盘。
         fail_fast_error: Optional[Dict[str, Any]] = None
         waiting_payload: Optional[Dict[str, Any]] = None
-        for step_id in ready_batch:
-            node = self._get_node(snapshot, step_id)
-            run_result = run_results.get(step_id)
-            if run_result is None:
-                # 理论上不会缺失；若缺失则兜底成失败结果，避免状态悬空。
-                run_result = self._failed_run_result("Missing step execution result")
-
-            # 汇总工具事件到全局事件流，便于上层追踪。
-            state["all_tool_events"].extend(list(run_result.tool_events))
-            if run_result.error:
-                # 步骤执行失败：写失败状态、输出、错误明细，并尝试写入首错。
-                node["state"] = STEP_STATE_FAILED
-                node["output_text"] = run_result.output_text
-                node["tool_events"] = list(run_result.tool_events)
-                node["error"] = run_result.error
-                self._set_first_error_once(state, run_result.error)
-                if fail_fast and fail_fast_error is None:
-                    fail_fast_error = run_result.error
-            elif self._step_requires_user_input(run_result.output_text):
-                # 需补充信息不视为失败，而是挂起当前任务等待用户补充。
-                node_waiting_payload = self._build_waiting_payload(
-                    step_id=step_id,
-                    output_text=run_result.output_text,
-                )
-                node["state"] = STEP_STATE_WAITING_USER_INPUT
-                node["output_text"] = run_result.output_text
-                node["tool_events"] = list(run_result.tool_events)
-                node["error"] = None
-                if waiting_payload is None:
+        dispatched = 0
+        in_flight: Dict[Future, str] = {}
+        # 步骤提交到进程级共享池（按任务公平轮转）；max_parallelism 只限制本任务的在途步骤数。
+        pool = self._step_pool or get_step_pool()
+        for step_id in list(state.get("ready_batch") or [])[:max_parallelism]:
+            in_flight[self._submit_step(pool, state, step_id)] = step_id
+            dispatched += 1
+
+        while in_flight:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            # 同一时刻完成的多个步骤按拓扑序回写，保证结果确定。
+            for future in sorted(done, key=lambda f: rank.get(in_flight[f], 10**9)):
+                step_id = in_flight.pop(future)
+                run_result = self._collect_step_result(future, step_id=step_id, task_id=task_id)
+                step_error, node_waiting_payload = self._commit_step_result(state, step_id, run_result)
+                if step_error is not None and fail_fast and fail_fast_error is None:
+                    fail_fast_error = step_error
+                if node_waiting_payload is not None and waiting_payload is None:
                     waiting_payload = node_waiting_payload
-            else:
-                # 步骤执行成功：写成功状态与输出。
-                node["state"] = STEP_STATE_SUCCEEDED
-                node["output_text"] = run_result.output_text
-                node["tool_events"] = list(run_result.tool_events)
-                node["error"] = None
-
-            # 记录执行顺序，并把当前步骤结果持久化到 TaskManager。
-            # 注意：这里写入的是步骤快照投影，保持与外部可观测结构一致。
-            state["executed_steps"].append(step_id)
-            self._task_manager.append_step_result(task_id, step_result_from_node(node))
 
-        # 默认继续回到 select_ready_steps，挑选下一轮 ready 批次。
+            if fail_fast_error is not None or waiting_payload is not None:
+                continue
+            for step_id in self._next_ready_steps(snapshot, max_parallelism - len(in_flight)):
+                in_flight[self._submit_step(pool, state, step_id)] = step_id
+                dispatched += 1
+
+        # 默认回到 select_ready_steps：由其判定全图结束或停滞。
         next_action = ACTION_SELECT_STEPS
         if waiting_payload is not None and state.get("first_error") is None:
             state["waiting_for_input"] = waiting_payload
@@ -451,11 +412,72 @@ class LangGraphTaskRunner:
             # 全图终态后进入 review，避免无意义循环。
             next_action = ACTION_REVIEW
 
-        # 清空本轮批次并写入下一步路由动作。
+        log_event(
+            logger,
+            logging.INFO,
+            "task.steps.run.done",
+            "步骤调度结束",
+            component="orchestrator",
+            task_id=task_id,
+            duration_ms=elapsed_ms(started),
+            dispatched=dispatched,
+            max_parallelism=max_parallelism,
+            fail_fast_hit=fail_fast_error is not None,
+            waiting=waiting_payload is not None,
+            pool_queue_depth=pool.stats()["queue_depth"],
+            reused=sum(1 for node in snapshot["nodes"] if node.get("reused")),
+        )
         state["ready_batch"] = []
         state["next_action"] = next_action
         return state
 
+    def _next_ready_steps(self, snapshot: Dict[str, Any], slots: int) -> List[str]:
+        """刷新依赖状态，按拓扑序取最多 slots 个新就绪的节点。"""
+        if slots <= 0:
+            return []
+        self._refresh_ready_nodes(snapshot)
+        return [str(node.get("step_id")) for node in self._ready_nodes(snapshot, limit=slots)]
+
+    def _commit_step_result(
+        self,
+        state: TaskFlowState,
+        step_id: str,
+        run_result: ExecutorRunResult,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        把单步执行结果写回节点并持久化，返回（步骤错误, 等待用户输入载荷）。
+        """
+        snapshot = state["task_snapshot"]
+        node = self._get_node(snapshot, step_id)
+        waiting_payload: Optional[Dict[str, Any]] = None
+
+        # 汇总工具事件到全局事件流，便于上层追踪。
+        state["all_tool_events"].extend(list(run_result.tool_events))
+        node["output_text"] = run_result.output_text
+        node["tool_events"] = list(run_result.tool_events)
+        if run_result.error:
+            # 步骤执行失败：写失败状态、输出、错误明细，并尝试写入首错。
+            node["state"] = STEP_STATE_FAILED
+            node["error"] = run_result.error
+            self._set_first_error_once(state, run_result.error)
+        elif self._step_requires_user_input(run_result.output_text):
+            # 需补充信息不视为失败，而是挂起当前任务等待用户补充。
+            waiting_payload = self._build_waiting_payload(
+                step_id=step_id,
+                output_text=run_result.output_text,
+            )
+            node["state"] = STEP_STATE_WAITING_USER_INPUT
+            node["error"] = None
+        else:
+            # 步骤执行成功：写成功状态与输出。
+            node["state"] = STEP_STATE_SUCCEEDED
+            node["error"] = None
+
+        # 把当前步骤结果持久化到 TaskManager。
+        # 注意：这里写入的是步骤快照投影，保持与外部可观测结构一致。
+        self._task_manager.append_step_result(state["task_id"], step_result_from_node(node))
+        return (run_result.error or None), waiting_payload
+
     def _review_task(self, state: TaskFlowState) -> TaskFlowState:
         # 评审节点只消费当前执行图，不改变节点状态，仅产出质量结论。
         started = time.perf_counter()
@@ -700,101 +722,153 @@ class LangGraphTaskRunner:
                 return node
         raise ValueError(f"Unknown step_id: {step_id}")
 
-    def _run_step_batch(
-        self,
-        *,
-        jobs: List[Tuple[str, str]],
-        executor_agent: Any,
-        history: List[Dict[str, str]],
-        session_id: str,
-        task_id: str,
-    ) -> Dict[str, ExecutorRunResult]:
+    def _submit_step(self, pool: StepPool, state: TaskFlowState, step_id: str) -> Future:
         """
-        并发执行一批可运行 step，并按 step_id 收集执行结果。
+        把节点置为 running、组装执行输入并提交到步骤池（以 task_id 作为公平队列键）。
 
-        参数说明：
-        - jobs: [(step_id, step_input)] 形式的任务列表。
-        - executor_agent: 负责真正执行 step 的 agent，需提供 run_task(...) 方法。
-        - history/session_id: 传给 agent 的上下文参数。
-
-        返回值：
-        - Dict[step_id, ExecutorRunResult]。
-        - 即使某个 step 抛异常，也会被转换为失败结果写入返回字典，
-          保证上层调度始终拿到统一结构进行状态流转。
+        executed_steps 按提交顺序记录，TaskRunResult.step_results 投影（_project_step_results）因此与调度顺序一致；
+        TaskManager 中持久化的 step_results 由 append_step_result 按完成顺序追加（同批完成的按拓扑序），
+        两者顺序可能不同。
         """
-        if not jobs:
-            # 空批次直接返回，避免创建线程池带来无意义开销。
-            return {}
+        snapshot = state["task_snapshot"]
+        node = self._get_node(snapshot, step_id)
+        node["state"] = STEP_STATE_RUNNING
+        node["error"] = None
+        node.pop("reused", None)
+        node.pop("reused_from", None)
+
+        entry = self._lookup_step_memo(state, step_id)
+        if entry is not None:
+            # 命中步骤记忆：不再调用 executor，直接以已完成的 Future 交给调度循环按正常路径回写。
+            node["reused"] = True
+            node["reused_from"] = str(entry.get("step_id") or "")
+            state["executed_steps"].append(step_id)
+            log_event(
+                logger,
+                logging.INFO,
+                "task.step.reused",
+                f"步骤复用已有结果：{step_id}",
+                component="orchestrator",
+                task_id=state["task_id"],
+                step_id=step_id,
+                reused_from=node["reused_from"],
+            )
+            future: Future = Future()
+            future.set_result(
+                (
+                    ExecutorRunResult(
+                        output_text=str(entry.get("output_text") or ""),
+                        tool_events=list(entry.get("tool_events") or []),
+                    ),
+                    0,
+                    0,
+                )
+            )
+            return future
 
-        # 当前策略：一个 step 对应一个 worker，优先降低batch内等待时间。至少一个 worker
-        max_workers = max(len(jobs), 1)
-        results: Dict[str, ExecutorRunResult] = {}
+        # 依赖刚完成时才组装输入，确保拿到上游最新输出。
+        step_input = self._build_step_input(
+            user_text=state["user_text"],
+            task_snapshot=snapshot,
+            step_id=step_id,
+        )
+        state["executed_steps"].append(step_id)
 
-        def _invoke_step(step_input: str) -> Tuple[ExecutorRunResult, int]:
-            started = time.perf_counter()
-            result = executor_agent.run_task(
-                user_text=step_input,
-                history=history,
-                session_id=session_id,
-            )
-            return result, elapsed_ms(started)
+        executor_agent = state["executor_agent"]
+        history = state["history"]
+        session_id = state["session_id"]
+        task_id = state["task_id"]
 
-        def _invoke_step_with_context(step_id: str, step_input: str) -> Tuple[ExecutorRunResult, int]:
+        submitted = time.perf_counter()
+
+        def _invoke_step() -> Tuple[ExecutorRunResult, int, int]:
+            queue_wait_ms = elapsed_ms(submitted)
+            started = time.perf_counter()
             with bind_log_context(
                 session_id=session_id,
                 task_id=task_id,
                 step_id=step_id,
             ):
-                return _invoke_step(step_input)
-
-        with ThreadPoolExecutor(max_workers=max_workers) as pool:
-            # future -> step_id 的映射用于后续反查：
-            # as_completed 返回的是 future，需要通过该映射定位所属节点。
-            futures = {}
-            for step_id, step_input in jobs:
-                parent_ctx = copy_context()
-                future = pool.submit(
-                    parent_ctx.run,
-                    _invoke_step_with_context,
-                    step_id,
-                    step_input,
+                result = executor_agent.run_task(
+                    user_text=step_input,
+                    history=history,
+                    session_id=session_id,
                 )
-                futures[future] = step_id
+            return result, elapsed_ms(started), queue_wait_ms
 
-            # as_completed 按“完成先后”返回 future，而不是按提交顺序。
-            # 这样可以让快任务先被处理并尽早写入结果，提升整体吞吐。
-            for future in as_completed(futures):
-                step_id = futures[future]
-                try:
-                    # 正常路径：收集执行器返回的结构化结果。
-                    run_result, duration_ms = future.result()
-                    results[step_id] = run_result
-                    log_event(
-                        logger,
-                        logging.INFO,
-                        "task.step.run.done",
-                        f"步骤执行结束：{step_id}",
-                        component="orchestrator",
-                        task_id=task_id,
-                        step_id=step_id,
-                        duration_ms=duration_ms,
-                        ok=not bool(run_result.error),
-                    )
-                except Exception as exc:
-                    # 异常路径：将异常统一包装为失败结果，避免异常向上传播
-                    # 打断整批收集流程，保证其余已完成任务仍可被记录。
-                    log_exception(
-                        logger,
-                        "task.step.run.error",
-                        f"步骤执行异常：{step_id}",
-                        component="orchestrator",
-                        task_id=task_id,
-                        step_id=step_id,
-                        error_code="TOOL_EXECUTION_ERROR",
-                        retryable=True,
-                    )
-                    results[step_id] = self._failed_run_result(str(exc))
-        return results
+        # StepPool.submit 会捕获当前上下文副本（copy_context），日志上下文等 contextvars 在 worker 中保持一致。
+        return pool.submit(task_id, _invoke_step)
+
+    def _tool_names(self, executor_agent: Any) -> List[str]:
+        registry = getattr(executor_agent, "registry", None)
+        try:
+            schemas = registry.list_schemas() if registry is not None else []
+            return sorted(str(item["function"]["name"]) for item in schemas)
+        except Exception:
+            return []
+
+    def _lookup_step_memo(self, state: TaskFlowState, step_id: str) -> Optional[Dict[str, Any]]:
+        """
+        计算步骤记忆键并查找，命中返回记忆条目；未开启记忆或未命中时返回 None。
+
+        键在提交时计算并记在节点 memo_key 上，回写记忆时使用步骤实际执行时的输入。
+        """
+        step_memo = state.get("step_memo")
+        if step_memo is None:
+            return None
+        node = self._get_node(state["task_snapshot"], step_id)
+        memo_key = step_memo_key(state["task_snapshot"], step_id, state.get("tool_names") or [])
+        node["memo_key"] = memo_key
+        return step_memo.get(memo_key)
+
+    def _remember_succeeded_steps(self, state: TaskFlowState) -> None:
+        # 本轮成功的步骤（含 resume 前已成功的步骤）写入记忆，供后续 replan 轮次复用。
+        step_memo = state.get("step_memo")
+        if step_memo is None:
+            return
+        for node in (state.get("task_snapshot") or {}).get("nodes") or []:
+            if node.get("state") != STEP_STATE_SUCCEEDED:
+                continue
+            memo_key = str(node.get("memo_key") or "")
+            if not memo_key or memo_key in step_memo:
+                continue
+            step_memo[memo_key] = {
+                "step_id": str(node.get("step_id") or ""),
+                "output_text": str(node.get("output_text") or ""),
+                "tool_events": list(node.get("tool_events") or []),
+            }
+
+    def _collect_step_result(self, future: Future, *, step_id: str, task_id: str) -> ExecutorRunResult:
+        """
+        取回单步执行结果；执行异常统一转换为失败结果，保证调度循环始终拿到统一结构。
+        """
+        try:
+            run_result, duration_ms, queue_wait_ms = future.result()
+        except Exception as exc:
+            log_exception(
+                logger,
+                "task.step.run.error",
+                f"步骤执行异常：{step_id}",
+                component="orchestrator",
+                task_id=task_id,
+                step_id=step_id,
+                error_code="TOOL_EXECUTION_ERROR",
+                retryable=True,
+            )
+            return self._failed_run_result(str(exc))
+        log_event(
+            logger,
+            logging.INFO,
+            "task.step.run.done",
+            f"步骤执行结束：{step_id}",
+            component="orchestrator",
+            task_id=task_id,
+            step_id=step_id,
+            duration_ms=duration_ms,
+            queue_wait_ms=queue_wait_ms,
+            ok=not bool(run_result.error),
+        )
+        return run_result
 
     def _failed_run_result(self, message: str) -> ExecutorRunResult:
         return ExecutorRunResult(
@@ -95,6 +95,7 @@ class Orchestrator:
 
     def _record_memory(self, session_id: str, user_text: str, final_reply: str, meta: Dict) -> None:
         # 记忆写入采用 fail-soft：失败只记录日志，不中断主响应链路。
+        # MemoryService 默认后写：这里只做落日志入队，抽取与落库在后台完成。
         try:
             self._memory.ingest_turn(
                 session_id=session_id,
@@ -159,6 +160,7 @@ class Orchestrator:
         resume_snapshot: Optional[Dict[str, Any]] = None,
         resume_waiting_payload: Optional[Dict[str, Any]] = None,
         resume_user_reply: str = "",
+        step_memo: Optional[Dict[str, Dict[str, Any]]] = None,
     ):
         # task 模式统一委托给 LangGraphTaskRunner。
         # 这里仅做 agent 解析与参数透传，不掺杂图调度细节。
@@ -177,6 +179,7 @@ class Orchestrator:
             resume_snapshot=resume_snapshot,
             resume_waiting_payload=resume_waiting_payload,
             resume_user_reply=resume_user_reply,
+            step_memo=step_memo,
         )
 
     def _extract_step_summary(self, output_text: object) -> str:
@@ -352,6 +355,9 @@ class Orchestrator:
         2) 若命中可重试错误则触发有界 replan；
         3) 否则返回当前结果。
 
+        各轮共享一份步骤记忆（step_memo）：replan 会清空任务的 step_results/snapshot，
+        但新计划中指令、输入与工具集未变的步骤直接复用上一轮的成功输出，只重跑失败的部分。
+
         返回值：(task_run, replan_used)
         """
         replan_used = 0
@@ -361,6 +367,7 @@ class Orchestrator:
         current_snapshot = resume_snapshot
         current_waiting_payload = resume_waiting_payload
         current_resume_reply = resume_user_reply
+        step_memo: Dict[str, Dict[str, Any]] = {}
 
         while True:
             # 单轮执行：可能是新任务，也可能是 waiting 恢复任务。
@@ -373,6 +380,7 @@ class Orchestrator:
                 resume_snapshot=current_snapshot if use_resume else None,
                 resume_waiting_payload=current_waiting_payload if use_resume else None,
                 resume_user_reply=current_resume_reply if use_resume else "",
+                step_memo=step_memo,
             )
             use_resume = False
             current_plan = None
@@ -734,6 +742,18 @@ class Orchestrator:
             self._record_memory(session_id, user_text, result.final_reply, result.meta)
             return result
         finally:
+            if task_id_for_log != "-":
+                try:
+                    # 轮次结束屏障：本轮任务变更合并为完整记录，下一轮读取无需回放日志。
+                    self._task_manager.flush(task_id_for_log)
+                except Exception:
+                    log_exception(
+                        logger,
+                        "orchestrator.task.flush.error",
+                        "任务 checkpoint 失败",
+                        component="orchestrator",
+                        task_id=task_id_for_log,
+                    )
             log_event(
                 logger,
                 logging.INFO,
@@ -750,7 +770,10 @@ class Orchestrator:
             )
 
     def close(self) -> None:
-        # 释放底层资源（例如 memory 异步线程/连接）。
+        # 释放底层资源（例如 memory 异步线程/连接、任务库连接）。
+        task_close = getattr(self._task_manager, "close", None)
+        if callable(task_close):
+            task_close()
         close_fn = getattr(self._memory, "close", None)
         if callable(close_fn):
             close_fn()
@@ -0,0 +1,177 @@
+"""Process-wide bounded worker pool for task steps with per-task fair queuing."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextvars import Context, copy_context
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+DEFAULT_STEP_POOL_WORKERS = 4
+
+_QueuedStep = Tuple[float, Context, Callable[..., Any], tuple, Future]
+
+
+class StepPool:
+    """
+    任务步骤执行池（进程级共享）。
+
+    - 常驻 max_workers 个 worker 线程（按需拉起），不再为每批步骤新建/销毁线程池，
+      同时也是全进程并行执行器 LLM 循环数的上限；
+    - 每个任务一条队列，worker 在有排队的任务之间轮转取作业：一个任务一次提交很多步骤，
+      也不会饿死其他会话的任务；
+    - submit 时捕获调用方的 contextvars（copy_context），作业在该上下文中执行，日志上下文等保持一致；
+    - stats() 给出队列深度、排队等待时间与在忙 worker 数。
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_STEP_POOL_WORKERS, name: str = "task-step"):
+        self.max_workers = max(int(max_workers), 1)
+        self._name = name
+        self._cond = threading.Condition()
+        self._queues: Dict[str, Deque[_QueuedStep]] = {}
+        # 有排队作业的任务轮转顺序。
+        self._rotation: Deque[str] = deque()
+        self._threads: List[threading.Thread] = []
+        self._idle = 0
+        self._busy = 0
+        self._queued = 0
+        self._closed = False
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "max_queue_depth": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        }
+
+    def submit(self, task_key: str, fn: Callable[..., Any], *args: Any) -> Future:
+        future: Future = Future()
+        item: _QueuedStep = (time.perf_counter(), copy_context(), fn, args, future)
+        key = str(task_key or "-")
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("step pool is closed")
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = deque()
+                self._queues[key] = queue
+                self._rotation.append(key)
+            queue.append(item)
+            self._queued += 1
+            self._stats["submitted"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queued)
+            # 空闲 worker 被唤醒前仍计为 idle，按“排队数 > 空闲数”判断是否需要新 worker。
+            if self._queued > self._idle and len(self._threads) < self.max_workers:
+                self._spawn_locked()
+            self._cond.notify()
+        return future
+
+    def _spawn_locked(self) -> None:
+        thread = threading.Thread(
+            target=self._worker_loop,
+            name=f"{self._name}-{len(self._threads)}",
+            daemon=True,
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def _take(self) -> Optional[_QueuedStep]:
+        with self._cond:
+            self._idle += 1
+            self._cond.wait_for(lambda: self._rotation or self._closed)
+            self._idle -= 1
+            if not self._rotation:
+                return None
+            key = self._rotation.popleft()
+            queue = self._queues[key]
+            item = queue.popleft()
+            if queue:
+                # 该任务还有排队作业，排到轮转队尾，让其他任务先取。
+                self._rotation.append(key)
+            else:
+                del self._queues[key]
+            self._queued -= 1
+            self._busy += 1
+            wait_ms = (time.perf_counter() - item[0]) * 1000.0
+            self._stats["wait_ms_total"] += wait_ms
+            self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], wait_ms)
+            return item
+
+    def _worker_loop(self) -> None:
+        while True:
+            item = self._take()
+            if item is None:
+                return
+            _, ctx, fn, args, future = item
+            outcome = "completed"
+            if not future.set_running_or_notify_cancel():
+                outcome = "cancelled"
+            else:
+                try:
+                    future.set_result(ctx.run(fn, *args))
+                except BaseException as exc:
+                    future.set_exception(exc)
+                    outcome = "failed"
+            with self._cond:
+                self._busy -= 1
+                self._stats[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            started = self._stats["submitted"] - self._queued
+            return {
+                **self._stats,
+                "wait_ms_total": round(self._stats["wait_ms_total"], 3),
+                "wait_ms_max": round(self._stats["wait_ms_max"], 3),
+                "avg_wait_ms": round(self._stats["wait_ms_total"] / started, 3) if started else 0.0,
+                "max_workers": self.max_workers,
+                "workers": len(self._threads),
+                "busy": self._busy,
+                "queue_depth": self._queued,
+                "queued_tasks": len(self._queues),
+            }
+
+    def close(self, wait: bool = True) -> None:
+        """停止接收新作业；排队中的作业被取消，执行中的作业跑完（wait=True 时等待 worker 退出）。"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            pending = [item for queue in self._queues.values() for item in queue]
+            self._queues.clear()
+            self._rotation.clear()
+            self._queued = 0
+            self._stats["cancelled"] += len(pending)
+            self._cond.notify_all()
+            threads = list(self._threads)
+        for *_, future in pending:
+            future.cancel()
+        if wait:
+            for thread in threads:
+                if thread is not threading.current_thread():
+                    thread.join()
+
+
+_installed_pool: Optional[StepPool] = None
+_installed_lock = threading.Lock()
+
+
+def install_step_pool(pool: Optional[StepPool]) -> Optional[StepPool]:
+    """设置进程级步骤池，返回被替换的旧池（由调用方决定是否关闭）。"""
+    global _installed_pool
+    with _installed_lock:
+        previous = _installed_pool
+        _installed_pool = pool
+    return previous
+
+
+def get_step_pool() -> StepPool:
+    """返回进程级步骤池；未安装时按默认大小懒创建一个。"""
+    global _installed_pool
+    with _installed_lock:
+        if _installed_pool is None:
+            _installed_pool = StepPool(DEFAULT_STEP_POOL_WORKERS)
+        return _installed_pool
@@ -1,5 +1,6 @@
+import hashlib
 import json
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 
 
 def completed_context(task_snapshot: Dict[str, Any]) -> str:
@@ -51,6 +52,31 @@ def resolve_step_inputs(task_snapshot: Dict[str, Any], step_id: str) -> Dict[str
     return resolved
 
 
+def step_memo_key(task_snapshot: Dict[str, Any], step_id: str, tool_names: Iterable[str]) -> str:
+    """
+    步骤记忆键：规范化指令 + 解析后的输入绑定 + 上游依赖输出 + 可用工具集。
+
+    不含 step_id / 标题 / 总目标文本，replan 后编号或措辞变化、但实际输入相同的步骤仍能命中。
+    """
+    index = {str(node.get("step_id")): node for node in task_snapshot.get("nodes") or []}
+    node = index.get(step_id)
+    if node is None:
+        raise ValueError(f"Unknown step_id: {step_id}")
+    upstream = sorted(
+        str(index[str(dep)].get("output_text") or "")
+        for dep in node.get("depends_on") or []
+        if str(dep) in index
+    )
+    payload = {
+        "instruction": " ".join(str(node.get("instruction") or "").split()),
+        "inputs": resolve_step_inputs(task_snapshot, step_id=step_id),
+        "upstream": upstream,
+        "tools": sorted({str(name) for name in tool_names}),
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
 def step_result_from_node(node: Dict[str, Any]) -> Dict[str, Any]:
     state = str(node.get("state") or "")
     return {
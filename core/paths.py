@@ -42,6 +42,14 @@ def runtime_memory_dir() -> Path:
     return runtime_root() / "memory"
 
 
+def runtime_manifest_path() -> Path:
+    return runtime_root() / "retention_manifest.db"
+
+
+def memory_module_dir() -> Path:
+    return runtime_memory_dir() / "memory_module"
+
+
 def memory_db_path() -> Path:
     return runtime_memory_dir() / "memory.db"
 
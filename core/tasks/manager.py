@@ -1,5 +1,6 @@
 import logging
 import threading
+import time
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
@@ -7,7 +8,7 @@ from uuid import uuid4
 from core.protocols import TaskState
 from core.tasks.record import TaskRecord
 from core.tasks.store import TaskStore
-from core.utils import log_event
+from core.utils import log_event, log_exception
 
 logger = logging.getLogger(__name__)
 
@@ -27,17 +28,64 @@ class TaskManager:
         TaskState.FAILED: {TaskState.PENDING},
     }
 
-    def __init__(self, store: Optional[TaskStore] = None):
+    def __init__(
+        self,
+        store: Optional[TaskStore] = None,
+        checkpoint_every: int = 16,
+        checkpoint_interval_sec: float = 2.0,
+    ):
         self.store = store or TaskStore()
+        # 变更先写日志；同一任务累计 checkpoint_every 条或首条未合并变更超过 checkpoint_interval_sec 时
+        # 才整条重写（checkpoint），轮次结束由 flush() 兜底合并。
+        self.checkpoint_every = max(int(checkpoint_every), 1)
+        self.checkpoint_interval_sec = max(float(checkpoint_interval_sec), 0.0)
+        # task_id -> (未合并日志条数, 首条未合并变更的 monotonic 时间)
+        self._dirty: Dict[str, Tuple[int, float]] = {}
         self._cache: Dict[str, TaskRecord] = {}
         self._mutation_seq = 0
         self._mutation_order: Dict[str, int] = {}
+        # session_id -> 最近进入等待的 task_id（None 表示已确认没有）；在状态迁移时维护，
+        # get_waiting_task 命中时不访问存储。
+        self._waiting_index: Dict[str, Optional[str]] = {}
         self._lock = threading.RLock()
 
     def _mark_mutated(self, task_id: str) -> None:
         self._mutation_seq += 1
         self._mutation_order[task_id] = self._mutation_seq
 
+    def _persist_locked(self, task: TaskRecord, op: Optional[str] = None, payload: Optional[Dict] = None) -> None:
+        """op 为空时写完整记录（checkpoint），否则只追加一条变更日志。"""
+        self._mark_mutated(task.task_id)
+        if op is None:
+            self._checkpoint_locked(task)
+        else:
+            self.store.append_mutation(task, op, payload or {})
+            count, first_at = self._dirty.get(task.task_id, (0, time.monotonic()))
+            count += 1
+            self._dirty[task.task_id] = (count, first_at)
+            if count >= self.checkpoint_every or time.monotonic() - first_at >= self.checkpoint_interval_sec:
+                self._checkpoint_locked(task)
+        self._sync_waiting_index_locked(task)
+
+    def _persist_fields_locked(self, task: TaskRecord, *fields: str) -> None:
+        payload: Dict[str, Any] = {name: getattr(task, name) for name in fields}
+        if "state" in payload:
+            payload["state"] = task.state.value
+        payload["updated_at"] = task.updated_at
+        self._persist_locked(task, "set", payload)
+
+    def _checkpoint_locked(self, task: TaskRecord) -> None:
+        self.store.save(task)
+        self._dirty.pop(task.task_id, None)
+
+    def _sync_waiting_index_locked(self, task: TaskRecord) -> None:
+        session_id = str(task.session_id or "")
+        if task.state == TaskState.WAITING_USER_INPUT:
+            self._waiting_index[session_id] = task.task_id
+        elif self._waiting_index.get(session_id) == task.task_id:
+            # 离开等待态：该会话可能还有更早的等待任务，下次查询时回落到存储索引。
+            self._waiting_index.pop(session_id, None)
+
     def _new_task_id(self) -> str:
         return f"t-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{uuid4().hex[:8]}"
 
@@ -45,8 +93,7 @@ class TaskManager:
         with self._lock:
             task = TaskRecord(task_id=self._new_task_id(), session_id=session_id, user_text=user_text)
             self._cache[task.task_id] = task
-            self._mark_mutated(task.task_id)
-            self.store.save(task)
+            self._persist_locked(task)
             return task
 
     def _to_epoch_ns(self, value: str) -> int:
@@ -61,13 +108,6 @@ class TaskManager:
         except Exception:
             return 0
 
-    def _task_mtime_ns(self, task_id: str) -> int:
-        path = self.store.base_dir / f"{task_id}.json"
-        try:
-            return int(path.stat().st_mtime_ns)
-        except Exception:
-            return 0
-
     def _can_transition(self, current: TaskState, target: TaskState) -> bool:
         if current == target:
             return True
@@ -83,34 +123,38 @@ class TaskManager:
         return loaded
 
     def _list_session_tasks_locked(self, session_id: str, limit: int = 50) -> List[TaskRecord]:
-        rows = self.store.list_recent(limit=max(int(limit), 1))
+        rows = self.store.list_session(session_id, limit=max(int(limit), 1))
         tasks: List[TaskRecord] = []
         for row in rows:
-            if str(row.get("session_id", "")) != session_id:
-                continue
             task_id = str(row.get("task_id", "")).strip()
             if not task_id:
                 continue
             task = self._get_task_locked(task_id)
             if task is not None:
                 tasks.append(task)
+        # 存储已按 (updated_at, write_seq) 倒序返回；进程内变更顺序优先，稳定排序保留存储顺序作为兜底。
         tasks.sort(
             key=lambda t: (
                 self._mutation_order.get(t.task_id, 0),
                 self._to_epoch_ns(t.updated_at),
                 self._to_epoch_ns(t.created_at),
-                self._task_mtime_ns(t.task_id),
             ),
             reverse=True,
         )
         return tasks
 
     def _select_waiting_task_locked(self, session_id: str) -> Optional[TaskRecord]:
-        tasks = self._list_session_tasks_locked(session_id=session_id, limit=50)
-        for task in tasks:
-            if task.state == TaskState.WAITING_USER_INPUT:
+        session_id = str(session_id or "")
+        if session_id in self._waiting_index:
+            task_id = self._waiting_index[session_id]
+            if task_id is None:
+                return None
+            task = self._get_task_locked(task_id)
+            if task is not None and task.state == TaskState.WAITING_USER_INPUT:
                 return task
-        return None
+        task_id = self.store.latest_task_id(session_id, TaskState.WAITING_USER_INPUT.value)
+        self._waiting_index[session_id] = task_id
+        return self._get_task_locked(task_id) if task_id else None
 
     def _reset_for_replan_locked(self, task: TaskRecord) -> bool:
         if not self._can_transition(task.state, TaskState.PENDING):
@@ -122,8 +166,9 @@ class TaskManager:
         task.task_snapshot = None
         task.convergence = {}
         task.touch()
-        self._mark_mutated(task.task_id)
-        self.store.save(task)
+        self._persist_fields_locked(
+            task, "state", "error", "step_results", "waiting_for_input", "task_snapshot", "convergence"
+        )
         return True
 
     def get_task(self, task_id: str) -> Optional[TaskRecord]:
@@ -141,8 +186,7 @@ class TaskManager:
                 return
             task.plan = plan
             task.touch()
-            self._mark_mutated(task_id)
-            self.store.save(task)
+            self._persist_fields_locked(task, "plan")
 
     def set_task_snapshot(self, task_id: str, task_snapshot: Dict[str, Any]) -> None:
         with self._lock:
@@ -151,8 +195,7 @@ class TaskManager:
                 return
             task.task_snapshot = dict(task_snapshot or {})
             task.touch()
-            self._mark_mutated(task_id)
-            self.store.save(task)
+            self._persist_fields_locked(task, "task_snapshot")
 
     def set_waiting_input(
         self,
@@ -174,8 +217,10 @@ class TaskManager:
             if task_snapshot is not None:
                 task.task_snapshot = dict(task_snapshot)
             task.touch()
-            self._mark_mutated(task_id)
-            self.store.save(task)
+            if task_snapshot is not None:
+                self._persist_fields_locked(task, "state", "error", "waiting_for_input", "task_snapshot")
+            else:
+                self._persist_fields_locked(task, "state", "error", "waiting_for_input")
             return True
 
     def update_convergence(self, task_id: str, patch: Dict[str, Any]) -> None:
@@ -187,8 +232,7 @@ class TaskManager:
             payload.update(dict(patch or {}))
             task.convergence = payload
             task.touch()
-            self._mark_mutated(task_id)
-            self.store.save(task)
+            self._persist_fields_locked(task, "convergence")
 
     def get_waiting_task(self, session_id: str) -> Optional[TaskRecord]:
         with self._lock:
@@ -216,8 +260,7 @@ class TaskManager:
             task.error = None
             task.waiting_for_input = None
             task.touch()
-            self._mark_mutated(task_id)
-            self.store.save(task)
+            self._persist_fields_locked(task, "state", "error", "waiting_for_input")
             return task, True, waiting_payload
 
     def set_state(self, task_id: str, state: TaskState, error: Dict = None) -> bool:
@@ -246,8 +289,7 @@ class TaskManager:
             task.state = state
             task.error = error
             task.touch()
-            self._mark_mutated(task_id)
-            self.store.save(task)
+            self._persist_fields_locked(task, "state", "error")
             return True
 
     def append_step_result(self, task_id: str, step_result: Dict) -> None:
@@ -257,8 +299,7 @@ class TaskManager:
                 return
             task.step_results.append(step_result)
             task.touch()
-            self._mark_mutated(task_id)
-            self.store.save(task)
+            self._persist_locked(task, "append_step", {"step_result": step_result, "updated_at": task.updated_at})
 
     def reset_task_for_replan(self, task_id: str) -> bool:
         with self._lock:
@@ -266,3 +307,31 @@ class TaskManager:
             if not task:
                 return False
             return self._reset_for_replan_locked(task)
+
+    def flush(self, task_id: Optional[str] = None) -> int:
+        """
+        轮次结束屏障：把未合并的变更日志写成完整记录（checkpoint）。
+
+        task_id 为空时处理全部脏任务；返回本次 checkpoint 的任务数。
+        """
+        with self._lock:
+            task_ids = [task_id] if task_id is not None else list(self._dirty)
+            flushed = 0
+            for dirty_id in task_ids:
+                if dirty_id not in self._dirty:
+                    continue
+                task = self._get_task_locked(dirty_id)
+                if task is None:
+                    self._dirty.pop(dirty_id, None)
+                    continue
+                self._checkpoint_locked(task)
+                flushed += 1
+            return flushed
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            # 日志已落盘，checkpoint 失败不丢数据，下次加载时回放。
+            log_exception(logger, "task.flush.error", "任务 checkpoint 失败", component="task")
+        self.store.close()
@@ -5,6 +5,19 @@ from typing import Any, Dict, List, Optional
 from core.protocols import TaskState
 
 
+# 任务日志中 "set" 操作允许覆盖的字段（task_id / session_id / user_text / created_at 不可变）。
+MUTABLE_FIELDS = (
+    "state",
+    "plan",
+    "step_results",
+    "error",
+    "task_snapshot",
+    "waiting_for_input",
+    "convergence",
+    "updated_at",
+)
+
+
 def utc_now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -43,6 +56,19 @@ class TaskRecord:
             "updated_at": self.updated_at,
         }
 
+    def apply_mutation(self, op: str, payload: Dict[str, Any]) -> None:
+        """把一条任务日志作用到记录上（TaskStore 回放未 checkpoint 的变更时使用）。"""
+        payload = dict(payload or {})
+        if op == "set":
+            for key, value in payload.items():
+                if key == "state":
+                    self.state = TaskState(value)
+                elif key in MUTABLE_FIELDS:
+                    setattr(self, key, value)
+        elif op == "append_step":
+            self.step_results.append(payload.get("step_result"))
+            self.updated_at = payload.get("updated_at", self.updated_at)
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "TaskRecord":
         return cls(
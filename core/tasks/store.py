@@ -1,5 +1,6 @@
 import json
-import os
+import sqlite3
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 
@@ -8,37 +9,250 @@ from core.tasks.record import TaskRecord
 
 
 class TaskStore:
+    """
+    任务持久化（SQLite，runtime/tasks/tasks.db）。
+
+    - 每个任务一行，完整记录以 JSON 存在 payload 列；session_id / state / updated_at 单独成列，
+      (session_id, state, updated_at) 上有索引，按会话取等待中的任务是一次索引查找，不随历史任务数线性增长；
+    - write_seq 为单调写入序号，updated_at 相同时用它保证“后写在前”；
+    - 变更先以小条目追加到 task_journal（append_mutation，只同步更新索引列），完整记录按需 checkpoint（save），
+      读取时在 checkpoint 之上按 seq 回放未合并的日志，进程崩溃后同样可恢复；
+    - 首次打开时把旧版 `{task_id}.json` 文件导入数据库（文件保留不动，导入完成后记标记，之后不再扫描）；
+    - 数据库在第一次读写时才打开（目录与 tasks.db 同时创建），只构造不使用的实例不会在磁盘上留下文件。
+    """
+
+    DB_NAME = "tasks.db"
+
     def __init__(self, base_dir: Optional[Union[str, Path]] = None):
         self.base_dir = Path(base_dir) if base_dir is not None else runtime_tasks_dir()
+        self.db_path = self.base_dir / self.DB_NAME
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        # task_id -> 最近一条日志的 seq（懒加载）。
+        self._journal_seq: Dict[str, int] = {}
+        self._stats = {"journal_appends": 0, "checkpoints": 0, "replayed": 0}
+        self._write_seq = 0
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    self._open()
+        return self._conn
+
+    def _open(self) -> None:
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        self._conn = conn
+        self._init_table()
+        row = self._db.execute("SELECT COALESCE(MAX(write_seq), 0) FROM tasks").fetchone()
+        self._write_seq = int(row[0])
+        self._import_legacy_files()
+
+    def _init_table(self) -> None:
+        with self._db:
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    write_seq INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    checkpoint_seq INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(tasks)")}
+            if "checkpoint_seq" not in columns:
+                self._db.execute("ALTER TABLE tasks ADD COLUMN checkpoint_seq INTEGER NOT NULL DEFAULT 0")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS task_journal (
+                    task_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    op TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    PRIMARY KEY (task_id, seq)
+                ) WITHOUT ROWID
+                """
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_tasks_session_state_updated "
+                "ON tasks(session_id, state, updated_at, write_seq)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_tasks_session_updated ON tasks(session_id, updated_at, write_seq)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_tasks_updated ON tasks(updated_at, write_seq)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _import_legacy_files(self) -> None:
+        done = self._db.execute("SELECT value FROM store_meta WHERE key = 'legacy_json_imported'").fetchone()
+        if done is not None:
+            return
+        records: List[TaskRecord] = []
+        for path in sorted(self.base_dir.glob("*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    records.append(TaskRecord.from_dict(json.load(f)))
+            except Exception:
+                continue
+        records.sort(key=lambda t: t.updated_at)
+        with self._lock, self._db:
+            for task in records:
+                self._write_seq += 1
+                # 库中已存在的同 id 任务以库为准，不被旧文件覆盖。
+                self._db.execute(
+                    "INSERT OR IGNORE INTO tasks(task_id, session_id, state, created_at, updated_at, write_seq, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    self._row(task),
+                )
+            self._db.execute(
+                "INSERT OR REPLACE INTO store_meta(key, value) VALUES ('legacy_json_imported', ?)",
+                (str(len(records)),),
+            )
+
+    def _row(self, task: TaskRecord) -> tuple:
+        return (
+            task.task_id,
+            str(task.session_id or ""),
+            task.state.value,
+            task.created_at,
+            task.updated_at,
+            self._write_seq,
+            json.dumps(task.to_dict(), ensure_ascii=False),
+        )
 
-    def _task_path(self, task_id: str) -> Path:
-        return self.base_dir / f"{task_id}.json"
+    def _last_journal_seq_locked(self, task_id: str) -> int:
+        seq = self._journal_seq.get(task_id)
+        if seq is None:
+            row = self._db.execute(
+                "SELECT MAX(seq) FROM task_journal WHERE task_id = ?",
+                (task_id,),
+            ).fetchone()
+            if row is None or row[0] is None:
+                row = self._db.execute("SELECT checkpoint_seq FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            seq = int(row[0]) if row and row[0] is not None else 0
+            self._journal_seq[task_id] = seq
+        return seq
 
     def save(self, task: TaskRecord) -> str:
-        path = self._task_path(task.task_id)
-        temp = str(path) + ".tmp"
-        with open(temp, "w", encoding="utf-8") as f:
-            json.dump(task.to_dict(), f, ensure_ascii=False, indent=2)
-        os.replace(temp, path)
-        return str(path)
+        """checkpoint：写入完整记录，并清掉已被合并的日志。"""
+        with self._lock, self._db:
+            self._write_seq += 1
+            checkpoint_seq = self._last_journal_seq_locked(task.task_id)
+            self._db.execute(
+                """
+                INSERT INTO tasks(task_id, session_id, state, created_at, updated_at, write_seq, payload, checkpoint_seq)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(task_id) DO UPDATE SET
+                    session_id = excluded.session_id,
+                    state = excluded.state,
+                    updated_at = excluded.updated_at,
+                    write_seq = excluded.write_seq,
+                    payload = excluded.payload,
+                    checkpoint_seq = excluded.checkpoint_seq
+                """,
+                (*self._row(task), checkpoint_seq),
+            )
+            self._db.execute(
+                "DELETE FROM task_journal WHERE task_id = ? AND seq <= ?",
+                (task.task_id, checkpoint_seq),
+            )
+            self._stats["checkpoints"] += 1
+        return task.task_id
+
+    def append_mutation(self, task: TaskRecord, op: str, payload: Dict) -> int:
+        """
+        追加一条变更日志（op 见 TaskRecord.apply_mutation），同时更新 state / updated_at 索引列。
+
+        任务行须已存在（create 时先 save 一次）；返回该条日志的 seq。
+        """
+        line = json.dumps(payload, ensure_ascii=False)
+        with self._lock, self._db:
+            seq = self._last_journal_seq_locked(task.task_id) + 1
+            self._write_seq += 1
+            self._db.execute(
+                "INSERT INTO task_journal(task_id, seq, op, payload) VALUES (?, ?, ?, ?)",
+                (task.task_id, seq, op, line),
+            )
+            self._db.execute(
+                "UPDATE tasks SET state = ?, updated_at = ?, write_seq = ? WHERE task_id = ?",
+                (task.state.value, task.updated_at, self._write_seq, task.task_id),
+            )
+            self._journal_seq[task.task_id] = seq
+            self._stats["journal_appends"] += 1
+        return seq
+
+    def _materialize_locked(self, task_id: str, payload: str, checkpoint_seq: int) -> TaskRecord:
+        task = TaskRecord.from_dict(json.loads(payload))
+        rows = self._db.execute(
+            "SELECT op, payload FROM task_journal WHERE task_id = ? AND seq > ? ORDER BY seq ASC",
+            (task_id, int(checkpoint_seq)),
+        ).fetchall()
+        for op, entry in rows:
+            task.apply_mutation(op, json.loads(entry))
+        self._stats["replayed"] += len(rows)
+        return task
 
     def load(self, task_id: str) -> Optional[TaskRecord]:
-        path = self._task_path(task_id)
-        if not path.exists():
-            return None
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return TaskRecord.from_dict(data)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload, checkpoint_seq FROM tasks WHERE task_id = ?",
+                (task_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            return self._materialize_locked(task_id, row[0], row[1])
 
     def list_recent(self, limit: int = 20) -> List[Dict]:
-        rows = []
-        for p in self.base_dir.glob("*.json"):
-            try:
-                with open(p, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                rows.append(data)
-            except Exception:
-                continue
-        rows.sort(key=lambda x: x.get("updated_at", ""), reverse=True)
-        return rows[:limit]
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT task_id, payload, checkpoint_seq FROM tasks ORDER BY updated_at DESC, write_seq DESC LIMIT ?",
+                (max(int(limit), 1),),
+            ).fetchall()
+            return [self._materialize_locked(*row).to_dict() for row in rows]
+
+    def list_session(self, session_id: str, limit: int = 50, state: Optional[str] = None) -> List[Dict]:
+        """按会话（可选按状态）取最近的任务，走 (session_id, state, updated_at) 索引。"""
+        sql = "SELECT task_id, payload, checkpoint_seq FROM tasks WHERE session_id = ?"
+        params: list = [str(session_id or "")]
+        if state is not None:
+            sql += " AND state = ?"
+            params.append(state)
+        sql += " ORDER BY updated_at DESC, write_seq DESC LIMIT ?"
+        params.append(max(int(limit), 1))
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+            return [self._materialize_locked(*row).to_dict() for row in rows]
+
+    def latest_task_id(self, session_id: str, state: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT task_id FROM tasks WHERE session_id = ? AND state = ? "
+                "ORDER BY updated_at DESC, write_seq DESC LIMIT 1",
+                (str(session_id or ""), state),
+            ).fetchone()
+        return str(row[0]) if row else None
+
+    def count_by_state(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall()
+        return {str(state): int(count) for state, count in rows}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = self._db.execute("SELECT COUNT(*) FROM task_journal").fetchone()
+            return {**self._stats, "journal_pending": int(pending[0])}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
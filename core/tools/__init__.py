@@ -1,4 +1,5 @@
 from core.tools.base import BaseTool
+from core.tools.cache import ToolResultCache, get_tool_result_cache, install_tool_result_cache
 from core.tools.defaults import build_default_registry
 from core.tools.file_io import ReadFileTool, ReadPdfTool, WriteMarkdownTool
 from core.tools.models import ToolContext, ToolResult
@@ -13,6 +14,9 @@ __all__ = [
     "ToolContext",
     "ToolResult",
     "ToolRegistry",
+    "ToolResultCache",
     "WebSearchTool",
     "build_default_registry",
+    "get_tool_result_cache",
+    "install_tool_result_cache",
 ]
@@ -1,10 +1,13 @@
 import json
 import logging
+import threading
 import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from contextlib import nullcontext
+from typing import Any, Dict, Optional, Tuple
 
 from core.utils import elapsed_ms, log_event, log_exception
+from core.tools.cache import build_cache_key, get_tool_result_cache
 from core.tools.models import ToolContext, ToolResult
 
 logger = logging.getLogger(__name__)
@@ -21,12 +24,24 @@ class BaseTool(ABC):
         parameters_schema: Dict[str, Any],
         max_retries: int = 0,
         retry_backoff_sec: float = 0.2,
+        max_concurrency: int = 0,
+        parallel_safe: bool = True,
+        cacheable: bool = False,
+        cache_ttl_sec: float = 0.0,
     ):
         self.name = str(name).strip()
         self.description = str(description).strip()
         self.parameters_schema = dict(parameters_schema or {})
         self.max_retries = max(int(max_retries), 0)
         self.retry_backoff_sec = max(float(retry_backoff_sec), 0.0)
+        # 同一工具的进程内并发上限（由 ToolRegistry 执行），0 表示不限。
+        self.max_concurrency = max(int(max_concurrency), 0)
+        # 有副作用、调用顺序有意义的工具（写文件等）设为 False，执行器不会把它与同轮其他调用并行。
+        self.parallel_safe = bool(parallel_safe)
+        # 只读、结果只取决于参数（和 cache_freshness 描述的来源状态）的工具才声明可缓存；
+        # cache_ttl_sec > 0 时条目到期失效，0 表示仅靠键失效。
+        self.cacheable = bool(cacheable)
+        self.cache_ttl_sec = max(float(cache_ttl_sec), 0.0)
 
     def schema(self) -> Dict[str, Any]:
         return {
@@ -38,8 +53,73 @@ class BaseTool(ABC):
             },
         }
 
-    def invoke(self, args: Dict[str, Any], ctx: ToolContext) -> ToolResult:
+    def cache_freshness(self, args: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        """
+        返回参与缓存键的来源状态（如文件的 mtime/size）；返回 None 表示本次调用不走缓存。
+        默认没有外部来源状态。
+        """
+        _ = args
+        return ()
+
+    def _cache_key(self, args: Dict[str, Any]) -> Optional[str]:
+        if not self.cacheable:
+            return None
+        try:
+            freshness = self.cache_freshness(args)
+        except Exception:
+            return None
+        if freshness is None:
+            return None
+        return build_cache_key(self.name, args, freshness)
+
+    def invoke(
+        self,
+        args: Dict[str, Any],
+        ctx: ToolContext,
+        limit: Optional[threading.BoundedSemaphore] = None,
+    ) -> ToolResult:
+        """
+        执行工具。limit 为 ToolRegistry 传入的并发上限，只在真正执行时占用：
+        缓存命中直接返回，不排在在途的慢调用后面。
+        """
         safe_args = args if isinstance(args, dict) else {}
+        cache_key = self._cache_key(safe_args)
+        if cache_key is None:
+            with limit or nullcontext():
+                return self._invoke_uncached(safe_args, ctx, cache_fields={})
+
+        cache = get_tool_result_cache()
+        started = time.perf_counter()
+        cached = cache.get(cache_key)
+        stats = cache.stats()
+        if cached is not None:
+            log_event(
+                logger,
+                logging.INFO,
+                "tool.call.done",
+                f"工具调用完成（缓存命中）：{self.name}",
+                component="tool",
+                tool=self.name,
+                attempt=0,
+                ok=cached.ok,
+                duration_ms=elapsed_ms(started),
+                session_id=str(getattr(ctx, "session_id", "") or "-"),
+                cache="hit",
+                cache_hits=stats["hits"],
+                cache_misses=stats["misses"],
+            )
+            return cached
+
+        with limit or nullcontext():
+            result = self._invoke_uncached(
+                safe_args,
+                ctx,
+                cache_fields={"cache": "miss", "cache_hits": stats["hits"], "cache_misses": stats["misses"]},
+            )
+        cache.put(cache_key, result, ttl_sec=self.cache_ttl_sec)
+        return result
+
+    def _invoke_uncached(self, safe_args: Dict[str, Any], ctx: ToolContext, *, cache_fields: Dict[str, Any]) -> ToolResult:
         attempts = self.max_retries + 1
         for attempt in range(attempts):
             started = time.perf_counter()
@@ -57,6 +137,7 @@ class BaseTool(ABC):
                         ok=result.ok,
                         duration_ms=elapsed_ms(started),
                         session_id=str(getattr(ctx, "session_id", "") or "-"),
+                        **cache_fields,
                     )
                     return result
                 log_event(
@@ -6,6 +6,7 @@ from typing import Any
 from core.paths import runtime_notes_dir
 from core.tools.base import BaseTool
 from core.tools.models import ToolContext, ToolResult
+from core.utils.retention import register_runtime_file
 
 
 class WriteNoteTool(BaseTool):
@@ -21,6 +22,7 @@ class WriteNoteTool(BaseTool):
                 },
                 "required": ["filename", "content"],
             },
+            parallel_safe=False,
         )
 
     def run(self, *, ctx: ToolContext, filename: str, content: str, **kwargs: Any) -> ToolResult:
@@ -31,9 +33,12 @@ class WriteNoteTool(BaseTool):
         notes_dir = runtime_notes_dir()
         notes_dir.mkdir(parents=True, exist_ok=True)
         path = notes_dir / safe_name
+        created = not path.exists()
         entry = f"\n## {datetime.utcnow().isoformat()}Z | session={ctx.session_id}\n{content}\n"
         with open(path, "a", encoding="utf-8") as f:
             f.write(entry)
+        if created:
+            register_runtime_file(path, "notes")
         return ToolResult(ok=True, content=f"note_written:{path}")
 
 
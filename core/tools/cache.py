@@ -0,0 +1,143 @@
+"""Bounded LRU cache for tool results keyed by normalized args and source freshness."""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.tools.models import ToolResult
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+@dataclass
+class _CacheEntry:
+    result: ToolResult
+    size: int
+    expires_at: Optional[float]
+
+
+def normalize_args(args: Dict[str, Any]) -> Dict[str, Any]:
+    """去掉值为 None 的参数、字符串去首尾空白，保证等价调用得到同一个键。"""
+    normalized: Dict[str, Any] = {}
+    for key in sorted(args):
+        value = args[key]
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        normalized[str(key)] = value
+    return normalized
+
+
+def build_cache_key(tool_name: str, args: Dict[str, Any], freshness: Tuple[Any, ...]) -> str:
+    payload = json.dumps(
+        [tool_name, normalize_args(args), list(freshness)],
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ToolResultCache:
+    """
+    工具结果缓存（进程级共享，跨任务 / replan / 会话复用）。
+
+    - 键 = 工具名 + 规范化参数 + 来源新鲜度（文件工具为 路径/mtime/size），来源变化即自然失效；
+    - 条目可带 TTL（web_search），过期条目在读取时丢弃；
+    - 按条目数与结果字符数双重上限做 LRU 淘汰；只缓存成功结果。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max(int(max_entries), 1)
+        self.max_bytes = max(int(max_bytes), 1)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+
+    def get(self, key: str) -> Optional[ToolResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= self._clock():
+                self._drop_locked(key)
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry.result
+
+    def put(self, key: str, result: ToolResult, ttl_sec: float = 0.0) -> None:
+        if not result.ok:
+            return
+        size = len(result.content or "")
+        if size > self.max_bytes:
+            return
+        expires_at = self._clock() + float(ttl_sec) if ttl_sec and ttl_sec > 0 else None
+        with self._lock:
+            if key in self._entries:
+                self._drop_locked(key)
+            self._entries[key] = _CacheEntry(result=result, size=size, expires_at=expires_at)
+            self._bytes += size
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop_locked(oldest)
+                self._stats["evictions"] += 1
+
+    def _drop_locked(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+_installed_cache: Optional[ToolResultCache] = None
+_installed_lock = threading.Lock()
+
+
+def install_tool_result_cache(cache: Optional[ToolResultCache]) -> Optional[ToolResultCache]:
+    """设置进程级工具结果缓存，返回被替换的旧缓存。"""
+    global _installed_cache
+    with _installed_lock:
+        previous = _installed_cache
+        _installed_cache = cache
+    return previous
+
+
+def get_tool_result_cache() -> ToolResultCache:
+    """返回进程级工具结果缓存；未安装时按默认上限懒创建一个。"""
+    global _installed_cache
+    with _installed_lock:
+        if _installed_cache is None:
+            _installed_cache = ToolResultCache()
+        return _installed_cache
@@ -132,9 +132,30 @@ class _FileToolBase(BaseTool):
         name: str,
         description: str,
         parameters_schema: Dict[str, Any],
+        max_concurrency: int = 0,
+        parallel_safe: bool = True,
+        cacheable: bool = False,
     ):
         self.policy = _FilePolicy.from_config(config)
-        super().__init__(name=name, description=description, parameters_schema=parameters_schema)
+        super().__init__(
+            name=name,
+            description=description,
+            parameters_schema=parameters_schema,
+            max_concurrency=max_concurrency,
+            parallel_safe=parallel_safe,
+            cacheable=cacheable,
+        )
+
+    def cache_freshness(self, args: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        # 解析后的真实路径 + mtime/size：文件被改写（或被替换成别的文件）后旧条目自然失效。
+        path, _ = self.policy.resolve_path(str(args.get("path") or ""))
+        if path is None:
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return (str(path), int(stat.st_mtime_ns), int(stat.st_size))
 
     def _read_path(self, raw_path: str, *, only_exts: Optional[Set[str]] = None) -> Tuple[Optional[Path], Optional[ToolResult]]:
         path, err = self.policy.resolve_path(raw_path)
@@ -211,6 +232,8 @@ class ReadFileTool(_FileToolBase):
                 },
                 "required": ["path"],
             },
+            max_concurrency=4,
+            cacheable=True,
         )
 
     def run(
@@ -325,6 +348,9 @@ class ReadPdfTool(_FileToolBase):
                 },
                 "required": ["path"],
             },
+            # PDF 解析吃 CPU，并发放低一些。
+            max_concurrency=2,
+            cacheable=True,
         )
 
     def run(
@@ -469,6 +495,7 @@ class WriteMarkdownTool(_FileToolBase):
                 },
                 "required": ["path", "content"],
             },
+            parallel_safe=False,
         )
 
     def run(
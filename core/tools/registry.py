@@ -1,4 +1,5 @@
 import json
+import threading
 from typing import Any, Dict, List
 
 from core.tools.base import BaseTool
@@ -8,9 +9,19 @@ from core.tools.models import ToolContext, ToolResult
 class ToolRegistry:
     def __init__(self):
         self._tools: Dict[str, BaseTool] = {}
+        self._limits: Dict[str, threading.BoundedSemaphore] = {}
 
     def register(self, tool: BaseTool) -> None:
         self._tools[tool.name] = tool
+        if tool.max_concurrency > 0:
+            self._limits[tool.name] = threading.BoundedSemaphore(tool.max_concurrency)
+        else:
+            self._limits.pop(tool.name, None)
+
+    def is_parallel_safe(self, name: str) -> bool:
+        tool = self._tools.get(str(name or "").strip())
+        # 未知工具只会返回 TOOL_NOT_FOUND，没有副作用。
+        return tool is None or tool.parallel_safe
 
     def list_schemas(self) -> List[Dict[str, Any]]:
         return [tool.schema() for tool in self._tools.values()]
@@ -24,4 +35,5 @@ class ToolRegistry:
                 "retryable": False,
             }
             return ToolResult(ok=False, content=json.dumps(payload, ensure_ascii=False))
-        return tool.invoke(args=args, ctx=ctx)
+        # 并发上限交给 invoke 在缓存未命中、真正执行时才占用。
+        return tool.invoke(args=args, ctx=ctx, limit=self._limits.get(tool.name))
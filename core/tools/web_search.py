@@ -45,6 +45,10 @@ class WebSearchTool(BaseTool):
             },
             max_retries=1,
             retry_backoff_sec=0.25,
+            max_concurrency=4,
+            # 搜索结果随时间变化，只在 TTL 内复用；cache_ttl_sec=0 关闭缓存。
+            cacheable=float(cfg.cache_ttl_sec) > 0,
+            cache_ttl_sec=float(cfg.cache_ttl_sec),
         )
 
     def is_retryable_exception(self, exc: Exception) -> bool:
@@ -9,6 +9,7 @@ from typing import Any, Dict, Iterable
 from core.config import LoggingConfig
 from core.paths import runtime_root
 from core.utils.log_context import get_log_context
+from core.utils.retention import SizeTimeRotatingFileHandler
 
 _LOGGING_CONFIGURED = False
 
@@ -333,6 +334,16 @@ def _human_file_formatter() -> logging.Formatter:
     )
 
 
+def _rotating_handler(path: Path, config: LoggingConfig) -> logging.Handler:
+    return SizeTimeRotatingFileHandler(
+        path,
+        max_bytes=config.rotate_max_bytes,
+        max_age_seconds=config.rotate_max_age_hours * 3600.0,
+        compress=config.compress_rotated,
+        category="logs",
+    )
+
+
 def setup_logging(config: LoggingConfig, *, force: bool = False) -> None:
     global _LOGGING_CONFIGURED
     if _LOGGING_CONFIGURED and not force:
@@ -364,7 +375,7 @@ def setup_logging(config: LoggingConfig, *, force: bool = False) -> None:
         root.addHandler(console_handler)
 
     if config.enable_file:
-        file_handler = logging.FileHandler(log_dir / config.log_file_name, encoding="utf-8")
+        file_handler = _rotating_handler(log_dir / config.log_file_name, config)
         if config.format == "json":
             file_handler.setFormatter(JsonFormatter())
         else:
@@ -373,7 +384,7 @@ def setup_logging(config: LoggingConfig, *, force: bool = False) -> None:
         root.addHandler(file_handler)
 
     if config.enable_event_file:
-        event_handler = logging.FileHandler(log_dir / config.event_file_name, encoding="utf-8")
+        event_handler = _rotating_handler(log_dir / config.event_file_name, config)
         event_handler.setFormatter(JsonFormatter())
         event_handler.addFilter(context_filter)
         root.addHandler(event_handler)
@@ -0,0 +1,383 @@
+"""Runtime file retention: rotation + compression, a file manifest and a background sweeper."""
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Mapping, Optional, Union
+
+from core.utils.logging_helpers import log_event, log_exception
+
+logger = logging.getLogger(__name__)
+
+# 在线 SQLite 库及其 -wal/-shm 不参与过期删除，也不登记进清单。
+PROTECTED_SUFFIXES = (".db", ".db-wal", ".db-shm")
+
+
+class RuntimeManifest:
+    """
+    runtime 文件清单（SQLite，runtime/retention_manifest.db）。
+
+    - 写入方在创建/轮转文件时 register 一次：记录类别、大小、mtime，并算出 expires_at；
+    - sweep 只按 expires_at 索引取到期行：文件期间被追加过（mtime 变新）则顺延，否则删除——
+      每轮开销与到期文件数成正比，而不是 runtime 下的文件总数；
+    - rebuild 做一次全量扫描，用于首次启用或清单丢失时引导。
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        keep_seconds: Mapping[str, float],
+        clock: Callable[[], float] = time.time,
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.keep_seconds: Dict[str, float] = {str(k): float(v) for k, v in keep_seconds.items()}
+        self._clock = clock
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"registered": 0, "deleted": 0, "rescheduled": 0, "missing": 0, "deleted_bytes": 0}
+        with self._db:
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS runtime_files (
+                    path TEXT PRIMARY KEY,
+                    category TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    expires_at REAL
+                ) WITHOUT ROWID
+                """
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_runtime_files_expires_at "
+                "ON runtime_files(expires_at) WHERE expires_at IS NOT NULL"
+            )
+
+    def _expires_at(self, category: str, mtime: float) -> Optional[float]:
+        keep = self.keep_seconds.get(category, 0.0)
+        return mtime + keep if keep > 0 else None
+
+    def register(self, path: Union[str, Path], category: str) -> None:
+        """登记（或刷新）一个文件；文件不存在或受保护时忽略。"""
+        path = Path(path)
+        if path.name.endswith(PROTECTED_SUFFIXES):
+            return
+        try:
+            st = path.stat()
+        except OSError:
+            return
+        with self._lock:
+            if self._closed:
+                return
+            with self._db:
+                self._db.execute(
+                    """
+                    INSERT INTO runtime_files(path, category, size_bytes, mtime, expires_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(path) DO UPDATE SET
+                        category = excluded.category,
+                        size_bytes = excluded.size_bytes,
+                        mtime = excluded.mtime,
+                        expires_at = excluded.expires_at
+                    """,
+                    (str(path), category, int(st.st_size), float(st.st_mtime), self._expires_at(category, st.st_mtime)),
+                )
+            self._stats["registered"] += 1
+
+    def apply_keep_seconds(self) -> None:
+        """按当前保留期重算所有条目的 expires_at（只改清单，不访问文件系统）。"""
+        with self._lock:
+            if self._closed:
+                return
+            with self._db:
+                categories = [row[0] for row in self._db.execute("SELECT DISTINCT category FROM runtime_files")]
+                for category in categories:
+                    keep = self.keep_seconds.get(category, 0.0)
+                    self._db.execute(
+                        "UPDATE runtime_files SET expires_at = CASE WHEN ? > 0 THEN mtime + ? ELSE NULL END "
+                        "WHERE category = ?",
+                        (keep, keep, category),
+                    )
+
+    def rebuild(self, runtime_dir: Union[str, Path], categories: Iterable[str]) -> int:
+        """全量扫描 runtime_dir 下各类别子目录并登记（类别名即子目录名）。"""
+        count = 0
+        for category in categories:
+            subdir = Path(runtime_dir) / category
+            if not subdir.exists():
+                continue
+            for path in subdir.rglob("*"):
+                if path.is_file() and not path.name.endswith(PROTECTED_SUFFIXES):
+                    self.register(path, category)
+                    count += 1
+        return count
+
+    def sweep(self, dry_run: bool = False, batch_size: int = 500) -> dict:
+        """处理最多 batch_size 个到期条目；dry_run 时只返回候选，不删除也不改清单。"""
+        now = self._clock()
+        with self._lock:
+            if self._closed:
+                return {"scanned": 0, "deleted": [], "candidates": [], "rescheduled": 0, "missing": 0, "freed_bytes": 0}
+            rows = self._db.execute(
+                "SELECT path, category FROM runtime_files WHERE expires_at IS NOT NULL AND expires_at <= ? "
+                "ORDER BY expires_at ASC LIMIT ?",
+                (now, max(int(batch_size), 1)),
+            ).fetchall()
+        deleted, candidates = [], []
+        rescheduled = missing = freed = 0
+        for raw_path, category in rows:
+            path = Path(raw_path)
+            try:
+                st = path.stat()
+            except OSError:
+                st = None
+            if st is None:
+                missing += 1
+                if not dry_run:
+                    self._forget(raw_path)
+                continue
+            expires_at = self._expires_at(category, st.st_mtime)
+            if expires_at is None or expires_at > now:
+                # 登记后又被写过：按最新 mtime 顺延。
+                rescheduled += 1
+                if not dry_run:
+                    self.register(path, category)
+                continue
+            candidates.append(raw_path)
+            if dry_run:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            freed += int(st.st_size)
+            deleted.append(raw_path)
+            self._forget(raw_path)
+        with self._lock:
+            if not dry_run:
+                self._stats["deleted"] += len(deleted)
+                self._stats["rescheduled"] += rescheduled
+                self._stats["missing"] += missing
+                self._stats["deleted_bytes"] += freed
+        return {
+            "scanned": len(rows),
+            "deleted": deleted,
+            "candidates": candidates,
+            "rescheduled": rescheduled,
+            "missing": missing,
+            "freed_bytes": freed,
+        }
+
+    def _forget(self, raw_path: str) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            with self._db:
+                self._db.execute("DELETE FROM runtime_files WHERE path = ?", (raw_path,))
+
+    def summary(self) -> dict:
+        """按类别汇总清单中的文件数与字节数。"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT category, COUNT(*), COALESCE(SUM(size_bytes), 0), MIN(mtime) FROM runtime_files GROUP BY category"
+            ).fetchall()
+        now = self._clock()
+        return {
+            category: {
+                "files": int(files),
+                "bytes": int(size),
+                "oldest_age_days": round((now - float(oldest)) / 86400.0, 2) if oldest is not None else 0.0,
+            }
+            for category, files, size, oldest in rows
+        }
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM runtime_files LIMIT 1").fetchone() is None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._db.close()
+
+
+_installed_manifest: Optional[RuntimeManifest] = None
+
+
+def install_runtime_manifest(manifest: Optional[RuntimeManifest]) -> None:
+    """设置进程级清单；未安装时 register_runtime_file 为空操作（测试与脚本默认不登记）。"""
+    global _installed_manifest
+    _installed_manifest = manifest
+
+
+def register_runtime_file(path: Union[str, Path], category: str) -> None:
+    manifest = _installed_manifest
+    if manifest is None:
+        return
+    try:
+        manifest.register(path, category)
+    except Exception:
+        # 登记失败不影响写入方；rebuild 可补齐。
+        pass
+
+
+def rotate_file(path: Union[str, Path], compress: bool = True) -> Optional[Path]:
+    """
+    把 path 改名为带 UTC 时间戳的归档文件（可选 gzip），返回归档路径；文件不存在或为空时返回 None。
+
+    例：events.jsonl -> events.20261019T120000Z.jsonl.gz
+    """
+    path = Path(path)
+    try:
+        if path.stat().st_size == 0:
+            return None
+    except OSError:
+        return None
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    archive = path.with_name(f"{path.stem}.{stamp}{path.suffix}")
+    os.replace(path, archive)
+    if not compress:
+        return archive
+    gz_path = archive.with_name(archive.name + ".gz")
+    with open(archive, "rb") as src, gzip.open(gz_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    archive.unlink()
+    return gz_path
+
+
+class SizeTimeRotatingFileHandler(logging.FileHandler):
+    """
+    按大小或文件年龄轮转的日志 handler；归档文件带时间戳、可 gzip，并登记进 runtime 清单。
+
+    与 RotatingFileHandler 不同，归档不做编号平移，保留期限交给清单按时间清理。
+    """
+
+    def __init__(
+        self,
+        filename: Union[str, Path],
+        max_bytes: int = 0,
+        max_age_seconds: float = 0.0,
+        compress: bool = True,
+        category: str = "logs",
+        encoding: str = "utf-8",
+    ):
+        super().__init__(str(filename), encoding=encoding)
+        self.max_bytes = max(int(max_bytes), 0)
+        self.max_age_seconds = max(float(max_age_seconds), 0.0)
+        self.compress = bool(compress)
+        self.category = category
+        # 年龄从本进程打开文件起算；重启后已有文件按新的周期计。
+        self._opened_at = time.time()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is None:
+            return False
+        if self.max_age_seconds > 0 and time.time() - self._opened_at >= self.max_age_seconds:
+            return self.stream.tell() > 0
+        if self.max_bytes > 0:
+            # 只看已写入的大小，不为判定再格式化一次记录；文件最多超出上限一条记录。
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        archive = rotate_file(self.baseFilename, compress=self.compress)
+        if archive is not None:
+            register_runtime_file(archive, self.category)
+        self.stream = self._open()
+        self._opened_at = time.time()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+        except Exception:
+            self.handleError(record)
+            return
+        super().emit(record)
+
+
+class RetentionScheduler:
+    """
+    进程内保留期调度：后台线程每 interval_seconds 执行一次 manifest.sweep。
+
+    首轮按当前保留期重算清单；清单为空（首次启用）时先 rebuild 一次。
+    """
+
+    def __init__(
+        self,
+        manifest: RuntimeManifest,
+        runtime_dir: Union[str, Path],
+        categories: Iterable[str],
+        interval_seconds: float = 300.0,
+        batch_size: int = 500,
+    ):
+        self.manifest = manifest
+        self.runtime_dir = Path(runtime_dir)
+        self.categories = list(categories)
+        self.interval_seconds = max(float(interval_seconds), 1.0)
+        self.batch_size = max(int(batch_size), 1)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._runs = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="runtime-retention", daemon=True)
+        self._thread.start()
+
+    def run_once(self) -> dict:
+        if self._runs == 0:
+            # 保留期配置可能在重启间变化：首轮按当前配置重算；清单为空时先全量引导。
+            if self.manifest.is_empty():
+                self.manifest.rebuild(self.runtime_dir, self.categories)
+            self.manifest.apply_keep_seconds()
+        self._runs += 1
+        result = self.manifest.sweep(batch_size=self.batch_size)
+        if result["deleted"]:
+            log_event(
+                logger,
+                logging.INFO,
+                "runtime.retention.sweep.done",
+                "runtime 过期文件清理完成",
+                component="retention",
+                deleted=len(result["deleted"]),
+                rescheduled=result["rescheduled"],
+                freed_bytes=result["freed_bytes"],
+            )
+        return result
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                log_exception(logger, "runtime.retention.sweep.error", "runtime 过期清理失败", component="retention")
+            self._stop.wait(self.interval_seconds)
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
@@ -1,19 +1,26 @@
 import json
 import logging
 import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from queue import Full, Queue
 from typing import Any, Dict, Optional, Union
 
 from core.paths import runtime_traces_dir
-from core.utils.logging_helpers import log_event
+from core.utils.logging_helpers import log_event, log_exception
+from core.utils.retention import register_runtime_file, rotate_file
 
 logger = logging.getLogger(__name__)
 
 
 class TraceLogger:
-    """Async JSONL trace logger backed by queue + writer thread."""
+    """
+    Async JSONL trace logger backed by queue + writer thread.
+
+    max_bytes / max_age_seconds > 0 时由写线程按大小或时长轮转：当前文件改名为带时间戳的归档（可 gzip），
+    归档与新文件都登记进 runtime 清单，由保留期清理按时间删除。
+    """
 
     _SENTINEL = object()
 
@@ -24,6 +31,9 @@ class TraceLogger:
         max_queue_size: int = 1024,
         flush_every: int = 20,
         drop_on_overflow: bool = True,
+        max_bytes: int = 0,
+        max_age_seconds: float = 0.0,
+        compress_rotated: bool = True,
     ):
         self.trace_dir = Path(trace_dir) if trace_dir is not None else runtime_traces_dir()
         self.trace_dir.mkdir(parents=True, exist_ok=True)
@@ -32,6 +42,10 @@ class TraceLogger:
         self._queue: Queue = Queue(maxsize=max_queue_size)
         self._flush_every = max(int(flush_every), 1)
         self._drop_on_overflow = bool(drop_on_overflow)
+        self._max_bytes = max(int(max_bytes), 0)
+        self._max_age_seconds = max(float(max_age_seconds), 0.0)
+        self._compress_rotated = bool(compress_rotated)
+        self.rotations = 0
         self._dropped_count = 0
         self._closed = False
         self._lock = threading.Lock()
@@ -43,9 +57,35 @@ class TraceLogger:
         )
         self._writer.start()
 
+    def _open_trace_file(self):
+        f = open(self.path, "a", encoding="utf-8")
+        register_runtime_file(self.path, "traces")
+        return f
+
+    def _should_rotate(self, size: int, opened_at: float) -> bool:
+        if self._max_age_seconds > 0 and time.monotonic() - opened_at >= self._max_age_seconds:
+            return size > 0
+        return self._max_bytes > 0 and size >= self._max_bytes
+
+    def _rotate(self, f):
+        f.close()
+        try:
+            archive = rotate_file(self.path, compress=self._compress_rotated)
+            if archive is not None:
+                register_runtime_file(archive, "traces")
+                self.rotations += 1
+        except OSError:
+            log_exception(logger, "trace.logger.rotate.error", "Trace 文件轮转失败", component="trace")
+        return self._open_trace_file()
+
     def _writer_loop(self) -> None:
-        with open(self.path, "a", encoding="utf-8") as f:
-            pending = 0
+        rotating = bool(self._max_bytes or self._max_age_seconds)
+        f = self._open_trace_file()
+        # 按写入字节自行累计文件大小，避免每行 tell()/stat() 触发刷盘。
+        size = self.path.stat().st_size if rotating else 0
+        opened_at = time.monotonic()
+        pending = 0
+        try:
             while True:
                 item = self._queue.get()
                 try:
@@ -58,8 +98,17 @@ class TraceLogger:
                     if pending >= self._flush_every:
                         f.flush()
                         pending = 0
+                    if rotating:
+                        size += len(item.encode("utf-8"))
+                        if self._should_rotate(size, opened_at):
+                            f = self._rotate(f)
+                            size = 0
+                            opened_at = time.monotonic()
+                            pending = 0
                 finally:
                     self._queue.task_done()
+        finally:
+            f.close()
 
     def log(self, event: str, payload: Dict[str, Any]) -> None:
         with self._lock:
@@ -1,8 +1,16 @@
 import argparse
-import shutil
+import hashlib
+import json
+import os
+import sqlite3
 import sys
+import tempfile
+import time
+import zipfile
+import zlib
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
@@ -14,24 +22,450 @@ from core.paths import backups_root, runtime_root
 DEFAULT_RUNTIME = runtime_root()
 DEFAULT_BACKUP_DIR = backups_root()
 
+STORE_DIR_NAME = "store"
+MANIFEST_VERSION = 1
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+SQLITE_HEADER = b"SQLite format 3\x00"
+# 这些文件的内容已经（或应当）被合并进主库快照，单独拷贝只会得到不一致的中间态。
+SKIP_SUFFIXES = ("-wal", "-shm", "-journal", ".tmp")
+
+
+def _snapshot_id(snapshots_dir: Path) -> str:
+    base = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    snapshot_id, n = base, 0
+    while (snapshots_dir / f"{snapshot_id}.json").exists():
+        n += 1
+        snapshot_id = f"{base}-{n:03d}"
+    return snapshot_id
+
+
+def _snapshot_sort_key(snapshot_id: str) -> Tuple[str, int]:
+    # 同一秒内的后缀按数值排序（兼容未补零的旧 id），否则 -10 会排在 -2 之前。
+    date, _, rest = snapshot_id.partition("-")
+    clock, _, suffix = rest.partition("-")
+    if suffix.isdigit():
+        return f"{date}-{clock}", int(suffix)
+    return snapshot_id, 0
+
+
+def _iter_runtime_files(runtime_dir: Path, exclude: List[Path]) -> Iterator[Tuple[str, Path]]:
+    excluded = [p.resolve() for p in exclude]
+    for root, dirs, files in os.walk(runtime_dir):
+        root_path = Path(root)
+        dirs[:] = sorted(d for d in dirs if (root_path / d).resolve() not in excluded)
+        for name in sorted(files):
+            if name.endswith(SKIP_SUFFIXES):
+                continue
+            path = root_path / name
+            yield path.relative_to(runtime_dir).as_posix(), path
+
+
+def _is_sqlite(path: Path) -> bool:
+    if path.suffix.lower() not in SQLITE_SUFFIXES:
+        return False
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+    except OSError:
+        return False
+
+
+def _sqlite_snapshot(src: Path, dst: Path) -> None:
+    """用 SQLite 在线备份 API 复制一份一致的库（包含尚未 checkpoint 的 WAL 内容），不阻塞写入方。"""
+    source = sqlite3.connect(f"file:{src.as_posix()}?mode=ro", uri=True)
+    try:
+        target = sqlite3.connect(str(dst))
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def _sqlite_integrity(path: Path) -> str:
+    db = sqlite3.connect(f"file:{path.as_posix()}?mode=ro", uri=True)
+    try:
+        row = db.execute("PRAGMA integrity_check").fetchone()
+    finally:
+        db.close()
+    return str(row[0]) if row else "no result"
+
+
+class ChunkStore:
+    """
+    内容寻址的分块仓库：`<backup_dir>/store/chunks/<sha[:2]>/<sha256>`（zlib 压缩）+ `snapshots/<id>.json`。
+
+    - 文件按固定大小切块，块名为原始内容的 sha256，同一内容在所有快照之间只存一份；
+      固定块对齐 SQLite 页，库里没动过的页所在的块会被直接复用；
+    - 快照清单最后写入（临时文件 + 原子替换），备份中途失败只会留下无人引用的块，由 prune 回收。
+    """
+
+    def __init__(self, backup_dir: Path):
+        self.root = Path(backup_dir) / STORE_DIR_NAME
+        self.chunks_dir = self.root / "chunks"
+        self.snapshots_dir = self.root / "snapshots"
+
+    def ensure(self) -> None:
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+
+    def chunk_path(self, digest: str) -> Path:
+        return self.chunks_dir / digest[:2] / digest
+
+    def has_chunk(self, digest: str) -> bool:
+        return self.chunk_path(digest).exists()
+
+    def put_chunk(self, data: bytes) -> Tuple[str, int]:
+        """写入一个块，返回（sha256, 新写入的压缩字节数；已存在时为 0）。"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.chunk_path(digest)
+        if path.exists():
+            return digest, 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = zlib.compress(data, 3)
+        temp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+        return digest, len(payload)
+
+    def get_chunk(self, digest: str) -> bytes:
+        """读出并校验一个块；内容与块名不符时抛 ValueError。"""
+        data = zlib.decompress(self.chunk_path(digest).read_bytes())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"chunk hash mismatch: {digest}")
+        return data
+
+    def snapshot_ids(self) -> List[str]:
+        if not self.snapshots_dir.exists():
+            return []
+        return sorted((p.stem for p in self.snapshots_dir.glob("*.json")), key=_snapshot_sort_key)
+
+    def resolve(self, snapshot_id: str) -> str:
+        ids = self.snapshot_ids()
+        if snapshot_id == "latest":
+            if not ids:
+                raise FileNotFoundError(f"no snapshots under {self.snapshots_dir}")
+            return ids[-1]
+        if snapshot_id not in ids:
+            raise FileNotFoundError(f"snapshot not found: {snapshot_id}")
+        return snapshot_id
+
+    def load_manifest(self, snapshot_id: str) -> dict:
+        with open(self.snapshots_dir / f"{self.resolve(snapshot_id)}.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_manifest(self, manifest: dict) -> Path:
+        path = self.snapshots_dir / f"{manifest['snapshot_id']}.json"
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, path)
+        return path
+
+
+def _store_stream(store: ChunkStore, f, chunk_size: int) -> Tuple[List[str], int, str, int, int]:
+    """切块写入，返回（块列表, 原始字节数, 整文件 sha256, 新块数, 新写入字节数）。"""
+    chunks: List[str] = []
+    file_hash = hashlib.sha256()
+    size = new_chunks = new_bytes = 0
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            break
+        file_hash.update(data)
+        size += len(data)
+        digest, written = store.put_chunk(data)
+        chunks.append(digest)
+        if written:
+            new_chunks += 1
+            new_bytes += written
+    return chunks, size, file_hash.hexdigest(), new_chunks, new_bytes
+
+
+def backup_incremental(
+    runtime_dir: Path,
+    backup_dir: Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict:
+    """
+    增量备份 runtime 目录，返回快照清单。
+
+    - 普通文件：大小与 mtime 都和上一份快照一致、且其块仍在仓库中时直接复用块列表，不读文件；
+      否则切块写入，已存在的块只引用不重写；
+    - SQLite 库：先用在线备份 API 复制到临时文件再切块，-wal / -shm 不单独备份。
+    """
+    started = time.perf_counter()
+    runtime_dir = Path(runtime_dir)
+    store = ChunkStore(backup_dir)
+    store.ensure()
+    chunk_size = max(int(chunk_size), 4096)
+    previous_ids = store.snapshot_ids()
+    previous = store.load_manifest(previous_ids[-1]) if previous_ids else {}
+    # 块大小变了，旧块列表不能按文件复用（块本身仍可按内容去重）。
+    previous_files: Dict[str, dict] = previous.get("files", {}) if previous.get("chunk_size") == chunk_size else {}
+
+    files: Dict[str, dict] = {}
+    stats = {
+        "files": 0,
+        "bytes": 0,
+        "reused_files": 0,
+        "sqlite_files": 0,
+        "new_chunks": 0,
+        "new_bytes": 0,
+        "skipped": [],
+    }
+    exclude = [Path(backup_dir)]
+    for rel, path in _iter_runtime_files(runtime_dir, exclude):
+        try:
+            st = path.stat()
+            if _is_sqlite(path):
+                with tempfile.TemporaryDirectory(dir=store.root) as temp_dir:
+                    temp_db = Path(temp_dir) / "snapshot.db"
+                    _sqlite_snapshot(path, temp_db)
+                    with open(temp_db, "rb") as f:
+                        chunks, size, digest, new_chunks, new_bytes = _store_stream(store, f, chunk_size)
+                entry = {"size": size, "mtime_ns": st.st_mtime_ns, "sha256": digest, "chunks": chunks, "sqlite": True}
+                stats["sqlite_files"] += 1
+            else:
+                prev = previous_files.get(rel)
+                if (
+                    prev is not None
+                    and not prev.get("sqlite")
+                    and prev.get("size") == st.st_size
+                    and prev.get("mtime_ns") == st.st_mtime_ns
+                    and all(store.has_chunk(c) for c in prev.get("chunks", []))
+                ):
+                    files[rel] = prev
+                    stats["files"] += 1
+                    stats["bytes"] += st.st_size
+                    stats["reused_files"] += 1
+                    continue
+                with open(path, "rb") as f:
+                    chunks, size, digest, new_chunks, new_bytes = _store_stream(store, f, chunk_size)
+                entry = {"size": size, "mtime_ns": st.st_mtime_ns, "sha256": digest, "chunks": chunks, "sqlite": False}
+        except (OSError, sqlite3.Error) as exc:
+            # 备份期间被轮转 / 清理掉的文件只记录，不让整次备份失败。
+            stats["skipped"].append({"path": rel, "error": str(exc)})
+            continue
+        files[rel] = entry
+        stats["files"] += 1
+        stats["bytes"] += entry["size"]
+        stats["new_chunks"] += new_chunks
+        stats["new_bytes"] += new_bytes
+
+    stats["elapsed_ms"] = int((time.perf_counter() - started) * 1000)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "snapshot_id": _snapshot_id(store.snapshots_dir),
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "runtime_dir": str(runtime_dir.resolve()),
+        "chunk_size": chunk_size,
+        "parent": previous.get("snapshot_id"),
+        "files": files,
+        "stats": stats,
+    }
+    store.write_manifest(manifest)
+    return manifest
+
+
+def verify_snapshot(backup_dir: Path, snapshot_id: str = "latest") -> dict:
+    """不落盘地校验快照：每个块的哈希、每个文件的大小与整文件 sha256。"""
+    store = ChunkStore(backup_dir)
+    manifest = store.load_manifest(snapshot_id)
+    checked: Dict[str, bool] = {}
+    errors: List[dict] = []
+    for rel, entry in manifest.get("files", {}).items():
+        file_hash = hashlib.sha256()
+        size = 0
+        try:
+            for digest in entry.get("chunks", []):
+                data = store.get_chunk(digest)
+                checked[digest] = True
+                file_hash.update(data)
+                size += len(data)
+        except (OSError, ValueError, zlib.error) as exc:
+            errors.append({"path": rel, "error": str(exc)})
+            continue
+        if size != entry.get("size") or file_hash.hexdigest() != entry.get("sha256"):
+            errors.append({"path": rel, "error": "file hash mismatch"})
+    return {
+        "snapshot_id": manifest["snapshot_id"],
+        "files": len(manifest.get("files", {})),
+        "chunks": len(checked),
+        "errors": errors,
+        "ok": not errors,
+    }
+
+
+def restore_snapshot(
+    backup_dir: Path,
+    target_dir: Path,
+    snapshot_id: str = "latest",
+    force: bool = False,
+) -> dict:
+    """
+    把快照还原到 target_dir，逐块、逐文件校验哈希，SQLite 库再跑一次 integrity_check。
+
+    每个文件先写临时文件，校验通过后才替换到位；目标目录非空时需要 force。
+    """
+    store = ChunkStore(backup_dir)
+    manifest = store.load_manifest(snapshot_id)
+    target_dir = Path(target_dir)
+    if target_dir.exists() and any(target_dir.iterdir()) and not force:
+        raise FileExistsError(f"restore target is not empty: {target_dir}")
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    restored = 0
+    errors: List[dict] = []
+    for rel, entry in manifest.get("files", {}).items():
+        path = target_dir / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".restore.tmp")
+        try:
+            file_hash = hashlib.sha256()
+            size = 0
+            with open(temp_path, "wb") as f:
+                for digest in entry.get("chunks", []):
+                    data = store.get_chunk(digest)
+                    file_hash.update(data)
+                    size += len(data)
+                    f.write(data)
+            if size != entry.get("size") or file_hash.hexdigest() != entry.get("sha256"):
+                raise ValueError("file hash mismatch")
+            if entry.get("sqlite"):
+                integrity = _sqlite_integrity(temp_path)
+                if integrity != "ok":
+                    raise ValueError(f"sqlite integrity_check failed: {integrity}")
+            for suffix in ("-wal", "-shm"):
+                # 目标处残留的旧 WAL 会被 SQLite 当成新库的日志回放。
+                Path(str(path) + suffix).unlink(missing_ok=True)
+            os.replace(temp_path, path)
+            os.utime(path, ns=(entry.get("mtime_ns", 0), entry.get("mtime_ns", 0)))
+            restored += 1
+        except (OSError, ValueError, zlib.error, sqlite3.Error) as exc:
+            temp_path.unlink(missing_ok=True)
+            errors.append({"path": rel, "error": str(exc)})
+    return {
+        "snapshot_id": manifest["snapshot_id"],
+        "target_dir": str(target_dir),
+        "restored": restored,
+        "errors": errors,
+        "ok": not errors,
+    }
+
+
+def prune_snapshots(backup_dir: Path, keep_last: int) -> dict:
+    """只保留最近 keep_last 份快照，并回收不再被任何快照引用的块。"""
+    store = ChunkStore(backup_dir)
+    ids = store.snapshot_ids()
+    keep_last = max(int(keep_last), 1)
+    removed = ids[:-keep_last] if len(ids) > keep_last else []
+    for snapshot_id in removed:
+        (store.snapshots_dir / f"{snapshot_id}.json").unlink(missing_ok=True)
+
+    referenced = set()
+    for snapshot_id in store.snapshot_ids():
+        for entry in store.load_manifest(snapshot_id).get("files", {}).values():
+            referenced.update(entry.get("chunks", []))
+    freed_chunks = freed_bytes = 0
+    if store.chunks_dir.exists():
+        for path in store.chunks_dir.glob("*/*"):
+            if path.name in referenced:
+                continue
+            freed_bytes += path.stat().st_size
+            path.unlink()
+            freed_chunks += 1
+    return {"removed": removed, "freed_chunks": freed_chunks, "freed_bytes": freed_bytes}
+
 
 def backup_runtime(runtime_dir: Path, backup_dir: Path) -> Path:
+    """全量 zip 备份；SQLite 库同样经在线备份 API 取一致副本，-wal / -shm 不入包。"""
     backup_dir.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-    archive_base = backup_dir / f"lumina-runtime-{timestamp}"
-    archive_path = shutil.make_archive(str(archive_base), "zip", root_dir=str(runtime_dir))
-    return Path(archive_path)
+    archive_path = backup_dir / f"lumina-runtime-{timestamp}.zip"
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for rel, path in _iter_runtime_files(runtime_dir, [backup_dir]):
+            try:
+                if _is_sqlite(path):
+                    with tempfile.TemporaryDirectory(dir=backup_dir) as temp_dir:
+                        temp_db = Path(temp_dir) / "snapshot.db"
+                        _sqlite_snapshot(path, temp_db)
+                        archive.write(temp_db, rel)
+                else:
+                    archive.write(path, rel)
+            except (OSError, sqlite3.Error):
+                continue
+    return archive_path
+
+
+def _print_result(result: dict, as_json: bool, keys: List[str]) -> None:
+    if as_json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    for key in keys:
+        print(f"{key}={result.get(key)}")
+    for error in result.get("errors", []):
+        print(f"error={error['path']}: {error['error']}")
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Backup Lumina runtime directory")
     parser.add_argument("--runtime-dir", default=str(DEFAULT_RUNTIME))
     parser.add_argument("--backup-dir", default=str(DEFAULT_BACKUP_DIR))
+    parser.add_argument("--incremental", action="store_true", help="Content-addressed incremental snapshot")
+    parser.add_argument("--chunk-size-kb", type=int, default=DEFAULT_CHUNK_SIZE // 1024)
+    parser.add_argument("--list", action="store_true", help="List incremental snapshots")
+    parser.add_argument("--verify", metavar="SNAPSHOT", help="Verify a snapshot ('latest' allowed)")
+    parser.add_argument("--restore", metavar="SNAPSHOT", help="Restore a snapshot ('latest' allowed)")
+    parser.add_argument("--target", help="Restore target directory")
+    parser.add_argument("--force", action="store_true", help="Allow restoring into a non-empty directory")
+    parser.add_argument("--keep-last", type=int, default=0, help="Prune to the newest N snapshots")
+    parser.add_argument("--json", action="store_true", help="Print result as JSON")
     args = parser.parse_args()
 
     runtime_dir = Path(args.runtime_dir)
     backup_dir = Path(args.backup_dir)
 
+    try:
+        if args.list:
+            store = ChunkStore(backup_dir)
+            for snapshot_id in store.snapshot_ids():
+                stats = store.load_manifest(snapshot_id).get("stats", {})
+                print(f"{snapshot_id} files={stats.get('files')} bytes={stats.get('bytes')} new_bytes={stats.get('new_bytes')}")
+            return 0
+        if args.verify:
+            result = verify_snapshot(backup_dir, args.verify)
+            _print_result(result, args.json, ["snapshot_id", "files", "chunks", "ok"])
+            return 0 if result["ok"] else 2
+        if args.restore:
+            if not args.target:
+                print("--target is required for --restore")
+                return 1
+            result = restore_snapshot(backup_dir, Path(args.target), args.restore, force=args.force)
+            _print_result(result, args.json, ["snapshot_id", "target_dir", "restored", "ok"])
+            return 0 if result["ok"] else 2
+    except (FileNotFoundError, FileExistsError) as exc:
+        print(str(exc))
+        return 1
+
+    if args.incremental or args.keep_last:
+        if args.incremental:
+            if not runtime_dir.exists():
+                print(f"runtime directory not found: {runtime_dir}")
+                return 1
+            manifest = backup_incremental(runtime_dir, backup_dir, chunk_size=args.chunk_size_kb * 1024)
+            _print_result(
+                {"snapshot_id": manifest["snapshot_id"], **manifest["stats"]},
+                args.json,
+                ["snapshot_id", "files", "bytes", "reused_files", "sqlite_files", "new_chunks", "new_bytes", "elapsed_ms"],
+            )
+        if args.keep_last:
+            _print_result(prune_snapshots(backup_dir, args.keep_last), args.json, ["removed", "freed_chunks", "freed_bytes"])
+        return 0
+
     if not runtime_dir.exists():
         print(f"runtime directory not found: {runtime_dir}")
         return 1
@@ -0,0 +1,145 @@
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine.long_term import LongTermMemory
+from core.memory.memory_module_engine.models import MemoryItem, MemoryMetadata
+
+TOPICS = ["博物馆", "咖啡", "跑步", "周报", "旅行", "电影", "编程", "猫咪", "做饭", "音乐"]
+
+
+def populate(long_term: LongTermMemory, size: int, dim: int, seed: int) -> List[str]:
+    rng = np.random.default_rng(seed)
+    queries: List[str] = []
+    batch: List[MemoryItem] = []
+    for i in range(size):
+        topic = TOPICS[i % len(TOPICS)]
+        content = f"episodic: 用户 第{i}次 提到 {topic} 和 {TOPICS[(i * 7) % len(TOPICS)]}"
+        batch.append(
+            MemoryItem(
+                id=str(uuid.uuid4()),
+                content=content,
+                importance=0.6,
+                embedding=rng.normal(size=dim).astype(np.float32).tolist(),
+                metadata=MemoryMetadata(store="long_term"),
+            )
+        )
+        if len(batch) >= 500:
+            long_term.add_many(batch)
+            batch = []
+    if batch:
+        long_term.add_many(batch)
+    for topic in TOPICS:
+        queries.append(f"{topic} 偏好")
+    return queries
+
+
+def bench_threads(
+    long_term: LongTermMemory,
+    queries: List[str],
+    threads: int,
+    queries_per_thread: int,
+    dim: int,
+    top_k: int,
+) -> dict:
+    rng = np.random.default_rng(threads)
+    embeddings = rng.normal(size=(len(queries), dim)).astype(np.float32).tolist()
+    before = long_term.read_pool_stats()
+    barrier = threading.Barrier(threads + 1)
+
+    def _worker(offset: int) -> None:
+        barrier.wait()
+        for i in range(queries_per_thread):
+            idx = (offset + i) % len(queries)
+            long_term.search_candidates(queries[idx], embeddings[idx], limit=top_k)
+
+    workers = [threading.Thread(target=_worker, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    after = long_term.read_pool_stats()
+
+    total = threads * queries_per_thread
+    waits = after["waits"] - before["waits"]
+    acquires = after["acquires"] - before["acquires"]
+    return {
+        "threads": threads,
+        "queries": total,
+        "elapsed_sec": round(elapsed, 3),
+        "qps": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+        "pool_waits": waits,
+        "pool_wait_rate": round(waits / acquires, 4) if acquires else 0.0,
+        "pool_wait_ms": round(after["wait_ms_total"] - before["wait_ms_total"], 3),
+    }
+
+
+def run(size: int, dim: int, pool_sizes: List[int], thread_counts: List[int], queries_per_thread: int, top_k: int):
+    workdir = Path(tempfile.mkdtemp(prefix="lumina-bench-read-pool-"))
+    results = []
+    try:
+        seeded = LongTermMemory(str(workdir), vector_dim=dim, vector_backend="flat")
+        queries = populate(seeded, size=size, dim=dim, seed=7)
+        seeded.close()
+        for pool_size in pool_sizes:
+            # pool_size=1 等价于改造前的“单读连接 + 锁”。
+            long_term = LongTermMemory(str(workdir), vector_dim=dim, vector_backend="flat", read_pool_size=pool_size)
+            try:
+                for threads in thread_counts:
+                    result = bench_threads(long_term, queries, threads, queries_per_thread, dim, top_k)
+                    results.append({"pool_size": pool_size, "size": size, **result})
+            finally:
+                long_term.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark long-term search throughput vs reader threads")
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--pool-sizes", default="1,4,8")
+    parser.add_argument("--threads", default="1,2,4,8")
+    parser.add_argument("--queries-per-thread", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = run(
+        size=max(args.size, 1),
+        dim=max(args.dim, 1),
+        pool_sizes=[int(s) for s in args.pool_sizes.split(",") if s.strip()],
+        thread_counts=[int(s) for s in args.threads.split(",") if s.strip()],
+        queries_per_thread=max(args.queries_per_thread, 1),
+        top_k=max(args.top_k, 1),
+    )
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+    for result in results:
+        print(
+            f"pool={result['pool_size']} threads={result['threads']} qps={result['qps']} "
+            f"waits={result['pool_waits']} wait_rate={result['pool_wait_rate']} wait_ms={result['pool_wait_ms']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+import argparse
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine.models import MemoryItem, MemoryMetadata
+from core.memory.memory_module_engine.overflow_processor import OverflowProcessor
+from core.memory.memory_module_engine.utils import cosine_similarity
+
+
+def _latency_stats(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+    ordered = sorted(samples)
+
+    def _pick(percentile: float) -> float:
+        index = int(round((len(ordered) - 1) * percentile))
+        return round(ordered[max(min(index, len(ordered) - 1), 0)], 3)
+
+    return {
+        "count": len(ordered),
+        "avg_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": _pick(0.50),
+        "p95_ms": _pick(0.95),
+    }
+
+
+def reference_cluster(items: List[MemoryItem], threshold: float, max_cluster_size: int) -> List[List[MemoryItem]]:
+    """逐成员计算平均余弦的贪心单遍聚类（向量化前的实现），用于对照耗时与结果。"""
+    clusters: List[List[MemoryItem]] = []
+    for item in items:
+        placed = False
+        for cluster in clusters:
+            if len(cluster) >= max_cluster_size:
+                continue
+            sims = [cosine_similarity(item.embedding, other.embedding) for other in cluster]
+            if sum(sims) / len(sims) >= threshold:
+                cluster.append(item)
+                placed = True
+                break
+        if not placed:
+            clusters.append([item])
+    return clusters
+
+
+def make_working_set(size: int, dim: int, topics: int, noise: float, seed: int = 7) -> List[MemoryItem]:
+    # 以若干“话题中心 + 噪声”模拟 working 记忆：同话题条目彼此相近。
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(topics, 1), dim))
+    labels = rng.integers(0, max(topics, 1), size=size)
+    vectors = centers[labels] + rng.normal(scale=noise, size=(size, dim))
+    return [
+        MemoryItem(
+            id=str(uuid.uuid4()),
+            content=f"episodic: topic-{labels[idx]} note-{idx}",
+            importance=0.5,
+            embedding=vectors[idx].tolist(),
+            metadata=MemoryMetadata(store="working"),
+        )
+        for idx in range(size)
+    ]
+
+
+def bench_size(size: int, dim: int, topics: int, noise: float, repeats: int, threshold: float, max_cluster_size: int) -> dict:
+    items = make_working_set(size, dim, topics, noise)
+    processor = OverflowProcessor(similarity_threshold=threshold, max_cluster_size=max_cluster_size)
+
+    vectorized_samples: List[float] = []
+    reference_samples: List[float] = []
+    clusters: List[List[MemoryItem]] = []
+    expected: List[List[MemoryItem]] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        clusters = processor.cluster(items)
+        vectorized_samples.append((time.perf_counter() - start) * 1000.0)
+
+        start = time.perf_counter()
+        expected = reference_cluster(items, threshold, max_cluster_size)
+        reference_samples.append((time.perf_counter() - start) * 1000.0)
+
+    same = [[item.id for item in c] for c in clusters] == [[item.id for item in c] for c in expected]
+    return {
+        "size": size,
+        "dim": dim,
+        "clusters": len(clusters),
+        "max_cluster": max((len(c) for c in clusters), default=0),
+        "same_as_reference": same,
+        "vectorized_ms": _latency_stats(vectorized_samples),
+        "reference_ms": _latency_stats(reference_samples),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark working-memory overflow clustering")
+    parser.add_argument("--sizes", default="50,100,200,500")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=20)
+    parser.add_argument("--noise", type=float, default=0.35)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.82)
+    parser.add_argument("--max-cluster-size", type=int, default=6)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        result = bench_size(
+            size=size,
+            dim=args.dim,
+            topics=args.topics,
+            noise=args.noise,
+            repeats=max(args.repeats, 1),
+            threshold=args.threshold,
+            max_cluster_size=max(args.max_cluster_size, 1),
+        )
+        results.append(result)
+        if not args.json:
+            print(
+                f"size={size} clusters={result['clusters']} same={result['same_as_reference']} "
+                f"vectorized={result['vectorized_ms']} reference={result['reference_ms']}"
+            )
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,155 @@
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.orchestrator.langgraph_task_runner import LangGraphTaskRunner
+from core.protocols import CriticResult, ExecutorRunResult, PlanItem, PlanResult
+
+
+class _NullTaskManager:
+    def set_plan(self, task_id, plan):
+        pass
+
+    def append_step_result(self, task_id, step_result):
+        pass
+
+    def set_task_snapshot(self, task_id, snapshot):
+        pass
+
+    def set_state(self, task_id, state, error=None):
+        return True
+
+    def set_waiting_input(self, task_id, **kwargs):
+        return True
+
+
+class _SleepExecutor:
+    def __init__(self, latencies: Dict[str, float]):
+        self.latencies = latencies
+
+    def run_task(self, user_text, history, session_id):
+        step_id = user_text.split(":", 1)[1].strip()
+        time.sleep(self.latencies.get(step_id, 0.0))
+        return ExecutorRunResult(output_text=f"{step_id} ok", tool_events=[])
+
+
+class _Planner:
+    def __init__(self, plan: PlanResult):
+        self.plan = plan
+
+    def plan_task(self, user_text, history):
+        return self.plan
+
+
+class _Critic:
+    def review_task(self, user_text, plan_result, execution_graph):
+        return CriticResult(quality="pass", summary="ok")
+
+
+class _WaveRunner(LangGraphTaskRunner):
+    """改造前的批次屏障调度：本批全部完成前不补投新就绪节点（仅作对照）。"""
+
+    def _next_ready_steps(self, snapshot, slots):
+        return []
+
+
+def build_dag(rng: random.Random, steps: int, max_deps: int, slow_ratio: float, fast_ms: float, slow_ms: float):
+    """随机分层 DAG：每个步骤依赖前面至多 max_deps 个步骤；slow_ratio 比例的步骤耗时为 slow_ms，其余为 fast_ms。"""
+    items: List[PlanItem] = []
+    latencies: Dict[str, float] = {}
+    for idx in range(steps):
+        step_id = f"S{idx + 1}"
+        candidates = [f"S{n + 1}" for n in range(max(idx - 4, 0), idx)]
+        depends_on = rng.sample(candidates, k=min(len(candidates), rng.randint(0, max_deps)))
+        items.append(PlanItem(step_id=step_id, title=step_id, instruction=step_id, depends_on=depends_on))
+        slow = rng.random() < slow_ratio
+        latencies[step_id] = (slow_ms if slow else fast_ms * rng.uniform(0.5, 1.5)) / 1000.0
+    return items, latencies
+
+
+def run_once(runner_cls, items: List[PlanItem], latencies: Dict[str, float], parallelism: int) -> float:
+    plan = PlanResult(goal="bench", steps=items, graph_policy={"max_parallelism": parallelism, "fail_fast": False})
+    runner = runner_cls(
+        task_manager=_NullTaskManager(),
+        build_step_input=lambda **kwargs: f"当前步骤: {kwargs['step_id']}",
+    )
+    started = time.perf_counter()
+    runner.run(
+        user_text="bench",
+        history=[],
+        session_id="bench",
+        task_id="bench",
+        planner_agent=_Planner(plan),
+        executor_agent=_SleepExecutor(latencies),
+        critic_agent=_Critic(),
+    )
+    return time.perf_counter() - started
+
+
+def run(dags: int, steps: int, max_deps: int, slow_ratio: float, fast_ms: float, slow_ms: float, parallelism: int, seed: int):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(dags):
+        items, latencies = build_dag(rng, steps, max_deps, slow_ratio, fast_ms, slow_ms)
+        wave = run_once(_WaveRunner, items, latencies, parallelism)
+        event = run_once(LangGraphTaskRunner, items, latencies, parallelism)
+        rows.append({"wave_sec": wave, "event_sec": event, "work_sec": sum(latencies.values())})
+    wave_mean = statistics.mean(r["wave_sec"] for r in rows)
+    event_mean = statistics.mean(r["event_sec"] for r in rows)
+    return {
+        "dags": dags,
+        "steps": steps,
+        "parallelism": parallelism,
+        "slow_ratio": slow_ratio,
+        "work_sec_mean": round(statistics.mean(r["work_sec"] for r in rows), 3),
+        "wave_sec_mean": round(wave_mean, 3),
+        "event_sec_mean": round(event_mean, 3),
+        "speedup": round(wave_mean / event_mean, 3) if event_mean > 0 else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark event-driven step scheduling vs wave barriers")
+    parser.add_argument("--dags", type=int, default=5)
+    parser.add_argument("--steps", type=int, default=12)
+    parser.add_argument("--max-deps", type=int, default=2)
+    parser.add_argument("--slow-ratio", type=float, default=0.2)
+    parser.add_argument("--fast-ms", type=float, default=20.0)
+    parser.add_argument("--slow-ms", type=float, default=200.0)
+    parser.add_argument("--parallelism", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    result = run(
+        dags=max(args.dags, 1),
+        steps=max(args.steps, 1),
+        max_deps=max(args.max_deps, 0),
+        slow_ratio=min(max(args.slow_ratio, 0.0), 1.0),
+        fast_ms=max(args.fast_ms, 0.0),
+        slow_ms=max(args.slow_ms, 0.0),
+        parallelism=max(args.parallelism, 1),
+        seed=args.seed,
+    )
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+    print(
+        f"dags={result['dags']} steps={result['steps']} parallelism={result['parallelism']} "
+        f"work={result['work_sec_mean']}s wave={result['wave_sec_mean']}s "
+        f"event={result['event_sec_mean']}s speedup={result['speedup']}x"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,142 @@
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine.vector_store import QuantizedFlatVectorStore, build_vector_store
+
+
+def make_vectors(size: int, dim: int, clusters: int, seed: int = 7) -> np.ndarray:
+    """
+    带簇结构、方差随维度衰减的合成 embedding。
+
+    方差集中在前几维，近似 Matryoshka 训练的 embedding（前缀维度信息量最大），
+    truncate 与 pca 都能保留主要结构。
+    """
+    rng = np.random.default_rng(seed)
+    spectrum = (np.arange(1, dim + 1, dtype=np.float32) ** -0.6)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32) * spectrum
+    labels = rng.integers(0, clusters, size=size)
+    noise = rng.normal(size=(size, dim)).astype(np.float32) * spectrum * 0.35
+    return (centers[labels] + noise).astype(np.float32)
+
+
+def exact_top_k(data: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    normalized = data / np.linalg.norm(data, axis=1, keepdims=True)
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = q @ normalized.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(int(i) for i in row) for row in top]
+
+
+def bench_config(
+    label: str,
+    data: np.ndarray,
+    queries: np.ndarray,
+    truth: List[set],
+    k: int,
+    backend: str,
+    reduction: str = "none",
+    reduced_dim: int = 0,
+    rescore_multiplier: int = 4,
+) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="lumina-bench-quant-"))
+    dim = data.shape[1]
+    try:
+        options = {}
+        if backend == "flat_q8":
+            options = {"reduction": reduction, "reduced_dim": reduced_dim, "rescore_multiplier": rescore_multiplier}
+        store = build_vector_store(backend, str(workdir), dim, **options)
+        for start in range(0, len(data), 2000):
+            chunk = data[start : start + 2000]
+            store.upsert([(str(start + i), chunk[i], {}) for i in range(len(chunk))])
+        pca = None
+        if isinstance(store, QuantizedFlatVectorStore) and reduction == "pca":
+            pca = store.fit_pca()
+
+        recalls = []
+        latencies = []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            hits = store.query(query, k)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            recalls.append(len({int(memory_id) for memory_id, _ in hits} & expected) / k)
+        footprint = store.footprint()
+        store.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "config": label,
+        "size": len(data),
+        "dim": dim,
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "scan_mb": round(footprint["scan_bytes"] / (1 << 20), 2),
+        "disk_mb": round(footprint["disk_bytes"] / (1 << 20), 2),
+        "avg_query_ms": round(float(np.mean(latencies)), 3),
+        "pca_explained_variance": pca["explained_variance"] if pca else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark recall@k vs footprint for quantized long-term vectors")
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--reduced-dims", default="64,128")
+    parser.add_argument("--rescore-multiplier", type=int, default=4)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    k = max(args.top_k, 1)
+    data = make_vectors(args.size, args.dim, args.clusters)
+    rng = np.random.default_rng(11)
+    picks = rng.integers(0, len(data), size=args.queries)
+    queries = data[picks] + rng.normal(size=(args.queries, args.dim)).astype(np.float32) * 0.05
+    truth = exact_top_k(data, queries, k)
+
+    configs = [("flat", "flat", "none", 0), ("flat_q8", "flat_q8", "none", 0)]
+    for reduced in [int(v) for v in args.reduced_dims.split(",") if v.strip()]:
+        if 0 < reduced < args.dim:
+            configs.append((f"flat_q8+truncate{reduced}", "flat_q8", "truncate", reduced))
+            configs.append((f"flat_q8+pca{reduced}", "flat_q8", "pca", reduced))
+
+    results = [
+        bench_config(
+            label,
+            data,
+            queries,
+            truth,
+            k,
+            backend,
+            reduction=reduction,
+            reduced_dim=reduced_dim,
+            rescore_multiplier=args.rescore_multiplier,
+        )
+        for label, backend, reduction, reduced_dim in configs
+    ]
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+    for result in results:
+        print(
+            f"config={result['config']} recall@{k}={result[f'recall@{k}']} scan_mb={result['scan_mb']} "
+            f"disk_mb={result['disk_mb']} avg_query_ms={result['avg_query_ms']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine.vector_store import VECTOR_BACKENDS, build_vector_store
+
+
+def _latency_stats(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+    ordered = sorted(samples)
+
+    def _pick(percentile: float) -> float:
+        index = int(round((len(ordered) - 1) * percentile))
+        return round(ordered[max(min(index, len(ordered) - 1), 0)], 3)
+
+    return {
+        "count": len(ordered),
+        "avg_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": _pick(0.50),
+        "p95_ms": _pick(0.95),
+    }
+
+
+def bench_backend(
+    backend: str,
+    size: int,
+    dim: int,
+    batch_size: int,
+    single_adds: int,
+    queries: int,
+    top_k: int,
+    seed: int = 7,
+) -> dict:
+    rng = np.random.default_rng(seed)
+    workdir = Path(tempfile.mkdtemp(prefix=f"lumina-bench-{backend}-"))
+    store = build_vector_store(backend, str(workdir), dim)
+    try:
+        # 预填充：按 batch 写入，模拟历史存量。
+        fill_start = time.perf_counter()
+        written = 0
+        while written < size:
+            count = min(batch_size, size - written)
+            vectors = rng.normal(size=(count, dim)).astype(np.float32)
+            store.upsert([(str(uuid.uuid4()), vectors[i], {}) for i in range(count)])
+            written += count
+        fill_sec = time.perf_counter() - fill_start
+
+        # 单条写入：对应 LongTermMemory.add 的一次 upsert。
+        add_samples: List[float] = []
+        for _ in range(single_adds):
+            vector = rng.normal(size=dim).astype(np.float32)
+            start = time.perf_counter()
+            store.upsert([(str(uuid.uuid4()), vector, {})])
+            add_samples.append((time.perf_counter() - start) * 1000.0)
+
+        # 检索：对应 _vector_candidates / find_similar_scores。
+        search_samples: List[float] = []
+        for _ in range(queries):
+            vector = rng.normal(size=dim).astype(np.float32)
+            start = time.perf_counter()
+            store.query(vector, top_k)
+            search_samples.append((time.perf_counter() - start) * 1000.0)
+    finally:
+        store.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "backend": backend,
+        "size": size,
+        "dim": dim,
+        "fill_sec": round(fill_sec, 3),
+        "add_latency_ms": _latency_stats(add_samples),
+        "search_latency_ms": _latency_stats(search_samples),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark long-term memory vector backends")
+    parser.add_argument("--backends", default="flat,hnsw,qdrant", help=f"Comma separated, from {VECTOR_BACKENDS}")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--single-adds", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=40)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    results = []
+    for size in sizes:
+        for backend in backends:
+            try:
+                result = bench_backend(
+                    backend=backend,
+                    size=size,
+                    dim=args.dim,
+                    batch_size=max(args.batch_size, 1),
+                    single_adds=max(args.single_adds, 1),
+                    queries=max(args.queries, 1),
+                    top_k=max(args.top_k, 1),
+                )
+            except Exception as exc:
+                result = {"backend": backend, "size": size, "error": str(exc)}
+            results.append(result)
+            if not args.json:
+                if "error" in result:
+                    print(f"backend={backend} size={size} error={result['error']}")
+                    continue
+                print(
+                    f"backend={backend} size={size} fill_sec={result['fill_sec']} "
+                    f"add={result['add_latency_ms']} search={result['search_latency_ms']}"
+                )
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,68 +1,101 @@
 import argparse
+import json
 import sys
-import time
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from core.config import RETENTION_CATEGORIES
 from core.paths import runtime_root
+from core.utils.retention import RuntimeManifest
 
 
 DEFAULT_RUNTIME = runtime_root()
-TARGET_SUBDIRS = ["sessions", "traces", "tasks", "notes"]
-
-
-def cleanup(runtime_dir: Path, keep_days: int, dry_run: bool = True) -> dict:
-    now = time.time()
-    threshold = now - (keep_days * 86400)
-
-    deleted = []
-    skipped = []
-
-    for sub in TARGET_SUBDIRS:
-        subdir = runtime_dir / sub
-        if not subdir.exists():
-            continue
-
-        for p in subdir.rglob("*"):
-            if not p.is_file():
-                continue
-            mtime = p.stat().st_mtime
-            if mtime < threshold:
-                if dry_run:
-                    skipped.append(str(p))
-                else:
-                    p.unlink(missing_ok=True)
-                    deleted.append(str(p))
+MANIFEST_NAME = "retention_manifest.db"
+
+
+def cleanup(
+    runtime_dir: Path,
+    keep_days: float,
+    dry_run: bool = True,
+    rebuild: bool = False,
+    batch_size: int = 1000,
+) -> dict:
+    """
+    按 runtime 文件清单清理过期文件：只处理 expires_at 已到的条目，不再遍历全部文件。
+
+    清单为空（首次运行）或指定 rebuild 时先全量扫描登记一次。服务运行时写入方会持续登记新文件，
+    开启 retention.enable_scheduler 后同样的清理由服务进程内定期执行。
+    """
+    manifest = RuntimeManifest(
+        runtime_dir / MANIFEST_NAME,
+        keep_seconds={category: keep_days * 86400.0 for category in RETENTION_CATEGORIES},
+    )
+    try:
+        rebuilt = 0
+        if rebuild or manifest.is_empty():
+            rebuilt = manifest.rebuild(runtime_dir, RETENTION_CATEGORIES)
+        manifest.apply_keep_seconds()
+        if dry_run:
+            result = manifest.sweep(dry_run=True, batch_size=max(batch_size, 1) * 100)
+            deleted, candidates = [], result["candidates"]
+            rescheduled, freed = result["rescheduled"], 0
+        else:
+            deleted, rescheduled, freed = [], 0, 0
+            while True:
+                result = manifest.sweep(batch_size=batch_size)
+                deleted.extend(result["deleted"])
+                rescheduled += result["rescheduled"]
+                freed += result["freed_bytes"]
+                progress = len(result["deleted"]) + result["rescheduled"] + result["missing"]
+                if result["scanned"] < batch_size or progress == 0:
+                    break
+            candidates = deleted
+        summary = manifest.summary()
+    finally:
+        manifest.close()
 
     return {
         "keep_days": keep_days,
         "dry_run": dry_run,
+        "rebuilt": rebuilt,
         "deleted_count": len(deleted),
-        "candidates_count": len(skipped) if dry_run else len(deleted),
+        "candidates_count": len(candidates),
+        "rescheduled_count": rescheduled,
+        "freed_bytes": freed,
         "deleted": deleted,
-        "candidates": skipped,
+        "candidates": candidates,
+        "manifest": summary,
     }
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Cleanup old Lumina runtime files")
     parser.add_argument("--runtime-dir", default=str(DEFAULT_RUNTIME))
-    parser.add_argument("--keep-days", type=int, default=7)
+    parser.add_argument("--keep-days", type=float, default=7)
     parser.add_argument("--apply", action="store_true", help="Apply deletion (default is dry-run)")
+    parser.add_argument("--rebuild", action="store_true", help="Rescan runtime directories into the manifest first")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--json", action="store_true")
     args = parser.parse_args()
 
     result = cleanup(
         runtime_dir=Path(args.runtime_dir),
         keep_days=args.keep_days,
         dry_run=(not args.apply),
+        rebuild=args.rebuild,
+        batch_size=args.batch_size,
     )
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
 
     print(
-        f"dry_run={result['dry_run']} keep_days={result['keep_days']} "
-        f"candidates={result['candidates_count']} deleted={result['deleted_count']}"
+        f"dry_run={result['dry_run']} keep_days={result['keep_days']} rebuilt={result['rebuilt']} "
+        f"candidates={result['candidates_count']} deleted={result['deleted_count']} "
+        f"rescheduled={result['rescheduled_count']} freed_bytes={result['freed_bytes']}"
     )
 
     # Print first few files for quick inspection
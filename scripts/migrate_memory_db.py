@@ -0,0 +1,78 @@
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine.schema import (
+    SCHEMA_VERSION,
+    detect_layout,
+    migrate_memories_schema,
+    schema_version,
+    table_columns,
+)
+from core.paths import memory_module_dir
+
+
+DEFAULT_DB = memory_module_dir() / "memory.db"
+
+
+def inspect_db(db_path: Path) -> dict:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        columns = table_columns(conn, "memories")
+        version = detect_layout(columns)
+        layout = f"v{version}" if version else "unknown"
+        rows = conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0] if columns else 0
+        return {
+            "db": str(db_path),
+            "layout": layout,
+            "user_version": schema_version(conn),
+            "target_version": SCHEMA_VERSION,
+            "rows": int(rows),
+        }
+    finally:
+        conn.close()
+
+
+def migrate_db(db_path: Path, batch_size: int = 1000) -> dict:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        conn.execute("PRAGMA busy_timeout=5000")
+        result = migrate_memories_schema(conn, batch_size=batch_size)
+        conn.commit()
+        return {"db": str(db_path), **result}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migrate Lumina long-term memory.db to the current schema")
+    parser.add_argument("--db", default=str(DEFAULT_DB))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--apply", action="store_true", help="Apply migration (default only inspects)")
+    args = parser.parse_args()
+
+    db_path = Path(args.db)
+    if not db_path.exists():
+        print(f"memory db not found: {db_path}")
+        return 1
+
+    if not args.apply:
+        print(json.dumps(inspect_db(db_path), ensure_ascii=False))
+        return 0
+
+    # 迁移期间请先停止服务，避免与在线写连接竞争。
+    print(json.dumps(migrate_db(db_path, batch_size=args.batch_size), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
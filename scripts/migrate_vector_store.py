@@ -0,0 +1,130 @@
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine.vector_store import (
+    VECTOR_BACKENDS,
+    VECTOR_REDUCTIONS,
+    QuantizedFlatVectorStore,
+    build_vector_store,
+)
+from core.paths import memory_module_dir
+
+
+def _memory_ids(db_path: Path) -> list[str]:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return [row[0] for row in conn.execute("SELECT id FROM memories ORDER BY rowid ASC")]
+    finally:
+        conn.close()
+
+
+def migrate_vectors(
+    storage_dir: Path,
+    vector_dim: int,
+    source_backend: str,
+    target_backend: str = "flat_q8",
+    reduction: str = "none",
+    reduced_dim: int = 0,
+    fit_pca: bool = True,
+    batch_size: int = 1000,
+) -> dict:
+    """
+    把 memory.db 中所有记忆的向量从 source 后端复制到 target 后端（id 不变）。
+
+    源索引只读、不删除；确认新后端工作正常后再切换配置并手动清理旧目录。
+    target 为 flat_q8 且 reduction=pca 时，复制完成后从全精度向量拟合投影并重编码。
+    """
+    ids = _memory_ids(storage_dir / "memory.db")
+    source = build_vector_store(source_backend, str(storage_dir), vector_dim)
+    target = build_vector_store(
+        target_backend,
+        str(storage_dir),
+        vector_dim,
+        reduction=reduction,
+        reduced_dim=reduced_dim,
+    )
+    copied = 0
+    missing = 0
+    pca = None
+    try:
+        for start in range(0, len(ids), max(int(batch_size), 1)):
+            points = []
+            for memory_id in ids[start : start + batch_size]:
+                vector = source.get_vector(memory_id)
+                if not vector:
+                    missing += 1
+                    continue
+                points.append((memory_id, vector, {}))
+            target.upsert(points)
+            copied += len(points)
+        if fit_pca and isinstance(target, QuantizedFlatVectorStore) and target.reduction == "pca" and copied:
+            pca = target.fit_pca()
+        target.flush()
+        footprint = target.footprint() if hasattr(target, "footprint") else None
+    finally:
+        source.close()
+        target.close()
+    return {
+        "storage": str(storage_dir),
+        "source_backend": source_backend,
+        "target_backend": target_backend,
+        "reduction": reduction,
+        "reduced_dim": reduced_dim,
+        "memories": len(ids),
+        "copied": copied,
+        "missing_vectors": missing,
+        "pca": pca,
+        "footprint": footprint,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Copy Lumina long-term memory vectors into another index backend")
+    parser.add_argument("--storage", default=str(memory_module_dir()))
+    parser.add_argument("--dim", type=int, required=True, help="Embedding dimension of the stored vectors")
+    parser.add_argument("--from-backend", default="qdrant", choices=VECTOR_BACKENDS)
+    parser.add_argument("--to-backend", default="flat_q8", choices=VECTOR_BACKENDS)
+    parser.add_argument("--reduction", default="none", choices=VECTOR_REDUCTIONS)
+    parser.add_argument("--reduced-dim", type=int, default=0)
+    parser.add_argument("--no-fit-pca", action="store_true", help="Skip fitting the PCA projection after copying")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--apply", action="store_true", help="Apply migration (default only inspects)")
+    args = parser.parse_args()
+
+    storage_dir = Path(args.storage)
+    db_path = storage_dir / "memory.db"
+    if not db_path.exists():
+        print(f"memory db not found: {db_path}")
+        return 1
+    if args.from_backend == args.to_backend and args.to_backend != "flat_q8":
+        print("source and target backend are the same")
+        return 1
+
+    if not args.apply:
+        print(json.dumps({"storage": str(storage_dir), "memories": len(_memory_ids(db_path))}, ensure_ascii=False))
+        return 0
+
+    # 迁移期间请先停止服务，避免与在线写入竞争；完成后把 memory_vector.vector_backend 等配置切到新后端。
+    result = migrate_vectors(
+        storage_dir,
+        vector_dim=args.dim,
+        source_backend=args.from_backend,
+        target_backend=args.to_backend,
+        reduction=args.reduction,
+        reduced_dim=args.reduced_dim,
+        fit_pca=not args.no_fit_pca,
+        batch_size=args.batch_size,
+    )
+    print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
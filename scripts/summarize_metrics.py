@@ -1,5 +1,6 @@
 import argparse
 import json
+import sqlite3
 import sys
 from collections import Counter
 from pathlib import Path
@@ -12,6 +13,31 @@ if str(PROJECT_ROOT) not in sys.path:
 from core.paths import runtime_root, runtime_tasks_dir, runtime_traces_dir
 
 
+def _task_state_counts(task_dir: Path) -> Counter:
+    """任务状态分布：读 tasks.db（只读打开，不触发导入）；尚无数据库时回退统计旧版 JSON 任务文件。"""
+    counter = Counter()
+    db_path = task_dir / "tasks.db"
+    if db_path.exists():
+        try:
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            try:
+                for state, count in conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state"):
+                    counter[state] += int(count)
+            finally:
+                conn.close()
+            return counter
+        except sqlite3.Error:
+            pass
+    for tf in task_dir.glob("*.json") if task_dir.exists() else []:
+        try:
+            with open(tf, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            counter[data.get("state", "unknown")] += 1
+        except Exception:
+            continue
+    return counter
+
+
 def _iter_jsonl(path: Path):
     if not path.exists():
         return
@@ -116,15 +142,8 @@ def summarize(trace_dir: Path, task_dir: Path, event_log_dir: Path) -> dict:
             elif event == "tts.stream.end":
                 tts_durations_ms.append(value)
 
-    task_files = list(task_dir.glob("*.json")) if task_dir.exists() else []
-    task_state_counter = Counter()
-    for tf in task_files:
-        try:
-            with open(tf, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            task_state_counter[data.get("state", "unknown")] += 1
-        except Exception:
-            continue
+    task_state_counter = _task_state_counts(task_dir)
+    task_total = sum(task_state_counter.values())
 
     round_latency = _latency_stats(round_durations_ms)
     avg_round_sec = round(round_latency["avg_ms"] / 1000.0, 3) if round_latency["count"] > 0 else 0.0
@@ -132,7 +151,7 @@ def summarize(trace_dir: Path, task_dir: Path, event_log_dir: Path) -> dict:
     return {
         "trace_files": len(trace_files),
         "event_log_files": len(event_log_files),
-        "task_files": len(task_files),
+        "task_files": task_total,
         "event_counts": dict(event_counter),
         "error_code_counts": dict(error_code_counter),
         "tool_call_counts": dict(tool_counter),
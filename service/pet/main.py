@@ -11,7 +11,8 @@ from typing import Optional
 from flask import Flask
 from flask_sock import Sock
 
-from core.config import load_app_config
+from core.config import RETENTION_CATEGORIES, load_app_config
+from core.paths import runtime_manifest_path, runtime_root
 from core.emotion.main import EmotionEngine
 from core.utils import (
     TraceLogger,
@@ -24,9 +25,11 @@ from core.utils import (
     summarize_text,
 )
 from core.utils.logging_setup import setup_logging
+from core.utils.retention import RetentionScheduler, RuntimeManifest, install_runtime_manifest
 from core.utils.errors import ErrorCode, error_payload
 from core.llm.main import TranslateEngine
 from core.orchestrator import Orchestrator
+from core.orchestrator.step_pool import StepPool, install_step_pool
 from core.tts.main import TTSEngine, TTSRequest
 from service.pet.pipeline import AudioChunk, EmotionContext, OrderedSentenceMap, SentenceSlot
 from service.pet.ws_contract import parse_user_text
@@ -44,6 +47,9 @@ logger = logging.getLogger(__name__)
 logging.getLogger("werkzeug").setLevel(logging.WARNING)
 
 # --- engines ---
+# 任务步骤共享执行池：所有会话的任务步骤都在这里排队，按任务公平轮转。
+step_pool = StepPool(app_config.task_flow.step_pool_workers)
+install_step_pool(step_pool)
 orchestrator = Orchestrator()
 translator: Optional[TranslateEngine] = TranslateEngine() if ENABLE_TRANSLATION else None
 tts: Optional[TTSEngine] = TTSEngine() if ENABLE_TTS else None
@@ -487,7 +493,12 @@ def handle_bot_reply(ws, user_text: str, session_id: str, trace: TraceLogger, ro
 def websocket_handler(ws):
     session_id = f"ws-{uuid.uuid4().hex[:10]}"
     with bind_log_context(session_id=session_id):
-        trace = TraceLogger(session_id=session_id)
+        trace = TraceLogger(
+            session_id=session_id,
+            max_bytes=app_config.logging.rotate_max_bytes,
+            max_age_seconds=app_config.logging.rotate_max_age_hours * 3600.0,
+            compress_rotated=app_config.logging.compress_rotated,
+        )
         trace.log("session_start", {"session_id": session_id})
         log_event(
             logger,
@@ -558,7 +569,36 @@ def websocket_handler(ws):
             )
 
 
+retention_manifest: Optional[RuntimeManifest] = None
+retention_scheduler: Optional[RetentionScheduler] = None
+
+
+def start_retention():
+    """安装 runtime 文件清单（写入方据此登记文件）；retention.enable_scheduler 时启动后台清理。"""
+    global retention_manifest, retention_scheduler
+    retention_cfg = app_config.retention
+    retention_manifest = RuntimeManifest(
+        runtime_manifest_path(),
+        keep_seconds={category: days * 86400.0 for category, days in retention_cfg.keep_days.items()},
+    )
+    install_runtime_manifest(retention_manifest)
+    if retention_cfg.enable_scheduler:
+        retention_scheduler = RetentionScheduler(
+            retention_manifest,
+            runtime_dir=runtime_root(),
+            categories=RETENTION_CATEGORIES,
+            interval_seconds=retention_cfg.sweep_interval_seconds,
+            batch_size=retention_cfg.sweep_batch_size,
+        )
+        retention_scheduler.start()
+
+
 def shutdown_runtime():
+    if retention_scheduler is not None:
+        retention_scheduler.close()
+    if retention_manifest is not None:
+        install_runtime_manifest(None)
+        retention_manifest.close()
     try:
         orchestrator.close()
     except Exception:
@@ -567,6 +607,15 @@ def shutdown_runtime():
             "runtime.shutdown.orchestrator.error",
             "Orchestrator 关闭失败",
         )
+    try:
+        install_step_pool(None)
+        step_pool.close(wait=False)
+    except Exception:
+        log_exception(
+            logger,
+            "runtime.shutdown.step_pool.error",
+            "步骤执行池关闭失败",
+        )
     try:
         executor.shutdown(wait=False, cancel_futures=True)
     except Exception:
@@ -589,6 +638,7 @@ def run_pet():
         enable_tts=ENABLE_TTS,
     )
     try:
+        start_retention()
         app.run(host=server_ip, port=server_port, threaded=True)
     finally:
         shutdown_runtime()
@@ -0,0 +1,164 @@
+import os
+import shutil
+import sqlite3
+import sys
+import unittest
+import uuid
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+for path in (PROJECT_ROOT, SCRIPTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from backup_runtime import (
+    ChunkStore,
+    backup_incremental,
+    backup_runtime,
+    prune_snapshots,
+    restore_snapshot,
+    verify_snapshot,
+)
+
+CHUNK = 4096
+
+
+class BackupRuntimeTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = PROJECT_ROOT / "runtime" / f"lumina-test-backup-{uuid.uuid4().hex[:8]}"
+        self.runtime_dir = self.temp_dir / "runtime"
+        self.backup_dir = self.temp_dir / "backups"
+        (self.runtime_dir / "traces").mkdir(parents=True, exist_ok=True)
+        self._dbs = []
+
+    def tearDown(self):
+        for db in self._dbs:
+            db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _open_wal_db(self) -> sqlite3.Connection:
+        path = self.runtime_dir / "memory" / "memory.db"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(path))
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA wal_autocheckpoint=0")
+        db.execute("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, body TEXT)")
+        self._dbs.append(db)
+        return db
+
+    def test_unchanged_content_is_deduplicated_across_snapshots(self):
+        trace = self.runtime_dir / "traces" / "trace-a.jsonl"
+        trace.write_bytes(os.urandom(CHUNK * 3))
+        (self.runtime_dir / "traces" / "copy.jsonl").write_bytes(trace.read_bytes())
+
+        first = backup_incremental(self.runtime_dir, self.backup_dir, chunk_size=CHUNK)
+        self.assertEqual(first["stats"]["files"], 2)
+        # 两个文件内容相同，块只存一份。
+        self.assertEqual(first["stats"]["new_chunks"], 3)
+
+        second = backup_incremental(self.runtime_dir, self.backup_dir, chunk_size=CHUNK)
+        self.assertEqual(second["stats"]["reused_files"], 2)
+        self.assertEqual(second["stats"]["new_chunks"], 0)
+
+        with open(trace, "ab") as f:
+            f.write(b"appended\n")
+        third = backup_incremental(self.runtime_dir, self.backup_dir, chunk_size=CHUNK)
+        self.assertEqual(third["stats"]["new_chunks"], 1)
+        self.assertEqual(third["parent"], second["snapshot_id"])
+        self.assertEqual(len(ChunkStore(self.backup_dir).snapshot_ids()), 3)
+
+    def test_sqlite_is_copied_consistently_with_uncheckpointed_wal(self):
+        db = self._open_wal_db()
+        with db:
+            db.executemany("INSERT INTO items(body) VALUES (?)", [(f"row-{i}",) for i in range(50)])
+        self.assertTrue((self.runtime_dir / "memory" / "memory.db-wal").exists())
+
+        manifest = backup_incremental(self.runtime_dir, self.backup_dir, chunk_size=CHUNK)
+        self.assertIn("memory/memory.db", manifest["files"])
+        self.assertNotIn("memory/memory.db-wal", manifest["files"])
+        self.assertEqual(manifest["stats"]["sqlite_files"], 1)
+
+        target = self.temp_dir / "restored"
+        result = restore_snapshot(self.backup_dir, target)
+        self.assertTrue(result["ok"], result["errors"])
+        restored = sqlite3.connect(str(target / "memory" / "memory.db"))
+        try:
+            self.assertEqual(restored.execute("SELECT COUNT(*) FROM items").fetchone()[0], 50)
+        finally:
+            restored.close()
+
+    def test_restore_verifies_and_reports_corrupt_chunks(self):
+        note = self.runtime_dir / "notes" / "n.md"
+        note.parent.mkdir(parents=True, exist_ok=True)
+        note.write_text("hello\n" * 2000, encoding="utf-8")
+        manifest = backup_incremental(self.runtime_dir, self.backup_dir, chunk_size=CHUNK)
+        self.assertTrue(verify_snapshot(self.backup_dir, "latest")["ok"])
+
+        target = self.temp_dir / "restored"
+        self.assertTrue(restore_snapshot(self.backup_dir, target)["ok"])
+        self.assertEqual((target / "notes" / "n.md").read_bytes(), note.read_bytes())
+        with self.assertRaises(FileExistsError):
+            restore_snapshot(self.backup_dir, target)
+
+        store = ChunkStore(self.backup_dir)
+        digest = manifest["files"]["notes/n.md"]["chunks"][0]
+        store.chunk_path(digest).write_bytes(store.chunk_path(manifest["files"]["notes/n.md"]["chunks"][-1]).read_bytes())
+        report = verify_snapshot(self.backup_dir, manifest["snapshot_id"])
+        self.assertFalse(report["ok"])
+        self.assertEqual(report["errors"][0]["path"], "notes/n.md")
+
+        result = restore_snapshot(self.backup_dir, self.temp_dir / "restored-2")
+        self.assertFalse(result["ok"])
+        self.assertFalse((self.temp_dir / "restored-2" / "notes" / "n.md").exists())
+
+    def test_prune_removes_unreferenced_chunks(self):
+        trace = self.runtime_dir / "traces" / "t.jsonl"
+        trace.write_bytes(os.urandom(CHUNK))
+        backup_incremental(self.runtime_dir, self.backup_dir, chunk_size=CHUNK)
+        trace.write_bytes(os.urandom(CHUNK))
+        os.utime(trace, ns=(1, 1))
+        latest = backup_incremental(self.runtime_dir, self.backup_dir, chunk_size=CHUNK)
+
+        result = prune_snapshots(self.backup_dir, keep_last=1)
+        self.assertEqual(len(result["removed"]), 1)
+        self.assertEqual(result["freed_chunks"], 1)
+        self.assertTrue(verify_snapshot(self.backup_dir, latest["snapshot_id"])["ok"])
+
+    def test_snapshots_within_one_second_keep_creation_order(self):
+        trace = self.runtime_dir / "traces" / "t.jsonl"
+        frozen = mock.Mock(wraps=datetime)
+        frozen.utcnow.return_value = datetime(2026, 1, 1, 12, 0, 0)
+        created = []
+        with mock.patch("backup_runtime.datetime", frozen):
+            for n in range(12):
+                trace.write_bytes(os.urandom(CHUNK))
+                os.utime(trace, ns=(n + 1, n + 1))
+                created.append(backup_incremental(self.runtime_dir, self.backup_dir, chunk_size=CHUNK))
+
+        store = ChunkStore(self.backup_dir)
+        ids = [item["snapshot_id"] for item in created]
+        self.assertEqual(store.snapshot_ids(), ids)
+        self.assertEqual(store.resolve("latest"), ids[-1])
+        self.assertEqual(store.load_manifest(ids[-1])["parent"], ids[-2])
+
+        result = prune_snapshots(self.backup_dir, keep_last=2)
+        self.assertEqual(result["removed"], ids[:-2])
+        self.assertTrue(verify_snapshot(self.backup_dir, ids[-1])["ok"])
+
+    def test_full_zip_skips_wal_sidecars(self):
+        db = self._open_wal_db()
+        with db:
+            db.execute("INSERT INTO items(body) VALUES ('x')")
+        archive = backup_runtime(self.runtime_dir, self.backup_dir)
+        with zipfile.ZipFile(archive) as zf:
+            names = zf.namelist()
+        self.assertIn("memory/memory.db", names)
+        self.assertFalse(any(name.endswith(("-wal", "-shm")) for name in names))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import sys
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine.consolidation_scheduler import ConsolidationScheduler, LoadMonitor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _step(processed=8, wrapped=False, **changes):
+    return {"processed": processed, "cursor_wrapped": wrapped, "elapsed_ms": 3, **changes}
+
+
+class ConsolidationSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.monitor = LoadMonitor(window_seconds=10, clock=self.clock)
+        self.scheduler = ConsolidationScheduler(
+            self.monitor,
+            tick_seconds=3,
+            batch_size=64,
+            time_budget_ms=250,
+            backoff_qps=5,
+            backoff_lock_wait_ms=20,
+            idle_qps=0.2,
+            max_backoff_seconds=20,
+            max_defer_seconds=60,
+            catchup_multiplier=4,
+            idle_rescan_seconds=600,
+            clock=self.clock,
+        )
+
+    def test_backs_off_under_load_then_forces_a_run_after_max_defer(self):
+        self.monitor.record_op(100)
+        intervals = [self.scheduler.decide(generation=1) for _ in range(4)]
+        self.assertEqual([d.action for d in intervals], ["backoff"] * 4)
+        self.assertEqual([d.next_interval for d in intervals], [6, 12, 20, 20])
+
+        self.clock.now += 61
+        self.monitor.record_lock_wait(50)
+        forced = self.scheduler.decide(generation=1)
+        self.assertEqual((forced.action, forced.batch_size), ("run", 64))
+        self.assertEqual(self.scheduler.stats()["forced"], 1)
+
+        # 负载消退后恢复基础 tick，并以放大批量追赶。
+        self.clock.now += 30
+        catchup = self.scheduler.decide(generation=1)
+        self.assertEqual((catchup.action, catchup.batch_size, catchup.time_budget_ms), ("catchup", 256, 1000))
+        self.assertEqual(catchup.next_interval, 3)
+
+    def test_moderate_load_runs_base_batch(self):
+        self.monitor.record_op(20)
+        decision = self.scheduler.decide(generation=1)
+        self.assertEqual((decision.action, decision.batch_size, decision.time_budget_ms), ("run", 64, 250))
+
+    def test_skips_after_clean_pass_until_generation_changes(self):
+        self.scheduler.decide(generation=1)
+        self.scheduler.observe_step(_step(dedupe_merged=1), generation=2)
+        self.scheduler.decide(generation=2)
+        # 回绕时上一轮有合并，不能静默。
+        self.scheduler.observe_step(_step(wrapped=True, reinforced=3), generation=3)
+        self.assertFalse(self.scheduler.stats()["quiescent"])
+        self.scheduler.decide(generation=3)
+        self.scheduler.observe_step(_step(reinforced=2), generation=4)
+        self.scheduler.decide(generation=4)
+        self.scheduler.observe_step(_step(wrapped=True), generation=5)
+        self.assertTrue(self.scheduler.stats()["quiescent"])
+
+        self.assertEqual(self.scheduler.decide(generation=5).action, "skip_idle")
+        self.assertEqual(self.scheduler.decide(generation=6).action, "catchup")
+
+        # 静默期超过 idle_rescan_seconds 后也会重新扫描。
+        self.scheduler.observe_step(_step(wrapped=True), generation=7)
+        self.scheduler.observe_step(_step(wrapped=True), generation=7)
+        self.assertEqual(self.scheduler.decide(generation=7).action, "skip_idle")
+        self.clock.now += 601
+        self.assertEqual(self.scheduler.decide(generation=7).action, "catchup")
+        self.assertEqual(self.scheduler.stats()["skip_idle"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import shutil
+import sys
+import unittest
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine.embedding import OpenAIEmbedding
+from core.memory.memory_module_engine.embedding_cache import PersistentEmbeddingCache
+
+
+class _FakeEmbeddingsAPI:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, input, dimensions):
+        self.calls += 1
+        vector = [float((ord(ch) % 7) + 1) for ch in str(input)[:dimensions]]
+        vector.extend([0.5] * (dimensions - len(vector)))
+        return SimpleNamespace(data=[SimpleNamespace(embedding=vector)])
+
+
+class PersistentEmbeddingCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = PROJECT_ROOT / "runtime" / f"lumina-test-embcache-{uuid.uuid4().hex[:8]}"
+        self.db_path = str(self.temp_dir / "embedding_cache.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _build_embedder(self, cache: PersistentEmbeddingCache) -> OpenAIEmbedding:
+        embedder = OpenAIEmbedding(
+            api_key="sk-test",
+            model="fake-embed",
+            dimensions=8,
+            persistent_cache=cache,
+        )
+        api = _FakeEmbeddingsAPI()
+        embedder.client = SimpleNamespace(embeddings=api)
+        return embedder
+
+    def test_cache_survives_restart(self):
+        first = self._build_embedder(PersistentEmbeddingCache(self.db_path))
+        vector = first.encode("我喜欢博物馆")
+        self.assertEqual(first.client.embeddings.calls, 1)
+        first.close()
+
+        second = self._build_embedder(PersistentEmbeddingCache(self.db_path))
+        cached = second.encode("我喜欢博物馆")
+        self.assertEqual(second.client.embeddings.calls, 0)
+        self.assertEqual(cached, vector)
+
+        second.encode("我喜欢博物馆")
+        stats = second.cache_stats()
+        self.assertEqual(stats["disk_hits"], 1)
+        self.assertEqual(stats["memory_hits"], 1)
+        self.assertEqual(stats["disk"]["hits"], 1)
+        second.close()
+
+    def test_api_memory_and_disk_results_share_float32_precision(self):
+        first = self._build_embedder(PersistentEmbeddingCache(self.db_path))
+        raw = [0.1, 0.2, 1.0 / 3.0, 0.7, 1e-8, 0.3, 2.0 / 3.0, 0.9]
+        first.client.embeddings.create = lambda model, input, dimensions: SimpleNamespace(
+            data=[SimpleNamespace(embedding=list(raw))]
+        )
+        from_api = first.encode("精度")
+        from_memory = first.encode("精度")
+        first.close()
+
+        second = self._build_embedder(PersistentEmbeddingCache(self.db_path))
+        from_disk = second.encode("精度")
+        self.assertEqual(second.client.embeddings.calls, 0)
+        self.assertEqual(from_api, from_memory)
+        self.assertEqual(from_api, from_disk)
+        self.assertNotEqual(from_api, raw)
+        self.assertEqual(from_api, [float(np.float32(value)) for value in raw])
+        second.close()
+
+    def test_size_cap_evicts_least_recently_used(self):
+        cache = PersistentEmbeddingCache(self.db_path, max_entries=4, evict_ratio=0.0)
+        keys = [PersistentEmbeddingCache.make_key("m", 4, f"text-{i}") for i in range(5)]
+        for key in keys[:4]:
+            cache.put(key, [1.0, 2.0, 3.0, 4.0])
+        # 访问最早写入的条目，使其成为最近使用。
+        self.assertIsNotNone(cache.get(keys[0]))
+        cache.put(keys[4], [1.0, 2.0, 3.0, 4.0])
+
+        self.assertEqual(len(cache), 4)
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
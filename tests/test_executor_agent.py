@@ -1,5 +1,7 @@
 import json
 import sys
+import threading
+import time
 import unittest
 from pathlib import Path
 
@@ -8,7 +10,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from core.agentic.executor_agent import ExecutorAgent
-from core.tools import ToolResult
+from core.tools import BaseTool, ToolContext, ToolRegistry, ToolResult
 from core.utils.errors import ErrorCode
 
 
@@ -101,6 +103,46 @@ class _FakeToolRegistry:
         return ToolResult(ok=True, content=f"{name}:{json.dumps(args, ensure_ascii=False, sort_keys=True)}")
 
 
+class _TimedToolRegistry(_FakeToolRegistry):
+    def __init__(self, delays, serial_tools=()):
+        super().__init__(tool_names=["web_search", "write_markdown"])
+        # 按参数 key（其次按工具名）查找模拟耗时。
+        self.delays = dict(delays)
+        self.serial_tools = set(serial_tools)
+        self.spans = {}
+
+    def is_parallel_safe(self, name):
+        return name not in self.serial_tools
+
+    def call(self, name, args, ctx):
+        started = time.perf_counter()
+        time.sleep(self.delays.get(args.get("key"), self.delays.get(name, 0.0)))
+        self.spans[args.get("key", name)] = (started, time.perf_counter())
+        return super().call(name, args, ctx)
+
+
+class _CountingTool(BaseTool):
+    def __init__(self, max_concurrency):
+        super().__init__(
+            name="counting",
+            description="count concurrent calls",
+            parameters_schema={"type": "object", "properties": {}, "required": []},
+            max_concurrency=max_concurrency,
+        )
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def run(self, *, ctx, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return ToolResult(ok=True, content="ok")
+
+
 class _ExecutorAgentHarness(ExecutorAgent):
     def __init__(
         self,
@@ -313,5 +355,64 @@ class ExecutorAgentReactLoopTests(unittest.TestCase):
         self.assertIn("缺少可用工具", result.output_text)
 
 
+class ExecutorAgentParallelToolTests(unittest.TestCase):
+    def _agent(self, registry, tool_calls):
+        agent = _ExecutorAgentHarness(
+            scripted_messages=[
+                _FakeMessage(tool_calls=tool_calls),
+                _FakeMessage(content=_executor_json("success", "完成")),
+            ],
+        )
+        agent.registry = registry
+        return agent
+
+    def test_independent_tool_calls_overlap_and_keep_call_order(self):
+        # 前面的调用更慢，完成顺序与调用顺序相反。
+        registry = _TimedToolRegistry({"q1": 0.3, "q2": 0.2, "q3": 0.1})
+        calls = [_FakeToolCall(f"c{i}", "web_search", json.dumps({"key": f"q{i}"})) for i in (1, 2, 3)]
+        agent = self._agent(registry, calls)
+
+        started = time.perf_counter()
+        result = agent.run_task(user_text="test", history=[], session_id="s1")
+        elapsed = time.perf_counter() - started
+
+        self.assertIsNone(result.error)
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual([event["args"]["key"] for event in result.tool_events], ["q1", "q2", "q3"])
+        tool_messages = [m for m in agent.invocations[1]["messages"] if m.get("role") == "tool"]
+        self.assertEqual([m["tool_call_id"] for m in tool_messages], ["c1", "c2", "c3"])
+
+    def test_non_parallel_safe_tool_acts_as_barrier(self):
+        registry = _TimedToolRegistry({"web_search": 0.1, "write_markdown": 0.05}, serial_tools={"write_markdown"})
+        calls = [
+            _FakeToolCall("c1", "web_search", '{"key": "a"}'),
+            _FakeToolCall("c2", "web_search", '{"key": "b"}'),
+            _FakeToolCall("c3", "write_markdown", '{"key": "w"}'),
+            _FakeToolCall("c4", "web_search", '{"key": "c"}'),
+        ]
+        agent = self._agent(registry, calls)
+        result = agent.run_task(user_text="test", history=[], session_id="s1")
+
+        self.assertIsNone(result.error)
+        spans = registry.spans
+        self.assertLess(abs(spans["a"][0] - spans["b"][0]), 0.05)
+        self.assertGreaterEqual(spans["w"][0], max(spans["a"][1], spans["b"][1]))
+        self.assertGreaterEqual(spans["c"][0], spans["w"][1])
+
+    def test_registry_enforces_per_tool_concurrency_limit(self):
+        registry = ToolRegistry()
+        tool = _CountingTool(max_concurrency=2)
+        registry.register(tool)
+        threads = [
+            threading.Thread(target=registry.call, args=("counting", {}, ToolContext(session_id="s1")))
+            for _ in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(tool.peak, 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,66 @@
+import sys
+import threading
+import unittest
+import uuid
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine.group_commit import GroupCommitWriter
+from core.memory.memory_module_engine.models import MemoryItem, MemoryMetadata
+
+
+def _item(content: str) -> MemoryItem:
+    return MemoryItem(
+        id=str(uuid.uuid4()),
+        content=content,
+        importance=0.8,
+        embedding=None,
+        metadata=MemoryMetadata(),
+    )
+
+
+class GroupCommitWriterTests(unittest.TestCase):
+    def test_concurrent_submissions_are_coalesced(self):
+        batches = []
+        writer = GroupCommitWriter(
+            lambda items: batches.append([item.content for item in items]),
+            max_delay_ms=50,
+            max_items=8,
+        )
+        barrier = threading.Barrier(8)
+        results = {}
+
+        def submit(idx):
+            barrier.wait()
+            results[idx] = writer.write([_item(f"m{idx}")], timeout=5)
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        writer.close()
+
+        self.assertEqual(len(results), 8)
+        self.assertLess(len(batches), 8)
+        self.assertEqual(sorted(c for batch in batches for c in batch), sorted(f"m{i}" for i in range(8)))
+
+    def test_failed_batch_is_retried_per_submission(self):
+        def write_fn(items):
+            if any(item.content == "bad" for item in items):
+                raise ValueError("bad item")
+
+        writer = GroupCommitWriter(write_fn, max_delay_ms=50, max_items=100)
+        good = writer.submit([_item("good")])
+        bad = writer.submit([_item("bad")])
+        self.assertEqual(len(good.result(timeout=5)), 1)
+        with self.assertRaises(ValueError):
+            bad.result(timeout=5)
+        writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import sys
+import threading
+import time
+import unittest
+import uuid
+from pathlib import Path
+from unittest.mock import patch
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine.models import MemoryItem, MemoryMetadata
+from core.memory.memory_module_engine.overflow_processor import OverflowProcessor
+from core.memory.memory_module_engine.signal_extractor import SignalExtractor
+
+
+def _signals(index: int, importance: float) -> dict:
+    return {
+        "index": index,
+        "explicit_remember": True,
+        "future_use": False,
+        "emotion_intensity": 0.1,
+        "temporal_urgency": 0.2,
+        "information_density": 0.7,
+        "importance_hint": importance,
+        "confidence": 0.9,
+        "user_rating": None,
+    }
+
+
+class SignalExtractorBatchingTests(unittest.TestCase):
+    def test_concurrent_extracts_share_one_call_and_map_back_by_index(self):
+        calls = []
+
+        def fake_chat_json(**kwargs):
+            calls.append(kwargs["user_prompt"])
+            # 乱序返回，且故意漏掉第 2 条。
+            return {"items": [_signals(3, 0.3), _signals(1, 0.1), _signals(4, 0.4)]}
+
+        extractor = SignalExtractor(
+            llm_enabled=True,
+            llm_api_key="test-key",
+            batch_max_size=8,
+            batch_max_delay_ms=200,
+        )
+        try:
+            with patch("core.memory.memory_module_engine.signal_extractor.chat_json", side_effect=fake_chat_json):
+                results = extractor.extract_many(["甲", "乙", "丙", "丁"])
+        finally:
+            extractor.close()
+
+        self.assertEqual(len(calls), 1)
+        self.assertIn("1. 甲", calls[0])
+        self.assertIn("4. 丁", calls[0])
+        self.assertEqual(
+            [r.metadata.llm_importance_hint for r in results],
+            [0.1, 0.45, 0.3, 0.4],
+        )
+        # 漏掉的一条回退中性低置信元数据。
+        self.assertEqual(results[1].metadata.confidence, 0.35)
+        self.assertTrue(results[0].metadata.explicit_remember)
+
+    def test_threads_coalesce_and_timeouts_fall_back_to_neutral(self):
+        calls = []
+
+        def slow_chat_json(**kwargs):
+            calls.append(kwargs["user_prompt"])
+            time.sleep(0.3)
+            return {"items": [_signals(1, 0.9)]}
+
+        extractor = SignalExtractor(
+            llm_enabled=True,
+            llm_api_key="test-key",
+            batch_max_delay_ms=20,
+            batch_wait_seconds=0.15,
+        )
+        results = []
+        try:
+            with patch("core.memory.memory_module_engine.signal_extractor.chat_json", side_effect=slow_chat_json):
+                threads = [
+                    threading.Thread(target=lambda text=text: results.append(extractor.extract(text)))
+                    for text in ("a", "b", "c")
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                stats = extractor.batcher_stats()
+        finally:
+            extractor.close()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r.metadata.confidence for r in results], [0.35, 0.35, 0.35])
+        self.assertEqual(stats["timeouts"], 3)
+
+    def test_disabled_llm_never_starts_a_batcher(self):
+        extractor = SignalExtractor(llm_enabled=False)
+        self.assertIsNone(extractor.batcher_stats())
+        self.assertEqual(extractor.extract("随便聊聊").metadata.confidence, 0.35)
+
+
+class OverflowSummaryBatchingTests(unittest.TestCase):
+    def test_clusters_are_summarized_in_one_call(self):
+        def _item(content):
+            return MemoryItem(
+                id=str(uuid.uuid4()),
+                content=content,
+                importance=0.5,
+                embedding=None,
+                metadata=MemoryMetadata(store="working"),
+            )
+
+        clusters = [[_item("用户喜欢博物馆"), _item("用户周末去博物馆")], [_item("下周交周报")], [_item("喜欢猫")]]
+        calls = []
+
+        def fake_chat_json(**kwargs):
+            calls.append(kwargs["user_prompt"])
+            return {"items": [{"index": 2, "summary": "用户下周需提交周报。"}, {"index": 1, "summary": "用户常去博物馆。"}]}
+
+        processor = OverflowProcessor(llm_enabled=True, llm_api_key="test-key", batch_max_delay_ms=50)
+        try:
+            with patch("core.memory.memory_module_engine.overflow_processor.chat_json", side_effect=fake_chat_json):
+                summaries = processor.build_summaries(clusters)
+        finally:
+            processor.close()
+
+        self.assertEqual(len(calls), 1)
+        self.assertIn("[组 3]", calls[0])
+        self.assertEqual(
+            [s.content for s in summaries],
+            ["用户常去博物馆。", "用户下周需提交周报。", "1. 喜欢猫"],
+        )
+        self.assertEqual(summaries[0].metadata.repeat_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,279 @@
+import json
+import shutil
+import sqlite3
+import sys
+import threading
+import unittest
+import uuid
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine.long_term import LongTermMemory
+from core.memory.memory_module_engine.models import MemoryItem, MemoryMetadata
+from core.memory.memory_module_engine.schema import SCHEMA_VERSION, schema_version
+
+
+def _make_item(content: str, importance: float = 0.6, **metadata) -> MemoryItem:
+    return MemoryItem(
+        id=str(uuid.uuid4()),
+        content=content,
+        importance=importance,
+        embedding=None,
+        metadata=MemoryMetadata(**metadata),
+    )
+
+
+class LongTermMemoryTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = PROJECT_ROOT / "runtime" / f"lumina-test-longterm-{uuid.uuid4().hex[:8]}"
+        self.long_term = LongTermMemory(str(self.temp_dir), vector_dim=8, vector_backend="flat")
+
+    def tearDown(self):
+        try:
+            self.long_term.close()
+        except Exception:
+            pass
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _reopen(self):
+        self.long_term.close()
+        self.long_term = LongTermMemory(str(self.temp_dir), vector_dim=8, vector_backend="flat")
+
+    def _fts_ids(self, query: str) -> set:
+        return set(self.long_term._keyword_candidates(query, limit=20).keys())
+
+    def test_fts_follows_add_update_delete_via_triggers(self):
+        item = _make_item("用户喜欢博物馆")
+        self.long_term.add(item)
+        self.assertIn(item.id, self._fts_ids("用户喜欢博物馆"))
+
+        item.content = "用户喜欢 museum"
+        self.long_term.update_item(item)
+        self.assertIn(item.id, self._fts_ids("museum"))
+        self.assertNotIn(item.id, self._fts_ids("用户喜欢博物馆"))
+
+        # 重复 add 同一 id 不应残留旧 FTS 行。
+        item.content = "用户喜欢 gallery"
+        self.long_term.add(item)
+        self.assertIn(item.id, self._fts_ids("gallery"))
+        self.assertNotIn(item.id, self._fts_ids("museum"))
+
+        self.long_term.delete(item.id)
+        self.assertEqual(self._fts_ids("gallery"), set())
+        self.assertFalse(self.long_term.check_fts_consistency(repair=False)["drift"])
+
+    def test_startup_skips_rebuild_when_in_sync_and_repairs_drift(self):
+        self.long_term.add(_make_item("alpha note"))
+        self.long_term.add(_make_item("beta note"))
+        self._reopen()
+        self.assertFalse(self.long_term.check_fts_consistency(repair=False)["drift"])
+
+        # 模拟绕过触发器的外部写入，造成 FTS 漂移。
+        db_path = self.temp_dir / "memory.db"
+        self.long_term.close()
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("DROP TRIGGER memories_fts_ai")
+        conn.execute(
+            "INSERT INTO memories(id, content, importance, recall_count, metadata, created_at, updated_at) "
+            "VALUES ('external', 'gamma note', 0.5, 0, '{}', 0, 0)"
+        )
+        conn.commit()
+        conn.close()
+
+        self.long_term = LongTermMemory(str(self.temp_dir), vector_dim=8, vector_backend="flat")
+        self.assertIn("external", self._fts_ids("gamma"))
+        self.assertFalse(self.long_term.check_fts_consistency(repair=False)["drift"])
+
+    def test_archived_filter_and_typed_columns(self):
+        active = _make_item("profile: 喜欢清淡饮食", importance=0.7, confidence=0.8)
+        archived = _make_item("profile: 喜欢辣", importance=0.7, state="archived")
+        self.long_term.add(active)
+        self.long_term.add(archived)
+
+        ids = {item.id for item in self.long_term.get_all()}
+        self.assertEqual(ids, {active.id})
+        self.assertEqual(len(self.long_term.get_all(include_archived=True)), 2)
+
+        row = self.long_term._write_db.execute(
+            "SELECT state, memory_type, confidence, metadata FROM memories WHERE id = ?",
+            (active.id,),
+        ).fetchone()
+        self.assertEqual(row["memory_type"], "profile")
+        self.assertAlmostEqual(row["confidence"], 0.8)
+        self.assertNotIn("state", json.loads(row["metadata"]))
+
+        self.long_term.mark_access_counts({active.id: 2, archived.id: 1})
+        loaded = self.long_term.get_by_id(active.id)
+        self.assertEqual(loaded.recall_count, 2)
+        self.assertAlmostEqual(loaded.metadata.confidence, 0.8)
+
+    def test_update_item_recomputes_memory_type(self):
+        item = _make_item("profile: 喜欢博物馆", importance=0.7)
+        self.long_term.add(item)
+        item.content = "commitment: 周五前提交周报"
+        self.long_term.update_item(item)
+
+        row = self.long_term._write_db.execute(
+            "SELECT memory_type FROM memories WHERE id = ?",
+            (item.id,),
+        ).fetchone()
+        self.assertEqual(row["memory_type"], "commitment")
+        stats = self.long_term.get_stats()
+        self.assertEqual(stats["by_type"], {"commitment": 1})
+
+    def test_stats_counters_follow_writes_and_match_rebuild(self):
+        first = _make_item("profile: 喜欢博物馆", importance=0.75)
+        second = _make_item("commitment: 提交周报", importance=0.32)
+        third = _make_item("周末去爬山", importance=0.55, created_at=1.0)
+        for item in (first, second, third):
+            self.long_term.add(item)
+
+        first.importance = 0.95
+        first.metadata.state = "compressed"
+        self.long_term.update_item(first)
+        self.long_term.add(second)
+        self.long_term.delete(third.id)
+
+        stats = self.long_term.get_stats()
+        self.assertEqual(stats["total"], 2)
+        self.assertEqual(stats["by_state"], {"active": 1, "compressed": 1})
+        self.assertEqual(stats["by_type"], {"commitment": 1, "profile": 1})
+        self.assertEqual(stats["by_store"], {"long_term": 2})
+        self.assertAlmostEqual(stats["avg_importance"], (0.95 + 0.32) / 2)
+        self.assertEqual(stats["importance_histogram"]["0.9-1.0"], 1)
+        self.assertEqual(stats["importance_histogram"]["0.3-0.4"], 1)
+        self.assertEqual(stats["importance_histogram"]["0.5-0.6"], 0)
+        self.assertEqual(stats["age_histogram"]["<1d"], 2)
+        self.assertEqual(sum(stats["age_histogram"].values()), 2)
+
+        self.assertEqual(self.long_term.rebuild_stats(), stats)
+
+    def test_lsh_candidates_drive_dedupe(self):
+        base = "episodic: 用户周末计划去国家博物馆参观青铜器展览并拍照留念"
+        original = _make_item(base, importance=0.7)
+        near = _make_item(base + "。", importance=0.5)
+        other = _make_item("profile: 用户喜欢清淡饮食，不吃辣")
+        for item in (original, near, other):
+            self.long_term.add(item)
+
+        self.assertEqual(self.long_term._lsh_candidate_ids_write(original.id, limit=8), [near.id])
+        self.assertEqual(self.long_term._lsh_candidate_ids_write(other.id, limit=8), [])
+
+        # 内容变化后重算签名，旧桶不再命中。
+        other.content = base + "！"
+        self.long_term.update_item(other)
+        self.assertIn(other.id, self.long_term._lsh_candidate_ids_write(original.id, limit=8))
+        other.content = "commitment: 下周一提交周报"
+        self.long_term.update_item(other)
+        self.assertNotIn(other.id, self.long_term._lsh_candidate_ids_write(original.id, limit=8))
+
+        result = self.long_term.dedupe_by_similarity(threshold=0.9)
+        self.assertEqual(result["merged"], 1)
+        self.assertEqual({item.id for item in self.long_term.get_all()}, {original.id, other.id})
+        lsh_ids = {
+            row["memory_id"]
+            for row in self.long_term._write_db.execute("SELECT memory_id FROM memory_lsh").fetchall()
+        }
+        self.assertEqual(lsh_ids, {original.id, other.id})
+
+    def test_add_many_commits_once_then_upserts_vectors_in_one_batch(self):
+        items = [_make_item(f"episodic: 第{i}条记忆") for i in range(3)]
+        for idx, item in enumerate(items):
+            item.embedding = [1.0 if dim == idx else 0.0 for dim in range(8)]
+
+        upsert_calls = []
+        original_upsert = self.long_term.vector_store.upsert
+
+        def recording_upsert(points):
+            # 向量写入时 DB 事务必须已提交，其它连接可见。
+            upsert_calls.append((len(points), self.long_term.get_by_id(points[0][0]) is not None))
+            original_upsert(points)
+
+        self.long_term.vector_store.upsert = recording_upsert
+        ids = self.long_term.add_many(items)
+
+        self.assertEqual(ids, [item.id for item in items])
+        self.assertEqual(upsert_calls, [(3, True)])
+        self.assertEqual(self.long_term.get_stats()["total"], 3)
+        self.assertEqual(self.long_term.find_similar(items[2].embedding, limit=1)[0][1].id, items[2].id)
+
+    def test_read_pool_serves_concurrent_readers_with_query_only_connections(self):
+        self.long_term.close()
+        self.long_term = LongTermMemory(str(self.temp_dir), vector_dim=8, vector_backend="flat", read_pool_size=2)
+        item = _make_item("episodic: 用户喜欢博物馆")
+        self.long_term.add(item)
+
+        with self.long_term._read_pool.connection() as conn:
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM memories")
+            # 池内另一条连接仍可借出，读取不被占用中的连接阻塞。
+            self.assertEqual(self.long_term.get_by_id(item.id).id, item.id)
+
+        errors = []
+
+        def _reader():
+            try:
+                for _ in range(20):
+                    self.assertEqual(len(self.long_term.get_by_ids([item.id])), 1)
+            except Exception as exc:  # pragma: no cover - 失败时由主线程断言
+                errors.append(exc)
+
+        threads = [threading.Thread(target=_reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        stats = self.long_term.read_pool_stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertLessEqual(stats["open"], 2)
+        self.assertEqual(stats["in_use"], 0)
+        self.assertGreaterEqual(stats["acquires"], 82)
+
+    def test_v1_database_is_migrated_on_open(self):
+        self.long_term.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.temp_dir.mkdir(parents=True)
+        conn = sqlite3.connect(str(self.temp_dir / "memory.db"))
+        conn.execute(
+            """
+            CREATE TABLE memories (
+                id TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                importance REAL DEFAULT 0.5,
+                recall_count INTEGER DEFAULT 0,
+                metadata TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        legacy_meta = MemoryMetadata(state="compressed", half_life_days=12.0, confidence=0.9, repeat_count=3)
+        conn.execute(
+            "INSERT INTO memories VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ("m1", "commitment: 提交周报", 0.6, 1, json.dumps(legacy_meta.to_dict()), 100.0, 100.0),
+        )
+        conn.commit()
+        conn.close()
+
+        self.long_term = LongTermMemory(str(self.temp_dir), vector_dim=8, vector_backend="flat")
+        self.assertEqual(schema_version(self.long_term._write_db), SCHEMA_VERSION)
+        item = self.long_term.get_by_id("m1")
+        self.assertEqual(item.metadata.state, "compressed")
+        self.assertAlmostEqual(item.metadata.half_life_days, 12.0)
+        self.assertAlmostEqual(item.metadata.confidence, 0.9)
+        self.assertEqual(item.metadata.repeat_count, 3)
+        row = self.long_term._write_db.execute(
+            "SELECT memory_type, minhash FROM memories WHERE id = 'm1'"
+        ).fetchone()
+        self.assertEqual(row["memory_type"], "commitment")
+        self.assertTrue(row["minhash"])
+        self.assertIn("m1", self._fts_ids("commitment"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import shutil
+import sys
+import unittest
+import uuid
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.dedupe_store import PersistentDedupeFilter
+
+
+class PersistentDedupeFilterTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = PROJECT_ROOT / "runtime" / f"lumina-test-dedupe-{uuid.uuid4().hex[:8]}"
+        self.db_path = str(self.temp_dir / "write_dedupe.db")
+        self.windows = {"episodic": 100, "profile": 1000}
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_window_per_type_survives_restart(self):
+        dedupe = PersistentDedupeFilter(self.db_path, windows=self.windows)
+        self.assertEqual(
+            dedupe.check_and_mark([("episodic", "e1"), ("profile", "p1"), ("episodic", "e1")], now=1000.0),
+            [False, False, True],
+        )
+        dedupe.close()
+
+        # 重启后窗口仍然有效；episodic 窗口 100 秒已过，profile 仍在窗口内。
+        reopened = PersistentDedupeFilter(self.db_path, windows=self.windows)
+        self.assertEqual(
+            reopened.check_and_mark([("episodic", "e1"), ("profile", "p1")], now=1150.0),
+            [False, True],
+        )
+        self.assertEqual(reopened.stats()["duplicates"], 1)
+        reopened.close()
+
+    def test_expired_rows_are_purged_and_workers_share_state(self):
+        first = PersistentDedupeFilter(self.db_path, windows=self.windows, purge_interval_sec=0)
+        second = PersistentDedupeFilter(self.db_path, windows=self.windows, purge_interval_sec=0)
+        first.check_and_mark([("episodic", "old"), ("profile", "keep")], now=1000.0)
+        self.assertEqual(second.check_and_mark([("profile", "keep")], now=1001.0), [True])
+
+        second.check_and_mark([("episodic", "fresh")], now=1200.0)
+        self.assertEqual(second.stats()["purged"], 1)
+        rows = {row[0] for row in second._db.execute("SELECT key FROM write_dedupe")}
+        self.assertEqual(rows, {"keep", "fresh"})
+        first.close()
+        second.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
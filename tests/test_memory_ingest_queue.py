@@ -0,0 +1,119 @@
+import json
+import shutil
+import sys
+import threading
+import unittest
+import uuid
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.ingest_queue import JournalLockedError, MemoryIngestQueue
+
+
+class MemoryIngestQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = PROJECT_ROOT / "runtime" / f"lumina-test-ingest-{uuid.uuid4().hex[:8]}"
+        self.journal = self.temp_dir / "ingest_journal.jsonl"
+        self.handled = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _handler(self, payloads):
+        self.handled.extend(payload["n"] for payload in payloads)
+
+    def test_flush_drains_in_order_and_acks_journal(self):
+        queue = MemoryIngestQueue(self.journal, handler=self._handler, batch_size=2)
+        for n in range(5):
+            self.assertTrue(queue.enqueue({"n": n}))
+        self.assertTrue(queue.flush(timeout=5))
+        self.assertEqual(self.handled, [0, 1, 2, 3, 4])
+        self.assertEqual(queue.stats()["processed"], 5)
+        queue.close()
+
+        # 全部已确认：重启不应重放。
+        reopened = MemoryIngestQueue(self.journal, handler=self._handler)
+        self.assertTrue(reopened.flush(timeout=5))
+        self.assertEqual(self.handled, [0, 1, 2, 3, 4])
+        reopened.close()
+
+    def test_unacked_entries_are_replayed_after_crash(self):
+        self.temp_dir.mkdir(parents=True)
+        records = [
+            {"op": "put", "seq": 1, "payload": {"n": 1}},
+            {"op": "put", "seq": 2, "payload": {"n": 2}},
+            {"op": "done", "seqs": [1]},
+            {"op": "put", "seq": 3, "payload": {"n": 3}},
+        ]
+        with open(self.journal, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.write('{"op": "put", "seq": 4, "pay')  # 崩溃留下的半行
+
+        queue = MemoryIngestQueue(self.journal, handler=self._handler)
+        self.assertTrue(queue.flush(timeout=5))
+        self.assertEqual(self.handled, [2, 3])
+        self.assertEqual(queue.stats()["recovered"], 2)
+        self.assertTrue(queue.enqueue({"n": 5}))
+        self.assertTrue(queue.flush(timeout=5))
+        self.assertEqual(self.handled, [2, 3, 5])
+        queue.close()
+
+    def test_full_queue_rejects_so_caller_can_fall_back(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocking_handler(payloads):
+            started.set()
+            release.wait(5)
+            self._handler(payloads)
+
+        queue = MemoryIngestQueue(
+            self.journal, handler=blocking_handler, max_pending=1, batch_size=1, put_timeout_sec=0.01
+        )
+        self.assertTrue(queue.enqueue({"n": 1}))
+        self.assertTrue(started.wait(5))
+        self.assertTrue(queue.enqueue({"n": 2}))
+        self.assertFalse(queue.enqueue({"n": 3}))
+        self.assertEqual(queue.stats()["rejected"], 1)
+        release.set()
+        self.assertTrue(queue.flush(timeout=5))
+        self.assertEqual(self.handled, [1, 2])
+        queue.close()
+
+    def test_second_instance_on_same_journal_is_rejected(self):
+        release = threading.Event()
+
+        def blocking_handler(payloads):
+            release.wait(5)
+            self._handler(payloads)
+
+        first = MemoryIngestQueue(self.journal, handler=blocking_handler, batch_size=1)
+        self.assertTrue(first.enqueue({"n": 1}))
+        self.assertTrue(first.enqueue({"n": 2}))
+
+        # 第二个实例拿不到日志锁：不得回放 first 的未完成条目，也不得替换其日志文件。
+        second_handled = []
+        with self.assertRaises(JournalLockedError):
+            MemoryIngestQueue(self.journal, handler=second_handled.extend)
+        self.assertEqual(second_handled, [])
+
+        self.assertTrue(first.enqueue({"n": 3}))
+        with open(self.journal, "r", encoding="utf-8") as f:
+            put_ns = [json.loads(line)["payload"]["n"] for line in f if '"put"' in line]
+        self.assertEqual(put_ns, [1, 2, 3])
+        release.set()
+        self.assertTrue(first.flush(timeout=5))
+        self.assertEqual(self.handled, [1, 2, 3])
+        first.close()
+
+        # 锁随 close 释放，之后的实例可正常接管。
+        reopened = MemoryIngestQueue(self.journal, handler=self._handler)
+        reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import shutil
+import sys
+import unittest
+import uuid
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.memory_module_engine import Memory
+from core.memory.service import DeterministicEmbeddingProvider
+
+
+class CountingEmbeddingProvider(DeterministicEmbeddingProvider):
+    def __init__(self):
+        super().__init__(dim=64)
+        self.calls = []
+
+    def encode(self, text):
+        self.calls.append(text)
+        return super().encode(text)
+
+
+class MemorySearchCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = PROJECT_ROOT / "runtime" / f"lumina-test-search-cache-{uuid.uuid4().hex[:8]}"
+        self.embedder = CountingEmbeddingProvider()
+        self.memory = Memory(
+            storage_path=str(self.temp_dir),
+            embedding_provider=self.embedder,
+            auto_consolidate=False,
+            config_overrides={"vector_backend": "flat", "persist_importance_threshold": 0.0},
+        )
+
+    def tearDown(self):
+        self.memory.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_repeated_query_hits_cache_until_store_changes(self):
+        self.memory.add("profile: 用户喜欢博物馆")
+        self.embedder.calls.clear()
+
+        first = [item.id for item in self.memory.search("博物馆 偏好", top_k=4)]
+        second = [item.id for item in self.memory.search("博物馆 偏好", top_k=4)]
+        self.assertEqual(first, second)
+        self.assertEqual(self.embedder.calls, ["博物馆 偏好"])
+
+        # 不同 top_k 是不同的缓存键。
+        self.memory.search("博物馆 偏好", top_k=2)
+        self.assertEqual(len(self.embedder.calls), 2)
+
+        # 新写入递增存储代数，旧缓存失效并能召回新记忆。
+        new_id = self.memory.add("profile: 用户喜欢 博物馆 夜场")
+        third = [item.id for item in self.memory.search("博物馆 偏好", top_k=4)]
+        self.assertIn(new_id, third)
+        stats = self.memory.get_stats()["search_cache"]
+        self.assertEqual(stats["hits"], 1)
+        self.assertGreaterEqual(stats["stale"], 1)
+
+    def test_idle_flush_keeps_generation_and_cached_items_are_copies(self):
+        self.memory.add("profile: 用户喜欢博物馆")
+        generation = self.memory.long_term.generation
+        self.memory.long_term._flush_pending_vector_ops()
+        self.assertEqual(self.memory.long_term.generation, generation)
+
+        _, first = self.memory._long_term_candidates("博物馆", 4)
+        first[0]["item"].content = "被调用方改写"
+        first[0]["item"].metadata.state = "archived"
+        _, second = self.memory._long_term_candidates("博物馆", 4)
+        self.assertEqual(self.memory.get_stats()["search_cache"]["hits"], 1)
+        self.assertEqual(second[0]["item"].content, "profile: 用户喜欢博物馆")
+        self.assertEqual(second[0]["item"].metadata.state, "active")
+
+
+
+if __name__ == "__main__":
+    unittest.main()
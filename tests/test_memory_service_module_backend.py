@@ -4,6 +4,7 @@ import sys
 import unittest
 import uuid
 from pathlib import Path
+from unittest import mock
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
@@ -64,6 +65,7 @@ class MemoryServiceModuleBackendTests(unittest.TestCase):
             assistant_reply="好的，我会记住这些偏好并提醒你。",
             meta={},
         )
+        self.memory.flush()
 
         context = self.memory.build_context(query="博物馆 周报")
         stats = self.memory._engine.get_stats()
@@ -84,10 +86,38 @@ class MemoryServiceModuleBackendTests(unittest.TestCase):
                 "plan": {"goal": "北京三日游规划"},
             },
         )
+        self.memory.flush()
 
         results = self.memory._engine.search("北京三日游规划", top_k=6)
         self.assertTrue(any("procedural:" in item.content for item in results))
 
+    def test_failed_engine_write_does_not_suppress_retry(self):
+        entries = [("profile", "用户喜欢博物馆")]
+        with mock.patch.object(self.memory._engine, "add_many", side_effect=RuntimeError("disk full")):
+            self.assertEqual(self.memory._persist_memories(entries), [])
+
+        # 失败的那次不应留下去重标记，重试时同样的内容照常写入。
+        self.assertEqual(len(self.memory._persist_memories(entries)), 1)
+        self.assertEqual(self.memory._persist_memories(entries), [])
+
+
+    def test_failed_batch_falls_back_to_per_entry_writes(self):
+        original_add_many = self.memory._engine.add_many
+
+        def _add(content):
+            if "坏数据" in content:
+                raise ValueError("bad entry")
+            return original_add_many([content])[0]
+
+        entries = [("profile", "用户喜欢博物馆"), ("episodic", "坏数据"), ("commitment", "下周提交周报")]
+        with mock.patch.object(self.memory._engine, "add_many", side_effect=RuntimeError("batch failed")), \
+                mock.patch.object(self.memory._engine, "add", side_effect=_add):
+            self.assertEqual(len(self.memory._persist_memories(entries)), 2)
+
+        # 只有失败的那条撤销了去重标记。
+        self.assertEqual(len(self.memory._persist_memories(entries)), 1)
+
+
 
 if __name__ == "__main__":
     unittest.main()
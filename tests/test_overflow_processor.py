@@ -0,0 +1,57 @@
+import sys
+import unittest
+import uuid
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from core.memory.memory_module_engine.models import MemoryItem, MemoryMetadata
+from core.memory.memory_module_engine.overflow_processor import OverflowProcessor
+from bench_overflow_cluster import make_working_set, reference_cluster
+
+
+def _item(content: str, embedding=None) -> MemoryItem:
+    return MemoryItem(
+        id=str(uuid.uuid4()),
+        content=content,
+        importance=0.5,
+        embedding=embedding,
+        metadata=MemoryMetadata(store="working"),
+    )
+
+
+class OverflowClusterTests(unittest.TestCase):
+    def test_matches_greedy_reference_and_respects_max_cluster_size(self):
+        items = make_working_set(size=120, dim=32, topics=6, noise=0.3)
+        processor = OverflowProcessor(similarity_threshold=0.82, max_cluster_size=6)
+
+        clusters = processor.cluster(items)
+        expected = reference_cluster(items, threshold=0.82, max_cluster_size=6)
+
+        self.assertEqual(
+            [[item.id for item in c] for c in clusters],
+            [[item.id for item in c] for c in expected],
+        )
+        self.assertTrue(all(len(c) <= 6 for c in clusters))
+        self.assertEqual(sum(len(c) for c in clusters), len(items))
+
+    def test_items_without_embedding_fall_back_to_text_overlap(self):
+        items = [
+            _item("用户 喜欢 博物馆", embedding=[1.0, 0.0]),
+            _item("用户 喜欢 博物馆"),
+            _item("下周 提交 周报", embedding=[0.0, 1.0]),
+        ]
+        processor = OverflowProcessor(similarity_threshold=0.8, max_cluster_size=6)
+
+        clusters = processor.cluster(items)
+        self.assertEqual([[item.id for item in c] for c in clusters], [[items[0].id, items[1].id], [items[2].id]])
+        self.assertEqual(processor.cluster([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
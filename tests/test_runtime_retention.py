@@ -0,0 +1,168 @@
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+import unittest
+import uuid
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+for path in (PROJECT_ROOT, SCRIPTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from cleanup_runtime import cleanup
+from core.utils.retention import (
+    RetentionScheduler,
+    RuntimeManifest,
+    SizeTimeRotatingFileHandler,
+    install_runtime_manifest,
+    rotate_file,
+)
+from core.utils.trace_logger import TraceLogger
+
+DAY = 86400.0
+
+
+class _Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _write(path: Path, text: str, mtime: float) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+class RuntimeRetentionTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = PROJECT_ROOT / "runtime" / f"lumina-test-retention-{uuid.uuid4().hex[:8]}"
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+
+    def tearDown(self):
+        install_runtime_manifest(None)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_sweep_only_touches_expired_entries(self):
+        now = time.time()
+        clock = _Clock(now)
+        manifest = RuntimeManifest(self.temp_dir / "manifest.db", {"traces": 7 * DAY, "notes": 0}, clock=clock)
+        old = _write(self.temp_dir / "traces" / "old.jsonl", "x", now - 10 * DAY)
+        fresh = _write(self.temp_dir / "traces" / "fresh.jsonl", "y", now - DAY)
+        touched = _write(self.temp_dir / "traces" / "touched.jsonl", "z", now - 10 * DAY)
+        note = _write(self.temp_dir / "notes" / "keep.md", "n", now - 100 * DAY)
+        gone = _write(self.temp_dir / "traces" / "gone.jsonl", "g", now - 10 * DAY)
+        protected = _write(self.temp_dir / "traces" / "index.db", "", now - 10 * DAY)
+        for path in (old, fresh, touched, gone, protected):
+            manifest.register(path, "traces")
+        manifest.register(note, "notes")
+
+        os.utime(touched, (now, now))
+        gone.unlink()
+
+        preview = manifest.sweep(dry_run=True)
+        self.assertEqual(preview["candidates"], [str(old)])
+        self.assertTrue(old.exists())
+
+        result = manifest.sweep()
+        self.assertEqual(result["scanned"], 3)
+        self.assertEqual(result["deleted"], [str(old)])
+        self.assertEqual((result["rescheduled"], result["missing"]), (1, 1))
+        self.assertFalse(old.exists())
+        for path in (fresh, touched, note, protected):
+            self.assertTrue(path.exists())
+        self.assertEqual(manifest.sweep()["scanned"], 0)
+
+        clock.now = now + 8 * DAY
+        self.assertEqual(sorted(manifest.sweep()["deleted"]), sorted([str(fresh), str(touched)]))
+        self.assertTrue(note.exists())
+        manifest.close()
+
+    def test_rotating_handler_compresses_and_registers_archives(self):
+        manifest = RuntimeManifest(self.temp_dir / "manifest.db", {"logs": 7 * DAY})
+        install_runtime_manifest(manifest)
+        log_path = self.temp_dir / "logs" / "events.jsonl"
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        handler = SizeTimeRotatingFileHandler(log_path, max_bytes=400, compress=True)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        test_logger = logging.getLogger(f"retention-test-{uuid.uuid4().hex[:6]}")
+        test_logger.propagate = False
+        test_logger.addHandler(handler)
+        try:
+            for idx in range(20):
+                test_logger.warning(json.dumps({"idx": idx, "pad": "x" * 40}))
+        finally:
+            test_logger.removeHandler(handler)
+            handler.close()
+
+        archives = sorted(log_path.parent.glob("events.*.jsonl.gz"))
+        self.assertGreaterEqual(len(archives), 2)
+        self.assertLess(log_path.stat().st_size, 400)
+        lines = []
+        for archive in archives:
+            with gzip.open(archive, "rt", encoding="utf-8") as f:
+                lines.extend(f.read().splitlines())
+        lines.extend(log_path.read_text(encoding="utf-8").splitlines())
+        self.assertEqual([json.loads(line)["idx"] for line in lines], list(range(20)))
+        self.assertEqual(manifest.summary()["logs"]["files"], len(archives))
+        manifest.close()
+
+    def test_trace_logger_rotates_by_size(self):
+        manifest = RuntimeManifest(self.temp_dir / "manifest.db", {"traces": 7 * DAY})
+        install_runtime_manifest(manifest)
+        trace = TraceLogger(trace_dir=self.temp_dir / "traces", session_id="rot", max_bytes=300, flush_every=1)
+        for idx in range(12):
+            trace.log("round_end", {"round": idx})
+        trace.close()
+
+        self.assertGreaterEqual(trace.rotations, 1)
+        archives = list((self.temp_dir / "traces").glob("trace-rot.*.jsonl.gz"))
+        self.assertEqual(len(archives), trace.rotations)
+        # 活跃文件 + 全部归档都已登记。
+        self.assertEqual(manifest.summary()["traces"]["files"], trace.rotations + 1)
+        manifest.close()
+
+    def test_rotate_file_skips_empty_files(self):
+        empty = _write(self.temp_dir / "logs" / "empty.log", "", time.time())
+        self.assertIsNone(rotate_file(empty))
+        self.assertTrue(empty.exists())
+
+    def test_scheduler_bootstraps_empty_manifest(self):
+        now = time.time()
+        _write(self.temp_dir / "traces" / "old.jsonl", "x", now - 30 * DAY)
+        manifest = RuntimeManifest(self.temp_dir / "manifest.db", {"traces": 7 * DAY})
+        scheduler = RetentionScheduler(manifest, self.temp_dir, ["traces"], interval_seconds=60)
+        result = scheduler.run_once()
+        self.assertEqual(len(result["deleted"]), 1)
+        manifest.close()
+
+    def test_cleanup_script_uses_manifest(self):
+        now = time.time()
+        old = _write(self.temp_dir / "sessions" / "old.jsonl", "x", now - 30 * DAY)
+        recent = _write(self.temp_dir / "sessions" / "recent.jsonl", "y", now - 2 * DAY)
+        _write(self.temp_dir / "tasks" / "tasks.db", "", now - 30 * DAY)
+
+        preview = cleanup(self.temp_dir, keep_days=7, dry_run=True)
+        self.assertEqual(preview["candidates"], [str(old)])
+        self.assertEqual(preview["rebuilt"], 2)
+
+        result = cleanup(self.temp_dir, keep_days=7, dry_run=False)
+        self.assertEqual(result["rebuilt"], 0)
+        self.assertEqual(result["deleted"], [str(old)])
+        self.assertTrue(recent.exists())
+
+        # 收紧保留期后，已登记条目按新期限重算。
+        self.assertEqual(cleanup(self.temp_dir, keep_days=1, dry_run=False)["deleted"], [str(recent)])
+
+
+if __name__ == "__main__":
+    unittest.main()
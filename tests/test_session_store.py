@@ -0,0 +1,107 @@
+import json
+import shutil
+import sys
+import threading
+import unittest
+import uuid
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory.session_store import SessionHistoryStore
+
+
+def _round(i: int):
+    return [
+        {"role": "user", "content": f"u{i}"},
+        {"role": "assistant", "content": f"a{i}"},
+    ]
+
+
+class SessionHistoryStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = PROJECT_ROOT / "runtime" / f"lumina-test-sessions-{uuid.uuid4().hex[:8]}"
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_append_is_one_line_per_round_and_window_served_from_cache(self):
+        store = SessionHistoryStore(self.temp_dir, window_messages=8, compact_every=1000)
+        for i in range(10):
+            store.append_round("s1", _round(i), {"round": i})
+
+        lines = store.session_path("s1").read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(lines), 10)
+        recent = store.recent("s1", 4)
+        self.assertEqual([m["content"] for m in recent], ["u8", "a8", "u9", "a9"])
+        self.assertEqual(store.metadata("s1"), {"round": 9})
+        self.assertEqual(store.stats()["misses"], 1)
+
+        # 超出窗口的全量读取回落到文件。
+        self.assertEqual(len(store.recent("s1", None)), 20)
+
+    def test_cold_load_reads_tail_and_drops_torn_line(self):
+        store = SessionHistoryStore(self.temp_dir, window_messages=4, compact_every=1000)
+        for i in range(6):
+            store.append_round("s1", _round(i), {"round": i})
+        path = store.session_path("s1")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"op": "round", "messages": [{"role": "user", "con')
+
+        reopened = SessionHistoryStore(self.temp_dir, window_messages=4, compact_every=1000)
+        self.assertEqual([m["content"] for m in reopened.recent("s1", 4)], ["u4", "a4", "u5", "a5"])
+        reopened.append_round("s1", _round(6), {"round": 6})
+        self.assertEqual(len(reopened.recent("s1", None)), 14)
+        self.assertTrue(path.read_text(encoding="utf-8").endswith("\n"))
+
+    def test_compaction_folds_rounds_into_snapshot(self):
+        store = SessionHistoryStore(self.temp_dir, window_messages=4, compact_every=5, retain_messages=6)
+        for i in range(5):
+            store.append_round("s1", _round(i), {"round": i})
+
+        lines = store.session_path("s1").read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(lines), 1)
+        snapshot = json.loads(lines[0])
+        self.assertEqual(snapshot["op"], "snapshot")
+        self.assertEqual(snapshot["metadata"], {"round": 4})
+        self.assertEqual([m["content"] for m in snapshot["messages"]][:2], ["u2", "a2"])
+        self.assertEqual(store.stats()["compactions"], 1)
+
+        reopened = SessionHistoryStore(self.temp_dir, window_messages=16)
+        self.assertEqual(len(reopened.recent("s1", None)), 6)
+
+    def test_legacy_json_session_is_migrated(self):
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        legacy = self.temp_dir / "old.json"
+        legacy.write_text(
+            json.dumps({"session_id": "old", "history": _round(0), "metadata": {"k": "v"}}),
+            encoding="utf-8",
+        )
+        store = SessionHistoryStore(self.temp_dir)
+        self.assertEqual(len(store.recent("old", None)), 2)
+        self.assertEqual(store.metadata("old"), {"k": "v"})
+        self.assertFalse(legacy.exists())
+        self.assertTrue(store.session_path("old").exists())
+
+    def test_concurrent_sessions_keep_their_own_order(self):
+        store = SessionHistoryStore(self.temp_dir, window_messages=200, compact_every=30)
+
+        def writer(session_id: str):
+            for i in range(50):
+                store.append_round(session_id, _round(i), {"round": i})
+
+        threads = [threading.Thread(target=writer, args=(f"s{n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for n in range(4):
+            history = store.recent(f"s{n}", None)
+            self.assertEqual([m["content"] for m in history[::2]], [f"u{i}" for i in range(50)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import CancelledError
+from contextvars import ContextVar
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.orchestrator.step_pool import StepPool
+
+_REQUEST = ContextVar("request", default="-")
+
+
+class StepPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = StepPool(max_workers=1, name="test-step")
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_tasks_are_served_round_robin(self):
+        started, gate = threading.Event(), threading.Event()
+        order = []
+
+        def _block():
+            started.set()
+            return gate.wait(5)
+
+        blocker = self.pool.submit("A", _block)
+        self.assertTrue(started.wait(5))
+        futures = [
+            self.pool.submit("A", order.append, "A1"),
+            self.pool.submit("A", order.append, "A2"),
+            self.pool.submit("A", order.append, "A3"),
+            self.pool.submit("B", order.append, "B1"),
+        ]
+        self.assertEqual(self.pool.stats()["queue_depth"], 4)
+        self.assertEqual(self.pool.stats()["queued_tasks"], 2)
+        gate.set()
+        for future in [blocker, *futures]:
+            future.result(timeout=5)
+
+        # B 只排了一个作业，也不必等 A 的全部作业执行完。
+        self.assertEqual(order, ["A1", "B1", "A2", "A3"])
+        stats = self.pool.stats()
+        self.assertEqual((stats["completed"], stats["queue_depth"]), (5, 0))
+        self.assertEqual(stats["max_queue_depth"], 4)
+        self.assertGreater(stats["wait_ms_max"], 0.0)
+
+    def test_context_is_propagated_and_threads_are_reused(self):
+        pool = StepPool(max_workers=2)
+        try:
+            results = []
+            for idx in range(6):
+                token = _REQUEST.set(f"req-{idx}")
+                try:
+                    results.append(pool.submit("T", lambda: (_REQUEST.get(), threading.current_thread().name)))
+                finally:
+                    _REQUEST.reset(token)
+            values = [future.result(timeout=5) for future in results]
+        finally:
+            pool.close()
+        self.assertEqual([value for value, _ in values], [f"req-{idx}" for idx in range(6)])
+        self.assertLessEqual(len({name for _, name in values}), 2)
+        self.assertLessEqual(pool.stats()["workers"], 2)
+
+    def test_idle_workers_do_not_serialize_burst_submissions(self):
+        pool = StepPool(max_workers=2)
+        try:
+            pool.submit("T", time.sleep, 0).result(timeout=5)
+            time.sleep(0.05)
+            barrier = threading.Barrier(2, timeout=2)
+            futures = [pool.submit("T", barrier.wait), pool.submit("T", barrier.wait)]
+            # 两个作业须同时在跑才能越过 barrier。
+            for future in futures:
+                future.result(timeout=5)
+        finally:
+            pool.close()
+
+    def test_exceptions_and_close_cancel_queued_work(self):
+        def _boom():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            self.pool.submit("T", _boom).result(timeout=5)
+
+        started, gate = threading.Event(), threading.Event()
+
+        def _block():
+            started.set()
+            return gate.wait(5)
+
+        running = self.pool.submit("T", _block)
+        self.assertTrue(started.wait(5))
+        queued = self.pool.submit("T", time.sleep, 0)
+        threading.Timer(0.05, gate.set).start()
+        self.pool.close()
+        self.assertTrue(running.result(timeout=5))
+        with self.assertRaises(CancelledError):
+            queued.result(timeout=5)
+        with self.assertRaises(RuntimeError):
+            self.pool.submit("T", time.sleep, 0)
+        stats = self.pool.stats()
+        self.assertEqual((stats["failed"], stats["cancelled"]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import json
 import shutil
 import sys
 import time
@@ -67,6 +68,14 @@ class _DelayedExecutorAgent(_FakeExecutorAgent):
         return super().run_task(user_text, history, session_id)
 
 
+class _FakeToolRegistry:
+    def __init__(self, names):
+        self.names = list(names)
+
+    def list_schemas(self):
+        return [{"type": "function", "function": {"name": name}} for name in self.names]
+
+
 class _FakePlannerAgent:
     def __init__(self, plan_result: PlanResult):
         self.plan_result = plan_result
@@ -115,6 +124,16 @@ class TaskFlowRegressionTests(unittest.TestCase):
         self.assertEqual(loaded.plan.get("goal"), "x")
         self.assertEqual(len(loaded.step_results), 1)
 
+    def test_task_store_opens_database_on_first_use(self):
+        task_dir = self.temp_dir / "lazy-tasks"
+        store = TaskStore(base_dir=str(task_dir))
+        TaskManager(store=store)
+        self.assertFalse(task_dir.exists())
+
+        self.assertEqual(store.count_by_state(), {})
+        self.assertTrue((task_dir / TaskStore.DB_NAME).exists())
+        store.close()
+
     def test_task_manager_reset_for_replan_from_failed(self):
         store = TaskStore(base_dir=str(self.temp_dir / "tasks"))
         manager = TaskManager(store=store)
@@ -165,6 +184,98 @@ class TaskFlowRegressionTests(unittest.TestCase):
         self.assertIsNotNone(payload)
         self.assertEqual(resumed_task.state, TaskState.RUNNING)
 
+    def test_task_manager_waiting_index_tracks_transitions(self):
+        store = TaskStore(base_dir=str(self.temp_dir / "tasks"))
+        manager = TaskManager(store=store)
+
+        older = manager.create_task(session_id="s1", user_text="older")
+        newer = manager.create_task(session_id="s1", user_text="newer")
+        other = manager.create_task(session_id="s2", user_text="other session")
+        for task in (older, newer, other):
+            self.assertTrue(manager.set_state(task.task_id, TaskState.RUNNING))
+            self.assertTrue(manager.set_waiting_input(task.task_id, waiting_for_input={"pending_step_id": "S1"}))
+
+        lookups = []
+        original = store.latest_task_id
+        store.latest_task_id = lambda *args: lookups.append(args) or original(*args)
+
+        self.assertEqual(manager.get_waiting_task("s1").task_id, newer.task_id)
+        self.assertEqual(manager.get_waiting_task("s2").task_id, other.task_id)
+        self.assertEqual(lookups, [])
+
+        manager.resume_waiting_task(newer.task_id, "继续")
+        self.assertEqual(manager.get_waiting_task("s1").task_id, older.task_id)
+        self.assertEqual(len(lookups), 1)
+
+        # 新 manager 从存储索引恢复等待任务。
+        reopened = TaskManager(store=TaskStore(base_dir=str(self.temp_dir / "tasks")))
+        self.assertEqual(reopened.get_waiting_task("s1").task_id, older.task_id)
+        self.assertIsNone(reopened.get_waiting_task("s3"))
+
+    def test_task_manager_journals_mutations_and_flushes_checkpoint(self):
+        store = TaskStore(base_dir=str(self.temp_dir / "tasks"))
+        manager = TaskManager(store=store, checkpoint_every=100, checkpoint_interval_sec=3600)
+
+        task = manager.create_task(session_id="s1", user_text="journal")
+        self.assertTrue(manager.set_state(task.task_id, TaskState.RUNNING))
+        manager.set_plan(task.task_id, {"goal": "g"})
+        for idx in range(3):
+            manager.append_step_result(task.task_id, {"step_id": f"S{idx}", "state": "succeeded"})
+        manager.update_convergence(task.task_id, {"round": 1})
+        self.assertEqual(store.stats()["checkpoints"], 1)
+        self.assertEqual(store.stats()["journal_pending"], 6)
+
+        # 模拟崩溃：不 flush，新连接从 checkpoint + 日志回放出最新状态。
+        recovered = TaskStore(base_dir=str(self.temp_dir / "tasks")).load(task.task_id)
+        self.assertEqual(recovered.state, TaskState.RUNNING)
+        self.assertEqual(recovered.plan, {"goal": "g"})
+        self.assertEqual([row["step_id"] for row in recovered.step_results], ["S0", "S1", "S2"])
+        self.assertEqual(recovered.convergence, {"round": 1})
+        self.assertEqual(recovered.updated_at, manager.get_task(task.task_id).updated_at)
+
+        self.assertEqual(manager.flush(), 1)
+        self.assertEqual(store.stats()["journal_pending"], 0)
+        self.assertEqual(manager.flush(), 0)
+        manager.append_step_result(task.task_id, {"step_id": "S3", "state": "succeeded"})
+        reopened = TaskStore(base_dir=str(self.temp_dir / "tasks")).load(task.task_id)
+        self.assertEqual(len(reopened.step_results), 4)
+
+    def test_task_manager_checkpoints_after_journal_threshold(self):
+        store = TaskStore(base_dir=str(self.temp_dir / "tasks"))
+        manager = TaskManager(store=store, checkpoint_every=3, checkpoint_interval_sec=3600)
+
+        task = manager.create_task(session_id="s1", user_text="threshold")
+        for idx in range(3):
+            manager.append_step_result(task.task_id, {"step_id": f"S{idx}"})
+        self.assertEqual(store.stats()["checkpoints"], 2)
+        self.assertEqual(store.stats()["journal_pending"], 0)
+
+    def test_task_store_imports_legacy_json_files(self):
+        task_dir = self.temp_dir / "tasks"
+        task_dir.mkdir(parents=True, exist_ok=True)
+        (task_dir / "t-legacy-a.json").write_text(
+            json.dumps({"task_id": "t-legacy-a", "session_id": "s9", "user_text": "old", "state": "succeeded"}),
+            encoding="utf-8",
+        )
+        (task_dir / "t-legacy-b.json").write_text(
+            json.dumps({"task_id": "t-legacy-b", "session_id": "s9", "user_text": "ask", "state": "waiting_user_input"}),
+            encoding="utf-8",
+        )
+        (task_dir / "broken.json").write_text("{not json", encoding="utf-8")
+
+        store = TaskStore(base_dir=str(task_dir))
+        self.assertEqual(store.load("t-legacy-a").session_id, "s9")
+        self.assertEqual(store.count_by_state(), {"succeeded": 1, "waiting_user_input": 1})
+        self.assertEqual(store.latest_task_id("s9", TaskState.WAITING_USER_INPUT.value), "t-legacy-b")
+        self.assertEqual(len(store.list_session("s9")), 2)
+
+        # 导入只做一次：之后新增的旧格式文件不再被扫描。
+        (task_dir / "t-late.json").write_text(
+            json.dumps({"task_id": "t-late", "session_id": "s9", "user_text": "late"}),
+            encoding="utf-8",
+        )
+        self.assertIsNone(TaskStore(base_dir=str(task_dir)).load("t-late"))
+
     def test_trace_logger_async_write(self):
         trace_dir = self.temp_dir / "traces"
         logger = TraceLogger(trace_dir=str(trace_dir), session_id="ut1")
@@ -425,6 +536,83 @@ class TaskFlowRegressionTests(unittest.TestCase):
         # S1/S2 should run in the same batch; if auto-serialized, elapsed would be notably longer.
         self.assertLess(elapsed, 0.55)
 
+    def test_langgraph_runner_dispatches_dependents_without_waiting_for_slow_sibling(self):
+        store = TaskStore(base_dir=str(self.temp_dir / "tasks"))
+        manager = TaskManager(store=store)
+        task = manager.create_task(session_id="s1", user_text="demo")
+        manager.set_state(task.task_id, TaskState.RUNNING)
+
+        plan = PlanResult(
+            goal="demo",
+            steps=[
+                PlanItem(step_id="S1", title="s1", instruction="slow"),
+                PlanItem(step_id="S2", title="s2", instruction="fast"),
+                PlanItem(step_id="S3", title="s3", instruction="after fast", depends_on=["S2"]),
+                PlanItem(step_id="S4", title="s4", instruction="after all", depends_on=["S1", "S3"]),
+            ],
+            graph_policy={"max_parallelism": 2, "fail_fast": False},
+        )
+        runner = LangGraphTaskRunner(
+            task_manager=manager,
+            build_step_input=lambda **kwargs: f"当前步骤: {kwargs['step_id']}",
+        )
+        executor_agent = _DelayedExecutorAgent(delays={"S1": 0.4, "S2": 0.05, "S3": 0.05})
+
+        started = time.perf_counter()
+        result = runner.run(
+            user_text="demo",
+            history=[],
+            session_id="s1",
+            task_id=task.task_id,
+            planner_agent=_FakePlannerAgent(plan),
+            executor_agent=executor_agent,
+            critic_agent=_FakeCriticAgent(),
+        )
+        elapsed = time.perf_counter() - started
+
+        # S3 在 S2 完成后立即被补投，不等慢的 S1；按批次屏障调度时 S3 会排在 S1 之后。
+        self.assertEqual(executor_agent.calls, ["S2", "S3", "S1", "S4"])
+        self.assertEqual([item["step_id"] for item in result.step_results], ["S1", "S2", "S3", "S4"])
+        self.assertLess(elapsed, 0.55)
+        persisted = manager.get_task(task.task_id)
+        self.assertEqual(len(persisted.step_results), 4)
+
+    def test_langgraph_runner_fail_fast_stops_dispatch_but_drains_in_flight(self):
+        store = TaskStore(base_dir=str(self.temp_dir / "tasks"))
+        manager = TaskManager(store=store)
+        task = manager.create_task(session_id="s1", user_text="demo")
+        manager.set_state(task.task_id, TaskState.RUNNING)
+
+        plan = PlanResult(
+            goal="demo",
+            steps=[
+                PlanItem(step_id="S1", title="s1", instruction="slow"),
+                PlanItem(step_id="S2", title="s2", instruction="fails"),
+                PlanItem(step_id="S3", title="s3", instruction="independent"),
+            ],
+            graph_policy={"max_parallelism": 2, "fail_fast": True},
+        )
+        runner = LangGraphTaskRunner(
+            task_manager=manager,
+            build_step_input=lambda **kwargs: f"当前步骤: {kwargs['step_id']}",
+        )
+        executor_agent = _DelayedExecutorAgent(failed_steps={"S2"}, delays={"S1": 0.2})
+
+        result = runner.run(
+            user_text="demo",
+            history=[],
+            session_id="s1",
+            task_id=task.task_id,
+            planner_agent=_FakePlannerAgent(plan),
+            executor_agent=executor_agent,
+            critic_agent=_FakeCriticAgent(),
+        )
+
+        state_map = {item["step_id"]: item["state"] for item in result.task_snapshot["nodes"]}
+        self.assertEqual(state_map, {"S1": "succeeded", "S2": "failed", "S3": "blocked"})
+        self.assertNotIn("S3", executor_agent.calls)
+        self.assertEqual(result.first_error["code"], "STEP_FAILED")
+
     def test_langgraph_runner_caps_max_parallelism_to_two(self):
         store = TaskStore(base_dir=str(self.temp_dir / "tasks"))
         manager = TaskManager(store=store)
@@ -457,5 +645,71 @@ class TaskFlowRegressionTests(unittest.TestCase):
 
         self.assertEqual(result.task_snapshot["policy"].get("max_parallelism"), 2)
 
+    def test_langgraph_runner_reuses_succeeded_steps_across_replans(self):
+        store = TaskStore(base_dir=str(self.temp_dir / "tasks"))
+        manager = TaskManager(store=store)
+        task = manager.create_task(session_id="s1", user_text="demo")
+        manager.set_state(task.task_id, TaskState.RUNNING)
+        runner = LangGraphTaskRunner(
+            task_manager=manager,
+            build_step_input=lambda **kwargs: f"当前步骤: {kwargs['step_id']}",
+        )
+        step_memo = {}
+
+        def _run(plan, executor):
+            return runner.run(
+                user_text="demo",
+                history=[],
+                session_id="s1",
+                task_id=task.task_id,
+                planner_agent=_FakePlannerAgent(plan),
+                executor_agent=executor,
+                critic_agent=_FakeCriticAgent(),
+                step_memo=step_memo,
+            )
+
+        first_plan = PlanResult(
+            goal="demo",
+            steps=[
+                PlanItem(step_id="S1", title="s1", instruction="do s1"),
+                PlanItem(step_id="S2", title="s2", instruction="do s2", depends_on=["S1"]),
+                PlanItem(step_id="S3", title="s3", instruction="do s3", depends_on=["S1"]),
+            ],
+            graph_policy={"max_parallelism": 1, "fail_fast": False},
+        )
+        first_executor = _FakeExecutorAgent(failed_steps={"S3"})
+        _run(first_plan, first_executor)
+        self.assertEqual(len(step_memo), 2)
+
+        # replan 后步骤重新编号、指令空白有差异，但输入不变的步骤直接复用。
+        manager.reset_task_for_replan(task.task_id)
+        manager.set_state(task.task_id, TaskState.RUNNING)
+        second_plan = PlanResult(
+            goal="demo",
+            steps=[
+                PlanItem(step_id="A1", title="a1", instruction="  do   s1 "),
+                PlanItem(step_id="A2", title="a2", instruction="do s2", depends_on=["A1"]),
+                PlanItem(step_id="A3", title="a3", instruction="do s3 differently", depends_on=["A1"]),
+            ],
+            graph_policy={"max_parallelism": 1, "fail_fast": False},
+        )
+        second_executor = _FakeExecutorAgent()
+        result = _run(second_plan, second_executor)
+
+        self.assertEqual(second_executor.calls, ["A3"])
+        nodes = {node["step_id"]: node for node in result.task_snapshot["nodes"]}
+        self.assertTrue(nodes["A1"].get("reused"))
+        self.assertEqual(nodes["A1"]["reused_from"], "S1")
+        self.assertEqual(nodes["A2"]["output_text"], "S2 ok")
+        self.assertFalse(nodes["A3"].get("reused"))
+        self.assertEqual([item["state"] for item in result.step_results], ["succeeded"] * 3)
+        self.assertIsNone(result.first_error)
+
+        # 工具集变化后记忆不再命中。
+        third_executor = _FakeExecutorAgent()
+        third_executor.registry = _FakeToolRegistry(["web_search"])
+        _run(second_plan, third_executor)
+        self.assertEqual(third_executor.calls, ["A1", "A2", "A3"])
+
 if __name__ == "__main__":
     unittest.main()
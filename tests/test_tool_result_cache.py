@@ -0,0 +1,206 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.config import FileIOConfig, UapiSearchConfig, WebSearchConfig
+from core.tools import (
+    BaseTool,
+    ToolContext,
+    ToolRegistry,
+    ToolResult,
+    ToolResultCache,
+    WebSearchTool,
+    install_tool_result_cache,
+)
+from core.tools.file_io import ReadFileTool
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeResponse:
+    status_code = 200
+    text = ""
+    content = b"{}"
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"results": [{"title": "Python", "url": "https://www.python.org/", "snippet": "home"}]}
+
+
+class _FakeSession:
+    def __init__(self):
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        return _FakeResponse()
+
+
+class _BlockingLookupTool(BaseTool):
+    def __init__(self):
+        super().__init__(
+            name="lookup",
+            description="test lookup",
+            parameters_schema={"type": "object", "properties": {"q": {"type": "string"}}},
+            max_concurrency=1,
+            cacheable=True,
+        )
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def run(self, *, ctx, q: str, **kwargs):
+        if q == "slow":
+            self.started.set()
+            self.release.wait(5)
+        return self.ok_result({"q": q})
+
+
+class ToolResultCacheTests(unittest.TestCase):
+    def test_lru_eviction_by_entries_and_bytes(self):
+        cache = ToolResultCache(max_entries=2, max_bytes=10)
+        cache.put("a", ToolResult(ok=True, content="aaa"))
+        cache.put("b", ToolResult(ok=True, content="bbb"))
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", ToolResult(ok=True, content="ccc"))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("d", ToolResult(ok=True, content="dddddddd"))
+        self.assertEqual(cache.stats()["entries"], 1)
+        self.assertLessEqual(cache.stats()["bytes"], 10)
+
+        cache.put("err", ToolResult(ok=False, content="x"))
+        self.assertIsNone(cache.get("err"))
+        stats = cache.stats()
+        self.assertEqual(stats["evictions"], 3)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 2)
+
+    def test_ttl_expiry(self):
+        clock = _Clock()
+        cache = ToolResultCache(clock=clock)
+        cache.put("k", ToolResult(ok=True, content="v"), ttl_sec=5)
+        clock.now += 4
+        self.assertIsNotNone(cache.get("k"))
+        clock.now += 2
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.stats()["expired"], 1)
+
+
+class ToolInvokeCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = ToolResultCache()
+        self.previous = install_tool_result_cache(self.cache)
+
+    def tearDown(self):
+        install_tool_result_cache(self.previous)
+
+    def test_read_file_cache_invalidates_on_mtime_and_size(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = FileIOConfig(
+                enabled=True,
+                allow_any_absolute_path=False,
+                allowed_roots=[tmp],
+                allowed_read_exts=[".txt"],
+                allowed_write_exts=[".md"],
+                max_file_bytes=1024 * 1024,
+                max_chars=12000,
+                max_pdf_pages=20,
+                default_encoding="utf-8",
+            )
+            tool = ReadFileTool(config=cfg)
+            target = Path(tmp) / "a.txt"
+            target.write_text("hello", encoding="utf-8")
+            ctx = ToolContext(session_id="s1")
+
+            first = tool.invoke({"path": str(target)}, ctx)
+            second = tool.invoke({"path": f"  {target}  ", "encoding": None}, ctx)
+            self.assertTrue(first.ok)
+            self.assertIs(second, first)
+            self.assertEqual(self.cache.stats()["hits"], 1)
+
+            other_range = tool.invoke({"path": str(target), "end_line": 1}, ctx)
+            self.assertIsNot(other_range, first)
+
+            target.write_text("hello world", encoding="utf-8")
+            stat = target.stat()
+            os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            third = tool.invoke({"path": str(target)}, ctx)
+            self.assertIn("hello world", json.loads(third.content)["content"])
+
+            missing = tool.invoke({"path": str(Path(tmp) / "missing.txt")}, ctx)
+            self.assertFalse(missing.ok)
+            stats = self.cache.stats()
+            self.assertEqual(stats["hits"], 1)
+            self.assertEqual(stats["misses"], 3)
+            self.assertEqual(stats["entries"], 3)
+
+    def test_cache_hit_does_not_wait_for_concurrency_limit(self):
+        tool = _BlockingLookupTool()
+        registry = ToolRegistry()
+        registry.register(tool)
+        ctx = ToolContext(session_id="s1")
+        self.assertTrue(registry.call("lookup", {"q": "fast"}, ctx).ok)
+
+        slow = threading.Thread(target=registry.call, args=("lookup", {"q": "slow"}, ctx))
+        slow.start()
+        self.assertTrue(tool.started.wait(5))
+        # 唯一的并发名额被慢调用占着，命中缓存的调用仍应立即返回。
+        hit = []
+        fast = threading.Thread(target=lambda: hit.append(registry.call("lookup", {"q": "fast"}, ctx)))
+        fast.start()
+        fast.join(1)
+        finished = not fast.is_alive()
+        tool.release.set()
+        slow.join(5)
+        fast.join(5)
+        self.assertTrue(finished)
+        self.assertTrue(hit[0].ok)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_web_search_cache_respects_ttl_config(self):
+        uapis = UapiSearchConfig(
+            endpoint="https://uapis.cn/api/v1/search/aggregate",
+            api_key="test-key",
+            default_sort="relevance",
+            default_fetch_full=False,
+        )
+        session = _FakeSession()
+        tool = WebSearchTool(
+            config=WebSearchConfig(timeout_sec=8.0, max_top_k=5, uapis=uapis, cache_ttl_sec=60),
+            session=session,
+        )
+        ctx = ToolContext(session_id="s1")
+        self.assertTrue(tool.invoke({"text": "python"}, ctx).ok)
+        self.assertTrue(tool.invoke({"text": "python "}, ctx).ok)
+        self.assertEqual(session.calls, 1)
+        tool.invoke({"text": "python", "top_k": 1}, ctx)
+        self.assertEqual(session.calls, 2)
+
+        uncached = WebSearchTool(
+            config=WebSearchConfig(timeout_sec=8.0, max_top_k=5, uapis=uapis, cache_ttl_sec=0),
+            session=session,
+        )
+        uncached.invoke({"text": "python"}, ctx)
+        uncached.invoke({"text": "python"}, ctx)
+        self.assertEqual(session.calls, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
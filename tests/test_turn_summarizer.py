@@ -51,6 +51,7 @@ class MemoryIngestExtractionTests(unittest.TestCase):
             assistant_reply="好的，我会先整理行程。",
             meta={},
         )
+        self.memory.flush()
 
         context = self.memory.build_context(query="北京三日游 博物馆")
         self.assertTrue(context)
@@ -64,6 +65,7 @@ class MemoryIngestExtractionTests(unittest.TestCase):
             assistant_reply="收到，我会提醒你。",
             meta={},
         )
+        self.memory.flush()
 
         context = self.memory.build_context(query="提交周报")
         self.assertTrue(context)
@@ -0,0 +1,247 @@
+import importlib.util
+import os
+import shutil
+import sys
+import unittest
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from core.memory.memory_module_engine.long_term import LongTermMemory
+from core.memory.memory_module_engine.models import MemoryItem, MemoryMetadata
+from core.memory.memory_module_engine.vector_store import (
+    FlatVectorStore,
+    HnswVectorStore,
+    QuantizedFlatVectorStore,
+    build_vector_store,
+)
+from migrate_vector_store import migrate_vectors
+
+HAS_HNSWLIB = importlib.util.find_spec("hnswlib") is not None
+
+
+def _random_vectors(count: int, dim: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(count, dim)).astype(np.float32)
+
+
+class FlatVectorStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = PROJECT_ROOT / "runtime" / f"lumina-test-vectors-{uuid.uuid4().hex[:8]}"
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_query_returns_exact_top_k(self):
+        store = FlatVectorStore(str(self.temp_dir), vector_dim=16)
+        vectors = _random_vectors(50, 16)
+        ids = [str(uuid.uuid4()) for _ in range(50)]
+        store.upsert([(ids[i], vectors[i].tolist(), {}) for i in range(50)])
+
+        hits = store.query(vectors[3].tolist(), limit=5)
+        self.assertEqual(hits[0][0], ids[3])
+        self.assertAlmostEqual(hits[0][1], 1.0, places=5)
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(normalized @ normalized[3]))[:5]
+        self.assertEqual([memory_id for memory_id, _ in hits], [ids[i] for i in expected])
+        store.close()
+
+    def test_delete_reuses_slot_and_survives_reopen(self):
+        store = FlatVectorStore(str(self.temp_dir), vector_dim=8)
+        vectors = _random_vectors(3, 8)
+        store.upsert([("a", vectors[0].tolist(), {}), ("b", vectors[1].tolist(), {})])
+        store.delete(["a"])
+        store.upsert([("c", vectors[2].tolist(), {})])
+        self.assertEqual(len(store), 2)
+        self.assertNotIn("a", [memory_id for memory_id, _ in store.query(vectors[0].tolist(), 5)])
+        store.close()
+
+        reopened = FlatVectorStore(str(self.temp_dir), vector_dim=8)
+        self.assertEqual(len(reopened), 2)
+        self.assertEqual(reopened.query(vectors[2].tolist(), 1)[0][0], "c")
+        self.assertEqual(reopened.query_by_id("b", 1)[0][0], "b")
+        reopened.close()
+
+    def test_grows_past_initial_capacity(self):
+        store = FlatVectorStore(str(self.temp_dir), vector_dim=4)
+        total = FlatVectorStore.INITIAL_CAPACITY + 10
+        vectors = _random_vectors(total, 4)
+        store.upsert([(f"id-{i}", vectors[i].tolist(), {}) for i in range(total)])
+        self.assertEqual(len(store), total)
+        self.assertEqual(store.query(vectors[-1].tolist(), 1)[0][0], f"id-{total - 1}")
+        store.close()
+
+    @unittest.skipUnless(HAS_HNSWLIB, "hnswlib not installed")
+    def test_hnsw_backend_round_trip(self):
+        store = HnswVectorStore(str(self.temp_dir), vector_dim=8, max_elements=4)
+        vectors = _random_vectors(10, 8)
+        store.upsert([(f"id-{i}", vectors[i].tolist(), {}) for i in range(10)])
+        store.delete(["id-0"])
+        self.assertEqual(store.query(vectors[5].tolist(), 1)[0][0], "id-5")
+        store.close()
+
+        reopened = build_vector_store("hnsw", str(self.temp_dir), 8)
+        self.assertIsNone(reopened.get_vector("id-0"))
+        self.assertEqual(reopened.query(vectors[7].tolist(), 1)[0][0], "id-7")
+        reopened.close()
+
+    @unittest.skipUnless(HAS_HNSWLIB, "hnswlib not installed")
+    def test_long_term_memory_hnsw_reconciles_unflushed_writes(self):
+        long_term = LongTermMemory(
+            str(self.temp_dir), vector_dim=8, vector_backend="hnsw", vector_flush_interval_sec=0
+        )
+        vectors = _random_vectors(4, 8)
+        texts = ["用户喜欢博物馆", "用户下周提交周报", "用户养了一只猫", "用户在学日语"]
+        by_text = {text: vectors[idx].tolist() for idx, text in enumerate(texts)}
+
+        def _item(idx):
+            return MemoryItem(
+                id=str(uuid.uuid4()),
+                content=texts[idx],
+                importance=0.8,
+                embedding=vectors[idx].tolist(),
+                metadata=MemoryMetadata(),
+            )
+
+        ids = long_term.add_many([_item(0), _item(1), _item(2)])
+        long_term.vector_store.flush()
+        # 落盘之后的写入与删除只在内存索引里，不调用 close（模拟崩溃）。
+        ids.append(long_term.add(_item(3)))
+        long_term.delete(ids[1])
+
+        reopened = LongTermMemory(
+            str(self.temp_dir), vector_dim=8, vector_backend="hnsw", vector_flush_interval_sec=0
+        )
+        self.assertIsNotNone(reopened.vector_store.get_vector(ids[1]))
+        self.assertIsNone(reopened.vector_store.get_vector(ids[3]))
+        result = reopened.reconcile_vectors(lambda text: by_text[text])
+        self.assertEqual(result, {"checked": True, "restored": 1, "removed": 1})
+        self.assertIsNone(reopened.vector_store.get_vector(ids[1]))
+        self.assertEqual(reopened.vector_store.query(vectors[3].tolist(), 1)[0][0], ids[3])
+        reopened.close()
+
+        index_dir = self.temp_dir / "vectors_hnsw_8"
+        self.assertEqual(len([name for name in os.listdir(index_dir) if name.endswith(".bin")]), 1)
+        final = build_vector_store("hnsw", str(self.temp_dir), 8)
+        self.assertEqual(final.ids(), {ids[0], ids[2], ids[3]})
+        final.close()
+        long_term.close()
+
+    def test_long_term_memory_with_flat_backend(self):
+        long_term = LongTermMemory(str(self.temp_dir), vector_dim=8, vector_backend="flat")
+        vectors = _random_vectors(2, 8)
+        for idx, text in enumerate(["用户喜欢博物馆", "用户下周提交周报"]):
+            long_term.add(
+                MemoryItem(
+                    id=str(uuid.uuid4()),
+                    content=text,
+                    importance=0.8,
+                    embedding=vectors[idx].tolist(),
+                    metadata=MemoryMetadata(),
+                )
+            )
+
+        candidates = long_term.search_candidates("博物馆", vectors[0].tolist(), limit=2)
+        best = max(candidates, key=lambda c: c["vector_score"])
+        self.assertEqual(best["item"].content, "用户喜欢博物馆")
+        self.assertAlmostEqual(long_term.find_similar_scores(vectors[1].tolist(), limit=1)[0], 1.0, places=5)
+        long_term.close()
+
+
+class QuantizedFlatVectorStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = PROJECT_ROOT / "runtime" / f"lumina-test-q8-{uuid.uuid4().hex[:8]}"
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_int8_scan_with_rescore_matches_exact_top_k(self):
+        store = QuantizedFlatVectorStore(str(self.temp_dir), vector_dim=32, rescore_multiplier=4)
+        vectors = _random_vectors(300, 32)
+        store.upsert([(f"id-{i}", vectors[i].tolist(), {}) for i in range(300)])
+        store.delete(["id-1"])
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        exact = [i for i in np.argsort(-(normalized @ normalized[0])) if i != 1][:5]
+        hits = store.query(vectors[0].tolist(), limit=5)
+        self.assertEqual([memory_id for memory_id, _ in hits], [f"id-{i}" for i in exact])
+        # 返回分数来自全精度重排。
+        self.assertAlmostEqual(hits[0][1], 1.0, places=5)
+        self.assertEqual(store.footprint()["scan_bytes"], store._capacity * (32 + 4))
+        store.close()
+
+        reopened = build_vector_store("flat_q8", str(self.temp_dir), 32)
+        self.assertEqual(len(reopened), 299)
+        self.assertEqual(reopened.query(vectors[7].tolist(), 1)[0][0], "id-7")
+        np.testing.assert_allclose(reopened.get_vector("id-7"), normalized[7], atol=1e-6)
+        reopened.close()
+
+    def test_reduced_dimensions_truncate_and_pca(self):
+        with self.assertRaises(ValueError):
+            QuantizedFlatVectorStore(str(self.temp_dir), vector_dim=16, reduction="pca", reduced_dim=16)
+
+        vectors = _random_vectors(200, 16)
+        for reduction in ("truncate", "pca"):
+            store = QuantizedFlatVectorStore(str(self.temp_dir), vector_dim=16, reduction=reduction, reduced_dim=6)
+            store.upsert([(f"id-{i}", vectors[i].tolist(), {}) for i in range(200)])
+            if reduction == "pca":
+                self.assertFalse(store.pca_fitted)
+                fitted = store.fit_pca()
+                self.assertEqual((fitted["reencoded"], fitted["code_dim"]), (200, 6))
+            self.assertEqual(store.query(vectors[42].tolist(), 1)[0][0], "id-42")
+            store.close()
+
+        reopened = QuantizedFlatVectorStore(str(self.temp_dir), vector_dim=16, reduction="pca", reduced_dim=6)
+        self.assertTrue(reopened.pca_fitted)
+        self.assertEqual(reopened.query(vectors[9].tolist(), 1)[0][0], "id-9")
+        reopened.close()
+
+    def test_migrate_long_term_vectors_from_flat_to_quantized(self):
+        long_term = LongTermMemory(str(self.temp_dir), vector_dim=8, vector_backend="flat")
+        vectors = _random_vectors(12, 8)
+        items = [
+            MemoryItem(
+                id=str(uuid.uuid4()),
+                content=f"episodic: 第{i}条记忆",
+                importance=0.8,
+                embedding=vectors[i].tolist(),
+                metadata=MemoryMetadata(),
+            )
+            for i in range(12)
+        ]
+        long_term.add_many(items)
+        long_term.close()
+
+        result = migrate_vectors(
+            self.temp_dir,
+            vector_dim=8,
+            source_backend="flat",
+            reduction="pca",
+            reduced_dim=4,
+        )
+        self.assertEqual((result["memories"], result["copied"], result["missing_vectors"]), (12, 12, 0))
+        self.assertEqual(result["pca"]["reencoded"], 12)
+
+        migrated = LongTermMemory(
+            str(self.temp_dir),
+            vector_dim=8,
+            vector_backend="flat_q8",
+            vector_options={"reduction": "pca", "reduced_dim": 4},
+        )
+        self.assertEqual(migrated.find_similar(vectors[3].tolist(), limit=1)[0][1].id, items[3].id)
+        migrated.close()
+
+
+if __name__ == "__main__":
+    unittest.main()